@@ -15,11 +15,14 @@ from alphagocanvas.api.models.password_reset import (
     ResetPasswordRequest, ResetPasswordResponse,
     VerifyResetTokenRequest, VerifyResetTokenResponse
 )
-from alphagocanvas.api.services.authentication_service import get_user, create_user, generate_id
+from alphagocanvas.api.services.authentication_service import (
+    check_email_available, get_user, create_user, generate_id
+)
 from alphagocanvas.api.services.password_reset_service import (
-    create_password_reset_token, verify_reset_token, reset_password
+    check_reset_token, create_password_reset_token, verify_reset_token, reset_password
 )
-from alphagocanvas.api.utils.passwords import hash_password, is_hashed_password, verify_password
+from alphagocanvas.api.utils.password_pool import hash_password_async, verify_password_async
+from alphagocanvas.api.utils.passwords import is_hashed_password
 from alphagocanvas.api.utils import create_token
 from alphagocanvas.database import database_dependency
 from alphagocanvas.database.models import UserTable, StudentTable, FacultyTable
@@ -39,7 +42,10 @@ async def signup(signup_data: SignupRequest, db: database_dependency):
     :return: Created user information with assigned Student_id or Faculty_id
     """
     try:
-        result = create_user(signup_data, db)
+        # Refuse duplicates before spending a hash-pool slot on the password
+        check_email_available(signup_data.Useremail, db)
+        password_hash = await hash_password_async(signup_data.Userpassword)
+        result = create_user(signup_data, db, password_hash=password_hash)
         
         id_type = "Student_id" if signup_data.Userrole == "Student" else "Faculty_id"
         
@@ -73,14 +79,14 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
     password = form_data.password
 
     user = get_user(username, db)
-    if not user or not verify_password(password, user.Userpassword):
+    if not user or not await verify_password_async(password, user.Userpassword):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if not user.Isactive:
         raise HTTPException(status_code=403, detail="Account is deactivated")
 
     # Seamless migration for legacy plain-text rows.
     if not is_hashed_password(user.Userpassword):
-        user.Userpassword = hash_password(password)
+        user.Userpassword = await hash_password_async(password)
         db.commit()
         db.refresh(user)
 
@@ -149,7 +155,7 @@ async def google_auth(auth_data: GoogleAuthRequest, db: database_dependency):
         new_user = UserTable(
             Userid=assigned_id,
             Useremail=email.lower(),
-            Userpassword=hash_password(temp_password),
+            Userpassword=await hash_password_async(temp_password),
             Userrole="Student",
             Createdat=datetime.utcnow().isoformat(),
             Isactive=True
@@ -244,7 +250,7 @@ async def set_google_user_password(request: SetPasswordRequest, db: database_dep
             raise HTTPException(status_code=400, detail="Password must be at least 8 characters long")
         
         # Update password
-        user.Userpassword = hash_password(request.password)
+        user.Userpassword = await hash_password_async(request.password)
         db.commit()
         db.refresh(user)
         
@@ -314,7 +320,12 @@ async def reset_user_password(request: ResetPasswordRequest, db: database_depend
     :return: Success/failure message
     """
     try:
-        success, message = reset_password(db, request.token, request.new_password)
+        # Bad tokens are rejected before the new password is hashed, so they cost no hash-pool slot
+        failure = check_reset_token(db, request.token)
+        if failure:
+            raise HTTPException(status_code=400, detail=failure)
+        password_hash = await hash_password_async(request.new_password)
+        success, message = reset_password(db, request.token, request.new_password, password_hash=password_hash)
         if not success:
             raise HTTPException(status_code=400, detail=message)
         return ResetPasswordResponse(success=success, message=message)
@@ -16,10 +16,11 @@ from alphagocanvas.api.models.calendar import (
     CalendarEventsListResponse, CalendarEventDeleteResponse
 )
 from alphagocanvas.api.services.calendar_service import (
-    create_event, get_events_for_user, update_event, delete_event, sync_assignments_to_calendar
+    create_event, get_events_for_user_async, update_event, delete_event, sync_assignments_to_calendar,
+    get_enrolled_course_ids,
 )
 from alphagocanvas.api.utils.auth import decode_token
-from alphagocanvas.database import database_dependency
+from alphagocanvas.database import async_database_dependency, database_dependency
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 router = APIRouter(prefix="/calendar", tags=["calendar"])
@@ -27,7 +28,7 @@ router = APIRouter(prefix="/calendar", tags=["calendar"])
 
 @router.get("/events", response_model=CalendarEventsListResponse)
 async def get_events(
-    db: database_dependency,
+    db: async_database_dependency,
     start_date: str = Query(..., description="Start date (ISO format)"),
     end_date: str = Query(..., description="End date (ISO format)"),
     courseid: Optional[int] = Query(None, description="Filter by course"),
@@ -37,7 +38,7 @@ async def get_events(
     decoded_token = decode_token(token=token)
     user_id = decoded_token.get("userid")
     
-    return get_events_for_user(db, user_id, start_date, end_date, courseid)
+    return await get_events_for_user_async(db, user_id, start_date, end_date, courseid)
 
 
 @router.post("/events", response_model=CalendarEventResponse)
@@ -86,15 +87,11 @@ async def sync_calendar_endpoint(
     db: database_dependency,
     token: str = Depends(oauth2_scheme)
 ):
-    """Sync assignments and quizzes to calendar"""
+    """Sync assignment due dates to calendar"""
     decoded_token = decode_token(token=token)
     user_id = decoded_token.get("userid")
     
-    # Get user's enrolled courses (simplified - in production, query from enrollments)
-    from sqlalchemy import text
-    query = text("SELECT Courseid FROM studentenrollment WHERE Studentid = :id")
-    results = db.execute(query, {"id": user_id}).fetchall()
-    course_ids = [r.Courseid for r in results]
+    course_ids = get_enrolled_course_ids(db, user_id)
     
     synced = sync_assignments_to_calendar(db, user_id, course_ids)
     
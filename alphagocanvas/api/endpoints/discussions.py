@@ -7,20 +7,20 @@ Provides endpoints for:
 - Pinning and locking discussions
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
 
 from alphagocanvas.api.models.discussion import (
     DiscussionCreateRequest, DiscussionUpdateRequest, DiscussionResponse,
     DiscussionDetailResponse, DiscussionReplyCreateRequest, DiscussionReplyUpdateRequest,
-    DiscussionReplyResponse, DiscussionListResponse, DiscussionDeleteResponse, ReplyDeleteResponse,
+    DiscussionReplyResponse, DiscussionReplyPageResponse, DiscussionListResponse, DiscussionDeleteResponse, ReplyDeleteResponse,
     DiscussionGradeRequest, DiscussionGradeResponse,
 )
 from alphagocanvas.api.services.discussion_service import (
     create_discussion, get_discussion, get_discussions_by_course, update_discussion,
-    delete_discussion, set_discussion_grade, create_reply, update_reply, delete_reply
+    delete_discussion, set_discussion_grade, create_reply, update_reply, delete_reply, get_reply_page
 )
 from alphagocanvas.api.utils.auth import decode_token, get_user_name
 from alphagocanvas.database import database_dependency
@@ -119,6 +119,19 @@ async def delete_discussion_endpoint(
 
 # ============== REPLY ENDPOINTS ==============
 
+@router.get("/{discussionid}/replies", response_model=DiscussionReplyPageResponse)
+async def get_replies_endpoint(
+    discussionid: int,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme),
+    limit: int = Query(20, ge=1, le=100, description="Top-level replies per page"),
+    cursor: Optional[str] = Query(None, description="Nextcursor from the previous page"),
+):
+    """Page through top-level replies, each with its full nested thread"""
+    decode_token(token=token)
+    return get_reply_page(db, discussionid, limit=limit, cursor=cursor)
+
+
 @router.post("/{discussionid}/replies", response_model=DiscussionReplyResponse)
 async def create_reply_endpoint(
     discussionid: int,
@@ -10,9 +10,10 @@ Provides endpoints for:
 
 from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 
 from alphagocanvas.api.models.submission import (
     FileUploadResponse, FileInfoResponse, FileDeleteResponse,
@@ -22,7 +23,7 @@ from alphagocanvas.api.models.submission import (
     GradingStatsResponse
 )
 from alphagocanvas.api.services.submission_service import (
-    upload_file, get_file_info, get_file_path, delete_file, get_files_by_course,
+    upload_file, get_file_info, open_file_download, delete_file, get_files_by_course,
     create_submission, get_submission, get_submissions_by_assignment, get_submissions_by_student, grade_submission,
     add_submission_comment, get_submission_comments, get_grading_stats
 )
@@ -78,19 +79,28 @@ async def get_file_info_endpoint(
 @file_router.get("/{fileid}/download")
 async def download_file_endpoint(
     fileid: int,
+    request: Request,
     db: database_dependency,
     token: str = Depends(oauth2_scheme)
 ):
-    """Download a file by ID"""
+    """
+    Download a file by ID, streamed from the storage backend.
+    
+    Responses carry a strong ETag (the content hash) and Last-Modified, so revalidation
+    with If-None-Match / If-Modified-Since gets a 304. A single byte range (optionally
+    guarded by If-Range) gets 206 Partial Content for resumed downloads and seeking.
+    """
     # Verify user is authenticated
     decode_token(token=token)
     
-    file_path, original_name, mime_type = get_file_path(db, fileid)
+    # Opening an object store read is a network call; keep it off the event loop
+    download = await run_in_threadpool(open_file_download, db, fileid, request.headers)
     
-    return FileResponse(
-        path=file_path,
-        filename=original_name,
-        media_type=mime_type
+    return StreamingResponse(
+        download.body,
+        status_code=download.status_code,
+        media_type=download.media_type,
+        headers=download.headers
     )
 
 
@@ -1,13 +1,19 @@
-"""Gradebook API: full course gradebook with late policy and curve."""
+"""Gradebook API: full course gradebook with late policy and curve, plus streaming export."""
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 
 from alphagocanvas.api.models.gradebook import GradebookResponse
-from alphagocanvas.api.services.gradebook_service import get_gradebook
+from alphagocanvas.api.services.gradebook_export_service import (
+    EXPORT_MEDIA_TYPES,
+    prepare_gradebook_export,
+    stream_gradebook_export,
+)
+from alphagocanvas.api.services.gradebook_snapshot_service import get_gradebook_from_snapshot_async
 from alphagocanvas.api.utils.auth import decode_token, is_current_user_faculty
-from alphagocanvas.database import database_dependency
+from alphagocanvas.database import async_database_dependency
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 router = APIRouter(prefix="/gradebook", tags=["gradebook"])
@@ -16,7 +22,7 @@ router = APIRouter(prefix="/gradebook", tags=["gradebook"])
 @router.get("/course/{courseid}", dependencies=[Depends(is_current_user_faculty)], response_model=GradebookResponse)
 async def get_course_gradebook(
     courseid: int,
-    db: database_dependency,
+    db: async_database_dependency,
     token: str = Depends(oauth2_scheme),
     semester: Optional[str] = Query(None, description="Filter by enrollment semester"),
     apply_late_policy: bool = Query(False, description="Apply assignment late policy to scores"),
@@ -24,10 +30,36 @@ async def get_course_gradebook(
 ):
     """Get full gradebook for a course: students x assignments with scores and status."""
     decode_token(token=token)
-    return get_gradebook(
+    return await get_gradebook_from_snapshot_async(
         db,
         course_id=courseid,
         semester=semester,
         apply_late_policy=apply_late_policy,
         curve_to_score=curve_to_score,
     )
+
+
+@router.get("/{courseid}/export", dependencies=[Depends(is_current_user_faculty)])
+async def export_course_gradebook(
+    courseid: int,
+    db: async_database_dependency,
+    token: str = Depends(oauth2_scheme),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    semester: Optional[str] = Query(None, description="Filter by enrollment semester"),
+    apply_late_policy: bool = Query(False, description="Apply assignment late policy to scores"),
+    curve_to_score: Optional[float] = Query(None, description="Scale grades so max = this value (e.g. 100)"),
+):
+    """Stream the course gradebook as CSV or NDJSON without holding every row in memory."""
+    decode_token(token=token)
+    plan = await prepare_gradebook_export(
+        db,
+        course_id=courseid,
+        semester=semester,
+        apply_late_policy=apply_late_policy,
+        curve_to_score=curve_to_score,
+    )
+    return StreamingResponse(
+        stream_gradebook_export(plan, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="gradebook-{courseid}.{export_format}"'},
+    )
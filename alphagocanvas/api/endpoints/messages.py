@@ -7,7 +7,9 @@ Provides endpoints for:
 - Messages
 """
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 from fastapi.security import OAuth2PasswordBearer
 
 from alphagocanvas.api.models.message import (
@@ -15,10 +17,10 @@ from alphagocanvas.api.models.message import (
     ConversationDetailResponse, InboxResponse
 )
 from alphagocanvas.api.services.message_service import (
-    create_conversation, get_inbox, get_conversation, send_message
+    create_conversation, get_inbox_async, get_conversation, send_message
 )
 from alphagocanvas.api.utils.auth import decode_token, get_user_name
-from alphagocanvas.database import database_dependency
+from alphagocanvas.database import async_database_dependency, database_dependency
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 router = APIRouter(prefix="/messages", tags=["messages"])
@@ -26,27 +28,31 @@ router = APIRouter(prefix="/messages", tags=["messages"])
 
 @router.get("/inbox", response_model=InboxResponse)
 async def get_inbox_endpoint(
-    db: database_dependency,
-    token: str = Depends(oauth2_scheme)
+    db: async_database_dependency,
+    token: str = Depends(oauth2_scheme),
+    limit: int = Query(50, ge=1, le=200, description="Conversations per page"),
+    cursor: Optional[str] = Query(None, description="Nextcursor from the previous page")
 ):
-    """Get user's inbox with all conversations"""
+    """Get a page of the user's inbox, most recently active conversations first"""
     decoded_token = decode_token(token=token)
     user_id = decoded_token.get("userid")
     
-    return get_inbox(db, user_id)
+    return await get_inbox_async(db, user_id, limit=limit, cursor=cursor)
 
 
 @router.get("/conversations/{conversationid}", response_model=ConversationDetailResponse)
 async def get_conversation_endpoint(
     conversationid: int,
     db: database_dependency,
-    token: str = Depends(oauth2_scheme)
+    token: str = Depends(oauth2_scheme),
+    limit: int = Query(50, ge=1, le=200, description="Messages per page"),
+    cursor: Optional[str] = Query(None, description="Nextcursor from the previous page, for older messages")
 ):
-    """Get a conversation with all messages"""
+    """Get a conversation with its newest messages, or an older page with cursor"""
     decoded_token = decode_token(token=token)
     user_id = decoded_token.get("userid")
     
-    return get_conversation(db, conversationid, user_id)
+    return get_conversation(db, conversationid, user_id, limit=limit, cursor=cursor)
 
 
 @router.post("/conversations", response_model=ConversationDetailResponse)
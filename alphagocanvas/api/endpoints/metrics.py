@@ -0,0 +1,28 @@
+"""
+Metrics API Endpoint
+
+Exposes per-worker connection pool and service counters in the Prometheus text format.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from alphagocanvas.config import METRICS_TOKEN
+from alphagocanvas.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Scrape endpoint for pool checkouts, overflow, wait time and acquire latency"""
+    # Never public: pool and queue sizes tell an attacker when the service is near its limits
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=503, detail="METRICS_TOKEN is not configured")
+    if not authorization or not hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
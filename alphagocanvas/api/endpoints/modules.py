@@ -19,12 +19,12 @@ from alphagocanvas.api.models.module import (
     ReorderRequest
 )
 from alphagocanvas.api.services.module_service import (
-    create_module, get_module, get_modules_by_course, update_module, delete_module,
+    create_module, get_module, get_modules_by_course_async, update_module, delete_module,
     reorder_modules, create_module_item, update_module_item, delete_module_item,
     reorder_module_items
 )
 from alphagocanvas.api.utils.auth import decode_token, is_current_user_faculty
-from alphagocanvas.database import database_dependency
+from alphagocanvas.database import async_database_dependency, database_dependency
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 router = APIRouter(prefix="/modules", tags=["modules"])
@@ -35,7 +35,7 @@ router = APIRouter(prefix="/modules", tags=["modules"])
 @router.get("/course/{courseid}", response_model=ModuleListResponse)
 async def get_course_modules(
     courseid: int,
-    db: database_dependency,
+    db: async_database_dependency,
     token: str = Depends(oauth2_scheme)
 ):
     """
@@ -50,7 +50,7 @@ async def get_course_modules(
     # Faculty can see unpublished modules
     include_unpublished = user_role == "Faculty"
     
-    return get_modules_by_course(db, courseid, include_unpublished)
+    return await get_modules_by_course_async(db, courseid, include_unpublished)
 
 
 @router.get("/{moduleid}", response_model=ModuleResponse)
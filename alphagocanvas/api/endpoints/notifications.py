@@ -0,0 +1,79 @@
+"""
+Notification API Endpoints
+
+Provides endpoints for:
+- The notification feed
+- The unread badge
+- Marking notifications read
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.security import OAuth2PasswordBearer
+
+from alphagocanvas.api.models.notification import (
+    NotificationFeedResponse, NotificationReadAllRequest, NotificationReadRequest, NotificationReadResponse,
+    UnreadCountResponse
+)
+from alphagocanvas.api.services.notification_service import (
+    get_feed, get_unread_count_async, mark_all_read, mark_read
+)
+from alphagocanvas.api.utils.auth import decode_token
+from alphagocanvas.database import async_database_dependency, database_dependency
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+@router.get("", response_model=NotificationFeedResponse)
+async def get_feed_endpoint(
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme),
+    limit: int = Query(50, ge=1, le=200, description="Notifications per page"),
+    cursor: Optional[str] = Query(None, description="Nextcursor from the previous page"),
+    unread_only: bool = Query(False, description="Only unread notifications")
+):
+    """Get a page of the user's notifications, newest first"""
+    decoded_token = decode_token(token=token)
+    user_id = decoded_token.get("userid")
+
+    return get_feed(db, user_id, limit=limit, cursor=cursor, unread_only=unread_only)
+
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count_endpoint(
+    db: async_database_dependency,
+    token: str = Depends(oauth2_scheme)
+):
+    """Get the user's unread notification count"""
+    decoded_token = decode_token(token=token)
+    user_id = decoded_token.get("userid")
+
+    return UnreadCountResponse(Unreadcount=await get_unread_count_async(db, user_id))
+
+
+@router.post("/read", response_model=NotificationReadResponse)
+async def mark_read_endpoint(
+    request: NotificationReadRequest,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme)
+):
+    """Mark some of the user's notifications read"""
+    decoded_token = decode_token(token=token)
+    user_id = decoded_token.get("userid")
+
+    return mark_read(db, user_id, request.Notificationids)
+
+
+@router.post("/read-all", response_model=NotificationReadResponse)
+async def mark_all_read_endpoint(
+    db: database_dependency,
+    request: Optional[NotificationReadAllRequest] = None,
+    token: str = Depends(oauth2_scheme)
+):
+    """Mark all of the user's notifications read, up to Throughid if given"""
+    decoded_token = decode_token(token=token)
+    user_id = decoded_token.get("userid")
+
+    return mark_all_read(db, user_id, through_id=request.Throughid if request else None)
@@ -0,0 +1,164 @@
+"""
+Real-time push endpoints
+
+Clients hold one connection open and receive new messages, grades, announcements and
+read-state changes as they happen instead of polling the inbox:
+- WebSocket: /push/ws?token=<access token>
+- Server-sent events: /push/events (Authorization header, or ?token= for EventSource)
+
+Every frame is JSON {"type": ..., "data": ...}. The first is "hello"; "ping" follows
+after PUSH_HEARTBEAT_SECONDS without events. A "resync" frame (or WebSocket close code
+4000) means events were dropped: reload, then reconnect.
+
+Connections end when their access token expires ("expired", or close code 4001) and when
+the user is deactivated or changes role ("session_ended", or close code 4001); reconnect
+with a current token.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from starlette import status
+
+from alphagocanvas.api.services.push import SESSION_ENDED, Subscription, hub, topics_for_user
+from alphagocanvas.api.utils.auth import decode_token
+from alphagocanvas.config import PUSH_HEARTBEAT_SECONDS
+from alphagocanvas.database import database_dependency
+from alphagocanvas.database.models import UserTable
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+router = APIRouter(prefix="/push", tags=["push"])
+
+PING_FRAME = json.dumps({"type": "ping", "data": {}})
+RESYNC_FRAME = json.dumps({"type": "resync", "data": {}})
+EXPIRED_FRAME = json.dumps({"type": "expired", "data": {}})
+# WebSocket close codes for a client that fell too far behind, and one that must authenticate again
+RESYNC_CLOSE_CODE = 4000
+REAUTHENTICATE_CLOSE_CODE = 4001
+
+
+def _subscribe_topics(db, token: str) -> Tuple[List[str], Optional[float]]:
+    """
+    Topics for the token's user and when the token expires. The user must still exist and be
+    active. The session is closed here since push connections stay open for hours.
+    """
+    decoded_token = decode_token(token=token)
+    try:
+        user = db.get(UserTable, decoded_token.get("userid"))
+        if user is None or not user.Isactive:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
+        return topics_for_user(db, user.Userid, user.Userrole), decoded_token.get("exp")
+    finally:
+        db.close()
+
+
+def _wait_seconds(heartbeat: float, expires_at: Optional[float]) -> float:
+    """Time to wait for the next event: until the heartbeat is due or the token expires"""
+    if expires_at is None:
+        return heartbeat
+    return max(min(heartbeat, expires_at - time.time()), 0)
+
+
+def _expired(expires_at: Optional[float]) -> bool:
+    return expires_at is not None and time.time() >= expires_at
+
+
+def _hello(subscription: Subscription) -> str:
+    return json.dumps({"type": "hello", "data": {
+        "Topics": list(subscription.topics), "Heartbeatseconds": PUSH_HEARTBEAT_SECONDS
+    }})
+
+
+async def event_stream(
+    topics: List[str], heartbeat: float = PUSH_HEARTBEAT_SECONDS, expires_at: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for the topics, until expires_at (epoch seconds) or a session_ended
+    event. Subscribing happens here rather than in the endpoint so that a client gone before
+    the stream starts never leaves a subscription behind.
+    """
+    subscription = hub.subscribe(topics)
+    if subscription is None:
+        yield f"event: resync\ndata: {RESYNC_FRAME}\n\n"
+        return
+    try:
+        yield f"retry: 3000\nevent: hello\ndata: {_hello(subscription)}\n\n"
+        while True:
+            frame = await subscription.get(_wait_seconds(heartbeat, expires_at))
+            if subscription.overflowed:
+                yield f"event: resync\ndata: {RESYNC_FRAME}\n\n"
+                return
+            if frame is None and _expired(expires_at):
+                yield f"event: expired\ndata: {EXPIRED_FRAME}\n\n"
+                return
+            yield ": ping\n\n" if frame is None else f"event: {frame.type}\ndata: {frame.json}\n\n"
+            if frame is not None and frame.type == SESSION_ENDED:
+                return
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def push_events(
+    db: database_dependency,
+    header_token: Optional[str] = Depends(oauth2_scheme),
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers")
+):
+    """Stream the user's events as server-sent events"""
+    if not (header_token or token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    topics, expires_at = _subscribe_topics(db, header_token or token)
+    if hub.connections >= hub.max_connections:
+        raise HTTPException(status_code=503, detail="Too many push connections", headers={"Retry-After": "5"})
+
+    return StreamingResponse(
+        event_stream(topics, expires_at=expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription, expires_at: Optional[float]) -> None:
+    await websocket.send_text(_hello(subscription))
+    while True:
+        frame = await subscription.get(_wait_seconds(PUSH_HEARTBEAT_SECONDS, expires_at))
+        if subscription.overflowed:
+            await websocket.close(code=RESYNC_CLOSE_CODE, reason="resync")
+            return
+        if frame is None and _expired(expires_at):
+            await websocket.close(code=REAUTHENTICATE_CLOSE_CODE, reason="expired")
+            return
+        await websocket.send_text(PING_FRAME if frame is None else frame.json)
+        if frame is not None and frame.type == SESSION_ENDED:
+            await websocket.close(code=REAUTHENTICATE_CLOSE_CODE, reason=SESSION_ENDED)
+            return
+
+
+@router.websocket("/ws")
+async def push_websocket(websocket: WebSocket, db: database_dependency, token: str = Query(...)):
+    """Stream the user's events over a WebSocket"""
+    try:
+        topics, expires_at = _subscribe_topics(db, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    subscription = hub.subscribe(topics)
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await websocket.accept()
+    sender = asyncio.ensure_future(_send_events(websocket, subscription, expires_at))
+    try:
+        # Clients only ever close; reading is how the disconnect is noticed
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscription)
@@ -1,5 +1,5 @@
 from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.security import OAuth2PasswordBearer
 
 from alphagocanvas.api.models.quiz import (
@@ -11,7 +11,7 @@ from alphagocanvas.api.models.quiz import (
 )
 from alphagocanvas.api.services.quiz_service import (
     create_quiz_with_questions,
-    get_quiz_with_questions,
+    get_student_quiz,
     submit_quiz_attempt,
     get_student_quiz_attempts,
     get_quiz_attempt_details,
@@ -105,13 +105,13 @@ async def get_quiz_details(
     if decoded_token["userrole"] != "Student":
         raise HTTPException(status_code=403, detail="Only students can take quizzes")
     
-    # Don't include correct answers for students taking quiz
-    quiz = get_quiz_with_questions(quiz_id, db, include_answers=False)
+    # Compiled payload has correct answers stripped; served as pre-encoded JSON
+    quiz = get_student_quiz(quiz_id, db)
     
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    return quiz
+    return Response(content=quiz.body, media_type="application/json")
 
 
 @router.post("/submit", response_model=QuizAttemptResponse)
@@ -13,11 +13,15 @@ from fastapi import APIRouter, Depends, Query
 from fastapi.security import OAuth2PasswordBearer
 
 from alphagocanvas.api.models.submission import (
-    SubmissionResponse, SubmissionListResponse, GradeSubmissionRequest,
-    GradeSubmissionResponse, GradingStatsResponse, SubmissionCommentRequest, SubmissionCommentResponse
+    SubmissionResponse, SubmissionListResponse, SubmissionPageResponse, GradeSubmissionRequest,
+    GradeSubmissionResponse, GradingStatsResponse, SubmissionCommentRequest, SubmissionCommentResponse,
+    SpeedGraderNavigationResponse, SpeedGraderWindowResponse, BulkGradeRequest, BulkGradeResponse
+)
+from alphagocanvas.api.services.speedgrader_service import (
+    bulk_grade_submissions, get_navigation, get_submission_window
 )
 from alphagocanvas.api.services.submission_service import (
-    get_submissions_by_assignment, get_submission, grade_submission,
+    get_submissions_by_assignment, get_submission_page, get_submission, grade_submission,
     add_submission_comment, get_submission_comments, get_grading_stats
 )
 from alphagocanvas.api.utils.auth import decode_token, is_current_user_faculty
@@ -40,6 +44,35 @@ async def get_speedgrader_submissions(
     return get_submissions_by_assignment(db, assignmentid)
 
 
+@router.get("/assignment/{assignmentid}/submissions",
+            dependencies=[Depends(is_current_user_faculty)],
+            response_model=SubmissionPageResponse)
+async def get_speedgrader_submission_page(
+    assignmentid: int,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme),
+    view: str = Query("list", pattern="^(list|full)$", description="list omits content and feedback"),
+    limit: int = Query(50, ge=1, le=200, description="Submissions per page"),
+    cursor: Optional[str] = Query(None, description="Nextcursor from the previous page")
+):
+    """Page through an assignment's submissions, newest first (the SpeedGrader sidebar)"""
+    decode_token(token=token)
+    return get_submission_page(db, assignmentid, view=view, limit=limit, cursor=cursor)
+
+
+@router.get("/assignment/{assignmentid}/navigation",
+            dependencies=[Depends(is_current_user_faculty)],
+            response_model=SpeedGraderNavigationResponse)
+async def get_speedgrader_navigation(
+    assignmentid: int,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme)
+):
+    """Ordered submission ids for a grading session; load once, then use next/prev"""
+    decode_token(token=token)
+    return get_navigation(db, assignmentid)
+
+
 @router.get("/assignment/{assignmentid}/stats",
             dependencies=[Depends(is_current_user_faculty)], 
             response_model=GradingStatsResponse)
@@ -66,6 +99,50 @@ async def get_speedgrader_submission(
     return get_submission(db, submissionid)
 
 
+@router.get("/submission/{submissionid}/next",
+            dependencies=[Depends(is_current_user_faculty)],
+            response_model=SpeedGraderWindowResponse)
+async def get_speedgrader_next(
+    submissionid: int,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme),
+    count: int = Query(5, ge=1, le=50, description="Submissions to prefetch"),
+    include_current: bool = Query(False, description="Start the window at this submission")
+):
+    """The next submissions after this one, with file info and comments (one query)"""
+    decode_token(token=token)
+    return get_submission_window(db, submissionid, "next", count, include_current)
+
+
+@router.get("/submission/{submissionid}/prev",
+            dependencies=[Depends(is_current_user_faculty)],
+            response_model=SpeedGraderWindowResponse)
+async def get_speedgrader_prev(
+    submissionid: int,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme),
+    count: int = Query(5, ge=1, le=50, description="Submissions to prefetch"),
+    include_current: bool = Query(False, description="Start the window at this submission")
+):
+    """The previous submissions before this one, nearest first, with file info and comments (one query)"""
+    decode_token(token=token)
+    return get_submission_window(db, submissionid, "prev", count, include_current)
+
+
+@router.put("/assignment/{assignmentid}/grades",
+            dependencies=[Depends(is_current_user_faculty)],
+            response_model=BulkGradeResponse)
+async def speedgrader_bulk_grade(
+    assignmentid: int,
+    request: BulkGradeRequest,
+    db: database_dependency,
+    token: str = Depends(oauth2_scheme)
+):
+    """Grade many submissions of an assignment in one transaction, reporting each row"""
+    decode_token(token=token)
+    return bulk_grade_submissions(db, assignmentid, request.Grades, request.Notify)
+
+
 @router.put("/submission/{submissionid}/grade",
             dependencies=[Depends(is_current_user_faculty)],
             response_model=GradeSubmissionResponse)
@@ -100,6 +100,13 @@ class DiscussionDeleteResponse(BaseModel):
     Discussionid: int
 
 
+class DiscussionReplyPageResponse(BaseModel):
+    """One page of top-level replies, each with its full nested thread"""
+    Discussionid: int
+    Replies: List[DiscussionReplyResponse]
+    Nextcursor: Optional[str] = None  # pass back as ?cursor= to load the next page; None on the last page
+
+
 class ReplyDeleteResponse(BaseModel):
     """Response after reply deletion"""
     Success: str
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -72,6 +72,9 @@ class AnnouncementRequestFacultyRequest(BaseModel):
 
 class AnnouncementRequestFacultyResponse(BaseModel):
     Success: str
+    Announcementid: Optional[int] = None
+    Notificationscreated: int = 0  # enrolled students notified in-app
+    Emailsqueued: int = 0
 
 
 class AssignmentResponse(BaseModel):
@@ -17,12 +17,22 @@ class GradebookCell(BaseModel):
     Curved: bool = False
 
 
+class GradebookDiscussionCell(BaseModel):
+    """One cell: student's score for one graded discussion."""
+    Discussionid: int
+    Discussiontitle: str
+    Points_possible: int
+    Score: Optional[str] = None
+    Score_numeric: Optional[float] = None
+
+
 class GradebookRow(BaseModel):
     """One row: one student and their scores for all assignments."""
     Studentid: int
     Studentname: str
     Cells: List[GradebookCell]
     Course_grade: Optional[str] = None  # enrollment grade if set
+    Discussion_cells: List[GradebookDiscussionCell] = []
 
 
 class GradebookResponse(BaseModel):
@@ -31,5 +41,6 @@ class GradebookResponse(BaseModel):
     Coursename: str
     Assignment_headers: List[dict]  # [{"Assignmentid", "Assignmentname", "Points"}]
     Rows: List[GradebookRow]
+    Discussion_headers: List[dict] = []  # [{"Discussionid", "Discussiontitle", "Points"}]
     Apply_late_policy: bool = False
     Curve_to_score: Optional[float] = None  # e.g. 100 if curve applied
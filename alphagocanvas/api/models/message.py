@@ -44,20 +44,25 @@ class ConversationResponse(BaseModel):
     Lastmessagedate: Optional[str]
     Participants: List[ParticipantInfo]
     Unreadcount: int = 0
-    Lastmessage: Optional[str] = None
+    Lastmessage: Optional[str] = None  # In the inbox, the first MESSAGE_PREVIEW_LENGTH characters
+    Lastmessagesendername: Optional[str] = None
     Createdat: Optional[str]
 
 
 class ConversationDetailResponse(ConversationResponse):
-    """Conversation with messages"""
+    """Conversation with a page of messages, oldest to newest"""
     Messages: List[MessageResponse]
+    Participantcount: Optional[int] = None  # Participants may be truncated for large threads; this is the total
+    Nextcursor: Optional[str] = None  # pass back as ?cursor= to load older messages; None at the start of the thread
 
 
 class InboxResponse(BaseModel):
     """User inbox"""
     Totalconversations: int
     Unreadconversations: int
+    Unreadmessages: int = 0
     Conversations: List[ConversationResponse]
+    Nextcursor: Optional[str] = None  # pass back as ?cursor= to load the next page; None on the last page
 
 
 class ConversationDeleteResponse(BaseModel):
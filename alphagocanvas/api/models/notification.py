@@ -0,0 +1,44 @@
+from typing import Optional, List
+from pydantic import BaseModel, Field
+
+
+# ============== NOTIFICATION MODELS ==============
+
+class NotificationResponse(BaseModel):
+    """One in-app notification"""
+    Notificationid: int
+    Title: str
+    Message: str
+    Notificationtype: str
+    Isread: bool
+    Linkurl: Optional[str] = None
+    Courseid: Optional[int] = None
+    Createdat: Optional[str] = None
+
+
+class NotificationFeedResponse(BaseModel):
+    """A page of the user's notifications, newest first"""
+    Notifications: List[NotificationResponse]
+    Unreadcount: int
+    Nextcursor: Optional[str] = None  # pass back as ?cursor= for older notifications; None on the last page
+
+
+class UnreadCountResponse(BaseModel):
+    """The user's unread notification badge"""
+    Unreadcount: int
+
+
+class NotificationReadRequest(BaseModel):
+    """Notifications to mark read"""
+    Notificationids: List[int] = Field(..., max_length=500)
+
+
+class NotificationReadAllRequest(BaseModel):
+    """Mark everything read, or only up to the newest notification the client has shown"""
+    Throughid: Optional[int] = None
+
+
+class NotificationReadResponse(BaseModel):
+    """Result of marking notifications read"""
+    Updated: int  # notifications that were unread before the request
+    Unreadcount: int
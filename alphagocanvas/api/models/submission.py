@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Optional, List, Union
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
@@ -13,6 +13,7 @@ class FileUploadResponse(BaseModel):
     Filemimetype: Optional[str]
     Filesize: int
     Fileurl: str
+    Filesha256: Optional[str] = None
     Message: str = "File uploaded successfully"
 
 
@@ -24,6 +25,7 @@ class FileInfoResponse(BaseModel):
     Filemimetype: Optional[str]
     Filesize: int
     Fileurl: str
+    Filesha256: Optional[str] = None
     Uploaderid: int
     Uploaderrole: str
     Courseid: Optional[int]
@@ -70,6 +72,30 @@ class SubmissionListResponse(BaseModel):
     Submissions: List[SubmissionResponse]
 
 
+class SubmissionSummaryResponse(BaseModel):
+    """Submission row for list views such as the SpeedGrader sidebar; no content or feedback"""
+    Submissionid: int
+    Assignmentid: int
+    Studentid: int
+    Studentname: Optional[str] = None
+    Submissionfileid: Optional[int]
+    Fileoriginalname: Optional[str] = None
+    Submissionscore: Optional[str]
+    Submissiongraded: bool
+    Submitteddate: str
+    Gradeddate: Optional[str]
+
+
+class SubmissionPageResponse(BaseModel):
+    """One page of an assignment's submissions, newest first; totals cover every page"""
+    Assignmentid: int
+    Assignmentname: str
+    Totalsubmissions: int
+    Gradedcount: int
+    Submissions: List[Union[SubmissionResponse, SubmissionSummaryResponse]]
+    Nextcursor: Optional[str] = None  # pass back as ?cursor= to load the next page; None on the last page
+
+
 class GradeSubmissionRequest(BaseModel):
     """Request to grade a submission"""
     Submissionscore: str
@@ -122,3 +148,59 @@ class GradingStatsResponse(BaseModel):
     Averagescore: Optional[float]
     Highestscore: Optional[str]
     Lowestscore: Optional[str]
+
+
+# ============== SPEEDGRADER NAVIGATION ==============
+
+class SpeedGraderNavigationResponse(BaseModel):
+    """Every submission id of an assignment in SpeedGrader order (newest first), loaded once per session"""
+    Assignmentid: int
+    Assignmentname: str
+    Totalsubmissions: int
+    Submissionids: List[int]
+
+
+class SpeedGraderSubmissionResponse(SubmissionResponse):
+    """A submission with everything the grading view shows"""
+    Comments: List[SubmissionCommentResponse] = []
+
+
+class SpeedGraderWindowResponse(BaseModel):
+    """Submissions next to a given one, in the direction of travel (nearest first)"""
+    Assignmentid: int
+    Submissions: List[SpeedGraderSubmissionResponse]
+    Hasmore: bool  # more submissions lie beyond the last one returned
+
+
+# ============== BULK GRADING ==============
+
+class BulkGradeItem(BaseModel):
+    """One grade; name the submission directly or by the student who made it"""
+    Submissionid: Optional[int] = None
+    Studentid: Optional[int] = None
+    Submissionscore: str
+    Submissionfeedback: Optional[str] = None
+
+
+class BulkGradeRequest(BaseModel):
+    """Grades for many submissions of one assignment, applied in one transaction"""
+    Grades: List[BulkGradeItem] = Field(..., min_length=1, max_length=2000)
+    Notify: bool = True  # email students whose grade was posted
+
+
+class BulkGradeResult(BaseModel):
+    """Outcome of one row of a bulk grade request"""
+    Index: int  # position of the row in the request
+    Submissionid: Optional[int]
+    Studentid: Optional[int]
+    Success: bool
+    Error: Optional[str] = None
+
+
+class BulkGradeResponse(BaseModel):
+    """Per-row results of a bulk grade request"""
+    Assignmentid: int
+    Gradedcount: int
+    Errorcount: int
+    Notificationsqueued: int
+    Results: List[BulkGradeResult]
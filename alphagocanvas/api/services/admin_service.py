@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List
 
 from fastapi import HTTPException
@@ -6,6 +7,8 @@ from sqlalchemy import text
 from alphagocanvas.api.models.admin import AdminCoursesByFaculty, StudentInformationCourses, CoursesForAdmin, \
     FacultyForAdmin, UserResponse, StudentCourseDetail, AssignCourseRequest, CreateCourseRequest
 from alphagocanvas.api.models.course import CourseFacultySemesterRequest, CourseFacultySemesterResponse
+from alphagocanvas.api.services import file_store, gradebook_snapshot_service, push
+from alphagocanvas.api.utils.principal_cache import invalidate_user
 from alphagocanvas.database import database_dependency
 from alphagocanvas.database.models import (
     CourseTable,
@@ -30,6 +33,7 @@ from alphagocanvas.database.models import (
     SubmissionCommentTable,
     DiscussionReplyTable,
     DiscussionTable,
+    FileTable,
 )
 
 
@@ -328,8 +332,11 @@ def update_user_role(db: database_dependency, user_id: int, new_role: str):
             
         # 3. Update UserTable
         user.Userrole = new_role
+        gradebook_snapshot_service.invalidate_student_snapshots(db, user_id)
         
         db.commit()
+        invalidate_user(user_id)
+        push.end_sessions(user_id)
         return {"message": f"Successfully updated user role to {new_role}"}
         
     except Exception as e:
@@ -348,6 +355,8 @@ def delete_user(db: database_dependency, user_id: int):
         
     user.Isactive = False
     db.commit()
+    invalidate_user(user_id)
+    push.end_sessions(user_id)
     return {"message": "User deactivated successfully"}
 
 
@@ -361,6 +370,7 @@ def activate_user(db: database_dependency, user_id: int):
         
     user.Isactive = True
     db.commit()
+    invalidate_user(user_id)
     return {"message": "User activated successfully"}
 
 
@@ -411,8 +421,11 @@ def hard_delete_user(db: database_dependency, user_id: int):
             db.delete(faculty)
 
     # 3. Delete User Account
+    gradebook_snapshot_service.invalidate_student_snapshots(db, user_id)
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
+    push.end_sessions(user_id)
     return {"message": "User permanently deleted"}
 
 
@@ -500,6 +513,7 @@ def assign_course_to_student(db: database_dependency, params: AssignCourseReques
     )
 
     db.add(new_enrollment)
+    gradebook_snapshot_service.invalidate_snapshot(db, params.course_id)
     db.commit()
     db.refresh(new_enrollment)
 
@@ -534,7 +548,7 @@ def get_admin_analytics(db: database_dependency) -> dict:
 
 
 def copy_course_structure(db: database_dependency, source_course_id: int, target_course_id: int) -> dict:
-    """Copy course structure: assignments, quizzes, modules, module items. No submissions or attempt data."""
+    """Copy course structure: assignments, quizzes, course files, modules, module items. No submissions or attempt data."""
     source = db.query(CourseTable).filter(CourseTable.Courseid == source_course_id).first()
     target = db.query(CourseTable).filter(CourseTable.Courseid == target_course_id).first()
     if not source or not target:
@@ -590,6 +604,28 @@ def copy_course_structure(db: database_dependency, source_course_id: int, target
                     Optionorder=opt.Optionorder or 0,
                 )
                 db.add(new_opt)
+    # Course files: blob-backed files get a new row sharing the blob (no bytes copied);
+    # older files that own their bytes stay referenced from the source course as before
+    file_id_map = {}
+    for f in db.query(FileTable).filter(FileTable.Courseid == source_course_id).all():
+        if not file_store.is_blob_file(db, f.Filename, f.Filesha256):
+            continue
+        file_store.acquire_blob(db, f.Filesha256)
+        new_f = FileTable(
+            Filename=f.Filename,
+            Fileoriginalname=f.Fileoriginalname,
+            Filemimetype=f.Filemimetype,
+            Filesize=f.Filesize,
+            Filesha256=f.Filesha256,
+            Fileurl=f.Fileurl,
+            Uploaderid=f.Uploaderid,
+            Uploaderrole=f.Uploaderrole,
+            Courseid=target_course_id,
+            Createdat=datetime.now().isoformat(),
+        )
+        db.add(new_f)
+        db.flush()
+        file_id_map[f.Fileid] = new_f.Fileid
     module_id_map = {}
     for m in db.query(ModuleTable).filter(ModuleTable.Courseid == source_course_id).order_by(ModuleTable.Moduleposition).all():
         new_m = ModuleTable(
@@ -613,6 +649,8 @@ def copy_course_structure(db: database_dependency, source_course_id: int, target
             new_ref = assignment_id_map[item.Referenceid]
         elif item.Itemtype == "quiz" and item.Referenceid and item.Referenceid in quiz_id_map:
             new_ref = quiz_id_map[item.Referenceid]
+        elif item.Itemtype == "file" and item.Referenceid and item.Referenceid in file_id_map:
+            new_ref = file_id_map[item.Referenceid]
         new_item = ModuleItemTable(
             Itemname=item.Itemname,
             Itemtype=item.Itemtype,
@@ -626,5 +664,6 @@ def copy_course_structure(db: database_dependency, source_course_id: int, target
             Createdat=getattr(item, "Createdat", None),
         )
         db.add(new_item)
+    gradebook_snapshot_service.invalidate_snapshot(db, target_course_id)
     db.commit()
     return {"message": "Course structure copied", "target_course_id": target_course_id}
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 from alphagocanvas.database import database_dependency
 from alphagocanvas.database.models import UserTable, StudentTable, FacultyTable
 from alphagocanvas.api.models.signup import SignupRequest
@@ -67,16 +68,15 @@ def generate_id(db: database_dependency, role: str) -> int:
     return new_id
 
 
-def create_user(signup_data: SignupRequest, db: database_dependency):
+def check_email_available(email: str, db: database_dependency) -> str:
     """
-    Create a new user account with auto-generated ID
-    
-    :param signup_data: Signup request data
+    Raise 400 if an account already uses email, so signup can refuse before hashing a password
+
+    :param email: email address from the signup form
     :param db: database dependency
-    :return: Created user information including assigned ID
+    :return: the normalized email
     """
-    # Check if email already exists
-    normalized_email = signup_data.Useremail.lower().strip()
+    normalized_email = email.lower().strip()
     existing_user = db.query(UserTable).filter(
         func.lower(UserTable.Useremail) == normalized_email
     ).first()
@@ -86,6 +86,19 @@ def create_user(signup_data: SignupRequest, db: database_dependency):
             status_code=400,
             detail="Email already registered"
         )
+    return normalized_email
+
+
+def create_user(signup_data: SignupRequest, db: database_dependency, password_hash: Optional[str] = None):
+    """
+    Create a new user account with auto-generated ID
+    
+    :param signup_data: Signup request data
+    :param db: database dependency
+    :param password_hash: Userpassword already hashed off the event loop; hashed here when omitted
+    :return: Created user information including assigned ID
+    """
+    normalized_email = check_email_available(signup_data.Useremail, db)
     
     # Generate unique ID based on role
     assigned_id = generate_id(db, signup_data.Userrole)
@@ -95,7 +108,7 @@ def create_user(signup_data: SignupRequest, db: database_dependency):
         new_user = UserTable(
             Userid=assigned_id,
             Useremail=normalized_email,
-            Userpassword=hash_password(signup_data.Userpassword),
+            Userpassword=password_hash or hash_password(signup_data.Userpassword),
             Userrole=signup_data.Userrole,
             Createdat=datetime.utcnow().isoformat(),
             Isactive=True
@@ -2,14 +2,16 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import text
+from sqlalchemy import Integer, insert, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from alphagocanvas.api.models.calendar import (
     CalendarEventCreateRequest, CalendarEventUpdateRequest, CalendarEventResponse,
     CalendarEventsListResponse, CalendarEventDeleteResponse
 )
-from alphagocanvas.database.models import CalendarEventTable
+from alphagocanvas.database.models import AssignmentTable, CalendarEventTable, CourseTable, StudentEnrollmentTable
 
 
 def create_event(
@@ -62,53 +64,24 @@ def create_event(
     )
 
 
-def get_events_for_user(
-    db: Session,
-    user_id: int,
-    start_date: str,
-    end_date: str,
-    course_id: Optional[int] = None
-) -> CalendarEventsListResponse:
-    """Get calendar events for a user within a date range"""
-    
-    # Get user's own events
-    query = db.query(CalendarEventTable).filter(
+def _events_query(user_id: int, start_date: str, end_date: str, course_id: Optional[int]):
+    """User's events in the range with their course name, resolved by the same query"""
+    query = select(CalendarEventTable, CourseTable.Coursename).outerjoin(
+        CourseTable, CourseTable.Courseid == CalendarEventTable.Courseid
+    ).where(
         CalendarEventTable.Userid == user_id,
         CalendarEventTable.Eventstart >= start_date,
         CalendarEventTable.Eventstart <= end_date
     )
-    
+
     if course_id:
-        query = query.filter(CalendarEventTable.Courseid == course_id)
-    
-    events = query.order_by(CalendarEventTable.Eventstart).all()
-    
-    event_responses = []
-    for evt in events:
-        course_name = None
-        if evt.Courseid:
-            cq = text('SELECT "Coursename" FROM courses WHERE "Courseid" = :id')
-            result = db.execute(cq, {"id": evt.Courseid}).fetchone()
-            course_name = result.Coursename if result else None
-        
-        event_responses.append(CalendarEventResponse(
-            Eventid=evt.Eventid,
-            Eventtitle=evt.Eventtitle,
-            Eventdescription=evt.Eventdescription,
-            Eventtype=evt.Eventtype,
-            Eventstart=evt.Eventstart,
-            Eventend=evt.Eventend,
-            Eventallday=evt.Eventallday or False,
-            Eventcolor=evt.Eventcolor,
-            Courseid=evt.Courseid,
-            Coursename=course_name,
-            Userid=evt.Userid,
-            Userrole=evt.Userrole,
-            Referencetype=evt.Referencetype,
-            Referenceid=evt.Referenceid,
-            Createdat=evt.Createdat
-        ))
-    
+        query = query.where(CalendarEventTable.Courseid == course_id)
+
+    return query.order_by(CalendarEventTable.Eventstart)
+
+
+def _events_list(start_date: str, end_date: str, rows) -> CalendarEventsListResponse:
+    event_responses = [_event_response(evt, course_name) for evt, course_name in rows]
     return CalendarEventsListResponse(
         Startdate=start_date,
         Enddate=end_date,
@@ -117,6 +90,50 @@ def get_events_for_user(
     )
 
 
+def get_events_for_user(
+    db: Session,
+    user_id: int,
+    start_date: str,
+    end_date: str,
+    course_id: Optional[int] = None
+) -> CalendarEventsListResponse:
+    """Get calendar events for a user within a date range"""
+    rows = db.execute(_events_query(user_id, start_date, end_date, course_id)).all()
+    return _events_list(start_date, end_date, rows)
+
+
+async def get_events_for_user_async(
+    db: AsyncSession,
+    user_id: int,
+    start_date: str,
+    end_date: str,
+    course_id: Optional[int] = None
+) -> CalendarEventsListResponse:
+    """Async variant of get_events_for_user which runs its query on the async engine."""
+    rows = (await db.execute(_events_query(user_id, start_date, end_date, course_id))).all()
+    return _events_list(start_date, end_date, rows)
+
+
+def _event_response(evt: CalendarEventTable, course_name: Optional[str]) -> CalendarEventResponse:
+    return CalendarEventResponse(
+        Eventid=evt.Eventid,
+        Eventtitle=evt.Eventtitle,
+        Eventdescription=evt.Eventdescription,
+        Eventtype=evt.Eventtype,
+        Eventstart=evt.Eventstart,
+        Eventend=evt.Eventend,
+        Eventallday=evt.Eventallday or False,
+        Eventcolor=evt.Eventcolor,
+        Courseid=evt.Courseid,
+        Coursename=course_name,
+        Userid=evt.Userid,
+        Userrole=evt.Userrole,
+        Referencetype=evt.Referencetype,
+        Referenceid=evt.Referenceid,
+        Createdat=evt.Createdat
+    )
+
+
 def update_event(
     db: Session,
     event_id: int,
@@ -198,42 +215,91 @@ def delete_event(db: Session, event_id: int, user_id: int) -> CalendarEventDelet
     )
 
 
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT that skips rows hitting uq_calendar_events_user_reference"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(CalendarEventTable).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(CalendarEventTable).on_conflict_do_nothing()
+    # Other backends rely on the NOT EXISTS anti-join alone
+    return insert(CalendarEventTable)
+
+
+_SYNCED_EVENT_COLUMNS = [
+    CalendarEventTable.Eventtitle,
+    CalendarEventTable.Eventtype,
+    CalendarEventTable.Eventstart,
+    CalendarEventTable.Eventallday,
+    CalendarEventTable.Eventcolor,
+    CalendarEventTable.Courseid,
+    CalendarEventTable.Userid,
+    CalendarEventTable.Userrole,
+    CalendarEventTable.Referencetype,
+    CalendarEventTable.Referenceid,
+    CalendarEventTable.Createdat,
+]
+
+
+def _assignment_events(user_id_column):
+    """SELECT producing one due-date event row per assignment for the user in user_id_column"""
+    already_synced = select(CalendarEventTable.Eventid).where(
+        CalendarEventTable.Referencetype == 'assignment',
+        CalendarEventTable.Referenceid == AssignmentTable.Assignmentid,
+        CalendarEventTable.Userid == user_id_column,
+    )
+    return select(
+        literal("Due: ") + AssignmentTable.Assignmentname,
+        literal('assignment'),
+        AssignmentTable.Duedate,
+        literal(True),
+        literal('#E53935'),
+        AssignmentTable.Courseid,
+        user_id_column,
+        literal('Student'),
+        literal('assignment'),
+        AssignmentTable.Assignmentid,
+        literal(datetime.now().isoformat()),
+    ).where(
+        AssignmentTable.Duedate.isnot(None),
+        ~already_synced.exists(),
+    )
+
+
+def get_enrolled_course_ids(db: Session, user_id: int) -> List[int]:
+    """Courses a student user is enrolled in (student ids are user ids)"""
+    return db.execute(
+        select(StudentEnrollmentTable.Courseid).where(StudentEnrollmentTable.Studentid == user_id).distinct()
+    ).scalars().all()
+
+
 def sync_assignments_to_calendar(db: Session, user_id: int, course_ids: List[int]) -> int:
-    """Sync assignments/quizzes to calendar events (returns count of synced items)"""
-    synced_count = 0
-    
-    for course_id in course_ids:
-        # Sync assignments
-        assignments_query = text("""
-            SELECT "Assignmentid", "Assignmentname", "Duedate" 
-            FROM assignments WHERE "Courseid" = :courseid AND "Duedate" IS NOT NULL
-        """)
-        assignments = db.execute(assignments_query, {"courseid": course_id}).fetchall()
-        
-        for assignment in assignments:
-            # Check if event already exists
-            existing = db.query(CalendarEventTable).filter(
-                CalendarEventTable.Referencetype == 'assignment',
-                CalendarEventTable.Referenceid == assignment.Assignmentid,
-                CalendarEventTable.Userid == user_id
-            ).first()
-            
-            if not existing:
-                event = CalendarEventTable(
-                    Eventtitle=f"Due: {assignment.Assignmentname}",
-                    Eventtype='assignment',
-                    Eventstart=assignment.Duedate,
-                    Eventallday=True,
-                    Eventcolor='#E53935',
-                    Courseid=course_id,
-                    Userid=user_id,
-                    Userrole='Student',
-                    Referencetype='assignment',
-                    Referenceid=assignment.Assignmentid,
-                    Createdat=datetime.now().isoformat()
-                )
-                db.add(event)
-                synced_count += 1
-    
+    """
+    Sync assignment due dates to a user's calendar (returns count of synced items).
+
+    One INSERT ... SELECT per call: an anti-join skips assignments already on the calendar,
+    and ON CONFLICT DO NOTHING covers two syncs racing each other.
+    """
+    if not course_ids:
+        return 0
+
+    events = _assignment_events(literal(user_id, Integer)).where(AssignmentTable.Courseid.in_(course_ids))
+    result = db.execute(_insert_ignoring_duplicates(db).from_select(_SYNCED_EVENT_COLUMNS, events))
     db.commit()
-    return synced_count
+    return max(result.rowcount, 0)
+
+
+def fan_out_assignment_to_calendars(db: Session, assignment_id: int) -> int:
+    """
+    Add a new assignment's due date to the calendar of every student enrolled in its course.
+
+    A single INSERT ... SELECT joined to enrollments; the caller commits. Returns rows inserted.
+    """
+    events = _assignment_events(StudentEnrollmentTable.Studentid).join(
+        StudentEnrollmentTable, StudentEnrollmentTable.Courseid == AssignmentTable.Courseid
+    ).where(
+        AssignmentTable.Assignmentid == assignment_id,
+        StudentEnrollmentTable.Studentid.isnot(None),
+    ).distinct()
+    result = db.execute(_insert_ignoring_duplicates(db).from_select(_SYNCED_EVENT_COLUMNS, events))
+    return max(result.rowcount, 0)
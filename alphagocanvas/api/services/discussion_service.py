@@ -2,15 +2,17 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import text
+from sqlalchemy import func, select, text, tuple_
 from sqlalchemy.orm import Session
 
 from alphagocanvas.api.models.discussion import (
     DiscussionCreateRequest, DiscussionUpdateRequest, DiscussionResponse,
     DiscussionDetailResponse, DiscussionReplyCreateRequest, DiscussionReplyUpdateRequest,
-    DiscussionReplyResponse, DiscussionListResponse, DiscussionDeleteResponse, ReplyDeleteResponse,
+    DiscussionReplyResponse, DiscussionReplyPageResponse, DiscussionListResponse, DiscussionDeleteResponse, ReplyDeleteResponse,
     DiscussionGradeRequest, DiscussionGradeResponse,
 )
+from alphagocanvas.api.services import gradebook_snapshot_service
+from alphagocanvas.api.utils.cursor import decode_cursor, encode_cursor
 from alphagocanvas.database.models import DiscussionTable, DiscussionReplyTable, DiscussionGradeTable
 
 
@@ -42,6 +44,8 @@ def create_discussion(
     )
     
     db.add(discussion)
+    if discussion.Points:
+        gradebook_snapshot_service.invalidate_snapshot(db, discussion.Courseid)
     db.commit()
     db.refresh(discussion)
     
@@ -179,7 +183,12 @@ def update_discussion(
         discussion.Discussionlocked = request.Discussionlocked
     if request.Discussionpublished is not None:
         discussion.Discussionpublished = request.Discussionpublished
+    # Graded discussions are gradebook columns; title or points changes reshape the snapshot
+    if discussion.Points and request.Discussiontitle is not None:
+        gradebook_snapshot_service.invalidate_snapshot(db, discussion.Courseid)
     if getattr(request, "Points", None) is not None:
+        if request.Points != discussion.Points:
+            gradebook_snapshot_service.invalidate_snapshot(db, discussion.Courseid)
         discussion.Points = request.Points
     
     discussion.Updatedat = datetime.now().isoformat()
@@ -228,7 +237,6 @@ def set_discussion_grade(
     if existing:
         existing.Score = request.Score
         existing.Gradedat = datetime.now().isoformat()
-        db.commit()
     else:
         grade = DiscussionGradeTable(
             Discussionid=discussion_id,
@@ -237,7 +245,10 @@ def set_discussion_grade(
             Gradedat=datetime.now().isoformat(),
         )
         db.add(grade)
-        db.commit()
+    gradebook_snapshot_service.apply_discussion_grade(
+        db, discussion.Courseid, request.Studentid, discussion_id, request.Score
+    )
+    db.commit()
     return DiscussionGradeResponse(
         Success="Discussion grade set",
         Discussionid=discussion_id,
@@ -268,6 +279,8 @@ def delete_discussion(db: Session, discussion_id: int, user_id: int, user_role:
         DiscussionReplyTable.Discussionid == discussion_id
     ).delete()
     
+    if discussion.Points:
+        gradebook_snapshot_service.invalidate_snapshot(db, discussion.Courseid)
     db.delete(discussion)
     db.commit()
     
@@ -279,34 +292,104 @@ def delete_discussion(db: Session, discussion_id: int, user_id: int, user_role:
 
 # ============== REPLY OPERATIONS ==============
 
+def _reply_response(reply: DiscussionReplyTable) -> DiscussionReplyResponse:
+    return DiscussionReplyResponse(
+        Replyid=reply.Replyid,
+        Replycontent=reply.Replycontent,
+        Discussionid=reply.Discussionid,
+        Parentreplyid=reply.Parentreplyid,
+        Authorid=reply.Authorid,
+        Authorrole=reply.Authorrole,
+        Authorname=reply.Authorname,
+        Createdat=reply.Createdat,
+        Updatedat=reply.Updatedat,
+        Replies=[]
+    )
+
+
+def _reply_order():
+    # Createdat is an ISO string; Replyid breaks ties so the order is total (keyset pagination relies on it)
+    return func.coalesce(DiscussionReplyTable.Createdat, ""), DiscussionReplyTable.Replyid
+
+
+def _assemble_reply_tree(replies: List[DiscussionReplyTable], root_ids: Optional[set] = None) -> List[DiscussionReplyResponse]:
+    """
+    Link already-ordered reply rows into a forest in O(n).
+
+    Roots are replies without a parent (or the given root ids); replies whose parent is
+    not among the rows are unreachable and dropped, as before.
+    """
+    nodes = {reply.Replyid: _reply_response(reply) for reply in replies}
+    roots = []
+    for reply in replies:
+        node = nodes[reply.Replyid]
+        if (reply.Replyid in root_ids) if root_ids is not None else reply.Parentreplyid is None:
+            roots.append(node)
+        elif reply.Parentreplyid in nodes:
+            nodes[reply.Parentreplyid].Replies.append(node)
+    return roots
+
+
 def get_replies_for_discussion(db: Session, discussion_id: int) -> List[DiscussionReplyResponse]:
-    """Get all top-level replies for a discussion with nested replies"""
-    # Get top-level replies (no parent)
-    top_level_replies = db.query(DiscussionReplyTable).filter(
+    """Get all top-level replies for a discussion with nested replies (one query for the whole thread)"""
+    replies = db.query(DiscussionReplyTable).filter(
+        DiscussionReplyTable.Discussionid == discussion_id
+    ).order_by(*_reply_order()).all()
+    
+    return _assemble_reply_tree(replies)
+
+
+def get_reply_page(
+    db: Session,
+    discussion_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> DiscussionReplyPageResponse:
+    """
+    Page through top-level replies in creation order, each with its whole subtree.
+
+    Keyset pagination on (Createdat, Replyid): one query for the page of top-level replies
+    and one recursive query for all of their descendants, however deep.
+    """
+    discussion = db.query(DiscussionTable.Discussionid).filter(
+        DiscussionTable.Discussionid == discussion_id
+    ).first()
+    if not discussion:
+        raise HTTPException(status_code=404, detail="Discussion not found")
+
+    created_key, id_key = _reply_order()
+    query = db.query(DiscussionReplyTable).filter(
         DiscussionReplyTable.Discussionid == discussion_id,
         DiscussionReplyTable.Parentreplyid == None
-    ).order_by(DiscussionReplyTable.Createdat).all()
-    
-    def build_reply_tree(reply: DiscussionReplyTable) -> DiscussionReplyResponse:
-        # Get child replies
-        child_replies = db.query(DiscussionReplyTable).filter(
-            DiscussionReplyTable.Parentreplyid == reply.Replyid
-        ).order_by(DiscussionReplyTable.Createdat).all()
-        
-        return DiscussionReplyResponse(
-            Replyid=reply.Replyid,
-            Replycontent=reply.Replycontent,
-            Discussionid=reply.Discussionid,
-            Parentreplyid=reply.Parentreplyid,
-            Authorid=reply.Authorid,
-            Authorrole=reply.Authorrole,
-            Authorname=reply.Authorname,
-            Createdat=reply.Createdat,
-            Updatedat=reply.Updatedat,
-            Replies=[build_reply_tree(child) for child in child_replies]
+    )
+    if cursor:
+        after_created, after_id = decode_cursor(cursor, str, int)
+        query = query.filter(tuple_(created_key, id_key) > tuple_(after_created, after_id))
+    top_level = query.order_by(created_key, id_key).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(top_level) > limit:
+        top_level = top_level[:limit]
+        next_cursor = encode_cursor(top_level[-1].Createdat or "", top_level[-1].Replyid)
+
+    root_ids = [reply.Replyid for reply in top_level]
+    replies = list(top_level)
+    if root_ids:
+        thread = select(DiscussionReplyTable.Replyid).where(
+            DiscussionReplyTable.Parentreplyid.in_(root_ids)
+        ).cte("reply_thread", recursive=True)
+        thread = thread.union_all(
+            select(DiscussionReplyTable.Replyid).where(DiscussionReplyTable.Parentreplyid == thread.c.Replyid)
         )
-    
-    return [build_reply_tree(reply) for reply in top_level_replies]
+        replies += db.query(DiscussionReplyTable).filter(
+            DiscussionReplyTable.Replyid.in_(select(thread.c.Replyid))
+        ).order_by(created_key, id_key).all()
+
+    return DiscussionReplyPageResponse(
+        Discussionid=discussion_id,
+        Replies=_assemble_reply_tree(replies, root_ids=set(root_ids)),
+        Nextcursor=next_cursor,
+    )
 
 
 def create_reply(
@@ -0,0 +1,443 @@
+"""
+Email outbox and its delivery worker.
+
+Requests never talk to SMTP. They insert rows into email_outbox, in their own transaction
+when they have one, so an email is queued exactly when the change it announces commits. A
+background worker in each API process then delivers them:
+
+- claim: up to EMAIL_OUTBOX_BATCH_SIZE due rows are leased by moving Nextattemptat past
+  the lease (FOR UPDATE SKIP LOCKED on PostgreSQL, so every process can run a worker). If
+  a worker dies mid-batch, its rows are simply due again once the lease runs out.
+- send: the batch is split into per-connection chunks, sent in parallel over pooled SMTP
+  connections that stay logged in between batches instead of a connect, STARTTLS and
+  login per message.
+- record: sent rows are marked with one executemany. Transient failures are rescheduled
+  with exponential backoff; permanent ones (5xx) and rows out of attempts are marked failed.
+"""
+import logging
+import smtplib
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from alphagocanvas.config import (
+    EMAIL_OUTBOX_BATCH_SIZE,
+    EMAIL_OUTBOX_LEASE_SECONDS,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EMAIL_OUTBOX_POLL_SECONDS,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+    SMTP_FROM_EMAIL,
+    SMTP_FROM_NAME,
+    SMTP_HOST,
+    SMTP_IDLE_TIMEOUT_SECONDS,
+    SMTP_MESSAGES_PER_CONNECTION,
+    SMTP_PASSWORD,
+    SMTP_POOL_SIZE,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT_SECONDS,
+    SMTP_USER,
+)
+from alphagocanvas.database.models import EmailOutboxTable
+from alphagocanvas.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+EMAILS_QUEUED = Counter("email_outbox_queued_total", "Emails added to the outbox")
+EMAILS_SENT = Counter("email_outbox_sent_total", "Emails accepted by the SMTP server")
+EMAILS_RETRIED = Counter("email_outbox_retries_total", "Failed sends rescheduled with backoff")
+EMAILS_FAILED = Counter("email_outbox_failed_total", "Emails given up on (permanent error or out of attempts)")
+SMTP_CONNECTIONS_OPENED = Counter("smtp_connections_opened_total", "SMTP connections opened and logged in")
+EMAIL_SEND_SECONDS = Histogram("email_send_seconds", "Time to hand one message to the SMTP server")
+EMAIL_BATCH_SECONDS = Histogram("email_outbox_batch_seconds", "Time to claim, send and record one outbox batch")
+EMAIL_THROUGHPUT = Gauge("email_outbox_throughput_per_second", "Messages sent per second in the last batch")
+
+SENT, RETRY, FAILED = "sent", "retry", "failed"
+
+# What the worker needs from a claimed row, detached from the session that claimed it
+_ClaimedEmail = namedtuple("_ClaimedEmail", "Emailid Toemail Subject Htmlbody Textbody Attempts")
+_Outcome = Tuple[int, str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class OutboundEmail:
+    """One message to queue"""
+    to_email: str
+    subject: str
+    html_body: str
+    text_body: Optional[str] = None
+
+
+def enqueue_emails(db: Session, emails: Sequence[OutboundEmail]) -> int:
+    """
+    Add emails to the outbox with one INSERT; the caller commits. The worker in this
+    process is woken once the transaction commits.
+    """
+    if not emails:
+        return 0
+    now = datetime.now().isoformat()
+    db.execute(insert(EmailOutboxTable), [
+        {
+            "Toemail": email.to_email,
+            "Subject": email.subject,
+            "Htmlbody": email.html_body,
+            "Textbody": email.text_body,
+            "Status": "pending",
+            "Attempts": 0,
+            "Nextattemptat": now,
+            "Createdat": now,
+        }
+        for email in emails
+    ])
+    db.info["email_outbox_wake"] = True
+    if not event.contains(db, "after_commit", _wake_after_commit):
+        event.listen(db, "after_commit", _wake_after_commit)
+    EMAILS_QUEUED.inc(len(emails))
+    return len(emails)
+
+
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop("email_outbox_wake", False):
+        wake_worker()
+
+
+def retry_delay(attempts: int, base: float = EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+                cap: float = EMAIL_OUTBOX_RETRY_MAX_SECONDS) -> float:
+    """Seconds to wait after the given number of failed attempts: base, 2*base, 4*base, ... up to cap"""
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.released_at = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """
+    Logged-in SMTP connections reused across messages and batches.
+
+    A connection goes back to the pool after a chunk unless it has carried max_messages
+    (providers cap messages per session) and is dropped after idle_timeout seconds unused,
+    before the server's own idle timeout closes it under us.
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: str = SMTP_USER,
+        password: str = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        max_idle: int = SMTP_POOL_SIZE,
+        max_messages: int = SMTP_MESSAGES_PER_CONNECTION,
+        idle_timeout: float = SMTP_IDLE_TIMEOUT_SECONDS,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_idle = max(max_idle, 1)
+        self.max_messages = max(max_messages, 1)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        SMTP_CONNECTIONS_OPENED.inc()
+        return _PooledConnection(smtp)
+
+    def acquire(self) -> _PooledConnection:
+        """The most recently used idle connection, or a new one"""
+        now = time.monotonic()
+        stale = []
+        connection = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.released_at < self.idle_timeout:
+                    connection = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            candidate.close()
+        return connection or self._open()
+
+    def release(self, connection: _PooledConnection) -> None:
+        if connection.sent >= self.max_messages:
+            connection.close()
+            return
+        connection.released_at = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def discard(self, connection: _PooledConnection) -> None:
+        """Drop a connection that failed mid-conversation"""
+        connection.smtp.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+
+def _smtp_code(error: smtplib.SMTPException) -> Optional[int]:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return max(codes) if codes else None
+    return getattr(error, "smtp_code", None)
+
+
+class OutboxWorker:
+    """Background thread that drains email_outbox over an SMTPConnectionPool"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        pool: Optional[SMTPConnectionPool] = None,
+        batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+        poll_seconds: float = EMAIL_OUTBOX_POLL_SECONDS,
+        max_attempts: int = EMAIL_OUTBOX_MAX_ATTEMPTS,
+        lease_seconds: float = EMAIL_OUTBOX_LEASE_SECONDS,
+        from_email: str = SMTP_FROM_EMAIL,
+        from_name: str = SMTP_FROM_NAME,
+    ):
+        self.session_factory = session_factory
+        self.pool = pool if pool is not None else SMTPConnectionPool()
+        self.batch_size = max(batch_size, 1)
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max(max_attempts, 1)
+        self.lease_seconds = lease_seconds
+        self.from_email = from_email
+        self.from_header = f"{from_name} <{from_email}>"
+        self._executor = ThreadPoolExecutor(max_workers=self.pool.max_idle, thread_name_prefix="smtp")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- lifecycle -----
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                processed = 0
+            # A full batch means more may be due right away
+            if processed < self.batch_size:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    # ----- one batch -----
+
+    def run_once(self) -> int:
+        """Claim, send and record one batch; returns how many emails were attempted"""
+        started = time.perf_counter()
+        claimed = self._claim()
+        if not claimed:
+            return 0
+
+        chunk_size = -(-len(claimed) // self.pool.max_idle)
+        chunks = [claimed[i:i + chunk_size] for i in range(0, len(claimed), chunk_size)]
+        outcomes: List[_Outcome] = []
+        for chunk_outcomes in self._executor.map(self._send_chunk, chunks):
+            outcomes.extend(chunk_outcomes)
+        self._record(claimed, outcomes)
+
+        elapsed = time.perf_counter() - started
+        EMAIL_BATCH_SECONDS.observe(elapsed)
+        sent = sum(1 for _, status, _ in outcomes if status == SENT)
+        EMAIL_THROUGHPUT.set(sent / elapsed if elapsed > 0 else 0)
+        return len(claimed)
+
+    def _claim(self) -> List[_ClaimedEmail]:
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(EmailOutboxTable).where(
+                    EmailOutboxTable.Status == "pending",
+                    EmailOutboxTable.Nextattemptat <= now.isoformat(),
+                ).order_by(
+                    EmailOutboxTable.Nextattemptat, EmailOutboxTable.Emailid
+                ).limit(self.batch_size).with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not rows:
+                db.rollback()
+                return []
+            lease_until = (now + timedelta(seconds=self.lease_seconds)).isoformat()
+            claimed = []
+            for row in rows:
+                row.Attempts = (row.Attempts or 0) + 1
+                row.Nextattemptat = lease_until
+                claimed.append(_ClaimedEmail(
+                    row.Emailid, row.Toemail, row.Subject, row.Htmlbody, row.Textbody, row.Attempts
+                ))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _message(self, email: _ClaimedEmail) -> str:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = email.Subject
+        msg["From"] = self.from_header
+        msg["To"] = email.Toemail
+        if email.Textbody:
+            msg.attach(MIMEText(email.Textbody, "plain"))
+        msg.attach(MIMEText(email.Htmlbody, "html"))
+        return msg.as_string()
+
+    def _send_chunk(self, emails: Sequence[_ClaimedEmail]) -> List[_Outcome]:
+        """Send a chunk over one pooled connection, reconnecting once if the server dropped it"""
+        outcomes: List[_Outcome] = []
+        pending = list(emails)
+        connection: Optional[_PooledConnection] = None
+        reconnected = False
+        while pending:
+            email = pending[0]
+            try:
+                if connection is None:
+                    connection = self.pool.acquire()
+                started = time.perf_counter()
+                connection.smtp.sendmail(self.from_email, [email.Toemail], self._message(email))
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as error:
+                # The server answered for this message; the connection is still good
+                code = _smtp_code(error)
+                outcomes.append((email.Emailid, FAILED if code and code >= 500 else RETRY, str(error)))
+                pending.pop(0)
+                continue
+            except (smtplib.SMTPException, OSError) as error:
+                if connection is not None:
+                    self.pool.discard(connection)
+                    connection = None
+                if not reconnected and not isinstance(error, smtplib.SMTPAuthenticationError):
+                    # A pooled connection may have been closed by the server while idle
+                    reconnected = True
+                    continue
+                logger.warning("SMTP connection failed, rescheduling %d emails: %s", len(pending), error)
+                outcomes.extend((pending_email.Emailid, RETRY, str(error)) for pending_email in pending)
+                break
+
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started)
+            connection.sent += 1
+            reconnected = False
+            outcomes.append((email.Emailid, SENT, None))
+            pending.pop(0)
+            if connection.sent >= self.pool.max_messages:
+                self.pool.release(connection)
+                connection = None
+
+        if connection is not None:
+            self.pool.release(connection)
+        return outcomes
+
+    def _record(self, claimed: Sequence[_ClaimedEmail], outcomes: Sequence[_Outcome]) -> None:
+        attempts = {email.Emailid: email.Attempts for email in claimed}
+        now = datetime.now()
+        sent, retried, failed = [], [], []
+        for email_id, status, error in outcomes:
+            if status == SENT:
+                sent.append({"Emailid": email_id, "Status": "sent", "Sentat": now.isoformat(), "Lasterror": None})
+            elif status == RETRY and attempts[email_id] < self.max_attempts:
+                next_attempt = now + timedelta(seconds=retry_delay(attempts[email_id]))
+                retried.append({"Emailid": email_id, "Nextattemptat": next_attempt.isoformat(), "Lasterror": error})
+            else:
+                failed.append({"Emailid": email_id, "Status": "failed", "Lasterror": error})
+
+        db = self.session_factory()
+        try:
+            # One executemany per outcome
+            for params in (sent, retried, failed):
+                if params:
+                    db.execute(update(EmailOutboxTable), params)
+            db.commit()
+        finally:
+            db.close()
+
+        EMAILS_SENT.inc(len(sent))
+        EMAILS_RETRIED.inc(len(retried))
+        EMAILS_FAILED.inc(len(failed))
+        for params in failed:
+            logger.error("Giving up on email %s: %s", params["Emailid"], params["Lasterror"])
+
+
+_worker: Optional[OutboxWorker] = None
+
+
+def start_worker(session_factory: Callable[[], Session]) -> OutboxWorker:
+    """Start this process's outbox worker (idempotent)"""
+    global _worker
+    if _worker is None:
+        _worker = OutboxWorker(session_factory)
+        _worker.start()
+    return _worker
+
+
+def stop_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def wake_worker() -> None:
+    """Have this process's worker poll now rather than at its next interval"""
+    if _worker is not None:
+        _worker.wake()
@@ -1,20 +1,47 @@
 """
 Email service for sending notifications and password reset emails.
-Supports SMTP and can be extended for services like SendGrid, AWS SES, etc.
+
+Emails are rendered here and queued in the email outbox; the outbox worker delivers them
+over pooled SMTP connections (see email_outbox). Supports any SMTP relay such as SendGrid
+or AWS SES.
 """
-import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from dataclasses import dataclass
+from typing import Optional, List, Sequence
+
+from sqlalchemy.orm import Session
+
+from alphagocanvas.api.services.email_outbox import OutboundEmail, enqueue_emails
 from alphagocanvas.config import (
     SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
     SMTP_FROM_EMAIL, SMTP_FROM_NAME, FRONTEND_URL
 )
+from alphagocanvas.database.connection import SessionLocal
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class GradeNotification:
+    """Arguments for one grade notification, collected so a batch can be queued at once"""
+    to_email: str
+    student_name: str
+    course_name: str
+    assignment_name: str
+    grade: str
+    feedback: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class AnnouncementNotification:
+    """Arguments for one announcement notification, collected so a course can be queued in batches"""
+    to_email: str
+    student_name: str
+    course_name: str
+    announcement_title: str
+    announcement_content: str
+
+
 class EmailService:
     """Email service for sending various types of emails"""
 
@@ -26,11 +53,41 @@ class EmailService:
         self.from_email = SMTP_FROM_EMAIL
         self.from_name = SMTP_FROM_NAME
         self.frontend_url = FRONTEND_URL
+        # Session for emails queued outside a request's transaction
+        self.session_factory = SessionLocal
 
     def _is_configured(self) -> bool:
         """Check if email service is properly configured"""
         return bool(self.username and self.password)
 
+    def _queue(self, emails: Sequence[OutboundEmail], db: Optional[Session] = None) -> int:
+        """
+        Queue emails in the outbox
+
+        :param emails: Rendered emails
+        :param db: Session whose transaction the emails join (the caller commits); when
+            omitted they are committed on their own
+        :return: Number of emails queued
+        """
+        if not self._is_configured():
+            logger.warning("Email service not configured. Skipping email send.")
+            return 0
+
+        if db is not None:
+            return enqueue_emails(db, emails)
+
+        session = self.session_factory()
+        try:
+            queued = enqueue_emails(session, emails)
+            session.commit()
+            return queued
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Failed to queue {len(emails)} emails: {str(e)}")
+            return 0
+        finally:
+            session.close()
+
     def _send_email(
         self,
         to_email: str,
@@ -39,43 +96,15 @@ class EmailService:
         text_body: Optional[str] = None
     ) -> bool:
         """
-        Send an email using SMTP
+        Queue one email for the outbox worker
 
         :param to_email: Recipient email address
         :param subject: Email subject
         :param html_body: HTML content of the email
         :param text_body: Plain text content (fallback)
-        :return: True if sent successfully, False otherwise
+        :return: True if queued successfully, False otherwise
         """
-        if not self._is_configured():
-            logger.warning("Email service not configured. Skipping email send.")
-            return False
-
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = f"{self.from_name} <{self.from_email}>"
-            msg["To"] = to_email
-
-            # Add plain text version
-            if text_body:
-                msg.attach(MIMEText(text_body, "plain"))
-
-            # Add HTML version
-            msg.attach(MIMEText(html_body, "html"))
-
-            # Connect and send
-            with smtplib.SMTP(self.host, self.port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.from_email, to_email, msg.as_string())
-
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {str(e)}")
-            return False
+        return self._queue([OutboundEmail(to_email, subject, html_body, text_body)]) == 1
 
     def send_password_reset_email(self, to_email: str, reset_token: str, user_name: str = "User") -> bool:
         """
@@ -165,6 +194,28 @@ class EmailService:
         :param feedback: Optional feedback from instructor
         :return: True if sent successfully
         """
+        notification = GradeNotification(to_email, student_name, course_name, assignment_name, grade, feedback)
+        return self._queue([self._grade_notification_email(notification)]) == 1
+
+    def queue_grade_notifications(self, db: Session, notifications: Sequence[GradeNotification]) -> int:
+        """
+        Queue a batch of grade notifications (e.g. after bulk grading) with one insert
+
+        :param db: Session of the grading transaction; the emails commit with the grades
+        :param notifications: One entry per student whose grade was posted
+        :return: Number of emails queued
+        """
+        if not notifications:
+            return 0
+        return self._queue([self._grade_notification_email(n) for n in notifications], db)
+
+    def _grade_notification_email(self, notification: GradeNotification) -> OutboundEmail:
+        """Render a grade notification"""
+        student_name = notification.student_name
+        course_name = notification.course_name
+        assignment_name = notification.assignment_name
+        grade = notification.grade
+        feedback = notification.feedback
         subject = f"Grade Posted: {assignment_name}"
 
         feedback_section = ""
@@ -228,7 +279,7 @@ class EmailService:
         - Go Canvas Team
         """
 
-        return self._send_email(to_email, subject, html_body, text_body)
+        return OutboundEmail(notification.to_email, subject, html_body, text_body)
 
     def send_assignment_notification(
         self,
@@ -326,6 +377,33 @@ class EmailService:
         :param announcement_content: Content of the announcement
         :return: True if sent successfully
         """
+        notification = AnnouncementNotification(
+            to_email, student_name, course_name, announcement_title, announcement_content
+        )
+        return self._queue([self._announcement_notification_email(notification)]) == 1
+
+    def queue_announcement_notifications(
+        self,
+        db: Session,
+        notifications: Sequence[AnnouncementNotification]
+    ) -> int:
+        """
+        Queue announcement notifications for many students with one insert
+
+        :param db: Session of the announcement's transaction; the emails commit with it
+        :param notifications: One entry per student to email
+        :return: Number of emails queued
+        """
+        if not notifications:
+            return 0
+        return self._queue([self._announcement_notification_email(n) for n in notifications], db)
+
+    def _announcement_notification_email(self, notification: AnnouncementNotification) -> OutboundEmail:
+        """Render an announcement notification"""
+        student_name = notification.student_name
+        course_name = notification.course_name
+        announcement_title = notification.announcement_title
+        announcement_content = notification.announcement_content
         subject = f"Announcement: {announcement_title}"
 
         html_body = f"""
@@ -378,7 +456,7 @@ class EmailService:
         - Go Canvas Team
         """
 
-        return self._send_email(to_email, subject, html_body, text_body)
+        return OutboundEmail(notification.to_email, subject, html_body, text_body)
 
 
 # Singleton instance
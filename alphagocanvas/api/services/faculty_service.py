@@ -9,6 +9,9 @@ from alphagocanvas.api.models.faculty import CoursesByFaculty, AddSyllabusReques
     AnnouncementRequestFacultyRequest, AnnouncementRequestFacultyResponse, AssignmentResponse, QuizResponse, \
     AnnouncementResponse, FacultyCourseDetails
 from alphagocanvas.api.models.student import StudentInformationDetails, CourseStudentGrade
+from alphagocanvas.api.services import gradebook_snapshot_service
+from alphagocanvas.api.services.announcement_service import fan_out_announcement
+from alphagocanvas.api.services.calendar_service import fan_out_assignment_to_calendars
 from alphagocanvas.database import database_dependency
 from alphagocanvas.database.models import (
     CourseFacultyTable,
@@ -171,6 +174,9 @@ def update_grade_students(facultyid: int, params: StudentGradeFaculty, db: datab
 
     if existing_record and existing_record.Facultyid == facultyid:
         existing_record.EnrollmentGrades = params.Grade
+        gradebook_snapshot_service.apply_course_grade(
+            db, params.Courseid, params.Studentid, params.Semester, params.Grade
+        )
         db.commit()
 
     return StudentGradeFacultyResponse(Success="Grades has been updated successfully")
@@ -225,6 +231,9 @@ def add_assignment_to_course(params: AssignmentRequestFacultyRequest,
             Latepolicy_grace_minutes=getattr(params, "Latepolicy_grace_minutes", None),
         )
         db.add(new_record)
+        gradebook_snapshot_service.invalidate_snapshot(db, params.Courseid)
+        db.flush()
+        fan_out_assignment_to_calendars(db, new_record.Assignmentid)
         db.commit()
         db.refresh(new_record)
 
@@ -244,18 +253,26 @@ def add_announcement_to_course(params: AnnouncementRequestFacultyRequest,
         raise HTTPException(status_code=404,
                             detail="Assignment can not be added to this course by you, check Semester, Course")
 
-    if existing_record:
-        new_record = AnnouncementTable(
-            Announcementname=params.Announcementname,
-            Announcementdescription=params.Announcementdescription,
-            Courseid=params.Courseid
-        )
-
-        db.add(new_record)
-        db.commit()
-        db.refresh(new_record)
+    new_record = AnnouncementTable(
+        Announcementname=params.Announcementname,
+        Announcementdescription=params.Announcementdescription,
+        Courseid=params.Courseid
+    )
+    db.add(new_record)
+    db.flush()
+    # Notifications and emails commit with the announcement
+    fan_out = fan_out_announcement(
+        db, params.Courseid, params.Semester, params.Announcementname, params.Announcementdescription,
+        announcement_id=new_record.Announcementid
+    )
+    db.commit()
 
-    return AnnouncementRequestFacultyResponse(Success="Announcement has been updated successfully")
+    return AnnouncementRequestFacultyResponse(
+        Success="Announcement has been updated successfully",
+        Announcementid=new_record.Announcementid,
+        Notificationscreated=fan_out.Notificationscreated,
+        Emailsqueued=fan_out.Emailsqueued
+    )
 
 
 def get_assignments_by_courseid(db: database_dependency, courseid: int) -> List[AssignmentResponse]:
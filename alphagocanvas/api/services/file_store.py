@@ -0,0 +1,185 @@
+"""
+Content-addressed, deduplicating store for uploaded files.
+
+Each distinct upload is kept once as a blob named by its SHA-256 and tracked in file_blobs
+with a reference count. FileTable rows point at the blob through Filename (the blob's key in
+the storage backend) and Filesha256, so re-uploads of the same bytes and copies of a file
+into another course only add a row and a reference. The blob is deleted when its last
+reference is released. Where the bytes live (local disk or an S3-compatible bucket) is up
+to the backend from get_storage().
+
+Concurrency: taking a reference is a single UPDATE (or an INSERT for a new blob) and
+collecting a blob locks its row, so a blob is never unlinked while another transaction is
+adding a reference to it. A blob row whose file went missing is repaired by the next upload
+of the same content.
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from alphagocanvas.api.services.storage import StorageBackend, create_storage
+from alphagocanvas.database.models import FileBlobTable
+
+# Upload directory (relative to project root): the local backend's files and upload scratch space
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "uploads")
+
+# Uploads are copied to disk in chunks of this size, so memory per upload stays constant
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """The process-wide storage backend, created from STORAGE_BACKEND on first use"""
+    global _storage
+    if _storage is None:
+        _storage = create_storage(UPLOAD_DIR)
+    return _storage
+
+
+def ensure_upload_dir():
+    """Ensure the upload directory exists"""
+    if not os.path.exists(UPLOAD_DIR):
+        os.makedirs(UPLOAD_DIR)
+
+
+def blob_filename(sha256: str, original_filename: str) -> str:
+    """Blob key; the extension keeps /uploads serving the right content type"""
+    ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
+    name = f"{sha256}.{ext}" if ext else sha256
+    return f"blobs/{sha256[:2]}/{name}"
+
+
+async def save_upload_stream(file: UploadFile, file_path: str, max_size: int) -> Tuple[int, str]:
+    """
+    Copy an upload to file_path chunk by chunk, hashing as it goes.
+
+    Disk writes run in the threadpool so the event loop is never blocked. The copy stops
+    as soon as the size limit is passed and the partial file is removed; data is written
+    to a ".part" file and only renamed into place once complete.
+
+    :return: (size in bytes, SHA-256 hex digest)
+    """
+    partial_path = file_path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    out = await run_in_threadpool(open, partial_path, 'wb')
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large. Maximum size is {max_size // (1024*1024)}MB"
+                )
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(os.replace, partial_path, file_path)
+    except BaseException:
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(_remove_if_exists, partial_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def store_upload(db: Session, file: UploadFile, max_size: int) -> FileBlobTable:
+    """
+    Stream an upload into the store and take one reference to its blob.
+
+    The bytes land in a local scratch file first and are handed to the storage backend
+    only when no stored blob has the same hash. The caller commits along with the
+    FileTable row.
+    """
+    scratch_dir = os.path.join(UPLOAD_DIR, "tmp")
+    await run_in_threadpool(os.makedirs, scratch_dir, exist_ok=True)
+    scratch_path = os.path.join(scratch_dir, uuid.uuid4().hex)
+    size, sha256 = await save_upload_stream(file, scratch_path, max_size)
+    try:
+        blob = acquire_blob(db, sha256)
+        if blob is None:
+            blob = FileBlobTable(
+                Blobsha256=sha256,
+                Blobfilename=blob_filename(sha256, file.filename or ""),
+                Blobsize=size,
+                Refcount=1,
+                Createdat=datetime.now().isoformat(),
+            )
+            try:
+                with db.begin_nested():
+                    db.add(blob)
+            except IntegrityError:
+                # A concurrent upload of the same bytes created the blob first
+                blob = acquire_blob(db, sha256)
+        storage = get_storage()
+        if not await run_in_threadpool(storage.exists, blob.Blobfilename):
+            await run_in_threadpool(storage.put_file, blob.Blobfilename, scratch_path, sha256)
+    finally:
+        await run_in_threadpool(_remove_if_exists, scratch_path)
+    return blob
+
+
+def acquire_blob(db: Session, sha256: str) -> Optional[FileBlobTable]:
+    """Add a reference to an existing blob; None when no blob has this hash"""
+    result = db.execute(
+        update(FileBlobTable)
+        .where(FileBlobTable.Blobsha256 == sha256)
+        .values(Refcount=FileBlobTable.Refcount + 1)
+    )
+    if result.rowcount == 0:
+        return None
+    return db.get(FileBlobTable, sha256, populate_existing=True)
+
+
+def release_blob(db: Session, sha256: str) -> None:
+    """Drop a reference; the caller commits, then calls collect_blob"""
+    db.execute(
+        update(FileBlobTable)
+        .where(FileBlobTable.Blobsha256 == sha256, FileBlobTable.Refcount > 0)
+        .values(Refcount=FileBlobTable.Refcount - 1)
+    )
+
+
+def collect_blob(db: Session, sha256: str) -> bool:
+    """
+    Delete a blob nobody references any more. Returns True if it was removed.
+
+    The row is locked while the object is deleted, so a concurrent acquire_blob either
+    lands first (and the blob is kept) or waits and then recreates the blob.
+    """
+    blob = db.query(FileBlobTable).filter(
+        FileBlobTable.Blobsha256 == sha256
+    ).with_for_update().populate_existing().first()
+    if blob is None or blob.Refcount > 0:
+        db.rollback()
+        return False
+    get_storage().delete(blob.Blobfilename)
+    db.delete(blob)
+    db.commit()
+    return True
+
+
+def is_blob_file(db: Session, filename: str, sha256: Optional[str]) -> bool:
+    """Whether a FileTable row is backed by a blob (files uploaded before the store own their file)"""
+    if not sha256:
+        return False
+    blob = db.get(FileBlobTable, sha256)
+    return blob is not None and blob.Blobfilename == filename
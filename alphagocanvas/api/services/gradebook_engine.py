@@ -0,0 +1,349 @@
+"""
+Columnar gradebook engine.
+
+Holds a course's students x assignments grid as NumPy arrays (scores, days late,
+submission flags) so the late policy, curve and status are computed for every
+cell at once, and timestamps are parsed in one vectorised pass instead of twice
+per cell. Only the final conversion to GradebookCell objects happens row by row.
+"""
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from alphagocanvas.api.models.gradebook import GradebookCell, GradebookRow
+
+STATUS_MISSING, STATUS_SUBMITTED, STATUS_GRADED, STATUS_LATE = 0, 1, 2, 3
+_STATUS_NAMES = np.array(["missing", "submitted", "graded", "late"], dtype=object)
+
+_EPOCH = datetime(1970, 1, 1)
+_SECONDS_PER_DAY = 86400.0
+# Naive extended-format ISO timestamps, which NumPy's datetime64 parser reads the same way as
+# datetime.fromisoformat; anything else (offsets, basic format like 20250201) it misreads or warns on
+_NAIVE_ISO = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}(?::\d{2}(?::\d{2}(?:\.\d{1,6})?)?)?)?")
+
+
+@dataclass
+class GradebookFrame:
+    """Raw grid for one course; axis 0 is unique students, axis 1 is assignments."""
+    student_ids: np.ndarray          # (S,) int64, sorted
+    assignment_ids: np.ndarray       # (A,) int64, in header order
+    assignment_names: List[str]
+    points: np.ndarray               # (A,) int64
+    percent_per_day: np.ndarray      # (A,) float64, 0 = no late policy
+    grace_days: np.ndarray           # (A,) float64
+    has_submission: np.ndarray       # (S, A) bool
+    graded: np.ndarray               # (S, A) bool
+    score: np.ndarray                # (S, A) float64
+    score_valid: np.ndarray          # (S, A) bool, False when missing or non-numeric
+    days_late: np.ndarray            # (S, A) float64, 0 when on time or unparseable
+    submission_id: np.ndarray        # (S, A) object, None when missing
+    raw_score: np.ndarray            # (S, A) object, score string as entered
+    submitted_date: np.ndarray       # (S, A) object
+
+
+@dataclass
+class ScoredGradebook:
+    """Frame after late policy and curve have been applied."""
+    frame: GradebookFrame
+    score: np.ndarray                # (S, A) float64
+    score_text: np.ndarray           # (S, A) object
+    late_deduction: np.ndarray       # (S, A) float64, NaN where no deduction applied
+    status: np.ndarray               # (S, A) int8 status codes
+    curved: bool
+
+
+def parse_score(score_str: Optional[str]) -> Optional[float]:
+    """Parse score string to float; return None if not numeric."""
+    if not score_str:
+        return None
+    try:
+        return float(score_str.strip())
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_timestamp(value: Optional[str]) -> Tuple[float, float, bool]:
+    """
+    Return (wall-clock seconds, UTC offset seconds or NaN if naive, parsed ok).
+
+    Keeping the wall clock and offset separate lets _days_late_matrix reproduce the
+    row-wise rule that a naive due date takes the submission's timezone.
+    """
+    if not value:
+        return 0.0, math.nan, False
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return 0.0, math.nan, False
+    offset = parsed.utcoffset()
+    wall = (parsed.replace(tzinfo=None) - _EPOCH).total_seconds()
+    return wall, (offset.total_seconds() if offset is not None else math.nan), True
+
+
+def _parse_timestamps(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised _parse_timestamp over many strings.
+
+    When every value is a naive or 'Z'-suffixed extended ISO timestamp (what the API
+    writes) the whole batch goes through NumPy's datetime64 parser in one call. If any value
+    has another shape (an explicit offset, basic format) the batch falls back to
+    datetime.fromisoformat one value at a time.
+    """
+    n = len(values)
+    wall = np.zeros(n, dtype=np.float64)
+    offset = np.full(n, math.nan, dtype=np.float64)
+    ok = np.zeros(n, dtype=bool)
+
+    present = [i for i, value in enumerate(values) if value and isinstance(value, str)]
+    if not present:
+        return wall, offset, ok
+
+    texts = [values[i] for i in present]
+    is_utc = [text.endswith("Z") for text in texts]
+    texts = [text[:-1] if utc else text for text, utc in zip(texts, is_utc)]
+    if all(_NAIVE_ISO.fullmatch(text) for text in texts):
+        try:
+            parsed = np.array(texts, dtype="datetime64[us]")
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            index = np.asarray(present)
+            wall[index] = parsed.astype(np.int64) / 1e6
+            offset[index] = np.where(np.asarray(is_utc), 0.0, math.nan)
+            ok[index] = True
+            return wall, offset, ok
+
+    for i in present:
+        wall[i], offset[i], ok[i] = _parse_timestamp(values[i])
+    return wall, offset, ok
+
+
+def _days_late_matrix(
+    due_wall: np.ndarray,
+    due_offset: np.ndarray,
+    due_ok: np.ndarray,
+    sub_wall: np.ndarray,
+    sub_offset: np.ndarray,
+    sub_ok: np.ndarray,
+) -> np.ndarray:
+    due_naive = np.isnan(due_offset)[None, :]
+    sub_naive = np.isnan(sub_offset)
+    # An aware due date cannot be compared with a naive submission time; treat as on time
+    valid = due_ok[None, :] & sub_ok & ~(~due_naive & sub_naive)
+    sub_off = np.where(sub_naive, 0.0, sub_offset)
+    due_off = np.where(due_naive, sub_off, due_offset[None, :])
+    delta = ((sub_wall - sub_off) - (due_wall[None, :] - due_off)) / _SECONDS_PER_DAY
+    return np.where(valid, np.maximum(delta, 0.0), 0.0)
+
+
+def build_frame(student_ids: Sequence[int], assignments: Sequence, subs_rows: Sequence) -> GradebookFrame:
+    """
+    Lay out enrolled students, course assignments and their submissions as arrays.
+
+    Submissions from students who are not in ``student_ids`` are ignored; if a student
+    has several rows for one assignment the last one wins, as in the row-wise builder.
+    """
+    students = np.unique(np.asarray(student_ids, dtype=np.int64))
+    assignment_ids = np.asarray([a.Assignmentid for a in assignments], dtype=np.int64)
+    n_students, n_assignments = len(students), len(assignment_ids)
+
+    points = np.asarray([getattr(a, "Points", None) or 100 for a in assignments], dtype=np.int64)
+    percent_per_day = np.asarray(
+        [getattr(a, "Latepolicy_percent_per_day", None) or 0 for a in assignments], dtype=np.float64
+    )
+    grace_days = np.asarray(
+        [(getattr(a, "Latepolicy_grace_minutes", None) or 0) / (60 * 24) for a in assignments], dtype=np.float64
+    )
+
+    due_wall, due_offset, due_ok = _parse_timestamps([getattr(a, "Duedate", None) for a in assignments])
+
+    shape = (n_students, n_assignments)
+    has_submission = np.zeros(shape, dtype=bool)
+    graded = np.zeros(shape, dtype=bool)
+    score = np.zeros(shape, dtype=np.float64)
+    score_valid = np.zeros(shape, dtype=bool)
+    sub_wall = np.zeros(shape, dtype=np.float64)
+    sub_offset = np.full(shape, math.nan, dtype=np.float64)
+    sub_ok = np.zeros(shape, dtype=bool)
+    submission_id = np.full(shape, None, dtype=object)
+    raw_score = np.full(shape, None, dtype=object)
+    submitted_date = np.full(shape, None, dtype=object)
+
+    if subs_rows and n_students and n_assignments:
+        row_students = np.fromiter((r.Studentid for r in subs_rows), dtype=np.int64, count=len(subs_rows))
+        row_assignments = np.fromiter((r.Assignmentid for r in subs_rows), dtype=np.int64, count=len(subs_rows))
+
+        assignment_order = np.argsort(assignment_ids, kind="stable")
+        sorted_assignments = assignment_ids[assignment_order]
+        s_pos = np.minimum(np.searchsorted(students, row_students), n_students - 1)
+        a_pos = np.minimum(np.searchsorted(sorted_assignments, row_assignments), n_assignments - 1)
+        keep = (students[s_pos] == row_students) & (sorted_assignments[a_pos] == row_assignments)
+        i_idx = s_pos[keep]
+        j_idx = assignment_order[a_pos[keep]]
+        kept_rows = [row for row, k in zip(subs_rows, keep.tolist()) if k]
+
+        has_submission[i_idx, j_idx] = True
+        graded[i_idx, j_idx] = np.fromiter((bool(r.Submissiongraded) for r in kept_rows), dtype=bool, count=len(kept_rows))
+        submission_id[i_idx, j_idx] = [r.Submissionid for r in kept_rows]
+        raw_score[i_idx, j_idx] = [r.Submissionscore for r in kept_rows]
+        submitted_date[i_idx, j_idx] = [r.Submitteddate for r in kept_rows]
+
+        parsed_scores = [parse_score(r.Submissionscore) for r in kept_rows]
+        score_valid[i_idx, j_idx] = [p is not None for p in parsed_scores]
+        score[i_idx, j_idx] = [p if p is not None else 0.0 for p in parsed_scores]
+
+        stamp_wall, stamp_offset, stamp_ok = _parse_timestamps([r.Submitteddate for r in kept_rows])
+        sub_wall[i_idx, j_idx] = stamp_wall
+        sub_offset[i_idx, j_idx] = stamp_offset
+        sub_ok[i_idx, j_idx] = stamp_ok
+
+    days_late = _days_late_matrix(due_wall, due_offset, due_ok, sub_wall, sub_offset, sub_ok)
+
+    return GradebookFrame(
+        student_ids=students,
+        assignment_ids=assignment_ids,
+        assignment_names=[a.Assignmentname or "" for a in assignments],
+        points=points,
+        percent_per_day=percent_per_day,
+        grace_days=grace_days,
+        has_submission=has_submission,
+        graded=graded,
+        score=score,
+        score_valid=score_valid,
+        days_late=days_late,
+        submission_id=submission_id,
+        raw_score=raw_score,
+        submitted_date=submitted_date,
+    )
+
+
+def _format_scores(values: np.ndarray) -> np.ndarray:
+    return np.asarray([f"{v:.1f}" for v in values.tolist()], dtype=object)
+
+
+def score_frame(
+    frame: GradebookFrame,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+    curve_max: Optional[float] = None,
+) -> ScoredGradebook:
+    """
+    Apply the late policy, curve and status rules to every cell at once.
+
+    The curve scales by this frame's highest score unless ``curve_max`` is given, which
+    lets a course processed in chunks be curved against its overall maximum.
+    """
+    score = frame.score.copy()
+    score_text = frame.raw_score.copy()
+    late_deduction = np.full(score.shape, np.nan)
+    is_late = frame.days_late > 0
+
+    status = np.full(score.shape, STATUS_MISSING, dtype=np.int8)
+    status[frame.has_submission] = STATUS_SUBMITTED
+    status[frame.graded & frame.has_submission] = STATUS_GRADED
+    status[(status == STATUS_GRADED) & is_late] = STATUS_LATE
+
+    if apply_late_policy:
+        penalised = frame.score_valid & is_late & (frame.percent_per_day != 0)[None, :]
+        days_after_grace = np.maximum(0.0, frame.days_late - frame.grace_days[None, :])
+        deduction = frame.points[None, :] * (days_after_grace * frame.percent_per_day[None, :] / 100.0)
+        deduction = np.minimum(score, deduction)
+        late_deduction[penalised] = deduction[penalised]
+        score[penalised] = np.maximum(0.0, score[penalised] - deduction[penalised])
+        score_text[penalised] = _format_scores(score[penalised])
+
+    curved = False
+    numeric = frame.score_valid & frame.has_submission
+    if curve_to_score is not None and numeric.any():
+        max_score = curve_max if curve_max is not None else score[numeric].max()
+        if max_score > 0:
+            score[numeric] = score[numeric] / max_score * curve_to_score
+            score_text[numeric] = _format_scores(score[numeric])
+            curved = True
+
+    return ScoredGradebook(
+        frame=frame,
+        score=score,
+        score_text=score_text,
+        late_deduction=late_deduction,
+        status=status,
+        curved=curved,
+    )
+
+
+def _nullable(values: np.ndarray, mask: np.ndarray) -> List[list]:
+    out = values.astype(object)
+    out[~mask] = None
+    return out.tolist()
+
+
+def numeric_max(scored: ScoredGradebook) -> Optional[float]:
+    """Highest numeric score in the frame (after any late policy), or None if there is none."""
+    numeric = scored.frame.score_valid & scored.frame.has_submission
+    return float(scored.score[numeric].max()) if numeric.any() else None
+
+
+def cell_values(scored: ScoredGradebook) -> Tuple[Dict[int, int], List[List[tuple]]]:
+    """
+    Plain-Python cell values per unique student.
+
+    :return: (student id -> row position, rows) where each row holds one tuple per assignment:
+             (Assignmentid, Assignmentname, Points_possible, Score, Score_numeric, Status,
+             Submissionid, Submitteddate, Late_deduction_applied, Curved)
+    """
+    frame = scored.frame
+    numeric = frame.score_valid & frame.has_submission
+    scores = _nullable(scored.score, numeric)
+    deductions = _nullable(scored.late_deduction, ~np.isnan(scored.late_deduction))
+    statuses = _STATUS_NAMES[scored.status].tolist()
+    curved_cells = (numeric & scored.curved).tolist()
+    texts = scored.score_text.tolist()
+    submission_ids = frame.submission_id.tolist()
+    submitted = frame.submitted_date.tolist()
+
+    ids, names, points = frame.assignment_ids.tolist(), frame.assignment_names, frame.points.tolist()
+    rows = [
+        list(zip(ids, names, points, texts[i], scores[i], statuses[i], submission_ids[i], submitted[i],
+                 deductions[i], curved_cells[i]))
+        for i in range(len(frame.student_ids))
+    ]
+    return {sid: i for i, sid in enumerate(frame.student_ids.tolist())}, rows
+
+
+def to_rows(
+    scored: ScoredGradebook,
+    student_ids: Sequence[int],
+    student_names: Dict[int, str],
+    course_grades: Dict[int, Optional[str]],
+) -> List[GradebookRow]:
+    """Materialise GradebookRow objects in enrollment order (duplicates preserved)."""
+    row_index, values = cell_values(scored)
+    rows = []
+    for sid in student_ids:
+        cells = [
+            GradebookCell(
+                Assignmentid=assignment_id,
+                Assignmentname=assignment_name,
+                Points_possible=points,
+                Score=text,
+                Score_numeric=score,
+                Status=status,
+                Submissionid=submission_id,
+                Submitteddate=submitted_date,
+                Late_deduction_applied=deduction,
+                Curved=curved,
+            )
+            for (assignment_id, assignment_name, points, text, score, status, submission_id, submitted_date,
+                 deduction, curved) in values[row_index[sid]]
+        ]
+        rows.append(GradebookRow(
+            Studentid=sid,
+            Studentname=student_names.get(sid, str(sid)),
+            Cells=cells,
+            Course_grade=course_grades.get(sid),
+        ))
+    return rows
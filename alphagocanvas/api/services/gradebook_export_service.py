@@ -0,0 +1,219 @@
+"""
+Streaming gradebook export (CSV or NDJSON).
+
+Enrollments are read through a server-side cursor in fixed-size chunks; each chunk's
+students, submissions and discussion grades are fetched with one query apiece and scored
+by the columnar engine, then written out and dropped. Memory stays bounded by the chunk
+size no matter how many students are enrolled. A curve needs the course-wide maximum
+first, so curved exports make one extra pass that only computes that number.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from alphagocanvas.api.services import gradebook_engine
+from alphagocanvas.api.services.gradebook_service import (
+    enrollments_query,
+    graded_discussions_query,
+    student_names,
+    submissions_query,
+)
+from alphagocanvas.database.connection import AsyncSessionLocal
+from alphagocanvas.database.models import (
+    AssignmentTable,
+    CourseTable,
+    DiscussionGradeTable,
+    StudentEnrollmentTable,
+    StudentTable,
+    SubmissionTable,
+)
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+@dataclass
+class GradebookExportPlan:
+    """Course-level data needed before streaming; small regardless of enrollment size."""
+    course_id: int
+    course_name: str
+    semester: Optional[str]
+    apply_late_policy: bool
+    curve_to_score: Optional[float]
+    assignments: list
+    discussions: list
+
+
+async def prepare_gradebook_export(
+    db: AsyncSession,
+    course_id: int,
+    semester: Optional[str] = None,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookExportPlan:
+    """Validate the course and load its assignment and discussion columns"""
+    course = (await db.execute(select(CourseTable).where(CourseTable.Courseid == course_id))).scalars().first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    assignments = (await db.execute(
+        select(AssignmentTable).where(AssignmentTable.Courseid == course_id).order_by(AssignmentTable.Assignmentid)
+    )).scalars().all()
+    discussions = (await db.execute(graded_discussions_query(course_id))).scalars().all()
+
+    return GradebookExportPlan(
+        course_id=course_id,
+        course_name=course.Coursename or "",
+        semester=semester,
+        apply_late_policy=apply_late_policy,
+        curve_to_score=curve_to_score,
+        assignments=list(assignments),
+        discussions=list(discussions),
+    )
+
+
+async def _enrollment_chunks(db: AsyncSession, plan: GradebookExportPlan) -> AsyncIterator[List[StudentEnrollmentTable]]:
+    query = enrollments_query(plan.course_id, plan.semester).order_by(StudentEnrollmentTable.Enrollmentid)
+    result = await db.stream_scalars(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    async for chunk in result.partitions(EXPORT_CHUNK_SIZE):
+        yield chunk
+
+
+async def _score_chunk(
+    db: AsyncSession,
+    plan: GradebookExportPlan,
+    enrollments: List[StudentEnrollmentTable],
+    curve_max: Optional[float],
+):
+    student_ids = sorted({e.Studentid for e in enrollments})
+    submissions = (await db.execute(
+        submissions_query([a.Assignmentid for a in plan.assignments]).where(
+            SubmissionTable.Studentid.in_(student_ids)
+        )
+    )).fetchall()
+    frame = gradebook_engine.build_frame(student_ids, plan.assignments, submissions)
+    return gradebook_engine.score_frame(
+        frame,
+        apply_late_policy=plan.apply_late_policy,
+        curve_to_score=plan.curve_to_score if curve_max is not None else None,
+        curve_max=curve_max,
+    )
+
+
+async def _course_max_score(db: AsyncSession, plan: GradebookExportPlan) -> Optional[float]:
+    best = None
+    async for enrollments in _enrollment_chunks(db, plan):
+        chunk_max = gradebook_engine.numeric_max(await _score_chunk(db, plan, enrollments, curve_max=None))
+        if chunk_max is not None and (best is None or chunk_max > best):
+            best = chunk_max
+    return best
+
+
+async def _export_rows(db: AsyncSession, plan: GradebookExportPlan) -> AsyncIterator[List[dict]]:
+    """Yield lists of row dicts, one list per enrollment chunk"""
+    curve_max = None
+    if plan.curve_to_score is not None and plan.assignments:
+        curve_max = await _course_max_score(db, plan)
+        if curve_max is not None and curve_max <= 0:
+            curve_max = None
+
+    discussion_ids = [d.Discussionid for d in plan.discussions]
+    async for enrollments in _enrollment_chunks(db, plan):
+        student_ids = sorted({e.Studentid for e in enrollments})
+        names = student_names((await db.execute(
+            select(StudentTable).where(StudentTable.Studentid.in_(student_ids))
+        )).scalars().all())
+        discussion_scores = {}
+        if discussion_ids:
+            grades = (await db.execute(
+                select(DiscussionGradeTable).where(
+                    DiscussionGradeTable.Discussionid.in_(discussion_ids),
+                    DiscussionGradeTable.Studentid.in_(student_ids),
+                ).order_by(DiscussionGradeTable.Gradeid)
+            )).scalars().all()
+            discussion_scores = {(g.Studentid, g.Discussionid): g.Score for g in grades}
+
+        row_index, cell_rows = {}, []
+        if plan.assignments:
+            row_index, cell_rows = gradebook_engine.cell_values(await _score_chunk(db, plan, enrollments, curve_max))
+        rows = []
+        for enrollment in enrollments:
+            sid = enrollment.Studentid
+            rows.append({
+                "Studentid": sid,
+                "Studentname": names.get(sid, str(sid)),
+                "Semester": enrollment.EnrollmentSemester,
+                "Course_grade": enrollment.EnrollmentGrades,
+                "Cells": [
+                    {
+                        "Assignmentid": assignment_id,
+                        "Score": text,
+                        "Score_numeric": score,
+                        "Status": status,
+                        "Late_deduction_applied": deduction,
+                        "Curved": curved,
+                    }
+                    for assignment_id, _, _, text, score, status, _, _, deduction, curved
+                    in (cell_rows[row_index[sid]] if cell_rows else ())
+                ],
+                "Discussion_cells": [
+                    {"Discussionid": did, "Score": discussion_scores.get((sid, did))} for did in discussion_ids
+                ],
+            })
+        yield rows
+
+
+# A spreadsheet opening the CSV evaluates a cell starting with one of these as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """Quote text that a spreadsheet would run as a formula; plain numbers such as -5 pass through"""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        try:
+            float(value)
+        except ValueError:
+            return "'" + value
+    return value
+
+
+def _csv_text(rows: List[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_cell(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_gradebook_export(plan: GradebookExportPlan, export_format: str) -> AsyncIterator[str]:
+    """
+    Stream the export body.
+
+    Opens its own session: the request's session is closed before a StreamingResponse
+    body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        if export_format == "csv":
+            yield _csv_text([
+                ["Studentid", "Studentname", "Semester", "Course_grade"]
+                + [f"{a.Assignmentname or ''} ({a.Assignmentid})" for a in plan.assignments]
+                + [f"{d.Discussiontitle or ''} ({d.Discussionid})" for d in plan.discussions]
+            ])
+            async for rows in _export_rows(db, plan):
+                yield _csv_text([
+                    [row["Studentid"], row["Studentname"], row["Semester"], row["Course_grade"]]
+                    + [cell["Score"] for cell in row["Cells"]]
+                    + [cell["Score"] for cell in row["Discussion_cells"]]
+                    for row in rows
+                ])
+        else:
+            async for rows in _export_rows(db, plan):
+                yield "".join(json.dumps(row) + "\n" for row in rows)
@@ -1,18 +1,23 @@
 """Gradebook service: full course gradebook with late policy and curve."""
 from datetime import datetime
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import text
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from alphagocanvas.api.models.gradebook import (
     GradebookResponse,
     GradebookRow,
     GradebookCell,
+    GradebookDiscussionCell,
 )
+from alphagocanvas.api.services import gradebook_engine
 from alphagocanvas.database.models import (
     AssignmentTable,
+    DiscussionGradeTable,
+    DiscussionTable,
     StudentEnrollmentTable,
     SubmissionTable,
     StudentTable,
@@ -20,14 +25,40 @@ from alphagocanvas.database.models import (
 )
 
 
-def _parse_score(score_str: Optional[str]) -> Optional[float]:
-    """Parse score string to float; return None if not numeric."""
-    if not score_str:
-        return None
-    try:
-        return float(score_str.strip())
-    except (ValueError, TypeError):
-        return None
+class GradebookInputs(NamedTuple):
+    """Everything a gradebook is computed from, whether read live or from the snapshot."""
+    course_name: str
+    enrollments: list
+    students: list
+    assignments: list
+    submissions: list
+    discussions: list
+    discussion_grades: list
+
+
+def submissions_query(assignment_ids: List[int]):
+    return select(
+        SubmissionTable.Submissionid,
+        SubmissionTable.Assignmentid,
+        SubmissionTable.Studentid,
+        SubmissionTable.Submissionscore,
+        SubmissionTable.Submissiongraded,
+        SubmissionTable.Submitteddate,
+    ).where(SubmissionTable.Assignmentid.in_(assignment_ids))
+
+
+def enrollments_query(course_id: int, semester: Optional[str]):
+    query = select(StudentEnrollmentTable).where(StudentEnrollmentTable.Courseid == course_id)
+    if semester:
+        query = query.where(StudentEnrollmentTable.EnrollmentSemester == semester)
+    return query
+
+
+def graded_discussions_query(course_id: int):
+    return select(DiscussionTable).where(
+        DiscussionTable.Courseid == course_id,
+        DiscussionTable.Points > 0,
+    ).order_by(DiscussionTable.Discussionid)
 
 
 def _days_late(due_iso: Optional[str], submitted_iso: Optional[str]) -> float:
@@ -45,48 +76,36 @@ def _days_late(due_iso: Optional[str], submitted_iso: Optional[str]) -> float:
         return 0.0
 
 
-def get_gradebook(
-    db: Session,
+def _empty_gradebook(
     course_id: int,
-    semester: Optional[str] = None,
-    apply_late_policy: bool = False,
-    curve_to_score: Optional[float] = None,
+    course_name: str,
+    apply_late_policy: bool,
+    curve_to_score: Optional[float],
 ) -> GradebookResponse:
-    """
-    Build full gradebook: students x assignments with scores and status.
-    Optionally apply late policy (per-assignment) and curve (scale so max = curve_to_score).
-    """
-    # Course name
+    return GradebookResponse(
+        Courseid=course_id,
+        Coursename=course_name,
+        Assignment_headers=[],
+        Rows=[],
+        Apply_late_policy=apply_late_policy,
+        Curve_to_score=curve_to_score,
+    )
+
+
+def load_gradebook_inputs(db: Session, course_id: int, semester: Optional[str] = None) -> GradebookInputs:
+    """Read the course, enrollments, students, assignments, submissions and discussion grades."""
     course = db.query(CourseTable).filter(CourseTable.Courseid == course_id).first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     course_name = course.Coursename or ""
 
     # Enrolled students (optionally filter by semester)
-    enrollment_query = db.query(StudentEnrollmentTable).filter(
-        StudentEnrollmentTable.Courseid == course_id
-    )
-    if semester:
-        enrollment_query = enrollment_query.filter(
-            StudentEnrollmentTable.EnrollmentSemester == semester
-        )
-    enrollments = enrollment_query.all()
+    enrollments = db.execute(enrollments_query(course_id, semester)).scalars().all()
     if not enrollments:
-        return GradebookResponse(
-            Courseid=course_id,
-            Coursename=course_name,
-            Assignment_headers=[],
-            Rows=[],
-            Apply_late_policy=apply_late_policy,
-            Curve_to_score=curve_to_score,
-        )
+        return GradebookInputs(course_name, [], [], [], [], [], [])
 
     student_ids = [e.Studentid for e in enrollments]
-    student_map = {}
-    for s in db.query(StudentTable).filter(StudentTable.Studentid.in_(student_ids)).all():
-        student_map[s.Studentid] = f"{s.Studentfirstname or ''} {s.Studentlastname or ''}".strip() or str(s.Studentid)
-
-    enrollment_grades = {e.Studentid: e.EnrollmentGrades for e in enrollments}
+    students = db.query(StudentTable).filter(StudentTable.Studentid.in_(student_ids)).all()
 
     # Assignments for course (include new columns if present)
     try:
@@ -96,6 +115,208 @@ def get_gradebook(
     except Exception:
         assignments = []
 
+    subs_rows = []
+    if assignments:
+        assignment_ids = [a.Assignmentid for a in assignments]
+        subs_rows = db.execute(submissions_query(assignment_ids)).fetchall()
+
+    discussions = db.execute(graded_discussions_query(course_id)).scalars().all()
+    discussion_grades = []
+    if discussions:
+        discussion_grades = db.query(DiscussionGradeTable).filter(
+            DiscussionGradeTable.Discussionid.in_([d.Discussionid for d in discussions])
+        ).order_by(DiscussionGradeTable.Gradeid).all()
+
+    return GradebookInputs(course_name, enrollments, students, assignments, subs_rows, discussions, discussion_grades)
+
+
+async def load_gradebook_inputs_async(
+    db: AsyncSession,
+    course_id: int,
+    semester: Optional[str] = None,
+) -> GradebookInputs:
+    """Async variant of load_gradebook_inputs which runs its queries on the async engine."""
+    course = (await db.execute(
+        select(CourseTable).where(CourseTable.Courseid == course_id)
+    )).scalars().first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    course_name = course.Coursename or ""
+
+    enrollments = (await db.execute(enrollments_query(course_id, semester))).scalars().all()
+    if not enrollments:
+        return GradebookInputs(course_name, [], [], [], [], [], [])
+
+    student_ids = [e.Studentid for e in enrollments]
+    students = (await db.execute(
+        select(StudentTable).where(StudentTable.Studentid.in_(student_ids))
+    )).scalars().all()
+
+    assignments = (await db.execute(
+        select(AssignmentTable).where(AssignmentTable.Courseid == course_id).order_by(AssignmentTable.Assignmentid)
+    )).scalars().all()
+
+    subs_rows = []
+    if assignments:
+        assignment_ids = [a.Assignmentid for a in assignments]
+        subs_rows = (await db.execute(submissions_query(assignment_ids))).fetchall()
+
+    discussions = (await db.execute(graded_discussions_query(course_id))).scalars().all()
+    discussion_grades = []
+    if discussions:
+        discussion_grades = (await db.execute(
+            select(DiscussionGradeTable).where(
+                DiscussionGradeTable.Discussionid.in_([d.Discussionid for d in discussions])
+            ).order_by(DiscussionGradeTable.Gradeid)
+        )).scalars().all()
+
+    return GradebookInputs(course_name, enrollments, students, assignments, subs_rows, discussions, discussion_grades)
+
+
+def get_gradebook(
+    db: Session,
+    course_id: int,
+    semester: Optional[str] = None,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """
+    Build full gradebook: students x assignments with scores and status.
+    Optionally apply late policy (per-assignment) and curve (scale so max = curve_to_score).
+    """
+    inputs = load_gradebook_inputs(db, course_id, semester)
+    return build_gradebook(course_id, inputs, apply_late_policy=apply_late_policy, curve_to_score=curve_to_score)
+
+
+async def get_gradebook_async(
+    db: AsyncSession,
+    course_id: int,
+    semester: Optional[str] = None,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """Async variant of get_gradebook which runs its queries on the async engine."""
+    inputs = await load_gradebook_inputs_async(db, course_id, semester)
+    return build_gradebook(course_id, inputs, apply_late_policy=apply_late_policy, curve_to_score=curve_to_score)
+
+
+def build_gradebook(
+    course_id: int,
+    inputs: GradebookInputs,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """Compute the gradebook response from already-loaded inputs."""
+    if not inputs.enrollments:
+        return _empty_gradebook(course_id, inputs.course_name, apply_late_policy, curve_to_score)
+
+    response = _build_gradebook(
+        course_id, inputs.course_name, inputs.enrollments, inputs.students, inputs.assignments, inputs.submissions,
+        apply_late_policy=apply_late_policy,
+        curve_to_score=curve_to_score,
+    )
+    if inputs.discussions:
+        _add_discussion_cells(response, inputs.discussions, inputs.discussion_grades)
+    return response
+
+
+def _add_discussion_cells(response: GradebookResponse, discussions: list, discussion_grades: list) -> None:
+    """Graded discussions (Points set) are reported beside the assignment cells; they are not curved."""
+    response.Discussion_headers = [
+        {"Discussionid": d.Discussionid, "Discussiontitle": d.Discussiontitle or "", "Points": d.Points}
+        for d in discussions
+    ]
+    scores = {(g.Studentid, g.Discussionid): g.Score for g in discussion_grades}
+    for row in response.Rows:
+        cells = []
+        for d in discussions:
+            score = scores.get((row.Studentid, d.Discussionid))
+            cells.append(GradebookDiscussionCell(
+                Discussionid=d.Discussionid,
+                Discussiontitle=d.Discussiontitle or "",
+                Points_possible=d.Points,
+                Score=score,
+                Score_numeric=gradebook_engine.parse_score(score),
+            ))
+        row.Discussion_cells = cells
+
+
+def student_names(students: List[StudentTable]) -> dict:
+    return {
+        s.Studentid: f"{s.Studentfirstname or ''} {s.Studentlastname or ''}".strip() or str(s.Studentid)
+        for s in students
+    }
+
+
+def _assignment_headers(assignments: List[AssignmentTable]) -> List[dict]:
+    return [
+        {
+            "Assignmentid": a.Assignmentid,
+            "Assignmentname": a.Assignmentname or "",
+            "Points": getattr(a, "Points", None) or 100,
+        }
+        for a in assignments
+    ]
+
+
+def _build_gradebook(
+    course_id: int,
+    course_name: str,
+    enrollments: List[StudentEnrollmentTable],
+    students: List[StudentTable],
+    assignments: List[AssignmentTable],
+    subs_rows: list,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """Assemble the students x assignments grid from already-fetched rows using the columnar engine."""
+    if not assignments:
+        return _build_gradebook_rowwise(
+            course_id, course_name, enrollments, students, assignments, subs_rows,
+            apply_late_policy=apply_late_policy,
+            curve_to_score=curve_to_score,
+        )
+
+    student_ids = [e.Studentid for e in enrollments]
+    frame = gradebook_engine.build_frame(student_ids, assignments, subs_rows)
+    scored = gradebook_engine.score_frame(frame, apply_late_policy=apply_late_policy, curve_to_score=curve_to_score)
+    rows = gradebook_engine.to_rows(
+        scored,
+        student_ids,
+        student_names(students),
+        {e.Studentid: e.EnrollmentGrades for e in enrollments},
+    )
+    return GradebookResponse(
+        Courseid=course_id,
+        Coursename=course_name,
+        Assignment_headers=_assignment_headers(assignments),
+        Rows=rows,
+        Apply_late_policy=apply_late_policy,
+        Curve_to_score=curve_to_score,
+    )
+
+
+def _build_gradebook_rowwise(
+    course_id: int,
+    course_name: str,
+    enrollments: List[StudentEnrollmentTable],
+    students: List[StudentTable],
+    assignments: List[AssignmentTable],
+    subs_rows: list,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """
+    Row-at-a-time builder the columnar engine replaced.
+
+    Still used for courses with no assignments, and kept as the reference for the
+    engine's equivalence tests and scripts/bench_gradebook.py.
+    """
+    student_ids = [e.Studentid for e in enrollments]
+    student_map = student_names(students)
+
+    enrollment_grades = {e.Studentid: e.EnrollmentGrades for e in enrollments}
+
     if not assignments:
         rows = [
             GradebookRow(
@@ -135,15 +356,6 @@ def get_gradebook(
             "grace_minutes": grace_mins,
         })
 
-    # All submissions for these assignments
-    subs_query = text("""
-        SELECT s.Submissionid, s.Assignmentid, s.Studentid, s.Submissionscore,
-               s.Submissiongraded, s.Submitteddate
-        FROM submissions s
-        WHERE s.Assignmentid = ANY(:assignment_ids)
-    """)
-    assignment_ids = [a.Assignmentid for a in assignments]
-    subs_rows = db.execute(subs_query, {"assignment_ids": assignment_ids}).fetchall()
     # (student_id, assignment_id) -> (score, graded, submitteddate)
     sub_map = {}
     for row in subs_rows:
@@ -175,7 +387,7 @@ def get_gradebook(
                 submission_id = sub["Submissionid"]
                 submitted_date = sub["Submitteddate"]
                 score_str = sub["Submissionscore"]
-                score_numeric = _parse_score(score_str)
+                score_numeric = gradebook_engine.parse_score(score_str)
                 if sub["Submissiongraded"]:
                     status = "graded"
                 else:
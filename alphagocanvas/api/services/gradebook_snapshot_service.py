@@ -0,0 +1,384 @@
+"""
+Materialized gradebook snapshots.
+
+Each course's gradebook inputs are persisted in gradebook_snapshots (the course header:
+assignments and graded discussions) and gradebook_snapshot_rows (one row per enrollment
+holding that student's submissions and discussion grades). Submit and grade events patch
+the affected rows inside their own transaction, so GET /gradebook reads two indexed
+tables instead of recomputing from submissions, assignments and studentenrollment.
+
+Structural changes (new assignment or enrollment, discussion points, renamed or removed
+student) drop the snapshot instead and the next read rebuilds it.
+
+Rebuilds, patches and drops all take a row lock on the course first. The course row exists
+whether or not a snapshot does, so a rebuild's read of the source tables is ordered against
+every write that touches the course: a write that commits before the rebuild's read is in
+what it reads, and one that waits on the lock patches the rebuilt snapshot afterwards.
+scripts/gradebook_snapshots.py rebuilds snapshots and checks them against a full recompute.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from alphagocanvas.api.models.gradebook import GradebookResponse
+from alphagocanvas.api.services.gradebook_service import (
+    GradebookInputs,
+    build_gradebook,
+    get_gradebook,
+    load_gradebook_inputs,
+    load_gradebook_inputs_async,
+)
+from alphagocanvas.database.models import (
+    AssignmentTable,
+    CourseTable,
+    GradebookSnapshotRowTable,
+    GradebookSnapshotTable,
+    SubmissionTable,
+)
+
+_ASSIGNMENT_FIELDS = (
+    "Assignmentid", "Assignmentname", "Points", "Duedate", "Latepolicy_percent_per_day", "Latepolicy_grace_minutes",
+)
+_DISCUSSION_FIELDS = ("Discussionid", "Discussiontitle", "Points")
+
+# Light row types standing in for the ORM objects build_gradebook normally receives
+_SnapshotAssignment = namedtuple("_SnapshotAssignment", _ASSIGNMENT_FIELDS)
+_SnapshotDiscussion = namedtuple("_SnapshotDiscussion", _DISCUSSION_FIELDS)
+_SnapshotEnrollment = namedtuple("_SnapshotEnrollment", ("Studentid", "EnrollmentGrades"))
+_SnapshotStudent = namedtuple("_SnapshotStudent", ("Studentid", "Studentfirstname", "Studentlastname"))
+_SnapshotSubmission = namedtuple("_SnapshotSubmission", (
+    "Submissionid", "Assignmentid", "Studentid", "Submissionscore", "Submissiongraded", "Submitteddate",
+))
+_SnapshotDiscussionGrade = namedtuple("_SnapshotDiscussionGrade", ("Discussionid", "Studentid", "Score"))
+
+
+def _submission_entry(submission) -> list:
+    return [
+        submission.Submissionid,
+        submission.Submissionscore,
+        bool(submission.Submissiongraded),
+        submission.Submitteddate,
+    ]
+
+
+def _snapshot_values(course_id: int, inputs: GradebookInputs) -> Tuple[dict, List[dict]]:
+    """Serialise freshly loaded inputs into the header and row values to insert."""
+    now = datetime.now().isoformat()
+    header = {
+        "Courseid": course_id,
+        "Coursename": inputs.course_name,
+        "Assignments": json.dumps([{f: getattr(a, f, None) for f in _ASSIGNMENT_FIELDS} for a in inputs.assignments]),
+        "Discussions": json.dumps([{f: getattr(d, f, None) for f in _DISCUSSION_FIELDS} for d in inputs.discussions]),
+        "Version": 0,
+        "Builtat": now,
+        "Updatedat": now,
+    }
+
+    names = {s.Studentid: (s.Studentfirstname, s.Studentlastname) for s in inputs.students}
+    submissions: Dict[int, dict] = {}
+    for row in inputs.submissions:
+        submissions.setdefault(row.Studentid, {})[str(row.Assignmentid)] = _submission_entry(row)
+    discussion_grades: Dict[int, dict] = {}
+    for grade in inputs.discussion_grades:
+        discussion_grades.setdefault(grade.Studentid, {})[str(grade.Discussionid)] = grade.Score
+
+    rows = []
+    for enrollment in inputs.enrollments:
+        firstname, lastname = names.get(enrollment.Studentid, (None, None))
+        rows.append({
+            "Courseid": course_id,
+            "Studentid": enrollment.Studentid,
+            "Studentfirstname": firstname,
+            "Studentlastname": lastname,
+            "Enrollmentsemester": enrollment.EnrollmentSemester,
+            "Coursegrade": enrollment.EnrollmentGrades,
+            "Submissions": json.dumps(submissions.get(enrollment.Studentid, {})),
+            "Discussiongrades": json.dumps(discussion_grades.get(enrollment.Studentid, {})),
+        })
+    return header, rows
+
+
+def _inputs_from_snapshot(snapshot: GradebookSnapshotTable, rows: List[GradebookSnapshotRowTable]) -> GradebookInputs:
+    assignments = [_SnapshotAssignment(**a) for a in json.loads(snapshot.Assignments or "[]")]
+    discussions = [_SnapshotDiscussion(**d) for d in json.loads(snapshot.Discussions or "[]")]
+
+    enrollments, students, submissions, discussion_grades = [], [], [], []
+    seen = set()
+    for row in rows:
+        enrollments.append(_SnapshotEnrollment(row.Studentid, row.Coursegrade))
+        # A student enrolled in several semesters has identical rows; read their cells once
+        if row.Studentid in seen:
+            continue
+        seen.add(row.Studentid)
+        students.append(_SnapshotStudent(row.Studentid, row.Studentfirstname, row.Studentlastname))
+        for assignment_id, (submission_id, score, graded, submitted) in json.loads(row.Submissions or "{}").items():
+            submissions.append(_SnapshotSubmission(
+                submission_id, int(assignment_id), row.Studentid, score, graded, submitted,
+            ))
+        for discussion_id, score in json.loads(row.Discussiongrades or "{}").items():
+            discussion_grades.append(_SnapshotDiscussionGrade(int(discussion_id), row.Studentid, score))
+
+    return GradebookInputs(
+        snapshot.Coursename or "", enrollments, students, assignments, submissions, discussions, discussion_grades,
+    )
+
+
+def _rows_query(course_id: int, semester: Optional[str] = None):
+    query = select(GradebookSnapshotRowTable).where(GradebookSnapshotRowTable.Courseid == course_id)
+    if semester:
+        query = query.where(GradebookSnapshotRowTable.Enrollmentsemester == semester)
+    return query.order_by(GradebookSnapshotRowTable.Rowid)
+
+
+def _lock_course(course_id: int):
+    """FOR NO KEY UPDATE on the course row, which serialises snapshot writers with rebuilds"""
+    return select(CourseTable.Courseid).where(CourseTable.Courseid == course_id).with_for_update(key_share=True)
+
+
+def _delete_statements(course_id: int):
+    return (
+        delete(GradebookSnapshotRowTable).where(GradebookSnapshotRowTable.Courseid == course_id),
+        delete(GradebookSnapshotTable).where(GradebookSnapshotTable.Courseid == course_id),
+    )
+
+
+# ============== REBUILD AND READ ==============
+
+def rebuild_snapshot(db: Session, course_id: int) -> GradebookSnapshotTable:
+    """Recompute a course's snapshot from the source tables and replace the stored one"""
+    db.execute(_lock_course(course_id))
+    header, rows = _snapshot_values(course_id, load_gradebook_inputs(db, course_id))
+    try:
+        for statement in _delete_statements(course_id):
+            db.execute(statement)
+        db.execute(insert(GradebookSnapshotTable), [header])
+        if rows:
+            db.execute(insert(GradebookSnapshotRowTable), rows)
+        db.commit()
+    except IntegrityError:
+        # Another request rebuilt the same course concurrently; use its snapshot
+        db.rollback()
+    return db.get(GradebookSnapshotTable, course_id, populate_existing=True)
+
+
+async def rebuild_snapshot_async(db: AsyncSession, course_id: int) -> GradebookSnapshotTable:
+    """Async variant of rebuild_snapshot which runs its queries on the async engine"""
+    await db.execute(_lock_course(course_id))
+    header, rows = _snapshot_values(course_id, await load_gradebook_inputs_async(db, course_id))
+    try:
+        for statement in _delete_statements(course_id):
+            await db.execute(statement)
+        await db.execute(insert(GradebookSnapshotTable), [header])
+        if rows:
+            await db.execute(insert(GradebookSnapshotRowTable), rows)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+    return await db.get(GradebookSnapshotTable, course_id, populate_existing=True)
+
+
+def get_gradebook_from_snapshot(
+    db: Session,
+    course_id: int,
+    semester: Optional[str] = None,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """Serve the gradebook from the course snapshot, building it first if there is none"""
+    snapshot = db.get(GradebookSnapshotTable, course_id)
+    if snapshot is None:
+        snapshot = rebuild_snapshot(db, course_id)
+    rows = db.execute(_rows_query(course_id, semester)).scalars().all()
+    return build_gradebook(
+        course_id, _inputs_from_snapshot(snapshot, rows),
+        apply_late_policy=apply_late_policy,
+        curve_to_score=curve_to_score,
+    )
+
+
+async def get_gradebook_from_snapshot_async(
+    db: AsyncSession,
+    course_id: int,
+    semester: Optional[str] = None,
+    apply_late_policy: bool = False,
+    curve_to_score: Optional[float] = None,
+) -> GradebookResponse:
+    """Async variant of get_gradebook_from_snapshot which runs its queries on the async engine"""
+    snapshot = await db.get(GradebookSnapshotTable, course_id)
+    if snapshot is None:
+        snapshot = await rebuild_snapshot_async(db, course_id)
+    rows = (await db.execute(_rows_query(course_id, semester))).scalars().all()
+    return build_gradebook(
+        course_id, _inputs_from_snapshot(snapshot, rows),
+        apply_late_policy=apply_late_policy,
+        curve_to_score=curve_to_score,
+    )
+
+
+# ============== INCREMENTAL UPDATES ==============
+# Called by the write paths before they commit, so the snapshot changes atomically with the source row.
+
+def _locked_snapshot(db: Session, course_id: int) -> Optional[GradebookSnapshotTable]:
+    """
+    Take the course lock, then read the header. Taken even when there is no snapshot, so a
+    rebuild that has already read the source tables finishes before this write commits and
+    the header it inserts is visible here (and patched) rather than missed.
+    """
+    db.execute(_lock_course(course_id))
+    return db.query(GradebookSnapshotTable).filter(
+        GradebookSnapshotTable.Courseid == course_id
+    ).populate_existing().first()
+
+
+def _patch_rows(db: Session, course_id: int, student_id: int, column: str, key: str, value,
+                semester: Optional[str] = None) -> None:
+    snapshot = _locked_snapshot(db, course_id)
+    if snapshot is None:
+        return  # built lazily on the next read
+
+    row_query = db.query(GradebookSnapshotRowTable).filter(
+        GradebookSnapshotRowTable.Courseid == course_id,
+        GradebookSnapshotRowTable.Studentid == student_id,
+    )
+    if semester is not None:
+        row_query = row_query.filter(GradebookSnapshotRowTable.Enrollmentsemester == semester)
+    rows = row_query.all()
+    if not rows:
+        return  # not enrolled, so not part of the gradebook
+
+    for row in rows:
+        if key is None:
+            setattr(row, column, value)
+        else:
+            data = json.loads(getattr(row, column) or "{}")
+            data[key] = value
+            setattr(row, column, json.dumps(data))
+    snapshot.Version = (snapshot.Version or 0) + 1
+    snapshot.Updatedat = datetime.now().isoformat()
+
+
+def apply_submission(db: Session, submission: SubmissionTable) -> None:
+    """Write a created, resubmitted or graded submission into its course snapshot"""
+    course_id = db.query(AssignmentTable.Courseid).filter(
+        AssignmentTable.Assignmentid == submission.Assignmentid
+    ).scalar()
+    if course_id is None:
+        return
+    _patch_rows(db, course_id, submission.Studentid, "Submissions", str(submission.Assignmentid),
+                _submission_entry(submission))
+
+
+def apply_submissions(db: Session, course_id: int, submissions: Sequence) -> None:
+    """
+    Write many graded submissions of one course into its snapshot at once: one header lock,
+    one read of the affected rows and one version bump, however many submissions there are
+    """
+    entries: Dict[int, Dict[str, list]] = {}
+    for submission in submissions:
+        entries.setdefault(submission.Studentid, {})[str(submission.Assignmentid)] = _submission_entry(submission)
+    if not entries:
+        return
+
+    snapshot = _locked_snapshot(db, course_id)
+    if snapshot is None:
+        return  # built lazily on the next read
+
+    rows = db.query(GradebookSnapshotRowTable).filter(
+        GradebookSnapshotRowTable.Courseid == course_id,
+        GradebookSnapshotRowTable.Studentid.in_(list(entries)),
+    ).all()
+    for row in rows:
+        data = json.loads(row.Submissions or "{}")
+        data.update(entries[row.Studentid])
+        row.Submissions = json.dumps(data)
+    snapshot.Version = (snapshot.Version or 0) + 1
+    snapshot.Updatedat = datetime.now().isoformat()
+
+
+def apply_discussion_grade(db: Session, course_id: int, student_id: int, discussion_id: int,
+                           score: Optional[str]) -> None:
+    """Write a discussion grade into its course snapshot"""
+    _patch_rows(db, course_id, student_id, "Discussiongrades", str(discussion_id), score)
+
+
+def apply_course_grade(db: Session, course_id: int, student_id: int, semester: str, grade: Optional[str]) -> None:
+    """Write an enrollment's final course grade into its course snapshot"""
+    _patch_rows(db, course_id, student_id, "Coursegrade", None, grade, semester=semester)
+
+
+def invalidate_snapshot(db: Session, course_id: int) -> None:
+    """Drop a course's snapshot after a structural change; the next read rebuilds it"""
+    db.execute(_lock_course(course_id))
+    for statement in _delete_statements(course_id):
+        db.execute(statement)
+
+
+def invalidate_student_snapshots(db: Session, student_id: int) -> None:
+    """Drop every snapshot that has a row for this student"""
+    course_ids = db.execute(
+        select(GradebookSnapshotRowTable.Courseid).where(GradebookSnapshotRowTable.Studentid == student_id).distinct()
+    ).scalars().all()
+    for course_id in course_ids:
+        invalidate_snapshot(db, course_id)
+
+
+# ============== CONSISTENCY CHECK ==============
+
+def _rows_by_student(response: GradebookResponse) -> Dict[int, List[str]]:
+    rows: Dict[int, List[str]] = {}
+    for row in response.Rows:
+        rows.setdefault(row.Studentid, []).append(json.dumps(row.model_dump(), sort_keys=True))
+    return {student_id: sorted(dumps) for student_id, dumps in rows.items()}
+
+
+def _cell_differences(live_row: str, stored_row: str) -> List[str]:
+    live_cells = {c["Assignmentid"]: c for c in json.loads(live_row)["Cells"]}
+    stored_cells = {c["Assignmentid"]: c for c in json.loads(stored_row)["Cells"]}
+    return [
+        f"assignment {assignment_id}: live {live_cells.get(assignment_id)} != snapshot {stored_cells.get(assignment_id)}"
+        for assignment_id in sorted(set(live_cells) | set(stored_cells))
+        if live_cells.get(assignment_id) != stored_cells.get(assignment_id)
+    ]
+
+
+def check_snapshot(db: Session, course_id: int) -> List[str]:
+    """
+    Compare a course's stored snapshot with a full recompute.
+
+    :return: human-readable differences; empty when the snapshot is consistent
+    """
+    snapshot = db.get(GradebookSnapshotTable, course_id, populate_existing=True)
+    if snapshot is None:
+        return [f"course {course_id}: no snapshot"]
+    rows = db.execute(_rows_query(course_id)).scalars().all()
+    stored = build_gradebook(course_id, _inputs_from_snapshot(snapshot, rows), apply_late_policy=True)
+    live = get_gradebook(db, course_id, apply_late_policy=True)
+
+    problems = []
+    for field in ("Coursename", "Assignment_headers", "Discussion_headers"):
+        if getattr(live, field) != getattr(stored, field):
+            problems.append(f"course {course_id}: {field} differs")
+
+    live_rows, stored_rows = _rows_by_student(live), _rows_by_student(stored)
+    for student_id in sorted(set(live_rows) | set(stored_rows)):
+        expected, actual = live_rows.get(student_id), stored_rows.get(student_id)
+        if expected == actual:
+            continue
+        if actual is None:
+            problems.append(f"course {course_id}: student {student_id} missing from snapshot")
+        elif expected is None:
+            problems.append(f"course {course_id}: student {student_id} in snapshot but not enrolled")
+        elif len(expected) != len(actual):
+            problems.append(f"course {course_id}: student {student_id} has {len(actual)} snapshot rows, "
+                            f"expected {len(expected)}")
+        else:
+            details = [d for e, a in zip(expected, actual) for d in _cell_differences(e, a)]
+            problems.append(f"course {course_id}: student {student_id} row differs"
+                            + (f" ({'; '.join(details)})" if details else ""))
+    return problems
@@ -1,8 +1,19 @@
+"""
+Conversations and the inbox.
+
+The inbox never reads messages: each conversation carries a snapshot of its newest message
+and each participant row carries that user's unread count and a copy of the conversation's
+Lastmessagedate. send_message maintains all three in the same transaction as the message
+insert, with increments done in SQL so concurrent senders cannot lose a count. A user's
+inbox page is then one range of the (Userid, Lastmessagedate, Conversationid) index.
+"""
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 
 from alphagocanvas.api.models.message import (
     MessageCreateRequest, ConversationCreateRequest, MessageResponse,
@@ -12,7 +23,30 @@ from alphagocanvas.api.models.message import (
 from alphagocanvas.database.models import (
     ConversationTable, ConversationParticipantTable, MessageTable
 )
+from alphagocanvas.api.services import push
 from alphagocanvas.api.utils.auth import get_user_name
+from alphagocanvas.api.utils.cursor import decode_cursor, encode_cursor
+
+# Characters of the newest message kept on the conversation for inbox previews
+MESSAGE_PREVIEW_LENGTH = 500
+# Participants listed when a conversation is opened; Participantcount has the total
+MAX_DETAIL_PARTICIPANTS = 50
+
+
+def _preview(content: str) -> str:
+    return content[:MESSAGE_PREVIEW_LENGTH]
+
+
+def _message_event(message: MessageTable) -> dict:
+    """Push payload announcing a new message"""
+    return {
+        "Conversationid": message.Conversationid,
+        "Messageid": message.Messageid,
+        "Senderid": message.Senderid,
+        "Sendername": message.Sendername,
+        "Preview": _preview(message.Messagecontent),
+        "Createdat": message.Createdat,
+    }
 
 
 def create_conversation(
@@ -25,14 +59,16 @@ def create_conversation(
     """Create a new conversation with initial message"""
     
     # Create conversation
+    now = datetime.now().isoformat()
     conversation = ConversationTable(
         Conversationsubject=request.Conversationsubject,
-        Lastmessagedate=datetime.now().isoformat(),
-        Createdat=datetime.now().isoformat()
+        Lastmessagedate=now,
+        Createdat=now,
+        Lastmessagepreview=_preview(request.Initialmessage),
+        Lastmessagesendername=sender_name
     )
     db.add(conversation)
-    db.commit()
-    db.refresh(conversation)
+    db.flush()
     
     # Add sender as participant
     sender_participant = ConversationParticipantTable(
@@ -40,7 +76,9 @@ def create_conversation(
         Userid=sender_id,
         Userrole=sender_role,
         Username=sender_name,
-        Isunread=False
+        Isunread=False,
+        Unreadcount=0,
+        Lastmessagedate=now
     )
     db.add(sender_participant)
     
@@ -54,7 +92,9 @@ def create_conversation(
             Userid=recipient_id,
             Userrole=recipient_role,
             Username=recipient_name,
-            Isunread=True  # New conversation is unread for recipients
+            Isunread=True,  # New conversation is unread for recipients
+            Unreadcount=1,
+            Lastmessagedate=now
         )
         db.add(recipient_participant)
     
@@ -66,11 +106,16 @@ def create_conversation(
         Senderrole=sender_role,
         Sendername=sender_name,
         Isread=True,
-        Createdat=datetime.now().isoformat()
+        Createdat=now
     )
     db.add(message)
+    db.flush()
+    conversation.Lastmessageid = message.Messageid
+    sender_participant.Lastreadmessageid = message.Messageid
+    push.publish_after_commit(
+        db, [push.user_topic(user_id) for user_id in [sender_id, *request.Recipientids]], "message", _message_event(message)
+    )
     db.commit()
-    db.refresh(message)
     
     # Build response
     participants = get_participants(db, conversation.Conversationid)
@@ -96,11 +141,11 @@ def create_conversation(
     )
 
 
-def get_participants(db: Session, conversation_id: int) -> List[ParticipantInfo]:
-    """Get all participants in a conversation"""
+def get_participants(db: Session, conversation_id: int, limit: Optional[int] = None) -> List[ParticipantInfo]:
+    """Get the participants in a conversation, in the order they were added (the first limit of them)"""
     participants = db.query(ConversationParticipantTable).filter(
         ConversationParticipantTable.Conversationid == conversation_id
-    ).all()
+    ).order_by(ConversationParticipantTable.Participantid).limit(limit).all()
     
     return [ParticipantInfo(
         Userid=p.Userid,
@@ -110,31 +155,73 @@ def get_participants(db: Session, conversation_id: int) -> List[ParticipantInfo]
     ) for p in participants]
 
 
-def get_inbox(db: Session, user_id: int) -> InboxResponse:
-    """Get user's inbox with all conversations"""
-    
-    # Get conversations where user is a participant
-    participant_convos = db.query(ConversationParticipantTable).filter(
-        ConversationParticipantTable.Userid == user_id
-    ).all()
-    
-    conversation_ids = [p.Conversationid for p in participant_convos]
-    unread_map = {p.Conversationid: p.Isunread for p in participant_convos}
-    
-    if not conversation_ids:
-        return InboxResponse(
-            Totalconversations=0,
-            Unreadconversations=0,
-            Conversations=[]
-        )
+def _inbox_statements(user_id: int, limit: int, cursor: Optional[str]):
+    """The totals and page queries behind get_inbox and get_inbox_async"""
+    me = ConversationParticipantTable
+    totals = select(
+        func.count(me.Participantid),
+        func.coalesce(func.sum(case((me.Unreadcount > 0, 1), else_=0)), 0),
+        func.coalesce(func.sum(me.Unreadcount), 0),
+    ).where(me.Userid == user_id)
 
-    conversations = db.query(ConversationTable).filter(
-        ConversationTable.Conversationid.in_(conversation_ids)
-    ).order_by(ConversationTable.Lastmessagedate.desc()).all()
+    page = select(ConversationTable, me.Unreadcount, me.Lastmessagedate).join(
+        me, me.Conversationid == ConversationTable.Conversationid
+    ).where(me.Userid == user_id)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor, str, int)
+        page = page.where(tuple_(me.Lastmessagedate, me.Conversationid) < tuple_(after_date, after_id))
+    # One row past the page tells whether there is another
+    page = page.order_by(me.Lastmessagedate.desc(), me.Conversationid.desc()).limit(limit + 1)
+    return totals, page
 
-    participants = db.query(ConversationParticipantTable).filter(
+
+def _participants_statement(conversation_ids: Sequence[int]):
+    return select(ConversationParticipantTable).where(
         ConversationParticipantTable.Conversationid.in_(conversation_ids)
-    ).all()
+    ).order_by(ConversationParticipantTable.Participantid)
+
+
+def get_inbox(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None) -> InboxResponse:
+    """
+    A page of the user's inbox, most recently active first.
+    
+    Keyset pagination on the participant row's (Lastmessagedate, Conversationid); the last
+    message and unread count come from the denormalized columns, so a page costs three
+    small queries however many messages the user's conversations hold.
+    """
+    totals_statement, page_statement = _inbox_statements(user_id, limit, cursor)
+    totals = db.execute(totals_statement).one()
+    rows = db.execute(page_statement).all()
+    conversation_ids = [conversation.Conversationid for conversation, _, _ in rows[:limit]]
+    participants = db.execute(_participants_statement(conversation_ids)).scalars().all() if conversation_ids else []
+
+    return _build_inbox(totals, rows, participants, limit)
+
+
+async def get_inbox_async(
+    db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None
+) -> InboxResponse:
+    """Async variant of get_inbox which runs its queries on the async engine."""
+    totals_statement, page_statement = _inbox_statements(user_id, limit, cursor)
+    totals = (await db.execute(totals_statement)).one()
+    rows = (await db.execute(page_statement)).all()
+    conversation_ids = [conversation.Conversationid for conversation, _, _ in rows[:limit]]
+    participants = (
+        (await db.execute(_participants_statement(conversation_ids))).scalars().all() if conversation_ids else []
+    )
+
+    return _build_inbox(totals, rows, participants, limit)
+
+
+def _build_inbox(
+    totals: Tuple[int, int, int],
+    rows: Sequence[Tuple[ConversationTable, Optional[int], Optional[str]]],
+    participants: List[ConversationParticipantTable],
+    limit: int
+) -> InboxResponse:
+    """Assemble the inbox response from already-fetched rows"""
+    total_conversations, unread_conversations, unread_messages = totals
+
     participants_map: Dict[int, List[ParticipantInfo]] = {}
     for participant in participants:
         conversation_participants = participants_map.setdefault(participant.Conversationid, [])
@@ -147,81 +234,100 @@ def get_inbox(db: Session, user_id: int) -> InboxResponse:
             )
         )
 
-    messages = db.query(MessageTable).filter(
-        MessageTable.Conversationid.in_(conversation_ids)
-    ).order_by(
-        MessageTable.Conversationid,
-        MessageTable.Createdat.desc()
-    ).all()
-    last_message_map: Dict[int, MessageTable] = {}
-    for message in messages:
-        if message.Conversationid not in last_message_map:
-            last_message_map[message.Conversationid] = message
-    
-    convo_responses = []
-    unread_count = 0
-    
-    for convo in conversations:
-        convo_participants = participants_map.get(convo.Conversationid, [])
-        last_message = last_message_map.get(convo.Conversationid)
-        
-        is_unread = unread_map.get(convo.Conversationid, False)
-        if is_unread:
-            unread_count += 1
-        
-        convo_responses.append(ConversationResponse(
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        _, _, last_date = rows[-1]
+        next_cursor = encode_cursor(last_date, rows[-1][0].Conversationid)
+
+    convo_responses = [
+        ConversationResponse(
             Conversationid=convo.Conversationid,
             Conversationsubject=convo.Conversationsubject,
             Lastmessagedate=convo.Lastmessagedate,
-            Participants=convo_participants,
-            Unreadcount=1 if is_unread else 0,
-            Lastmessage=last_message.Messagecontent if last_message else None,
+            Participants=participants_map.get(convo.Conversationid, []),
+            Unreadcount=unread_count or 0,
+            Lastmessage=convo.Lastmessagepreview,
+            Lastmessagesendername=convo.Lastmessagesendername,
             Createdat=convo.Createdat
-        ))
+        )
+        for convo, unread_count, _ in rows
+    ]
     
     return InboxResponse(
-        Totalconversations=len(convo_responses),
-        Unreadconversations=unread_count,
-        Conversations=convo_responses
+        Totalconversations=total_conversations,
+        Unreadconversations=unread_conversations,
+        Unreadmessages=unread_messages,
+        Conversations=convo_responses,
+        Nextcursor=next_cursor
     )
 
 
-def get_conversation(db: Session, conversation_id: int, user_id: int) -> ConversationDetailResponse:
-    """Get a conversation with all messages"""
+def get_conversation(
+    db: Session,
+    conversation_id: int,
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> ConversationDetailResponse:
+    """
+    A conversation with a page of its messages, newest page first.
     
-    # Verify user is a participant
-    participant = db.query(ConversationParticipantTable).filter(
-        ConversationParticipantTable.Conversationid == conversation_id,
+    Keyset pagination on (Createdat, Messageid) walks back through older messages, and at
+    most MAX_DETAIL_PARTICIPANTS participants are listed, so a long course-wide thread
+    opens with the same few queries as a short one.
+    
+    Opening the newest page advances the user's read position. The write is skipped when
+    nothing new arrived since the last open, so repeated opens (tab switches, polling) cost
+    reads only; it is also guarded on the unread count read here, so a message that lands
+    in between stays unread rather than being cleared unseen.
+    """
+    row = db.query(ConversationTable, ConversationParticipantTable).join(
+        ConversationParticipantTable,
+        ConversationParticipantTable.Conversationid == ConversationTable.Conversationid
+    ).filter(
+        ConversationTable.Conversationid == conversation_id,
         ConversationParticipantTable.Userid == user_id
     ).first()
     
-    if not participant:
+    # Participants cannot outlive their conversation, so no row means not a participant
+    if not row:
         raise HTTPException(status_code=403, detail="Not a participant in this conversation")
+    conversation, participant = row
     
-    conversation = db.query(ConversationTable).filter(
-        ConversationTable.Conversationid == conversation_id
-    ).first()
+    query = db.query(MessageTable).filter(MessageTable.Conversationid == conversation_id)
+    if cursor:
+        before_date, before_id = decode_cursor(cursor, str, int)
+        query = query.filter(tuple_(MessageTable.Createdat, MessageTable.Messageid) < tuple_(before_date, before_id))
+    # One row past the page tells whether there are older messages
+    messages = query.order_by(MessageTable.Createdat.desc(), MessageTable.Messageid.desc()).limit(limit + 1).all()
     
-    if not conversation:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].Createdat, messages[-1].Messageid)
+    messages.reverse()
     
-    # Mark as read for this user
-    participant.Isunread = False
-    db.commit()
+    # Others' read positions give the receipts on this user's own messages
+    others = ConversationParticipantTable.Userid != user_id
+    participant_count, read_by_all = db.query(
+        func.count(ConversationParticipantTable.Participantid),
+        func.min(case((others, func.coalesce(ConversationParticipantTable.Lastreadmessageid, 0)))),
+    ).filter(ConversationParticipantTable.Conversationid == conversation_id).one()
+    participants = get_participants(db, conversation_id, limit=MAX_DETAIL_PARTICIPANTS)
     
-    # Get messages
-    messages = db.query(MessageTable).filter(
-        MessageTable.Conversationid == conversation_id
-    ).order_by(MessageTable.Createdat).all()
-    
-    participants = get_participants(db, conversation_id)
+    if cursor is None:
+        _mark_read(db, participant, max([conversation.Lastmessageid or 0] + [m.Messageid for m in messages]))
     
     return ConversationDetailResponse(
         Conversationid=conversation.Conversationid,
         Conversationsubject=conversation.Conversationsubject,
         Lastmessagedate=conversation.Lastmessagedate,
         Participants=participants,
-        Unreadcount=0,
+        Participantcount=participant_count,
+        Unreadcount=0 if cursor is None else participant.Unreadcount or 0,
+        Lastmessage=conversation.Lastmessagepreview,
+        Lastmessagesendername=conversation.Lastmessagesendername,
         Createdat=conversation.Createdat,
         Messages=[MessageResponse(
             Messageid=m.Messageid,
@@ -230,12 +336,49 @@ def get_conversation(db: Session, conversation_id: int, user_id: int) -> Convers
             Senderid=m.Senderid,
             Senderrole=m.Senderrole,
             Sendername=m.Sendername,
-            Isread=m.Isread,
+            # Everything else is being read now; the user's own messages are read once every other participant has
+            Isread=m.Senderid != user_id or (read_by_all is not None and m.Messageid <= read_by_all),
             Createdat=m.Createdat
-        ) for m in messages]
+        ) for m in messages],
+        Nextcursor=next_cursor
     )
 
 
+def _mark_read(db: Session, participant: ConversationParticipantTable, read_through: int) -> bool:
+    """Advance a participant's read position and clear their unread count, if there is anything to clear"""
+    unread = participant.Unreadcount or 0
+    if not unread and not participant.Isunread and (participant.Lastreadmessageid or 0) >= read_through:
+        return False
+    
+    participants = ConversationParticipantTable
+    updated = db.execute(
+        update(participants).where(
+            participants.Participantid == participant.Participantid,
+            func.coalesce(participants.Unreadcount, 0) == unread,
+            # Nothing to do if another request already read this far
+            or_(
+                func.coalesce(participants.Unreadcount, 0) > 0,
+                participants.Isunread.is_(True),
+                func.coalesce(participants.Lastreadmessageid, 0) < read_through,
+            )
+        ).values(
+            Unreadcount=0,
+            Isunread=False,
+            Lastreadmessageid=case(
+                (func.coalesce(participants.Lastreadmessageid, 0) < read_through, read_through),
+                else_=participants.Lastreadmessageid
+            )
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if updated:
+        # The user's other tabs and devices clear their badge
+        push.publish_after_commit(db, [push.user_topic(participant.Userid)], "read", {
+            "Conversationid": participant.Conversationid, "Lastreadmessageid": read_through
+        })
+    db.commit()
+    return updated > 0
+
+
 def send_message(
     db: Session,
     conversation_id: int,
@@ -256,6 +399,7 @@ def send_message(
         raise HTTPException(status_code=403, detail="Not a participant in this conversation")
     
     # Create message
+    now = datetime.now().isoformat()
     message = MessageTable(
         Messagecontent=request.Messagecontent,
         Conversationid=conversation_id,
@@ -263,22 +407,40 @@ def send_message(
         Senderrole=sender_role,
         Sendername=sender_name,
         Isread=False,
-        Createdat=datetime.now().isoformat()
+        Createdat=now
     )
     db.add(message)
+    db.flush()
     
-    # Update conversation last message date
-    conversation = db.query(ConversationTable).filter(
-        ConversationTable.Conversationid == conversation_id
-    ).first()
-    if conversation:
-        conversation.Lastmessagedate = datetime.now().isoformat()
+    # Snapshot the last message; the guard keeps a slower, older send from overwriting a newer one
+    db.execute(
+        update(ConversationTable).where(
+            ConversationTable.Conversationid == conversation_id,
+            or_(ConversationTable.Lastmessageid.is_(None), ConversationTable.Lastmessageid < message.Messageid)
+        ).values(
+            Lastmessagedate=now,
+            Lastmessageid=message.Messageid,
+            Lastmessagepreview=_preview(message.Messagecontent),
+            Lastmessagesendername=sender_name
+        ).execution_options(synchronize_session=False)
+    )
     
-    # Mark as unread for other participants
-    db.query(ConversationParticipantTable).filter(
-        ConversationParticipantTable.Conversationid == conversation_id,
-        ConversationParticipantTable.Userid != sender_id
-    ).update({"Isunread": True})
+    # Move the conversation to the top of every participant's inbox and count it unread
+    # for the others, incrementing in SQL rather than read-modify-write
+    participants = ConversationParticipantTable
+    is_recipient = participants.Userid != sender_id
+    participant_ids = db.execute(
+        update(participants).where(participants.Conversationid == conversation_id).values(
+            Unreadcount=case((is_recipient, func.coalesce(participants.Unreadcount, 0) + 1), else_=participants.Unreadcount),
+            Isunread=case((is_recipient, True), else_=participants.Isunread),
+            Lastmessagedate=case(
+                (func.coalesce(participants.Lastmessagedate, "") < now, now), else_=participants.Lastmessagedate
+            )
+        ).returning(participants.Userid).execution_options(synchronize_session=False)
+    ).scalars().all()
+    push.publish_after_commit(
+        db, [push.user_topic(user_id) for user_id in participant_ids], "message", _message_event(message)
+    )
     
     db.commit()
     db.refresh(message)
@@ -293,3 +455,72 @@ def send_message(
         Isread=message.Isread,
         Createdat=message.Createdat
     )
+
+
+def backfill_inbox(db: Session) -> Tuple[int, int]:
+    """
+    Fill the inbox snapshot and counters for conversations and participants written before
+    they existed; rows already filled are left alone, so it is safe to re-run.
+    
+    Without a read position the unread count is estimated: for a conversation flagged
+    unread, the messages from others since the user's own last message (at least one),
+    and the read position is set to match.
+    Returns the (conversations, participants) updated.
+    """
+    latest = select(MessageTable.Messageid).where(
+        MessageTable.Conversationid == ConversationTable.Conversationid
+    ).order_by(MessageTable.Createdat.desc(), MessageTable.Messageid.desc()).limit(1).scalar_subquery()
+    conversations = db.execute(
+        update(ConversationTable).where(ConversationTable.Lastmessageid.is_(None)).values(Lastmessageid=latest)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    def last_message(column):
+        return select(column).where(MessageTable.Messageid == ConversationTable.Lastmessageid).scalar_subquery()
+    
+    db.execute(
+        update(ConversationTable).where(
+            ConversationTable.Lastmessagepreview.is_(None), ConversationTable.Lastmessageid.isnot(None)
+        ).values(
+            Lastmessagepreview=func.substr(last_message(MessageTable.Messagecontent), 1, MESSAGE_PREVIEW_LENGTH),
+            Lastmessagesendername=last_message(MessageTable.Sendername)
+        ).execution_options(synchronize_session=False)
+    )
+    
+    participants = ConversationParticipantTable
+    own = aliased(MessageTable)
+    own_last = select(func.max(own.Createdat)).where(
+        own.Conversationid == participants.Conversationid, own.Senderid == participants.Userid
+    ).correlate(participants).scalar_subquery()
+    since_own_last = select(func.count(MessageTable.Messageid)).where(
+        MessageTable.Conversationid == participants.Conversationid,
+        MessageTable.Senderid != participants.Userid,
+        MessageTable.Createdat > func.coalesce(own_last, "")
+    ).correlate(participants).scalar_subquery()
+    conversation_date = select(ConversationTable.Lastmessagedate).where(
+        ConversationTable.Conversationid == participants.Conversationid
+    ).scalar_subquery()
+    updated_participants = db.execute(
+        update(participants).where(participants.Lastmessagedate.is_(None)).values(
+            Lastmessagedate=conversation_date,
+            Unreadcount=case(
+                (participants.Isunread.is_(True), case((since_own_last > 0, since_own_last), else_=1)), else_=0
+            )
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    
+    # Read positions: everything for conversations already read, otherwise up to the user's own last message
+    own_last_id = select(func.max(own.Messageid)).where(
+        own.Conversationid == participants.Conversationid, own.Senderid == participants.Userid
+    ).correlate(participants).scalar_subquery()
+    conversation_last_id = select(ConversationTable.Lastmessageid).where(
+        ConversationTable.Conversationid == participants.Conversationid
+    ).scalar_subquery()
+    db.execute(
+        update(participants).where(participants.Lastreadmessageid.is_(None)).values(
+            Lastreadmessageid=case((participants.Isunread.is_(True), own_last_id), else_=conversation_last_id)
+        ).execution_options(synchronize_session=False)
+    )
+    
+    db.commit()
+    return conversations, updated_participants
@@ -4,7 +4,8 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import text
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from alphagocanvas.api.models.module import (
@@ -124,6 +125,69 @@ def get_modules_by_course(db: Session, course_id: int, include_unpublished: bool
     )
 
 
+async def get_modules_by_course_async(
+    db: AsyncSession, course_id: int, include_unpublished: bool = True
+) -> ModuleListResponse:
+    """Async variant of get_modules_by_course which runs its queries on the async engine."""
+    course_query = text('SELECT "Coursename" FROM courses WHERE "Courseid" = :courseid')
+    course = (await db.execute(course_query, {"courseid": course_id})).fetchone()
+    course_name = course.Coursename if course else None
+
+    modules_query = select(ModuleTable).where(ModuleTable.Courseid == course_id)
+    if not include_unpublished:
+        modules_query = modules_query.where(ModuleTable.Modulepublished == True)
+    modules = (await db.execute(modules_query.order_by(ModuleTable.Moduleposition))).scalars().all()
+
+    module_ids = [mod.Moduleid for mod in modules]
+    items = []
+    if module_ids:
+        items = (await db.execute(
+            select(ModuleItemTable)
+            .where(ModuleItemTable.Moduleid.in_(module_ids))
+            .order_by(ModuleItemTable.Moduleid, ModuleItemTable.Itemposition)
+        )).scalars().all()
+
+    assignment_ids, quiz_ids, file_ids = _collect_reference_ids(items)
+    assignments = quizzes = files = []
+    if assignment_ids:
+        assignments = (await db.execute(
+            select(AssignmentTable).where(AssignmentTable.Assignmentid.in_(assignment_ids))
+        )).scalars().all()
+    if quiz_ids:
+        quizzes = (await db.execute(
+            select(QuizTable).where(QuizTable.quizid.in_(quiz_ids))
+        )).scalars().all()
+    if file_ids:
+        files = (await db.execute(
+            select(FileTable).where(FileTable.Fileid.in_(file_ids))
+        )).scalars().all()
+
+    reference_map = _reference_map_from_rows(assignments, quizzes, files)
+    items_by_module: Dict[int, List[ModuleItemResponse]] = defaultdict(list)
+    for response in _item_responses(items, reference_map):
+        items_by_module[response.Moduleid].append(response)
+
+    module_responses = []
+    for mod in modules:
+        module_responses.append(ModuleResponse(
+            Moduleid=mod.Moduleid,
+            Modulename=mod.Modulename,
+            Moduledescription=mod.Moduledescription,
+            Moduleposition=mod.Moduleposition or 0,
+            Modulepublished=mod.Modulepublished or False,
+            Courseid=mod.Courseid,
+            Createdat=mod.Createdat,
+            Items=items_by_module.get(mod.Moduleid, [])
+        ))
+
+    return ModuleListResponse(
+        Courseid=course_id,
+        Coursename=course_name,
+        Totalmodules=len(module_responses),
+        Modules=module_responses
+    )
+
+
 def update_module(db: Session, module_id: int, request: ModuleUpdateRequest) -> ModuleResponse:
     """Update a module"""
     module = db.query(ModuleTable).filter(ModuleTable.Moduleid == module_id).first()
@@ -228,7 +292,12 @@ def build_module_item_responses(
     db: Session, items: List[ModuleItemTable]
 ) -> List[ModuleItemResponse]:
     reference_map = get_item_reference_info_map(db, items)
+    return _item_responses(items, reference_map)
 
+
+def _item_responses(
+    items: List[ModuleItemTable], reference_map: Dict[Tuple[str, Optional[int]], dict]
+) -> List[ModuleItemResponse]:
     item_responses = []
     now_iso = datetime.now().isoformat()
     for item in items:
@@ -262,61 +331,65 @@ def get_item_reference_info_map(
     Build reference info in bulk to avoid per-item database queries.
     Key format: (item_type, reference_id)
     """
-    reference_map: Dict[Tuple[str, Optional[int]], dict] = {}
     if not items:
-        return reference_map
+        return {}
 
-    assignment_ids = sorted(
-        {
-            int(item.Referenceid)
-            for item in items
-            if item.Itemtype == "assignment" and item.Referenceid is not None
-        }
-    )
-    quiz_ids = sorted(
-        {
-            int(item.Referenceid)
-            for item in items
-            if item.Itemtype == "quiz" and item.Referenceid is not None
-        }
-    )
-    file_ids = sorted(
-        {
-            int(item.Referenceid)
-            for item in items
-            if item.Itemtype == "file" and item.Referenceid is not None
-        }
-    )
+    assignment_ids, quiz_ids, file_ids = _collect_reference_ids(items)
 
+    assignments = quizzes = files = []
     if assignment_ids:
         assignments = db.query(AssignmentTable).filter(
             AssignmentTable.Assignmentid.in_(assignment_ids)
         ).all()
-        for assignment in assignments:
-            reference_map[("assignment", assignment.Assignmentid)] = {
-                "id": assignment.Assignmentid,
-                "name": assignment.Assignmentname,
-                "description": assignment.Assignmentdescription,
-            }
 
     if quiz_ids:
         quizzes = db.query(QuizTable).filter(QuizTable.quizid.in_(quiz_ids)).all()
-        for quiz in quizzes:
-            reference_map[("quiz", quiz.quizid)] = {
-                "id": quiz.quizid,
-                "name": quiz.quizname,
-                "description": quiz.quizdescription,
-            }
 
     if file_ids:
         files = db.query(FileTable).filter(FileTable.Fileid.in_(file_ids)).all()
-        for file in files:
-            reference_map[("file", file.Fileid)] = {
-                "id": file.Fileid,
-                "name": file.Fileoriginalname,
-                "url": file.Fileurl,
-                "mimetype": file.Filemimetype,
+
+    return _reference_map_from_rows(assignments, quizzes, files)
+
+
+def _collect_reference_ids(items: List[ModuleItemTable]) -> Tuple[List[int], List[int], List[int]]:
+    """Split item reference IDs by type: (assignment_ids, quiz_ids, file_ids)"""
+    def ids_for(item_type: str) -> List[int]:
+        return sorted(
+            {
+                int(item.Referenceid)
+                for item in items
+                if item.Itemtype == item_type and item.Referenceid is not None
             }
+        )
+
+    return ids_for("assignment"), ids_for("quiz"), ids_for("file")
+
+
+def _reference_map_from_rows(
+    assignments: List[AssignmentTable], quizzes: List[QuizTable], files: List[FileTable]
+) -> Dict[Tuple[str, Optional[int]], dict]:
+    reference_map: Dict[Tuple[str, Optional[int]], dict] = {}
+    for assignment in assignments:
+        reference_map[("assignment", assignment.Assignmentid)] = {
+            "id": assignment.Assignmentid,
+            "name": assignment.Assignmentname,
+            "description": assignment.Assignmentdescription,
+        }
+
+    for quiz in quizzes:
+        reference_map[("quiz", quiz.quizid)] = {
+            "id": quiz.quizid,
+            "name": quiz.quizname,
+            "description": quiz.quizdescription,
+        }
+
+    for file in files:
+        reference_map[("file", file.Fileid)] = {
+            "id": file.Fileid,
+            "name": file.Fileoriginalname,
+            "url": file.Fileurl,
+            "mimetype": file.Filemimetype,
+        }
 
     return reference_map
 
@@ -0,0 +1,259 @@
+"""
+In-app notifications: the feed, the unread badge and bulk writes.
+
+Each user's unread count is a row in notification_counters that changes in the same
+transaction as the notifications it counts. Creating notifications adds to it; marking read
+and purging subtract the number of rows whose state actually changed, as reported by the
+statement that changed them, so concurrent requests cannot drift it. Reading the badge is a
+primary-key lookup however many notifications the user has.
+
+The feed pages newest first on the (Userid, Notificationid) index. Marking a set of
+notifications read, marking all read and a batch of new notifications are each one
+statement on notifications plus one on the counters.
+"""
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from alphagocanvas.api.models.notification import (
+    NotificationFeedResponse, NotificationReadResponse, NotificationResponse
+)
+from alphagocanvas.api.services import push
+from alphagocanvas.api.utils.cursor import decode_cursor, encode_cursor
+from alphagocanvas.config import NOTIFICATION_INSERT_BATCH_SIZE
+from alphagocanvas.database.models import NotificationCounterTable, NotificationTable
+
+
+@dataclass(frozen=True)
+class NewNotification:
+    """A notification to create for one user"""
+    Userid: int
+    Userrole: str
+    Title: str
+    Message: str
+    Notificationtype: str  # 'assignment', 'grade', 'announcement', 'message', 'system'
+    Linkurl: Optional[str] = None
+    Courseid: Optional[int] = None
+
+
+def _unread():
+    return NotificationTable.Isread == False  # noqa: E712 (indexable, unlike IS false)
+
+
+def _counter_insert(db: Session):
+    """INSERT into notification_counters that adds to the count of users who already have a row"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(NotificationCounterTable.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=[NotificationCounterTable.Userid],
+        set_={"Unreadcount": NotificationCounterTable.Unreadcount + statement.excluded.Unreadcount},
+    )
+
+
+def _subtract_unread(amount):
+    return case((NotificationCounterTable.Unreadcount > amount, NotificationCounterTable.Unreadcount - amount), else_=0)
+
+
+# ============== READS ==============
+
+def _unread_count_statement(user_id: int):
+    return select(NotificationCounterTable.Unreadcount).where(NotificationCounterTable.Userid == user_id)
+
+
+def _feed_statement(user_id: int, limit: int, cursor: Optional[str], unread_only: bool):
+    statement = select(NotificationTable).where(NotificationTable.Userid == user_id)
+    if unread_only:
+        statement = statement.where(_unread())
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        statement = statement.where(NotificationTable.Notificationid < last_id)
+    # One extra row tells whether there is another page
+    return statement.order_by(NotificationTable.Notificationid.desc()).limit(limit + 1)
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """The user's unread notification count, from their counter row"""
+    return db.execute(_unread_count_statement(user_id)).scalar() or 0
+
+
+async def get_unread_count_async(db: AsyncSession, user_id: int) -> int:
+    """Async variant of get_unread_count which runs on the async engine."""
+    return (await db.execute(_unread_count_statement(user_id))).scalar() or 0
+
+
+def get_feed(
+    db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None, unread_only: bool = False
+) -> NotificationFeedResponse:
+    """A page of the user's notifications, newest first, with their unread count"""
+    rows = db.execute(_feed_statement(user_id, limit, cursor, unread_only)).scalars().all()
+    page = rows[:limit]
+    return NotificationFeedResponse(
+        Notifications=[
+            NotificationResponse(
+                Notificationid=row.Notificationid,
+                Title=row.Title,
+                Message=row.Message,
+                Notificationtype=row.Notificationtype,
+                Isread=bool(row.Isread),
+                Linkurl=row.Linkurl,
+                Courseid=row.Courseid,
+                Createdat=row.Createdat,
+            )
+            for row in page
+        ],
+        Unreadcount=get_unread_count(db, user_id),
+        Nextcursor=encode_cursor(page[-1].Notificationid) if len(rows) > limit else None,
+    )
+
+
+# ============== WRITES ==============
+
+def create_notifications(db: Session, notifications: Sequence[NewNotification]) -> int:
+    """
+    Insert notifications, NOTIFICATION_INSERT_BATCH_SIZE rows per statement, and add them to
+    their recipients' unread counts. Recipients are pushed a "notification" event on commit;
+    the caller commits.
+    """
+    if not notifications:
+        return 0
+    created_at = datetime.now().isoformat()
+    rows = [dict(asdict(notification), Isread=False, Createdat=created_at) for notification in notifications]
+    for start in range(0, len(rows), NOTIFICATION_INSERT_BATCH_SIZE):
+        db.execute(insert(NotificationTable.__table__), rows[start:start + NOTIFICATION_INSERT_BATCH_SIZE])
+
+    events: Dict[Tuple, List[str]] = {}
+    for notification in notifications:
+        key = (notification.Notificationtype, notification.Title, notification.Linkurl, notification.Courseid)
+        events.setdefault(key, []).append(push.user_topic(notification.Userid))
+    add_unread_for(db, [notification.Userid for notification in notifications])
+
+    for (notification_type, title, link, course_id), topics in events.items():
+        push.publish_after_commit(db, topics, "notification", {
+            "Notificationtype": notification_type, "Title": title, "Linkurl": link, "Courseid": course_id
+        })
+    return len(rows)
+
+
+def add_unread_for(db: Session, user_ids: Iterable[int]) -> None:
+    """
+    Add one to a user's unread count per occurrence in user_ids, e.g. the Userid column an
+    INSERT ... RETURNING of new notifications reported, in one statement.
+    """
+    per_user: Dict[int, int] = {}
+    for user_id in user_ids:
+        per_user[user_id] = per_user.get(user_id, 0) + 1
+    if not per_user:
+        return
+    # Counter rows are locked in user id order so overlapping fan-outs cannot deadlock
+    db.execute(_counter_insert(db), [
+        {"Userid": user_id, "Unreadcount": count} for user_id, count in sorted(per_user.items())
+    ])
+
+
+def _finish_read(db: Session, user_id: int, updated: int) -> NotificationReadResponse:
+    """Take what was just marked read off the user's count and commit"""
+    if not updated:
+        db.rollback()
+        return NotificationReadResponse(Updated=0, Unreadcount=get_unread_count(db, user_id))
+
+    unread = db.execute(
+        update(NotificationCounterTable)
+        .where(NotificationCounterTable.Userid == user_id)
+        .values(Unreadcount=_subtract_unread(updated))
+        .returning(NotificationCounterTable.Unreadcount)
+        .execution_options(synchronize_session=False)
+    ).scalar() or 0
+    # Other tabs and devices update their badge
+    push.publish_after_commit(db, [push.user_topic(user_id)], "notifications_read", {"Unreadcount": unread})
+    db.commit()
+    return NotificationReadResponse(Updated=updated, Unreadcount=unread)
+
+
+def mark_read(db: Session, user_id: int, notification_ids: Sequence[int]) -> NotificationReadResponse:
+    """Mark the user's notifications among notification_ids read; ids of others' notifications are ignored"""
+    updated = 0
+    if notification_ids:
+        updated = db.execute(
+            update(NotificationTable)
+            .where(
+                NotificationTable.Userid == user_id,
+                NotificationTable.Notificationid.in_(set(notification_ids)),
+                _unread(),
+            )
+            .values(Isread=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    return _finish_read(db, user_id, updated)
+
+
+def mark_all_read(db: Session, user_id: int, through_id: Optional[int] = None) -> NotificationReadResponse:
+    """
+    Mark all of the user's notifications read, or only those up to through_id, the newest one
+    the client has shown, so a notification arriving meanwhile stays unread.
+    """
+    statement = update(NotificationTable).where(NotificationTable.Userid == user_id, _unread())
+    if through_id is not None:
+        statement = statement.where(NotificationTable.Notificationid <= through_id)
+    updated = db.execute(statement.values(Isread=True).execution_options(synchronize_session=False)).rowcount
+    return _finish_read(db, user_id, updated)
+
+
+# ============== MAINTENANCE ==============
+
+def purge_notifications(db: Session, older_than: datetime, batch_size: int = NOTIFICATION_INSERT_BATCH_SIZE) -> int:
+    """
+    Delete notifications created before older_than, batch_size at a time with a commit after
+    each, taking the unread ones off their users' counts. Returns how many were deleted.
+    """
+    cutoff = older_than.isoformat()
+    purged = 0
+    while True:
+        ids = db.execute(
+            select(NotificationTable.Notificationid).where(NotificationTable.Createdat < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return purged
+        # RETURNING reports each row's read state as deleted, not as selected a moment ago
+        deleted = db.execute(
+            delete(NotificationTable.__table__)
+            .where(NotificationTable.Notificationid.in_(ids))
+            .returning(NotificationTable.Userid, NotificationTable.Isread)
+        ).all()
+        unread: Dict[int, int] = {}
+        for user_id, is_read in deleted:
+            if is_read is False:
+                unread[user_id] = unread.get(user_id, 0) + 1
+        if unread:
+            counters = NotificationCounterTable.__table__
+            db.execute(
+                update(counters)
+                .where(counters.c.Userid == bindparam("user_id"))
+                .values(Unreadcount=_subtract_unread(bindparam("purged"))),
+                [{"user_id": user_id, "purged": count} for user_id, count in sorted(unread.items())],
+            )
+        db.commit()
+        purged += len(deleted)
+
+
+def rebuild_unread_counts(db: Session) -> int:
+    """
+    Recount every user's unread notifications into notification_counters, for notifications
+    written before the counters existed or a counter suspected of drifting. Counts written by
+    concurrent requests can be lost, so run it while notifications are quiet.
+    Returns the number of users with unread notifications.
+    """
+    db.execute(
+        update(NotificationTable.__table__).where(NotificationTable.Isread.is_(None)).values(Isread=False)
+    )
+    db.execute(delete(NotificationCounterTable.__table__))
+    result = db.execute(insert(NotificationCounterTable.__table__).from_select(
+        ["Userid", "Unreadcount"],
+        select(NotificationTable.Userid, func.count()).where(_unread()).group_by(NotificationTable.Userid),
+    ))
+    db.commit()
+    return max(result.rowcount, 0)
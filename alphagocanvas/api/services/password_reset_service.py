@@ -135,30 +135,22 @@ def verify_reset_token(db: Session, token: str) -> Tuple[bool, str, Optional[str
     return True, "Token is valid.", masked_email
 
 
-def reset_password(db: Session, token: str, new_password: str) -> Tuple[bool, str]:
-    """
-    Reset user's password using the reset token
-
-    :param db: Database session
-    :param token: Password reset token
-    :param new_password: New password
-    :return: Tuple of (success, message)
-    """
-    # Find the reset record
+def _reset_target(db: Session, token: str) -> Tuple[Optional[PasswordResetTable], Optional[UserTable], str]:
+    """The reset record and user a token resets, or (None, None, why it cannot be used)"""
     reset_record = db.query(PasswordResetTable).filter(
         PasswordResetTable.Resettoken == token
     ).first()
 
     if not reset_record:
-        return False, "Invalid or expired reset link."
+        return None, None, "Invalid or expired reset link."
 
     if reset_record.Used:
-        return False, "This reset link has already been used."
+        return None, None, "This reset link has already been used."
 
     # Check expiration
     expires_at = datetime.fromisoformat(reset_record.Expiresat)
     if datetime.utcnow() > expires_at:
-        return False, "This reset link has expired. Please request a new one."
+        return None, None, "This reset link has expired. Please request a new one."
 
     # Find the user
     user = db.query(UserTable).filter(
@@ -166,14 +158,41 @@ def reset_password(db: Session, token: str, new_password: str) -> Tuple[bool, st
     ).first()
 
     if not user:
-        return False, "User not found."
+        return None, None, "User not found."
 
     if not user.Isactive:
-        return False, "This account has been deactivated."
+        return None, None, "This account has been deactivated."
+
+    return reset_record, user, ""
+
+
+def check_reset_token(db: Session, token: str) -> Optional[str]:
+    """
+    Why a token cannot reset a password, or None if it can; lets callers skip hashing
+    the new password for requests that will be rejected anyway
+    """
+    reset_record, _, message = _reset_target(db, token)
+    return None if reset_record else message
+
+
+def reset_password(db: Session, token: str, new_password: str,
+                   password_hash: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Reset user's password using the reset token
+
+    :param db: Database session
+    :param token: Password reset token
+    :param new_password: New password
+    :param password_hash: new_password already hashed off the event loop; hashed here when omitted
+    :return: Tuple of (success, message)
+    """
+    reset_record, user, message = _reset_target(db, token)
+    if not reset_record:
+        return False, message
 
     try:
         # Store reset password as a secure hash.
-        user.Userpassword = hash_password(new_password)
+        user.Userpassword = password_hash or hash_password(new_password)
 
         # Mark token as used
         reset_record.Used = True
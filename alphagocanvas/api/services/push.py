@@ -0,0 +1,370 @@
+"""
+Real-time push of new messages, grades and announcements to connected clients.
+
+Events are addressed to topics: "user:<id>" for one user, "course:<id>:<semester>" for
+everyone enrolled in a course offering. Each API process runs one PushHub, which maps
+topics to the subscriptions of the WebSocket and SSE connections it holds. Publishing
+goes through a broker, which delivers every event to the hub of every process:
+
+- LocalBroker hands events straight to this process's hub. It is enough for a single API
+  process, and it is what the tests run against.
+- PostgresBroker relays them with LISTEN/NOTIFY on the application database, so any
+  number of API nodes share events without another service to run.
+
+An event is encoded to JSON once, however many connections receive it. Events carry ids
+and short previews only; clients fetch anything larger through the normal endpoints, and
+a client that falls PUSH_QUEUE_SIZE events behind is disconnected so it reconnects and
+resyncs rather than holding memory for it.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from alphagocanvas.config import PUSH_BROKER, PUSH_CHANNEL, PUSH_MAX_CONNECTIONS, PUSH_QUEUE_SIZE
+from alphagocanvas.database.models import StudentEnrollmentTable
+from alphagocanvas.metrics import Counter, Gauge
+
+logger = logging.getLogger("gocanvas.push")
+
+# NOTIFY payloads must stay under 8000 bytes; events are packed into payloads up to this size
+NOTIFY_PAYLOAD_LIMIT = 7500
+
+# Event that closes the connections it reaches; clients reconnect and are authorised afresh
+SESSION_ENDED = "session_ended"
+
+PUSH_EVENTS_PUBLISHED = Counter("push_events_published_total", "Events published", ["type"])
+PUSH_DELIVERIES = Counter("push_deliveries_total", "Events queued for a connected client")
+PUSH_SLOW_CONSUMERS = Counter("push_slow_consumers_total", "Connections dropped for falling too far behind")
+PUSH_BROKER_ERRORS = Counter("push_broker_errors_total", "Events the broker failed to relay")
+
+
+def user_topic(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def course_topic(course_id: int, semester: str) -> str:
+    return f"course:{course_id}:{semester}"
+
+
+@dataclass(frozen=True)
+class PushEvent:
+    """One event for the subscribers of any of its topics"""
+    topics: Sequence[str]
+    type: str
+    data: dict
+
+    def encode(self) -> str:
+        return json.dumps({"topics": list(self.topics), "type": self.type, "data": self.data}, separators=(",", ":"))
+
+    @classmethod
+    def from_dict(cls, value: dict) -> "PushEvent":
+        return cls(tuple(value["topics"]), value["type"], value["data"])
+
+
+class _Frame:
+    """An event as sent to clients, encoded once and shared by every connection receiving it"""
+    __slots__ = ("type", "json")
+
+    def __init__(self, push_event: PushEvent):
+        self.type = push_event.type
+        self.json = json.dumps({"type": push_event.type, "data": push_event.data}, separators=(",", ":"))
+
+
+class Subscription:
+    """The queue of one connected client, subscribed to a fixed set of topics"""
+    __slots__ = ("topics", "queue", "overflowed")
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics = tuple(topics)
+        self.queue: "asyncio.Queue[_Frame]" = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    async def get(self, timeout: float) -> Optional[_Frame]:
+        """The next event, or None after timeout seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PushBroker:
+    """Carries published events to the hub of every API process"""
+
+    async def start(self, deliver) -> None:
+        """Begin passing every event published anywhere to deliver(events), on the hub's loop"""
+        self.deliver = deliver
+
+    async def stop(self) -> None:
+        pass
+
+    def publish(self, events: List[PushEvent]) -> None:
+        """Relay events; called on the hub's event loop and must not block it"""
+        raise NotImplementedError
+
+
+class LocalBroker(PushBroker):
+    """Single-process stand-in: events go straight to this process's hub"""
+
+    def publish(self, events: List[PushEvent]) -> None:
+        self.deliver(events)
+
+
+class PostgresBroker(PushBroker):
+    """
+    Events relayed between API nodes with PostgreSQL LISTEN/NOTIFY.
+
+    One asyncpg connection per process listens on the channel and sends the NOTIFYs. The
+    publisher receives its own notifications too, so local delivery takes the same path as
+    remote. Events published while the connection is down are lost (and counted); clients
+    see fresh state on their next fetch.
+    """
+
+    def __init__(self, dsn: str, channel: str = PUSH_CHANNEL, reconnect_seconds: float = 2):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self._connection = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopping = False
+
+    async def start(self, deliver) -> None:
+        await super().start(deliver)
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        await self._connect()
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, self._on_notify)
+        connection.add_termination_listener(self._on_terminated)
+        self._connection = connection
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self.deliver([PushEvent.from_dict(value) for value in json.loads(payload)])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed push payload on %s", channel)
+
+    def _on_terminated(self, connection) -> None:
+        self._connection = None
+        if not self._stopping:
+            self._spawn(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopping and self._connection is None:
+            try:
+                await self._connect()
+                logger.info("Push broker reconnected")
+            except Exception:
+                logger.warning("Push broker reconnect failed; retrying in %ss", self.reconnect_seconds)
+                await asyncio.sleep(self.reconnect_seconds)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in list(self._tasks):
+            task.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def publish(self, events: List[PushEvent]) -> None:
+        self._spawn(self._notify(events))
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _encode(self, push_event: PushEvent) -> List[str]:
+        """The event encoded to fit a payload, split by topic if it is addressed to too many users"""
+        raw = push_event.encode()
+        if len(raw) + 2 <= NOTIFY_PAYLOAD_LIMIT:
+            return [raw]
+        if len(push_event.topics) < 2:
+            logger.warning("Dropping %s push event of %d bytes", push_event.type, len(raw))
+            PUSH_BROKER_ERRORS.inc()
+            return []
+        half = len(push_event.topics) // 2
+        return [
+            raw
+            for topics in (push_event.topics[:half], push_event.topics[half:])
+            for raw in self._encode(PushEvent(topics, push_event.type, push_event.data))
+        ]
+
+    async def _notify(self, events: List[PushEvent]) -> None:
+        # Pack events into as few NOTIFYs as fit, each payload a JSON array of events
+        payloads, batch, size = [], [], 2
+        for raw in (raw for push_event in events for raw in self._encode(push_event)):
+            if batch and size + len(raw) + 1 > NOTIFY_PAYLOAD_LIMIT:
+                payloads.append("[" + ",".join(batch) + "]")
+                batch, size = [], 2
+            batch.append(raw)
+            size += len(raw) + 1
+        if batch:
+            payloads.append("[" + ",".join(batch) + "]")
+
+        connection = self._connection
+        if connection is None:
+            PUSH_BROKER_ERRORS.inc(len(events))
+            return
+        try:
+            async with self._lock:
+                for payload in payloads:
+                    await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception:
+            logger.exception("Push broker could not publish %d events", len(events))
+            PUSH_BROKER_ERRORS.inc(len(events))
+
+
+class PushHub:
+    """
+    This process's connected clients, by topic.
+
+    Subscriptions are only touched on the hub's event loop. publish() may be called from
+    any thread: events are handed to the loop and published through the broker there.
+    """
+
+    def __init__(self, broker: PushBroker, max_queue: int = PUSH_QUEUE_SIZE, max_connections: int = PUSH_MAX_CONNECTIONS):
+        self.broker = broker
+        self.max_queue = max_queue
+        self.max_connections = max_connections
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        self._loop = None
+        await self.broker.stop()
+
+    def subscribe(self, topics: Iterable[str]) -> Optional[Subscription]:
+        """A new subscription, or None when this process is at max_connections"""
+        if self._connections >= self.max_connections:
+            return None
+        subscription = Subscription(topics, self.max_queue)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+        self._connections -= 1
+
+    def publish(self, events: Sequence[PushEvent]) -> None:
+        """Publish events to every API process; dropped if the hub is not running"""
+        loop = self._loop
+        if loop is None or not events:
+            return
+        events = list(events)
+        for push_event in events:
+            PUSH_EVENTS_PUBLISHED.inc(type=push_event.type)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.broker.publish(events)
+        else:
+            loop.call_soon_threadsafe(self.broker.publish, events)
+
+    def _deliver(self, events: List[PushEvent]) -> None:
+        """Queue events for this process's subscribers (on the hub's loop)"""
+        for push_event in events:
+            recipients: Set[Subscription] = set()
+            for topic in push_event.topics:
+                recipients.update(self._topics.get(topic, ()))
+            if not recipients:
+                continue
+            frame = _Frame(push_event)
+            for subscription in recipients:
+                try:
+                    subscription.queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    if not subscription.overflowed:
+                        subscription.overflowed = True
+                        PUSH_SLOW_CONSUMERS.inc()
+            PUSH_DELIVERIES.inc(len(recipients))
+
+
+def create_broker() -> PushBroker:
+    """Broker selected by PUSH_BROKER"""
+    if PUSH_BROKER == "postgres":
+        from alphagocanvas.database.connection import ASYNC_ENGINE
+
+        # asyncpg takes a plain postgresql:// DSN
+        dsn = ASYNC_ENGINE.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBroker(dsn)
+    if PUSH_BROKER != "local":
+        raise ValueError(f"Unknown PUSH_BROKER {PUSH_BROKER!r}; use 'local' or 'postgres'")
+    return LocalBroker()
+
+
+hub = PushHub(create_broker())
+
+PUSH_CONNECTIONS = Gauge(
+    "push_connections", "Open WebSocket and SSE push connections in this process",
+    callback=lambda: {(): hub.connections}
+)
+
+
+def publish(topics: Sequence[str], event_type: str, data: dict) -> None:
+    """Publish one event now"""
+    hub.publish([PushEvent(tuple(topics), event_type, data)])
+
+
+def end_sessions(user_id: int) -> None:
+    """Close every push connection the user holds, on every node, after their role or active state changed"""
+    publish([user_topic(user_id)], SESSION_ENDED, {})
+
+
+def publish_after_commit(db: Session, topics: Sequence[str], event_type: str, data: dict) -> None:
+    """Publish an event once the session's transaction commits; dropped if it rolls back"""
+    db.info.setdefault("push_events", []).append(PushEvent(tuple(topics), event_type, data))
+    if not event.contains(db, "after_commit", _publish_after_commit):
+        event.listen(db, "after_commit", _publish_after_commit)
+        event.listen(db, "after_soft_rollback", _discard_after_rollback)
+
+
+def _publish_after_commit(session: Session) -> None:
+    events = session.info.pop("push_events", None)
+    if events:
+        hub.publish(events)
+
+
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop("push_events", None)
+
+
+def topics_for_user(db: Session, user_id: int, user_role: str) -> List[str]:
+    """
+    The topics a user's connection subscribes to: their own, and for students each course
+    offering they are enrolled in. Enrollment changes apply from the next connection.
+    """
+    topics = [user_topic(user_id)]
+    if user_role == "Student":
+        enrollments = db.query(StudentEnrollmentTable.Courseid, StudentEnrollmentTable.EnrollmentSemester).filter(
+            StudentEnrollmentTable.Studentid == user_id
+        ).distinct().all()
+        topics += [course_topic(course_id, semester) for course_id, semester in enrollments]
+    return topics
@@ -0,0 +1,129 @@
+"""
+Set-based quiz autograder.
+
+A quiz's answer key (question types, points, accepted answers and correct options) is
+read with one query, cached per quiz, and every answer in a submission is graded
+against it in memory. Grading therefore costs the same number of round-trips whether
+the quiz has five questions or two hundred.
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from alphagocanvas.api.utils.quiz_cache import quiz_answer_key_cache
+from alphagocanvas.database.models import QuizQuestionOptionTable, QuizQuestionTable
+
+OPTION_QUESTION_TYPES = ("multiple_choice", "true_false")
+TEXT_QUESTION_TYPES = ("short_answer", "fill_in_blank")
+
+
+def normalize_answer(s: Optional[str]) -> str:
+    if not s:
+        return ""
+    return s.strip().lower()
+
+
+@dataclass(frozen=True)
+class KeyedQuestion:
+    questiontype: str
+    points: int
+    correct_answer: Optional[str]  # normalized; None when the question has no accepted text answer
+    correct_options: FrozenSet[int]
+
+
+@dataclass(frozen=True)
+class QuizAnswerKey:
+    quizid: int
+    questions: Dict[int, KeyedQuestion]
+
+
+@dataclass(frozen=True)
+class GradedAnswer:
+    Questionid: int
+    Selectedoptionid: Optional[int]
+    Answertext: Optional[str]
+    Iscorrect: Optional[bool]
+    Pointsearned: int
+
+
+def load_answer_key(quiz_id: int, db: Session) -> QuizAnswerKey:
+    """Answer key for a quiz from the per-worker cache, or one query on a miss"""
+    key = quiz_answer_key_cache.get(quiz_id)
+    if key is not None:
+        return key
+
+    rows = db.execute(
+        select(
+            QuizQuestionTable.Questionid,
+            QuizQuestionTable.Questiontype,
+            QuizQuestionTable.Questionpoints,
+            QuizQuestionTable.Correctanswer,
+            QuizQuestionOptionTable.Optionid,
+        ).outerjoin(
+            QuizQuestionOptionTable,
+            (QuizQuestionOptionTable.Questionid == QuizQuestionTable.Questionid)
+            & QuizQuestionOptionTable.Iscorrect.is_(True),
+        ).where(QuizQuestionTable.Quizid == quiz_id)
+    ).all()
+
+    fields: Dict[int, Tuple[str, int, Optional[str]]] = {}
+    options: Dict[int, set] = {}
+    for question_id, questiontype, points, correct_answer, option_id in rows:
+        fields[question_id] = (questiontype, points or 0, normalize_answer(correct_answer) if correct_answer else None)
+        correct = options.setdefault(question_id, set())
+        if option_id is not None:
+            correct.add(option_id)
+
+    key = QuizAnswerKey(
+        quizid=quiz_id,
+        questions={
+            question_id: KeyedQuestion(questiontype, points, correct_answer, frozenset(options[question_id]))
+            for question_id, (questiontype, points, correct_answer) in fields.items()
+        },
+    )
+    quiz_answer_key_cache.put(quiz_id, key)
+    return key
+
+
+def grade_answers(key: QuizAnswerKey, answers: Sequence) -> Tuple[List[GradedAnswer], int, int, bool]:
+    """
+    Grade submitted answers in memory.
+
+    Answers to questions that are not on this quiz are dropped. A selected option only
+    counts when it is a correct option of the question being answered.
+
+    :return: (graded answers, total score, max score, whether every answer was auto-gradable)
+    """
+    graded = []
+    total_score = 0
+    max_score = 0
+    all_auto_gradable = True
+    for answer in answers:
+        question = key.questions.get(answer.Questionid)
+        if question is None:
+            all_auto_gradable = False
+            continue
+        if question.questiontype not in OPTION_QUESTION_TYPES:
+            all_auto_gradable = False
+
+        max_score += question.points
+
+        is_correct = None
+        if question.questiontype in OPTION_QUESTION_TYPES and answer.Selectedoptionid:
+            is_correct = answer.Selectedoptionid in question.correct_options
+        elif question.questiontype in TEXT_QUESTION_TYPES and question.correct_answer is not None:
+            given = normalize_answer(answer.Answertext)
+            is_correct = bool(question.correct_answer and given) and given == question.correct_answer
+
+        points_earned = question.points if is_correct else 0
+        total_score += points_earned
+        graded.append(GradedAnswer(
+            Questionid=answer.Questionid,
+            Selectedoptionid=answer.Selectedoptionid,
+            Answertext=answer.Answertext,
+            Iscorrect=is_correct,
+            Pointsearned=points_earned,
+        ))
+    return graded, total_score, max_score, all_auto_gradable
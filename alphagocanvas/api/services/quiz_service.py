@@ -1,3 +1,4 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List, Optional
@@ -13,6 +14,7 @@ from alphagocanvas.database.models import (
 )
 from alphagocanvas.api.models.quiz import (
     CreateQuizWithQuestions,
+    QuizDetailResponse,
     QuizQuestionResponse,
     QuizQuestionOptionResponse,
     QuizAttemptSubmit,
@@ -20,6 +22,8 @@ from alphagocanvas.api.models.quiz import (
     QuizAnswerResponse,
     GradeQuizAttempt,
 )
+from alphagocanvas.api.services.quiz_grader import grade_answers, load_answer_key
+from alphagocanvas.api.utils.quiz_cache import CompiledQuiz, invalidate_quiz, quiz_payload_cache
 
 
 def create_quiz_with_questions(quiz_data: CreateQuizWithQuestions, db: Session):
@@ -64,50 +68,55 @@ def create_quiz_with_questions(quiz_data: CreateQuizWithQuestions, db: Session):
                 db.add(new_option)
     
     db.commit()
+    invalidate_quiz(new_quiz.quizid)
     db.refresh(new_quiz)
     return new_quiz
 
 
 def get_quiz_with_questions(quiz_id: int, db: Session, include_answers: bool = False):
-    """Get quiz details with questions and options"""
+    """Get quiz details with questions and options (two queries regardless of question count)"""
     
     quiz = db.query(QuizTable).filter(QuizTable.quizid == quiz_id).first()
     if not quiz:
         return None
     
-    questions = db.query(QuizQuestionTable).filter(
+    # Questions and their options in one round-trip; questions without options come back once with None
+    rows = db.query(QuizQuestionTable, QuizQuestionOptionTable).outerjoin(
+        QuizQuestionOptionTable, QuizQuestionOptionTable.Questionid == QuizQuestionTable.Questionid
+    ).filter(
         QuizQuestionTable.Quizid == quiz_id
-    ).order_by(QuizQuestionTable.Questionorder).all()
+    ).order_by(
+        QuizQuestionTable.Questionorder, QuizQuestionTable.Questionid, QuizQuestionOptionTable.Optionorder
+    ).all()
     
     quiz_questions = []
-    for question in questions:
-        options = db.query(QuizQuestionOptionTable).filter(
-            QuizQuestionOptionTable.Questionid == question.Questionid
-        ).order_by(QuizQuestionOptionTable.Optionorder).all()
-        
-        # Hide correct answers for students unless include_answers is True
-        option_responses = []
-        for opt in options:
-            option_response = QuizQuestionOptionResponse(
-                Optionid=opt.Optionid,
-                Questionid=opt.Questionid,
-                Optiontext=opt.Optiontext,
-                Iscorrect=opt.Iscorrect if include_answers else False,
-                Optionorder=opt.Optionorder
+    by_question = {}
+    for question, opt in rows:
+        question_response = by_question.get(question.Questionid)
+        if question_response is None:
+            question_response = QuizQuestionResponse(
+                Questionid=question.Questionid,
+                Quizid=question.Quizid,
+                Questiontext=question.Questiontext,
+                Questiontype=question.Questiontype,
+                Questionpoints=question.Questionpoints,
+                Questionorder=question.Questionorder,
+                Createdat=question.Createdat,
+                options=[]
             )
-            option_responses.append(option_response)
+            by_question[question.Questionid] = question_response
+            quiz_questions.append(question_response)
+        if opt is None:
+            continue
         
-        question_response = QuizQuestionResponse(
-            Questionid=question.Questionid,
-            Quizid=question.Quizid,
-            Questiontext=question.Questiontext,
-            Questiontype=question.Questiontype,
-            Questionpoints=question.Questionpoints,
-            Questionorder=question.Questionorder,
-            Createdat=question.Createdat,
-            options=option_responses
-        )
-        quiz_questions.append(question_response)
+        # Hide correct answers for students unless include_answers is True
+        question_response.options.append(QuizQuestionOptionResponse(
+            Optionid=opt.Optionid,
+            Questionid=opt.Questionid,
+            Optiontext=opt.Optiontext,
+            Iscorrect=opt.Iscorrect if include_answers else False,
+            Optionorder=opt.Optionorder
+        ))
     
     return {
         "quizid": quiz.quizid,
@@ -122,10 +131,19 @@ def get_quiz_with_questions(quiz_id: int, db: Session, include_answers: bool = F
     }
 
 
-def _normalize_answer(s: Optional[str]) -> str:
-    if not s:
-        return ""
-    return s.strip().lower()
+def get_student_quiz(quiz_id: int, db: Session) -> Optional[CompiledQuiz]:
+    """Student view of a quiz, compiled to JSON once and served from the per-worker cache"""
+    compiled = quiz_payload_cache.get(quiz_id)
+    if compiled is not None:
+        return compiled
+    
+    quiz = get_quiz_with_questions(quiz_id, db, include_answers=False)
+    if not quiz:
+        return None
+    
+    compiled = CompiledQuiz(quizid=quiz_id, body=QuizDetailResponse(**quiz).model_dump_json().encode())
+    quiz_payload_cache.put(quiz_id, compiled)
+    return compiled
 
 
 def submit_quiz_attempt(student_id: int, attempt_data: QuizAttemptSubmit, db: Session):
@@ -159,84 +177,37 @@ def submit_quiz_attempt(student_id: int, attempt_data: QuizAttemptSubmit, db: Se
         if count >= allowed:
             raise HTTPException(status_code=400, detail=f"Maximum attempts ({allowed}) reached")
 
+    # Grade every answer in memory against the cached answer key
+    answer_key = load_answer_key(attempt_data.Quizid, db)
+    graded, total_score, max_score, all_auto_gradable = grade_answers(answer_key, attempt_data.answers)
+
     # Create attempt
     new_attempt = QuizAttemptTable(
         Quizid=attempt_data.Quizid,
         Studentid=student_id,
         Attemptstarted=datetime.now().isoformat(),
         Attemptsubmitted=datetime.now().isoformat(),
-        Attemptgraded=False
+        Attemptscore=total_score,
+        Attemptmaxscore=max_score,
+        # Mark as graded if all questions are auto-gradable
+        Attemptgraded=all_auto_gradable
     )
     db.add(new_attempt)
     db.flush()
     
-    total_score = 0
-    max_score = 0
-    
-    # Process each answer
-    for answer_data in attempt_data.answers:
-        question = db.query(QuizQuestionTable).filter(
-            QuizQuestionTable.Questionid == answer_data.Questionid
-        ).first()
-        
-        if not question:
-            continue
-        
-        max_score += question.Questionpoints
-        
-        # Auto-grade MC and TF questions
-        is_correct = None
-        points_earned = 0
-        
-        if question.Questiontype in ['multiple_choice', 'true_false'] and answer_data.Selectedoptionid:
-            selected_option = db.query(QuizQuestionOptionTable).filter(
-                QuizQuestionOptionTable.Optionid == answer_data.Selectedoptionid
-            ).first()
-            
-            if selected_option and selected_option.Iscorrect:
-                is_correct = True
-                points_earned = question.Questionpoints
-                total_score += points_earned
-            else:
-                is_correct = False
-                points_earned = 0
-        elif question.Questiontype in ['short_answer', 'fill_in_blank'] and getattr(question, 'Correctanswer', None):
-            correct = _normalize_answer(question.Correctanswer)
-            given = _normalize_answer(answer_data.Answertext)
-            if correct and given and correct == given:
-                is_correct = True
-                points_earned = question.Questionpoints
-                total_score += points_earned
-            else:
-                is_correct = False
-                points_earned = 0
-        
-        # Create answer record
-        new_answer = QuizAnswerTable(
-            Attemptid=new_attempt.Attemptid,
-            Questionid=answer_data.Questionid,
-            Selectedoptionid=answer_data.Selectedoptionid,
-            Answertext=answer_data.Answertext,
-            Iscorrect=is_correct,
-            Pointsearned=points_earned
-        )
-        db.add(new_answer)
-    
-    # Update attempt scores
-    new_attempt.Attemptscore = total_score
-    new_attempt.Attemptmaxscore = max_score
-    
-    # Mark as graded if all questions are auto-gradable
-    all_auto_gradable = all(
-        db.query(QuizQuestionTable).filter(
-            QuizQuestionTable.Questionid == ans.Questionid,
-            QuizQuestionTable.Questiontype.in_(['multiple_choice', 'true_false'])
-        ).first() is not None
-        for ans in attempt_data.answers
-    )
-    
-    if all_auto_gradable:
-        new_attempt.Attemptgraded = True
+    # One executemany for all answers; render_nulls keeps rows with None values in the same batch
+    if graded:
+        db.execute(insert(QuizAnswerTable).execution_options(render_nulls=True), [
+            {
+                "Attemptid": new_attempt.Attemptid,
+                "Questionid": answer.Questionid,
+                "Selectedoptionid": answer.Selectedoptionid,
+                "Answertext": answer.Answertext,
+                "Iscorrect": answer.Iscorrect,
+                "Pointsearned": answer.Pointsearned,
+            }
+            for answer in graded
+        ])
     
     db.commit()
     db.refresh(new_attempt)
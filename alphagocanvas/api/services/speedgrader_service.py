@@ -0,0 +1,282 @@
+"""
+SpeedGrader navigation and bulk grading.
+
+A grading session loads the assignment's ordered submission ids once, then flips through
+submissions by asking for the next (or previous) few around the current one. Each such
+window is a single query: a keyset scan of the (Assignmentid, Submitteddate, Submissionid)
+index for the neighbouring ids, joined to the submissions, their students, files and
+comments. The client prefetches the next window while the grader reads the current one.
+
+Bulk grading applies a pasted column of grades in one transaction: one query loads every
+target submission, one executemany UPDATE writes the grades, the gradebook snapshot is
+patched once, the grade emails are queued in the outbox with one insert, the students'
+in-app notifications are written in batches and connected students are pushed their
+grades once it all commits.
+"""
+import math
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import literal, or_, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+
+from alphagocanvas.api.models.submission import (
+    BulkGradeItem, BulkGradeResponse, BulkGradeResult,
+    SpeedGraderNavigationResponse, SpeedGraderSubmissionResponse, SpeedGraderWindowResponse
+)
+from alphagocanvas.api.services import gradebook_snapshot_service, push
+from alphagocanvas.api.services.email_service import GradeNotification, email_service
+from alphagocanvas.api.services.notification_service import create_notifications
+from alphagocanvas.api.services.submission_service import (
+    assignment_submissions, comment_response, format_student_name, get_assignment_header, grade_event,
+    grade_notification, submission_response
+)
+from alphagocanvas.database.models import (
+    AssignmentTable, CourseTable, FileTable, StudentTable, SubmissionCommentTable, SubmissionTable, UserTable
+)
+
+# submissions.Submissionscore is a String(10)
+MAX_SCORE_LENGTH = 10
+
+_GradedSubmission = namedtuple(
+    "_GradedSubmission", "Submissionid Assignmentid Studentid Submissionscore Submissiongraded Submitteddate"
+)
+
+
+def get_navigation(db: Session, assignment_id: int) -> SpeedGraderNavigationResponse:
+    """
+    Submission ids in SpeedGrader order (newest first, ties by id), over the same query the
+    submission pages use. Only ids are selected, so PostgreSQL drops the outer joins and
+    reads the index alone.
+    """
+    assignment = get_assignment_header(db, assignment_id)
+
+    submission_ids = [
+        row.Submissionid
+        for row in assignment_submissions(db, assignment_id, SubmissionTable.Submissionid).order_by(
+            SubmissionTable.Submitteddate.desc(), SubmissionTable.Submissionid.desc()
+        )
+    ]
+
+    return SpeedGraderNavigationResponse(
+        Assignmentid=assignment.Assignmentid,
+        Assignmentname=assignment.Assignmentname,
+        Totalsubmissions=len(submission_ids),
+        Submissionids=submission_ids
+    )
+
+
+def get_submission_window(
+    db: Session,
+    submission_id: int,
+    direction: str = "next",
+    count: int = 5,
+    include_current: bool = False,
+) -> SpeedGraderWindowResponse:
+    """
+    Up to count submissions after ("next") or before ("prev") a submission in navigation
+    order, nearest first, each with its file info and comments, in one query.
+
+    include_current starts the window at the submission itself, which is how a session
+    opens on its first submission.
+    """
+    anchor = aliased(SubmissionTable)
+    anchor_assignment = select(anchor.Assignmentid).where(anchor.Submissionid == submission_id).scalar_subquery()
+    anchor_date = select(anchor.Submitteddate).where(anchor.Submissionid == submission_id).scalar_subquery()
+
+    sort_key = tuple_(SubmissionTable.Submitteddate, SubmissionTable.Submissionid)
+    anchor_key = tuple_(anchor_date, literal(submission_id))
+    # Navigation runs newest first, so "next" walks down the sort key and "prev" walks up
+    if direction == "next":
+        bound = sort_key <= anchor_key if include_current else sort_key < anchor_key
+        order = (SubmissionTable.Submitteddate.desc(), SubmissionTable.Submissionid.desc())
+    else:
+        bound = sort_key >= anchor_key if include_current else sort_key > anchor_key
+        order = (SubmissionTable.Submitteddate.asc(), SubmissionTable.Submissionid.asc())
+
+    # One row past the window tells whether there is more
+    window = select(SubmissionTable.Submissionid).where(
+        SubmissionTable.Assignmentid == anchor_assignment, bound
+    ).order_by(*order).limit(count + 1).subquery("window")
+
+    rows = db.query(
+        SubmissionTable, StudentTable.Studentfirstname, StudentTable.Studentlastname, FileTable, SubmissionCommentTable
+    ).select_from(window).join(
+        SubmissionTable, SubmissionTable.Submissionid == window.c.Submissionid
+    ).outerjoin(
+        StudentTable, StudentTable.Studentid == SubmissionTable.Studentid
+    ).outerjoin(
+        FileTable, FileTable.Fileid == SubmissionTable.Submissionfileid
+    ).outerjoin(
+        SubmissionCommentTable, SubmissionCommentTable.Submissionid == SubmissionTable.Submissionid
+    ).order_by(
+        *order, SubmissionCommentTable.Createdat, SubmissionCommentTable.Commentid
+    ).all()
+
+    submissions: Dict[int, SpeedGraderSubmissionResponse] = {}
+    for submission, first_name, last_name, file_record, comment in rows:
+        response = submissions.get(submission.Submissionid)
+        if response is None:
+            response = SpeedGraderSubmissionResponse(
+                **submission_response(submission, format_student_name(first_name, last_name), file_record).model_dump(),
+                Comments=[]
+            )
+            submissions[submission.Submissionid] = response
+        if comment is not None:
+            response.Comments.append(comment_response(comment))
+
+    ordered: List[SpeedGraderSubmissionResponse] = list(submissions.values())
+    if not ordered:
+        # An empty window is the end of the list, unless the submission does not exist at all
+        anchor_row = db.query(SubmissionTable.Assignmentid).filter(
+            SubmissionTable.Submissionid == submission_id
+        ).first()
+        if not anchor_row:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        return SpeedGraderWindowResponse(Assignmentid=anchor_row.Assignmentid, Submissions=[], Hasmore=False)
+
+    return SpeedGraderWindowResponse(
+        Assignmentid=ordered[0].Assignmentid,
+        Submissions=ordered[:count],
+        Hasmore=len(ordered) > count
+    )
+
+
+# ============== BULK GRADING ==============
+
+def _score_error(score: str) -> Optional[str]:
+    """Why a score cannot be stored, or None; non-numeric scores (letter grades) are kept as given"""
+    if not score:
+        return "Score is required"
+    if len(score) > MAX_SCORE_LENGTH:
+        return f"Score must be at most {MAX_SCORE_LENGTH} characters"
+    try:
+        value = float(score)
+    except ValueError:
+        return None
+    if not math.isfinite(value) or value < 0:
+        return "Score must be a non-negative number"
+    return None
+
+
+def bulk_grade_submissions(
+    db: Session,
+    assignment_id: int,
+    grades: Sequence[BulkGradeItem],
+    notify: bool = True,
+) -> BulkGradeResponse:
+    """
+    Validate and apply many grades for one assignment in a single transaction.
+
+    Rows that fail validation are reported and skipped; the rest are written with one
+    executemany UPDATE. With notify, grade emails for opted-in students are queued in the
+    email outbox and every graded student gets an in-app notification, in the same
+    transaction, so they go out only if the grades commit.
+    """
+    assignment = db.query(
+        AssignmentTable.Assignmentid, AssignmentTable.Assignmentname, AssignmentTable.Courseid, CourseTable.Coursename
+    ).outerjoin(
+        CourseTable, CourseTable.Courseid == AssignmentTable.Courseid
+    ).filter(AssignmentTable.Assignmentid == assignment_id).first()
+
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    submission_ids = {g.Submissionid for g in grades if g.Submissionid is not None}
+    student_ids = {g.Studentid for g in grades if g.Submissionid is None and g.Studentid is not None}
+    targets = db.query(
+        SubmissionTable.Submissionid, SubmissionTable.Studentid, SubmissionTable.Submitteddate,
+        StudentTable.Studentfirstname, StudentTable.Studentlastname, StudentTable.Studentnotification,
+        UserTable.Useremail,
+    ).outerjoin(
+        StudentTable, StudentTable.Studentid == SubmissionTable.Studentid
+    ).outerjoin(
+        UserTable, UserTable.Userid == SubmissionTable.Studentid
+    ).filter(
+        SubmissionTable.Assignmentid == assignment_id,
+        or_(SubmissionTable.Submissionid.in_(submission_ids), SubmissionTable.Studentid.in_(student_ids)),
+    ).order_by(SubmissionTable.Submitteddate, SubmissionTable.Submissionid).all() if submission_ids or student_ids else []
+
+    by_submission = {row.Submissionid: row for row in targets}
+    # A student's latest submission is the one graded
+    by_student = {row.Studentid: row for row in targets}
+
+    graded_at = datetime.now().isoformat()
+    results: List[BulkGradeResult] = []
+    updates: List[dict] = []
+    graded: List[_GradedSubmission] = []
+    notifications: List[GradeNotification] = []
+    seen = set()
+    for index, item in enumerate(grades):
+        score = item.Submissionscore.strip()
+        if item.Submissionid is not None:
+            target = by_submission.get(item.Submissionid)
+            if target is not None and item.Studentid is not None and item.Studentid != target.Studentid:
+                error = "Submission belongs to another student"
+            else:
+                error = None if target else "Submission not found for this assignment"
+        elif item.Studentid is not None:
+            target = by_student.get(item.Studentid)
+            error = None if target else "Student has no submission for this assignment"
+        else:
+            target, error = None, "Submissionid or Studentid is required"
+
+        error = error or _score_error(score)
+        if not error and target.Submissionid in seen:
+            error = "Submission is graded more than once in this request"
+
+        if error:
+            results.append(BulkGradeResult(
+                Index=index, Submissionid=item.Submissionid, Studentid=item.Studentid, Success=False, Error=error
+            ))
+            continue
+
+        seen.add(target.Submissionid)
+        updates.append({
+            "Submissionid": target.Submissionid,
+            "Submissionscore": score,
+            "Submissionfeedback": item.Submissionfeedback,
+            "Submissiongraded": True,
+            "Gradeddate": graded_at,
+        })
+        graded.append(_GradedSubmission(
+            target.Submissionid, assignment_id, target.Studentid, score, True, target.Submitteddate
+        ))
+        results.append(BulkGradeResult(
+            Index=index, Submissionid=target.Submissionid, Studentid=target.Studentid, Success=True
+        ))
+        if notify and target.Useremail and target.Studentnotification is not False:
+            notifications.append(GradeNotification(
+                to_email=target.Useremail,
+                student_name=format_student_name(target.Studentfirstname, target.Studentlastname) or "Student",
+                course_name=assignment.Coursename or "",
+                assignment_name=assignment.Assignmentname or "",
+                grade=score,
+                feedback=item.Submissionfeedback,
+            ))
+
+    queued = 0
+    if updates:
+        # ORM bulk UPDATE by primary key: a single executemany for the whole batch
+        db.execute(update(SubmissionTable), updates)
+        if assignment.Courseid is not None:
+            gradebook_snapshot_service.apply_submissions(db, assignment.Courseid, graded)
+        queued = email_service.queue_grade_notifications(db, notifications)
+        if notify:
+            create_notifications(db, [
+                grade_notification(submission, assignment.Assignmentname, assignment.Courseid)
+                for submission in graded if submission.Studentid is not None
+            ])
+        for submission in graded:
+            push.publish_after_commit(db, [push.user_topic(submission.Studentid)], "grade", grade_event(submission))
+        db.commit()
+
+    return BulkGradeResponse(
+        Assignmentid=assignment_id,
+        Gradedcount=len(updates),
+        Errorcount=len(results) - len(updates),
+        Notificationsqueued=queued,
+        Results=results
+    )
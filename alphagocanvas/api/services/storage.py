@@ -0,0 +1,306 @@
+"""
+Storage backends for uploaded files.
+
+The file store decides what a file is called (its key, e.g. "blobs/ab/<sha256>.pdf") and a
+backend decides where the bytes live:
+
+- LocalStorage keeps them under a directory on this host (the default, and what /uploads
+  serves). It only works while every API node shares that directory.
+- S3Storage keeps them in a bucket on any S3-compatible object store (MinIO, AWS S3, ...),
+  so any number of API nodes serve the same files. Requests are signed with AWS Signature
+  Version 4 over plain HTTP(S); no SDK is needed.
+
+Backends stream: uploads are sent from a file on disk and reads yield fixed-size chunks of
+an optional byte range, so memory per transfer stays constant.
+"""
+import hashlib
+import hmac
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote, urlsplit
+
+import requests
+
+from alphagocanvas.config import (
+    S3_ACCESS_KEY_ID,
+    S3_BUCKET,
+    S3_ENDPOINT_URL,
+    S3_PUBLIC_URL,
+    S3_REGION,
+    S3_SECRET_ACCESS_KEY,
+    STORAGE_BACKEND,
+)
+
+# Reads are yielded in chunks of this size
+STORAGE_CHUNK_SIZE = 256 * 1024
+
+# SHA-256 of an empty body, sent with every request that has none
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class StorageError(Exception):
+    """A backend could not complete an operation"""
+
+
+class StorageBackend:
+    """Where stored files live. Keys are relative, "/"-separated paths."""
+
+    def put_file(self, key: str, source_path: str, sha256: str) -> None:
+        """Store the file at source_path under key. The source may be moved, so callers drop it afterwards."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove an object; a missing key is not an error"""
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Chunks of bytes start..end (inclusive; end None reads to the end of the object).
+
+        Raises StorageError right away when the object is missing, before anything is read.
+        """
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """URL recorded in FileTable.Fileurl"""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Files under a directory on this host"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key: str, source_path: str, sha256: str) -> None:
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source_path, target)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            f = open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise StorageError(f"{key} not found")
+        f.seek(start)
+        return self._read(f, None if end is None else end - start + 1)
+
+    @staticmethod
+    def _read(f, remaining: Optional[int]) -> Iterator[bytes]:
+        with f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(STORAGE_CHUNK_SIZE if remaining is None else min(STORAGE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_v4(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    payload_sha256: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: Optional[datetime] = None,
+    service: str = "s3",
+) -> Dict[str, str]:
+    """
+    Headers that authenticate a request with AWS Signature Version 4.
+
+    url must already be URI-encoded. Every header passed in is signed along with Host,
+    X-Amz-Date and X-Amz-Content-Sha256; the return value is the full header set to send.
+    """
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+    parts = urlsplit(url)
+
+    signed = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    signed["host"] = parts.netloc
+    signed["x-amz-date"] = amz_date
+    signed["x-amz-content-sha256"] = payload_sha256
+    names = sorted(signed)
+    canonical_query = "&".join(
+        sorted(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, _, v in (p.partition("=") for p in parts.query.split("&") if p)
+        )
+    )
+    canonical_request = "\n".join([
+        method,
+        parts.path or "/",
+        canonical_query,
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names),
+        payload_sha256,
+    ])
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+    ])
+    key = _hmac(("AWS4" + secret_key).encode("utf-8"), date)
+    for part in (region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    result = dict(headers)
+    result["x-amz-date"] = amz_date
+    result["x-amz-content-sha256"] = payload_sha256
+    result["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={';'.join(names)}, Signature={signature}"
+    )
+    return result
+
+
+class S3Storage(StorageBackend):
+    """Objects in a bucket on an S3-compatible store, addressed path-style (endpoint/bucket/key)"""
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        public_url: str = "",
+        timeout: float = 30,
+    ):
+        if not endpoint_url or not bucket:
+            raise StorageError("S3 storage needs S3_ENDPOINT_URL and S3_BUCKET")
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = public_url.rstrip("/") or f"{self.endpoint_url}/{bucket}"
+        self.timeout = timeout
+        # One pooled session per backend; requests.Session is safe to share for these calls
+        self._http = requests.Session()
+
+    def object_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{quote(key, safe='/-_.~')}"
+
+    def _request(self, method: str, key: str, headers: Optional[Dict[str, str]] = None,
+                 payload_sha256: str = EMPTY_SHA256, **kwargs) -> requests.Response:
+        url = self.object_url(key)
+        signed = sign_v4(method, url, headers or {}, payload_sha256,
+                         self.access_key, self.secret_key, self.region)
+        try:
+            return self._http.request(method, url, headers=signed, timeout=self.timeout, **kwargs)
+        except requests.RequestException as exc:
+            raise StorageError(f"{method} {key} failed: {exc}") from exc
+
+    @staticmethod
+    def _check(response: requests.Response, key: str, *ok: int) -> None:
+        if response.status_code not in ok:
+            raise StorageError(f"{response.request.method} {key} returned {response.status_code}")
+
+    def put_file(self, key: str, source_path: str, sha256: str) -> None:
+        # The content hash the store already computed doubles as the signed payload hash
+        size = os.path.getsize(source_path)
+        with open(source_path, "rb") as body:
+            response = self._request(
+                "PUT", key, {"Content-Length": str(size)}, payload_sha256=sha256, data=body
+            )
+        self._check(response, key, 200)
+
+    def exists(self, key: str) -> bool:
+        response = self._request("HEAD", key)
+        if response.status_code == 404:
+            return False
+        self._check(response, key, 200)
+        return True
+
+    def delete(self, key: str) -> None:
+        response = self._request("DELETE", key)
+        self._check(response, key, 200, 204, 404)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self._request("GET", key, headers, stream=True)
+        if response.status_code == 404:
+            response.close()
+            raise StorageError(f"{key} not found")
+        if not headers:
+            self._check(response, key, 200)
+            return self._iter_body(response)
+        self._check(response, key, 200, 206)
+        if response.status_code == 206:
+            return self._iter_body(response)
+        # The store ignored Range and sent the whole object; pass on only the bytes asked for
+        return self._slice_body(response, start, end)
+
+    @staticmethod
+    def _iter_body(response: requests.Response) -> Iterator[bytes]:
+        with response:
+            yield from response.iter_content(STORAGE_CHUNK_SIZE)
+
+    @staticmethod
+    def _slice_body(response: requests.Response, start: int, end: Optional[int]) -> Iterator[bytes]:
+        position = 0
+        with response:
+            for chunk in response.iter_content(STORAGE_CHUNK_SIZE):
+                chunk_start = position
+                position += len(chunk)
+                if position <= start:
+                    continue
+                chunk = chunk[max(start - chunk_start, 0):]
+                if end is not None and position > end + 1:
+                    chunk = chunk[:len(chunk) - (position - end - 1)]
+                if chunk:
+                    yield chunk
+                if end is not None and position > end:
+                    return
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{quote(key, safe='/-_.~')}"
+
+
+def create_storage(upload_dir: str) -> StorageBackend:
+    """Backend selected by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            S3_ENDPOINT_URL,
+            S3_BUCKET,
+            S3_ACCESS_KEY_ID,
+            S3_SECRET_ACCESS_KEY,
+            region=S3_REGION,
+            public_url=S3_PUBLIC_URL,
+        )
+    if STORAGE_BACKEND != "local":
+        raise StorageError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; use 'local' or 's3'")
+    return LocalStorage(upload_dir)
+
@@ -5,6 +5,7 @@ from sqlalchemy import text
 
 from alphagocanvas.api.models.student import StudentGrades, StudentInformation, StudentEnrollment, StudentCourseDetails, \
     StudentAssignments, StudentQuizzes, StudentAnnouncements
+from alphagocanvas.api.services import gradebook_snapshot_service
 from alphagocanvas.database import database_dependency
 from alphagocanvas.database.models import StudentTable
 
@@ -48,6 +49,9 @@ def update_student(studentid: int, studentdata: StudentInformation, db: database
             or studentdata.Studentcontactnumber is not None or not studentdata.Studentcontactnumber):
         data.Studentnotification = studentdata.Studentnotification
 
+    # Student names are stored in gradebook snapshot rows
+    gradebook_snapshot_service.invalidate_student_snapshots(db, studentid)
+
     db.commit()
     db.refresh(data)
 
@@ -1,25 +1,31 @@
-import os
-import uuid
-from datetime import datetime
-from typing import List, Optional
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import quote
 
 from fastapi import HTTPException, UploadFile
-from sqlalchemy import text
+from sqlalchemy import case, func, text, tuple_
 from sqlalchemy.orm import Session
 
 from alphagocanvas.api.models.submission import (
     FileUploadResponse, FileInfoResponse, FileDeleteResponse,
-    SubmissionResponse, SubmissionListResponse, GradeSubmissionResponse,
-    SubmissionCommentResponse, GradingStatsResponse
+    SubmissionResponse, SubmissionListResponse, SubmissionPageResponse, SubmissionSummaryResponse,
+    GradeSubmissionResponse, SubmissionCommentResponse, GradingStatsResponse
+)
+from alphagocanvas.api.services import file_store, gradebook_snapshot_service, push
+from alphagocanvas.api.services.notification_service import NewNotification, create_notifications
+from alphagocanvas.api.services.storage import StorageError
+from alphagocanvas.api.utils.cursor import decode_cursor, encode_cursor
+from alphagocanvas.api.utils.file_cache import CachedFile, file_metadata_cache, invalidate_file
+from alphagocanvas.database.models import (
+    AssignmentTable, FileTable, StudentTable, SubmissionTable, SubmissionCommentTable
 )
-from alphagocanvas.database.models import FileTable, SubmissionTable, SubmissionCommentTable
 
 
 # ============== FILE UPLOAD CONFIGURATION ==============
 
-# Upload directory (relative to project root)
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "uploads")
-
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
     'pdf', 'doc', 'docx', 'txt', 'py', 'java', 'cpp', 'c', 'js', 'ts', 'html', 'css',
@@ -29,11 +35,8 @@ ALLOWED_EXTENSIONS = {
 # Max file size (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
-
-def ensure_upload_dir():
-    """Ensure the upload directory exists"""
-    if not os.path.exists(UPLOAD_DIR):
-        os.makedirs(UPLOAD_DIR)
+# Browsers may reuse a downloaded file this long before revalidating with If-None-Match
+DOWNLOAD_MAX_AGE_SECONDS = 3600
 
 
 def is_allowed_file(filename: str) -> bool:
@@ -41,14 +44,6 @@ def is_allowed_file(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def generate_unique_filename(original_filename: str) -> str:
-    """Generate a unique filename while preserving extension"""
-    ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
-    unique_id = uuid.uuid4().hex[:12]
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    return f"{timestamp}_{unique_id}.{ext}" if ext else f"{timestamp}_{unique_id}"
-
-
 # ============== FILE OPERATIONS ==============
 
 async def upload_file(
@@ -68,7 +63,7 @@ async def upload_file(
     :param course_id: Optional course ID for context
     :return: FileUploadResponse with file details
     """
-    ensure_upload_dir()
+    file_store.ensure_upload_dir()
     
     # Validate file
     if not file.filename:
@@ -80,31 +75,18 @@ async def upload_file(
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read file content
-    content = await file.read()
-    
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    
-    # Generate unique filename and save
-    unique_filename = generate_unique_filename(file.filename)
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    with open(file_path, 'wb') as f:
-        f.write(content)
+    # Stream into the content-addressed store; identical bytes share one blob
+    blob = await file_store.store_upload(db, file, MAX_FILE_SIZE)
     
-    # Create file URL (relative path for now, can be updated for cloud storage)
-    file_url = f"/uploads/{unique_filename}"
+    file_url = file_store.get_storage().url(blob.Blobfilename)
     
     # Save to database
     new_file = FileTable(
-        Filename=unique_filename,
+        Filename=blob.Blobfilename,
         Fileoriginalname=file.filename,
         Filemimetype=file.content_type,
-        Filesize=len(content),
+        Filesize=blob.Blobsize,
+        Filesha256=blob.Blobsha256,
         Fileurl=file_url,
         Uploaderid=uploader_id,
         Uploaderrole=uploader_role,
@@ -123,17 +105,12 @@ async def upload_file(
         Filemimetype=new_file.Filemimetype,
         Filesize=new_file.Filesize,
         Fileurl=new_file.Fileurl,
+        Filesha256=new_file.Filesha256,
         Message="File uploaded successfully"
     )
 
 
-def get_file_info(db: Session, file_id: int) -> FileInfoResponse:
-    """Get file information by ID"""
-    file_record = db.query(FileTable).filter(FileTable.Fileid == file_id).first()
-    
-    if not file_record:
-        raise HTTPException(status_code=404, detail="File not found")
-    
+def file_info_response(file_record: FileTable) -> FileInfoResponse:
     return FileInfoResponse(
         Fileid=file_record.Fileid,
         Filename=file_record.Filename,
@@ -141,6 +118,7 @@ def get_file_info(db: Session, file_id: int) -> FileInfoResponse:
         Filemimetype=file_record.Filemimetype,
         Filesize=file_record.Filesize,
         Fileurl=file_record.Fileurl,
+        Filesha256=file_record.Filesha256,
         Uploaderid=file_record.Uploaderid,
         Uploaderrole=file_record.Uploaderrole,
         Courseid=file_record.Courseid,
@@ -148,19 +126,198 @@ def get_file_info(db: Session, file_id: int) -> FileInfoResponse:
     )
 
 
-def get_file_path(db: Session, file_id: int) -> str:
-    """Get the actual file path for downloading"""
+def get_file_info(db: Session, file_id: int) -> FileInfoResponse:
+    """Get file information by ID"""
     file_record = db.query(FileTable).filter(FileTable.Fileid == file_id).first()
     
     if not file_record:
         raise HTTPException(status_code=404, detail="File not found")
     
-    file_path = os.path.join(UPLOAD_DIR, file_record.Filename)
+    return file_info_response(file_record)
+
+
+@dataclass
+class FileDownload:
+    """A (possibly partial) file body streamed from the storage backend"""
+    body: Iterator[bytes]
+    status_code: int
+    media_type: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single-range Range header, or None to send the whole file.
+
+    Multiple ranges and malformed headers are ignored, as RFC 9110 allows; a range that
+    starts past the end of the file raises 416.
+    """
+    match = _BYTE_RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _file_metadata(db: Session, file_id: int) -> CachedFile:
+    """Download metadata from the per-worker cache, or the files table on a miss"""
+    cached = file_metadata_cache.get(file_id)
+    if cached is not None:
+        return cached
     
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
+    file_record = db.query(FileTable).filter(FileTable.Fileid == file_id).first()
+    
+    if not file_record:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    cached = CachedFile(
+        Fileid=file_record.Fileid,
+        Filename=file_record.Filename,
+        Fileoriginalname=file_record.Fileoriginalname,
+        Filemimetype=file_record.Filemimetype,
+        Filesize=file_record.Filesize,
+        Filesha256=file_record.Filesha256,
+        Createdat=file_record.Createdat,
+    )
+    file_metadata_cache.put(cached.Fileid, cached)
+    return cached
+
+
+def file_etag(file: CachedFile) -> Optional[str]:
+    """Strong ETag: the content hash, so every copy of the same bytes validates alike"""
+    return f'"{file.Filesha256}"' if file.Filesha256 else None
+
+
+def file_last_modified(file: CachedFile) -> Optional[datetime]:
+    """Upload time in UTC, to the second (Createdat is a naive local ISO timestamp)"""
+    if not file.Createdat:
+        return None
+    try:
+        created = datetime.fromisoformat(file.Createdat)
+    except ValueError:
+        return None
+    return created.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _etag_matches(header: str, etag: Optional[str]) -> bool:
+    """Weak comparison against an If-None-Match list (RFC 9110 13.1.2)"""
+    if header.strip() == "*":
+        return True
+    if etag is None:
+        return False
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def is_not_modified(headers: Mapping[str, str], etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Whether a conditional GET can be answered with 304; If-None-Match wins over If-Modified-Since"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    since = _parse_http_date(headers.get("if-modified-since"))
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def _if_range_allows(headers: Mapping[str, str], etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """A Range is only honoured if If-Range (when sent) still matches; otherwise the whole file goes out"""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return etag is not None and if_range == etag
+    return last_modified is not None and _parse_http_date(if_range) == last_modified
+
+
+def open_file_download(db: Session, file_id: int, headers: Optional[Mapping[str, str]] = None) -> FileDownload:
+    """
+    Open a file for download from the storage backend.
     
-    return file_path, file_record.Fileoriginalname, file_record.Filemimetype
+    headers are the request headers with lower-case names (Starlette's Headers qualifies).
+    Conditional requests (If-None-Match / If-Modified-Since) that still match get a 304
+    without touching storage, and a single Range (guarded by If-Range) gets a 206.
+    Nothing is buffered: the body yields chunks as they come from local disk or the object
+    store, so any API node can serve any file.
+    """
+    headers = headers or {}
+    file = _file_metadata(db, file_id)
+    etag = file_etag(file)
+    last_modified = file_last_modified(file)
+    
+    validators = {"Cache-Control": f"private, max-age={DOWNLOAD_MAX_AGE_SECONDS}"}
+    if etag:
+        validators["ETag"] = etag
+    if last_modified:
+        validators["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    
+    if is_not_modified(headers, etag, last_modified):
+        return FileDownload(
+            body=iter(()),
+            status_code=304,
+            media_type=file.Filemimetype or "application/octet-stream",
+            headers=validators,
+        )
+    
+    size = file.Filesize
+    byte_range = None
+    if size and _if_range_allows(headers, etag, last_modified):
+        byte_range = parse_byte_range(headers.get("range"), size)
+    start, end = byte_range if byte_range else (0, None)
+    try:
+        body = file_store.get_storage().iter_range(file.Filename, start, end)
+    except StorageError:
+        raise HTTPException(status_code=404, detail="File not found in storage")
+    
+    response_headers = {
+        **validators,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(file.Fileoriginalname or file.Filename),
+    }
+    if byte_range:
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response_headers["Content-Length"] = str(end - start + 1)
+    elif size is not None:
+        response_headers["Content-Length"] = str(size)
+    return FileDownload(
+        body=body,
+        status_code=206 if byte_range else 200,
+        media_type=file.Filemimetype or "application/octet-stream",
+        headers=response_headers,
+    )
 
 
 def delete_file(db: Session, file_id: int, user_id: int, user_role: str) -> FileDeleteResponse:
@@ -174,14 +331,21 @@ def delete_file(db: Session, file_id: int, user_id: int, user_role: str) -> File
     if file_record.Uploaderid != user_id and user_role != 'Faculty':
         raise HTTPException(status_code=403, detail="Not authorized to delete this file")
     
-    # Delete file from disk
-    file_path = os.path.join(UPLOAD_DIR, file_record.Filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
-    
-    # Delete from database
-    db.delete(file_record)
-    db.commit()
+    sha256 = file_record.Filesha256
+    if file_store.is_blob_file(db, file_record.Filename, sha256):
+        # Shared blob: drop this reference and unlink only once nothing else points at it
+        file_store.release_blob(db, sha256)
+        db.delete(file_record)
+        db.commit()
+        file_store.collect_blob(db, sha256)
+    else:
+        # Files uploaded before the blob store own their object
+        file_store.get_storage().delete(file_record.Filename)
+        
+        # Delete from database
+        db.delete(file_record)
+        db.commit()
+    invalidate_file(file_id)
     
     return FileDeleteResponse(
         Success="File deleted successfully",
@@ -201,6 +365,7 @@ def get_files_by_course(db: Session, course_id: int) -> List[FileInfoResponse]:
             Filemimetype=f.Filemimetype,
             Filesize=f.Filesize,
             Fileurl=f.Fileurl,
+            Filesha256=f.Filesha256,
             Uploaderid=f.Uploaderid,
             Uploaderrole=f.Uploaderrole,
             Courseid=f.Courseid,
@@ -236,6 +401,7 @@ def create_submission(
         existing.Submissionscore = None
         existing.Submissionfeedback = None
         existing.Gradeddate = None
+        gradebook_snapshot_service.apply_submission(db, existing)
         db.commit()
         db.refresh(existing)
         submission = existing
@@ -250,6 +416,8 @@ def create_submission(
             Submitteddate=datetime.now().isoformat()
         )
         db.add(submission)
+        db.flush()
+        gradebook_snapshot_service.apply_submission(db, submission)
         db.commit()
         db.refresh(submission)
     
@@ -317,51 +485,97 @@ def get_submission(db: Session, submission_id: int) -> SubmissionResponse:
     )
 
 
+def format_student_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    return f"{first_name or ''} {last_name or ''}".strip() or None
+
+
+def submission_response(
+    submission: SubmissionTable,
+    student_name: Optional[str],
+    file_record: Optional[FileTable]
+) -> SubmissionResponse:
+    return SubmissionResponse(
+        Submissionid=submission.Submissionid,
+        Assignmentid=submission.Assignmentid,
+        Studentid=submission.Studentid,
+        Studentname=student_name,
+        Submissioncontent=submission.Submissioncontent,
+        Submissionfileid=submission.Submissionfileid,
+        Fileinfo=file_info_response(file_record) if file_record else None,
+        Submissionscore=submission.Submissionscore,
+        Submissiongraded=submission.Submissiongraded or False,
+        Submissionfeedback=submission.Submissionfeedback,
+        Submitteddate=submission.Submitteddate,
+        Gradeddate=submission.Gradeddate
+    )
+
+
+def _submissions_with_files(db: Session, *columns):
+    """
+    Submissions with their student's name and their file, in one query. Both joins are
+    outer: a submission whose student row is missing is still listed, with no name.
+    """
+    return db.query(*columns).select_from(SubmissionTable).outerjoin(
+        StudentTable, StudentTable.Studentid == SubmissionTable.Studentid
+    ).outerjoin(
+        FileTable, FileTable.Fileid == SubmissionTable.Submissionfileid
+    )
+
+
+def assignment_submissions(db: Session, assignment_id: int, *columns):
+    """
+    An assignment's submissions over the shared base query, so SpeedGrader navigation and the
+    submission pages list and count the same rows
+    """
+    return _submissions_with_files(db, *columns).filter(SubmissionTable.Assignmentid == assignment_id)
+
+
+def full_submissions_query(db: Session):
+    return _submissions_with_files(
+        db, SubmissionTable, StudentTable.Studentfirstname, StudentTable.Studentlastname, FileTable
+    )
+
+
+def _summary_submissions(db: Session):
+    """The list projection: no Submissioncontent or Submissionfeedback, only the file's name"""
+    return _submissions_with_files(
+        db,
+        SubmissionTable.Submissionid, SubmissionTable.Assignmentid, SubmissionTable.Studentid,
+        StudentTable.Studentfirstname, StudentTable.Studentlastname,
+        SubmissionTable.Submissionfileid, FileTable.Fileoriginalname,
+        SubmissionTable.Submissionscore, SubmissionTable.Submissiongraded,
+        SubmissionTable.Submitteddate, SubmissionTable.Gradeddate,
+    )
+
+
+def _summary_response(row) -> SubmissionSummaryResponse:
+    return SubmissionSummaryResponse(
+        Submissionid=row.Submissionid,
+        Assignmentid=row.Assignmentid,
+        Studentid=row.Studentid,
+        Studentname=format_student_name(row.Studentfirstname, row.Studentlastname),
+        Submissionfileid=row.Submissionfileid,
+        Fileoriginalname=row.Fileoriginalname,
+        Submissionscore=row.Submissionscore,
+        Submissiongraded=row.Submissiongraded or False,
+        Submitteddate=row.Submitteddate,
+        Gradeddate=row.Gradeddate
+    )
+
+
 def get_submissions_by_student(db: Session, student_id: int) -> List[SubmissionResponse]:
     """Get all submissions for a specific student."""
-    submissions = db.query(SubmissionTable).filter(
+    rows = full_submissions_query(db).filter(
         SubmissionTable.Studentid == student_id
     ).order_by(SubmissionTable.Submitteddate.desc()).all()
 
-    student_query = text("""
-        SELECT CONCAT(Studentfirstname, ' ', Studentlastname) as Studentname
-        FROM student WHERE Studentid = :studentid
-    """)
-    student = db.execute(student_query, {"studentid": student_id}).fetchone()
-    student_name = student.Studentname if student else None
-
-    response: List[SubmissionResponse] = []
-    for submission in submissions:
-        file_info = None
-        if submission.Submissionfileid:
-            try:
-                file_info = get_file_info(db, submission.Submissionfileid)
-            except Exception:
-                file_info = None
-
-        response.append(
-            SubmissionResponse(
-                Submissionid=submission.Submissionid,
-                Assignmentid=submission.Assignmentid,
-                Studentid=submission.Studentid,
-                Studentname=student_name,
-                Submissioncontent=submission.Submissioncontent,
-                Submissionfileid=submission.Submissionfileid,
-                Fileinfo=file_info,
-                Submissionscore=submission.Submissionscore,
-                Submissiongraded=submission.Submissiongraded or False,
-                Submissionfeedback=submission.Submissionfeedback,
-                Submitteddate=submission.Submitteddate,
-                Gradeddate=submission.Gradeddate,
-            )
-        )
-
-    return response
+    return [
+        submission_response(submission, format_student_name(first_name, last_name), file_record)
+        for submission, first_name, last_name, file_record in rows
+    ]
 
 
-def get_submissions_by_assignment(db: Session, assignment_id: int) -> SubmissionListResponse:
-    """Get all submissions for an assignment"""
-    # Get assignment info
+def get_assignment_header(db: Session, assignment_id: int):
     assignment_query = text("""
         SELECT Assignmentid, Assignmentname FROM assignments WHERE Assignmentid = :assignmentid
     """)
@@ -369,51 +583,22 @@ def get_submissions_by_assignment(db: Session, assignment_id: int) -> Submission
     
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
+    return assignment
+
+
+def get_submissions_by_assignment(db: Session, assignment_id: int) -> SubmissionListResponse:
+    """Get all submissions for an assignment, with student names and file info from one query"""
+    assignment = get_assignment_header(db, assignment_id)
     
-    # Get all submissions with student names
-    submissions_query = text("""
-        SELECT 
-            s.Submissionid, s.Assignmentid, s.Studentid, 
-            CONCAT(st.Studentfirstname, ' ', st.Studentlastname) as Studentname,
-            s.Submissioncontent, s.Submissionfileid, s.Submissionscore,
-            s.Submissiongraded, s.Submissionfeedback, s.Submitteddate, s.Gradeddate
-        FROM submissions s
-        JOIN student st ON s.Studentid = st.Studentid
-        WHERE s.Assignmentid = :assignmentid
-        ORDER BY s.Submitteddate DESC
-    """)
-    
-    submissions = db.execute(submissions_query, {"assignmentid": assignment_id}).fetchall()
-    
-    submission_list = []
-    graded_count = 0
+    rows = full_submissions_query(db).filter(
+        SubmissionTable.Assignmentid == assignment_id
+    ).order_by(SubmissionTable.Submitteddate.desc()).all()
     
-    for sub in submissions:
-        # Get file info if exists
-        file_info = None
-        if sub.Submissionfileid:
-            try:
-                file_info = get_file_info(db, sub.Submissionfileid)
-            except:
-                pass
-        
-        if sub.Submissiongraded:
-            graded_count += 1
-        
-        submission_list.append(SubmissionResponse(
-            Submissionid=sub.Submissionid,
-            Assignmentid=sub.Assignmentid,
-            Studentid=sub.Studentid,
-            Studentname=sub.Studentname,
-            Submissioncontent=sub.Submissioncontent,
-            Submissionfileid=sub.Submissionfileid,
-            Fileinfo=file_info,
-            Submissionscore=sub.Submissionscore,
-            Submissiongraded=sub.Submissiongraded or False,
-            Submissionfeedback=sub.Submissionfeedback,
-            Submitteddate=sub.Submitteddate,
-            Gradeddate=sub.Gradeddate
-        ))
+    submission_list = [
+        submission_response(submission, format_student_name(first_name, last_name), file_record)
+        for submission, first_name, last_name, file_record in rows
+    ]
+    graded_count = sum(1 for sub in submission_list if sub.Submissiongraded)
     
     return SubmissionListResponse(
         Assignmentid=assignment.Assignmentid,
@@ -424,6 +609,87 @@ def get_submissions_by_assignment(db: Session, assignment_id: int) -> Submission
     )
 
 
+def get_submission_page(
+    db: Session,
+    assignment_id: int,
+    view: str = "list",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> SubmissionPageResponse:
+    """
+    Page through an assignment's submissions, newest first.
+    
+    Keyset pagination on (Submitteddate, Submissionid), so every page costs the same however
+    deep into a large section it is. view="list" returns the lightweight projection for
+    sidebars (no text content or feedback); view="full" returns complete submissions with
+    file info. Totals come from one aggregate query and cover the whole assignment.
+    """
+    assignment = get_assignment_header(db, assignment_id)
+    
+    total, graded = assignment_submissions(
+        db,
+        assignment_id,
+        func.count(SubmissionTable.Submissionid),
+        func.coalesce(func.sum(case((SubmissionTable.Submissiongraded.is_(True), 1), else_=0)), 0),
+    ).one()
+    
+    query = _summary_submissions(db) if view == "list" else full_submissions_query(db)
+    query = query.filter(SubmissionTable.Assignmentid == assignment_id)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor, str, int)
+        query = query.filter(
+            tuple_(SubmissionTable.Submitteddate, SubmissionTable.Submissionid) < tuple_(after_date, after_id)
+        )
+    rows = query.order_by(
+        SubmissionTable.Submitteddate.desc(), SubmissionTable.Submissionid.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1] if view == "list" else rows[-1][0]
+        next_cursor = encode_cursor(last.Submitteddate, last.Submissionid)
+    
+    if view == "list":
+        submissions = [_summary_response(row) for row in rows]
+    else:
+        submissions = [
+            submission_response(submission, format_student_name(first_name, last_name), file_record)
+            for submission, first_name, last_name, file_record in rows
+        ]
+    
+    return SubmissionPageResponse(
+        Assignmentid=assignment.Assignmentid,
+        Assignmentname=assignment.Assignmentname,
+        Totalsubmissions=total,
+        Gradedcount=graded,
+        Submissions=submissions,
+        Nextcursor=next_cursor
+    )
+
+
+def grade_event(submission) -> dict:
+    """Push payload telling a student a submission was graded"""
+    return {
+        "Submissionid": submission.Submissionid,
+        "Assignmentid": submission.Assignmentid,
+        "Submissionscore": submission.Submissionscore,
+    }
+
+
+def grade_notification(submission, assignment_name: Optional[str], course_id: Optional[int]) -> NewNotification:
+    """In-app notification telling a student a submission was graded"""
+    return NewNotification(
+        Userid=submission.Studentid,
+        Userrole="Student",
+        Title="Grade posted",
+        Message=f"{assignment_name or 'Your assignment'} was graded: {submission.Submissionscore}",
+        Notificationtype="grade",
+        Linkurl=f"/student/assignment/{submission.Assignmentid}",
+        Courseid=course_id,
+    )
+
+
 def grade_submission(
     db: Session,
     submission_id: int,
@@ -442,6 +708,15 @@ def grade_submission(
     submission.Submissionfeedback = feedback
     submission.Submissiongraded = True
     submission.Gradeddate = datetime.now().isoformat()
+    gradebook_snapshot_service.apply_submission(db, submission)
+    push.publish_after_commit(db, [push.user_topic(submission.Studentid)], "grade", grade_event(submission))
+    if submission.Studentid is not None:
+        assignment = db.query(AssignmentTable.Assignmentname, AssignmentTable.Courseid).filter(
+            AssignmentTable.Assignmentid == submission.Assignmentid
+        ).first()
+        create_notifications(db, [grade_notification(
+            submission, assignment.Assignmentname if assignment else None, assignment.Courseid if assignment else None
+        )])
     
     db.commit()
     
@@ -495,24 +770,25 @@ def add_submission_comment(
     )
 
 
+def comment_response(c: SubmissionCommentTable) -> SubmissionCommentResponse:
+    return SubmissionCommentResponse(
+        Commentid=c.Commentid,
+        Submissionid=c.Submissionid,
+        Commentcontent=c.Commentcontent,
+        Commentline=c.Commentline,
+        Authorid=c.Authorid,
+        Authorrole=c.Authorrole,
+        Createdat=c.Createdat
+    )
+
+
 def get_submission_comments(db: Session, submission_id: int) -> List[SubmissionCommentResponse]:
     """Get all comments for a submission"""
     comments = db.query(SubmissionCommentTable).filter(
         SubmissionCommentTable.Submissionid == submission_id
     ).order_by(SubmissionCommentTable.Createdat).all()
     
-    return [
-        SubmissionCommentResponse(
-            Commentid=c.Commentid,
-            Submissionid=c.Submissionid,
-            Commentcontent=c.Commentcontent,
-            Commentline=c.Commentline,
-            Authorid=c.Authorid,
-            Authorrole=c.Authorrole,
-            Createdat=c.Createdat
-        )
-        for c in comments
-    ]
+    return [comment_response(c) for c in comments]
 
 
 def get_grading_stats(db: Session, assignment_id: int) -> GradingStatsResponse:
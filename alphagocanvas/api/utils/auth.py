@@ -9,6 +9,7 @@ from sqlalchemy import text
 from starlette import status
 
 from alphagocanvas.api.models import TokenData
+from alphagocanvas.api.utils.principal_cache import CachedPrincipal, principal_cache
 from alphagocanvas.config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
 from alphagocanvas.database import database_dependency, UserTable
 
@@ -34,6 +35,20 @@ async def get_current_user(token: Annotated[str, Depends(_oauth2_scheme)], db: d
         if useremail is None or userrole is None or userid is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Could not validate credentials")
+
+        # Skip the usertable round-trip when this token was verified recently
+        issued_at = payload.get("iat")
+        if issued_at is not None:
+            cached = principal_cache.get((userid, issued_at))
+            if cached is not None and cached.Useremail == useremail:
+                return UserTable(
+                    Userid=cached.Userid,
+                    Useremail=cached.Useremail,
+                    Userrole=cached.Userrole,
+                    Createdat=cached.Createdat,
+                    Isactive=cached.Isactive,
+                )
+
         user = db.query(UserTable).filter(
             UserTable.Useremail == useremail,
             UserTable.Userid == userid
@@ -43,6 +58,14 @@ async def get_current_user(token: Annotated[str, Depends(_oauth2_scheme)], db: d
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials"
             )
+        if issued_at is not None:
+            principal_cache.put((user.Userid, issued_at), CachedPrincipal(
+                Userid=user.Userid,
+                Useremail=user.Useremail,
+                Userrole=user.Userrole,
+                Createdat=user.Createdat,
+                Isactive=user.Isactive,
+            ))
         return user
 
     except InvalidTokenError:
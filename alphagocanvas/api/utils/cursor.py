@@ -0,0 +1,27 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row on a page (e.g. its timestamp and id), JSON
+encoded and base64url'd so clients treat it as an opaque token.
+"""
+import base64
+import json
+from typing import Any, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple:
+    """Decode a cursor made by encode_cursor, coercing each value; 400 if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
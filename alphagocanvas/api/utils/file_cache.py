@@ -0,0 +1,35 @@
+"""
+Per-worker cache of file metadata for downloads.
+
+Course files such as lecture PDFs are downloaded over and over, and a file row never changes
+after upload, so the columns a download needs (storage key, name, type, size, content hash)
+are cached per file id instead of read from files on every hit. delete_file() calls
+invalidate_file() so this worker stops serving the file at once; other workers drop it when
+the entry expires.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from alphagocanvas.api.utils.ttl_cache import TTLCache
+from alphagocanvas.config import FILE_CACHE_MAX_ENTRIES, FILE_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    """The files columns a download depends on"""
+    Fileid: int
+    Filename: str
+    Fileoriginalname: Optional[str]
+    Filemimetype: Optional[str]
+    Filesize: Optional[int]
+    Filesha256: Optional[str]
+    Createdat: Optional[str]
+
+
+# file id -> CachedFile
+file_metadata_cache = TTLCache("file_metadata", FILE_CACHE_TTL_SECONDS, FILE_CACHE_MAX_ENTRIES)
+
+
+def invalidate_file(file_id: int) -> None:
+    """Drop a file's cached metadata after it was deleted"""
+    file_metadata_cache.invalidate(file_id)
@@ -0,0 +1,105 @@
+"""
+Password hashing and verification off the event loop.
+
+PBKDF2 at 310,000 iterations costs a few hundred milliseconds of CPU. Run inline in an
+async endpoint it stalls every other request on the worker, and a term-start login storm
+serialises the whole process. Instead, hashes and verifications go to a bounded pool:
+
+- PASSWORD_HASH_WORKERS processes (spawned, so they share nothing with the API process);
+  0 uses a thread pool, which still frees the event loop since hashlib releases the GIL.
+- At most PASSWORD_HASH_MAX_PENDING jobs may be queued or running per API process. Past
+  that, the request fails fast with 503 and Retry-After instead of queueing without bound.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+from alphagocanvas.api.utils.passwords import hash_password, is_hashed_password, verify_password
+from alphagocanvas.config import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+from alphagocanvas.metrics import Counter, Gauge, Histogram
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+_pending = 0  # jobs queued or running, guarded by _lock
+
+Gauge("password_hash_pending", "Password hash jobs queued or running", callback=lambda: {(): _pending})
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time from submitting a password job to its result, queueing included", ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password jobs refused because the pool was full", ["operation"]
+)
+
+
+def _create_executor(workers: int) -> Executor:
+    if workers > 0:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password")
+
+
+def _get_executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = _create_executor(PASSWORD_HASH_WORKERS)
+        return _executor
+
+
+def start() -> None:
+    """Create the pool and spawn its workers now rather than on the first login"""
+    executor = _get_executor()
+    if isinstance(executor, ProcessPoolExecutor):
+        for future in [executor.submit(is_hashed_password, "") for _ in range(PASSWORD_HASH_WORKERS)]:
+            future.result()
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run(operation: str, fn: Callable, *args):
+    global _pending, _executor
+    with _lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            PASSWORD_HASH_REJECTED.inc(operation=operation)
+            raise HTTPException(status_code=503, detail="Too many sign-ins in progress, please retry",
+                                headers={"Retry-After": "1"})
+        _pending += 1
+
+    executor = _get_executor()
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool for the next request
+        with _lock:
+            if _executor is executor:
+                _executor = None
+        raise
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        with _lock:
+            _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password in the pool"""
+    return await _run("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, stored_password: Optional[str]) -> bool:
+    """verify_password in the pool; legacy plain-text rows are compared inline"""
+    if not is_hashed_password(stored_password):
+        return verify_password(plain_password, stored_password)
+    return await _run("verify", verify_password, plain_password, stored_password)
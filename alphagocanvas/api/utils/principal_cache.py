@@ -0,0 +1,33 @@
+"""
+Short-lived cache of verified JWT principals.
+
+get_current_user only needs a user's role and active flag once the token signature
+has been checked, so the row is cached per (userid, token iat) for a few seconds
+instead of being read from usertable on every request. Admin operations that change
+a user's role or active state call invalidate_user() so the change applies immediately
+in this worker; other workers pick it up when their entry expires.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from alphagocanvas.api.utils.ttl_cache import TTLCache
+from alphagocanvas.config import AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CachedPrincipal:
+    """The usertable columns get_current_user depends on; the password hash is never cached"""
+    Userid: int
+    Useremail: str
+    Userrole: str
+    Createdat: Optional[str]
+    Isactive: bool
+
+
+# (userid, token iat) -> CachedPrincipal
+principal_cache = TTLCache("auth_principal", AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_user(userid: int) -> None:
+    """Drop every cached principal for a user whose role or active state changed"""
+    principal_cache.invalidate_where(lambda key: key[0] == userid)
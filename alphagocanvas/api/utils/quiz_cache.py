@@ -0,0 +1,31 @@
+"""
+Per-worker caches of compiled per-quiz data.
+
+When a section opens or submits a quiz together every request needs the same questions,
+so two things are built once per quiz and reused: the student-facing payload (correct
+answers already stripped, kept as pre-encoded JSON) and the answer key the autograder
+grades against. Code that changes a quiz or its questions calls invalidate_quiz() so this
+worker rebuilds both on the next read; other workers pick it up when the entry expires.
+"""
+from dataclasses import dataclass
+
+from alphagocanvas.api.utils.ttl_cache import TTLCache
+from alphagocanvas.config import QUIZ_CACHE_MAX_ENTRIES, QUIZ_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CompiledQuiz:
+    """Student view of a quiz, serialized once; never carries correct answers"""
+    quizid: int
+    body: bytes
+
+
+# quiz id -> CompiledQuiz, and quiz id -> answer key
+quiz_payload_cache = TTLCache("quiz_payload", QUIZ_CACHE_TTL_SECONDS, QUIZ_CACHE_MAX_ENTRIES)
+quiz_answer_key_cache = TTLCache("quiz_answer_key", QUIZ_CACHE_TTL_SECONDS, QUIZ_CACHE_MAX_ENTRIES)
+
+
+def invalidate_quiz(quiz_id: int) -> None:
+    """Drop everything compiled for a quiz whose details, questions or options changed"""
+    quiz_payload_cache.invalidate(quiz_id)
+    quiz_answer_key_cache.invalidate(quiz_id)
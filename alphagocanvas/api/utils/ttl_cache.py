@@ -0,0 +1,82 @@
+"""
+Per-worker TTL + LRU cache shared by the principal, quiz and file metadata caches.
+
+Entries expire ttl_seconds after they were stored, and the least recently used entry is
+evicted once max_entries are held. Values must be immutable: the same object is handed to
+every reader. Invalidation only reaches this worker; other workers drop an entry when it
+expires, which bounds how long a change can go unseen to the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from alphagocanvas.metrics import Counter
+
+CACHE_HITS = Counter("cache_hits_total", "Reads served from a per-worker cache", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Reads that missed a per-worker cache and went to the database", ["cache"])
+CACHE_INVALIDATIONS = Counter("cache_invalidations_total", "Cache entries dropped after their source changed", ["cache"])
+
+
+class TTLCache:
+    """Thread-safe TTL + LRU map; name labels its hit, miss and invalidation counters"""
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                CACHE_MISSES.inc(cache=self.name)
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                CACHE_MISSES.inc(cache=self.name)
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.inc(cache=self.name)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            removed = self._entries.pop(key, None)
+        if removed is not None:
+            CACHE_INVALIDATIONS.inc(cache=self.name)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key matches, e.g. all of one user's tokens"""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            CACHE_INVALIDATIONS.inc(len(stale), cache=self.name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,2 +1,2 @@
-from .connection import database_dependency
+from .connection import database_dependency, async_database_dependency
 from .models import UserTable
\ No newline at end of file
@@ -2,9 +2,22 @@ from typing import Annotated
 
 from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
-from alphagocanvas.config import URL_DATABASE
+from alphagocanvas.config import (
+    ASYNC_URL_DATABASE,
+    DB_ASYNC_MAX_OVERFLOW,
+    DB_ASYNC_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_USE_LIFO,
+    URL_DATABASE,
+)
+from alphagocanvas.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
 
 # Parse database URL and configure connection args
 # DigitalOcean requires SSL connections for managed databases
@@ -22,15 +35,21 @@ database_url = URL_DATABASE
 if database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql://", 1)
 
+requires_ssl = connect_args.get("sslmode") == "require"
+
 # Create engine with production-ready settings
 ENGINE = create_engine(
     database_url,
-    pool_size=5,              # Number of connections to keep open
-    max_overflow=10,          # Allow up to 15 total connections (5 + 10)
-    pool_pre_ping=True,       # Verify connections before using them
-    pool_recycle=3600,        # Recycle connections after 1 hour
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,              # Number of connections to keep open
+    max_overflow=DB_MAX_OVERFLOW,        # Extra connections allowed under load
+    pool_timeout=DB_POOL_TIMEOUT,        # Seconds to wait for a free connection
+    pool_use_lifo=DB_POOL_USE_LIFO,      # Reuse the most recently returned connection first
+    pool_pre_ping=DB_POOL_PRE_PING,      # Verify connections before using them
+    pool_recycle=DB_POOL_RECYCLE,        # Recycle connections after this many seconds
     connect_args=connect_args
 )
+instrument_engine(ENGINE, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=ENGINE)
 
@@ -49,3 +68,56 @@ def get_database():
 # database dependency
 database_dependency = Annotated[Session, Depends(get_database)]
 
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync PostgreSQL URL into its asyncpg equivalent.
+
+    asyncpg does not understand libpq query options such as ``sslmode``, so they are
+    dropped here and SSL is passed through ``connect_args`` instead.
+    """
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgresql+psycopg2://"):
+        url = url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+
+    base, _, query = url.partition("?")
+    options = [opt for opt in query.split("&") if opt and not opt.startswith("sslmode=")]
+    return f"{base}?{'&'.join(options)}" if options else base
+
+
+# asyncpg equivalents of the sync connect args above
+async_connect_args = {"timeout": 10}
+if requires_ssl:
+    async_connect_args["ssl"] = "require"
+
+# Async engine used by the hot read paths (gradebook, inbox, modules, calendar) so that
+# slow queries yield to the event loop instead of blocking the whole worker.
+ASYNC_ENGINE = create_async_engine(
+    ASYNC_URL_DATABASE or to_async_url(database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_ASYNC_POOL_SIZE,
+    max_overflow=DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_use_lifo=DB_POOL_USE_LIFO,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args=async_connect_args
+)
+instrument_engine(ASYNC_ENGINE.sync_engine, "async")
+
+AsyncSessionLocal = async_sessionmaker(bind=ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_database():
+    """
+    :return: return the async database session which is used to access the data without blocking the event loop
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# async database dependency
+async_database_dependency = Annotated[AsyncSession, Depends(get_async_database)]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, Text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -119,6 +119,7 @@ class FileTable(Base):
     Fileoriginalname = Column(String(255), nullable=False)
     Filemimetype = Column(String(100))
     Filesize = Column(Integer)  # Size in bytes
+    Filesha256 = Column(String(64), index=True)  # Hex digest computed while the upload streams in; blob key
     Fileurl = Column(String(500), nullable=False)
     Uploaderid = Column(Integer, nullable=False)
     Uploaderrole = Column(String(50), nullable=False)  # 'faculty', 'student', 'admin'
@@ -126,6 +127,16 @@ class FileTable(Base):
     Createdat = Column(String(50))  # ISO timestamp
 
 
+class FileBlobTable(Base):
+    """Content-addressed file contents shared by every FileTable row with the same hash"""
+    __tablename__ = 'file_blobs'
+    Blobsha256 = Column(String(64), primary_key=True)
+    Blobfilename = Column(String(255), nullable=False)  # Path under the upload directory
+    Blobsize = Column(Integer, nullable=False)
+    Refcount = Column(Integer, nullable=False, default=0)  # FileTable rows pointing at this blob
+    Createdat = Column(String(50))
+
+
 class SubmissionTable(Base):
     """Table for assignment submissions"""
     __tablename__ = 'submissions'
@@ -140,6 +151,11 @@ class SubmissionTable(Base):
     Submitteddate = Column(String(50))  # ISO timestamp
     Gradeddate = Column(String(50))  # ISO timestamp
 
+    __table_args__ = (
+        # Keyset pages of an assignment's submissions, newest first (SpeedGrader)
+        Index("ix_submissions_assignment_submitted", "Assignmentid", "Submitteddate", "Submissionid"),
+    )
+
 
 class SubmissionCommentTable(Base):
     """Table for inline comments on submissions"""
@@ -247,8 +263,8 @@ class DiscussionReplyTable(Base):
     __tablename__ = 'discussion_replies'
     Replyid = Column(Integer, primary_key=True, index=True, autoincrement=True)
     Replycontent = Column(Text, nullable=False)
-    Discussionid = Column(Integer, ForeignKey('discussions.Discussionid'), nullable=False)
-    Parentreplyid = Column(Integer, ForeignKey('discussion_replies.Replyid'))  # For nested replies
+    Discussionid = Column(Integer, ForeignKey('discussions.Discussionid'), nullable=False, index=True)
+    Parentreplyid = Column(Integer, ForeignKey('discussion_replies.Replyid'), index=True)  # For nested replies
     Authorid = Column(Integer, nullable=False)
     Authorrole = Column(String(50), nullable=False)
     Authorname = Column(String(255))
@@ -274,6 +290,13 @@ class CalendarEventTable(Base):
     Referenceid = Column(Integer)  # ID of referenced item
     Createdat = Column(String(50))
 
+    __table_args__ = (
+        # Calendar views filter by owner and a start-date range
+        Index("ix_calendar_events_userid_eventstart", "Userid", "Eventstart"),
+        # At most one synced event per user and referenced item; manual events have no reference
+        Index("uq_calendar_events_user_reference", "Userid", "Referencetype", "Referenceid", unique=True),
+    )
+
 
 class ConversationTable(Base):
     """Table for message conversations"""
@@ -282,17 +305,29 @@ class ConversationTable(Base):
     Conversationsubject = Column(String(255), nullable=False)
     Lastmessagedate = Column(String(50))
     Createdat = Column(String(50))
+    # Snapshot of the newest message, maintained by send_message so the inbox never reads messages
+    Lastmessageid = Column(Integer)
+    Lastmessagepreview = Column(Text)
+    Lastmessagesendername = Column(String(255))
 
 
 class ConversationParticipantTable(Base):
     """Table for conversation participants"""
     __tablename__ = 'conversation_participants'
     Participantid = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    Conversationid = Column(Integer, ForeignKey('conversations.Conversationid'), nullable=False)
+    Conversationid = Column(Integer, ForeignKey('conversations.Conversationid'), nullable=False, index=True)
     Userid = Column(Integer, nullable=False)
     Userrole = Column(String(50), nullable=False)
     Username = Column(String(255))
     Isunread = Column(Boolean, default=False)
+    Unreadcount = Column(Integer, default=0)  # Messages from others since this user last opened the conversation
+    Lastmessagedate = Column(String(50))  # Copy of conversations.Lastmessagedate, so a user's inbox is one index range
+    Lastreadmessageid = Column(Integer)  # Read position: messages up to this id have been seen by this user
+
+    __table_args__ = (
+        # Inbox pages: a user's conversations, most recent first
+        Index("ix_conversation_participants_user_lastmessage", "Userid", "Lastmessagedate", "Conversationid"),
+    )
 
 
 class MessageTable(Base):
@@ -307,6 +342,11 @@ class MessageTable(Base):
     Isread = Column(Boolean, default=False)
     Createdat = Column(String(50))
 
+    __table_args__ = (
+        # Conversation history pages, newest first
+        Index("ix_messages_conversation_created", "Conversationid", "Createdat", "Messageid"),
+    )
+
 
 # ============== QUIZ SYSTEM MODELS ==============
 
@@ -397,4 +437,69 @@ class NotificationTable(Base):
     Isread = Column(Boolean, default=False)
     Linkurl = Column(String(500))  # Optional link to related item
     Courseid = Column(Integer)  # References courses.Courseid (no FK constraint for flexibility)
-    Createdat = Column(String(50))  # ISO timestamp
\ No newline at end of file
+    Createdat = Column(String(50))  # ISO timestamp
+
+    __table_args__ = (
+        # The feed: a user's notifications newest first
+        Index("ix_notifications_user_id", "Userid", "Notificationid"),
+        # The unread feed and mark-all-read
+        Index("ix_notifications_user_unread", "Userid", "Isread", "Notificationid"),
+        # The retention purge
+        Index("ix_notifications_createdat", "Createdat"),
+    )
+
+
+class NotificationCounterTable(Base):
+    """Per-user unread notification count, kept in step with notifications so the badge is one row read"""
+    __tablename__ = 'notification_counters'
+    Userid = Column(Integer, primary_key=True, autoincrement=False)
+    Unreadcount = Column(Integer, nullable=False, default=0)
+
+
+class EmailOutboxTable(Base):
+    """Email waiting for (or given up on by) the outbox worker"""
+    __tablename__ = 'email_outbox'
+    Emailid = Column(Integer, primary_key=True, autoincrement=True)
+    Toemail = Column(String(255), nullable=False)
+    Subject = Column(String(255), nullable=False)
+    Htmlbody = Column(Text, nullable=False)
+    Textbody = Column(Text)
+    Status = Column(String(20), nullable=False, default="pending")  # 'pending', 'sent', 'failed'
+    Attempts = Column(Integer, nullable=False, default=0)
+    Nextattemptat = Column(String(50), nullable=False)  # ISO timestamp; also the lease while a worker sends it
+    Lasterror = Column(Text)
+    Createdat = Column(String(50))  # ISO timestamp
+    Sentat = Column(String(50))  # ISO timestamp
+
+    __table_args__ = (
+        # The worker's claim query: due pending rows, oldest first
+        Index("ix_email_outbox_status_next", "Status", "Nextattemptat"),
+    )
+
+
+# ============== GRADEBOOK SNAPSHOTS ==============
+
+class GradebookSnapshotTable(Base):
+    """Materialized per-course gradebook header, kept current by submit and grade events"""
+    __tablename__ = 'gradebook_snapshots'
+    Courseid = Column(Integer, ForeignKey('courses.Courseid'), primary_key=True)
+    Coursename = Column(String)
+    Assignments = Column(Text)  # JSON list of assignments with points, due date and late policy
+    Discussions = Column(Text)  # JSON list of graded discussions
+    Version = Column(Integer, default=0)  # Bumped on every incremental update
+    Builtat = Column(String(50))  # ISO timestamp of the last full rebuild
+    Updatedat = Column(String(50))  # ISO timestamp
+
+
+class GradebookSnapshotRowTable(Base):
+    """One enrollment's row in a materialized gradebook"""
+    __tablename__ = 'gradebook_snapshot_rows'
+    Rowid = Column(Integer, primary_key=True, autoincrement=True)
+    Courseid = Column(Integer, ForeignKey('gradebook_snapshots.Courseid'), nullable=False, index=True)
+    Studentid = Column(Integer, nullable=False, index=True)
+    Studentfirstname = Column(String)
+    Studentlastname = Column(String)
+    Enrollmentsemester = Column(String)
+    Coursegrade = Column(String)
+    Submissions = Column(Text)  # JSON {assignment_id: [submission_id, score, graded, submitted_date]}
+    Discussiongrades = Column(Text)  # JSON {discussion_id: score}
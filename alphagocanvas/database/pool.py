@@ -0,0 +1,138 @@
+"""
+Connection pools that report checkout, overflow and acquire-latency metrics.
+
+Both engines in connection.py use these pool classes, labelled "sync" and "async",
+so the /metrics endpoint can show how close each worker gets to its pool ceiling.
+"""
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+from alphagocanvas.metrics import Counter, Gauge, Histogram
+
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool", ["engine"])
+POOL_CHECKINS = Counter("db_pool_checkins_total", "Connections returned to the pool", ["engine"])
+POOL_CONNECTS = Counter("db_pool_connects_total", "New DBAPI connections opened by the pool", ["engine"])
+POOL_INVALIDATIONS = Counter("db_pool_invalidations_total", "Connections invalidated (e.g. failed pre-ping)", ["engine"])
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up after pool_timeout", ["engine"])
+POOL_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds", "Time to obtain a connection from the pool, including any new connect", ["engine"]
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent blocked on an exhausted pool before a connection was freed", ["engine"]
+)
+
+# engine label -> Engine, read at scrape time for the gauges below
+_engines: Dict[str, Engine] = {}
+
+
+def _pool_stat(attribute: str) -> Dict[Tuple[str, ...], float]:
+    stats = {}
+    for label, engine in _engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            stats[(label,)] = getattr(pool, attribute)()
+    return stats
+
+
+Gauge("db_pool_size", "Configured number of persistent connections", ["engine"], callback=lambda: _pool_stat("size"))
+Gauge("db_pool_checked_out", "Connections currently in use", ["engine"], callback=lambda: _pool_stat("checkedout"))
+Gauge("db_pool_checked_in", "Idle connections held by the pool", ["engine"], callback=lambda: _pool_stat("checkedin"))
+Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is still filling)",
+    ["engine"],
+    callback=lambda: _pool_stat("overflow"),
+)
+
+
+class _WaitTimingQueueMixin:
+    """
+    A pool's queue of idle connections. A blocking get first takes an idle connection
+    without blocking; only when there is none is the blocking get timed as a wait, so the
+    decision is the queue's own answer rather than a read of the pool's counters.
+    """
+    metrics_label = "default"
+
+    def get(self, block=True, timeout=None):
+        if block:
+            try:
+                return super().get(False)
+            except sqla_queue.Empty:
+                pass
+            started = time.perf_counter()
+            try:
+                return super().get(True, timeout)
+            finally:
+                POOL_WAIT_SECONDS.observe(time.perf_counter() - started, engine=self.metrics_label)
+        return super().get(block, timeout)
+
+
+class _WaitTimingQueue(_WaitTimingQueueMixin, sqla_queue.Queue):
+    pass
+
+
+class _WaitTimingAsyncQueue(_WaitTimingQueueMixin, sqla_queue.AsyncAdaptedQueue):
+    pass
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout; the pool's queue times the ones that wait on an exhausted pool."""
+
+    @property
+    def metrics_label(self) -> str:
+        return self._pool.metrics_label
+
+    @metrics_label.setter
+    def metrics_label(self, label: str) -> None:
+        self._pool.metrics_label = label
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc(engine=self.metrics_label)
+            raise
+        POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started, engine=self.metrics_label)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    _queue_class = _WaitTimingQueue
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    _queue_class = _WaitTimingAsyncQueue
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Attach pool event listeners and register the engine for the pool gauges"""
+    engine.pool.metrics_label = label
+    _engines[label] = engine
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc(engine=label)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKINS.inc(engine=label)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(engine=label)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc(engine=label)
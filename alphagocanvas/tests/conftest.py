@@ -16,6 +16,9 @@ os.environ["TESTING"] = "true"
 from main import app
 from alphagocanvas.database.models import Base
 from alphagocanvas.database import database_dependency as get_db
+from alphagocanvas.api.utils.file_cache import file_metadata_cache
+from alphagocanvas.api.utils.principal_cache import principal_cache
+from alphagocanvas.api.utils.quiz_cache import quiz_answer_key_cache, quiz_payload_cache
 
 # Create an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -45,9 +48,21 @@ def test_db():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def db(test_db):
+    """A session on the fresh test database; modules seed it by overriding db(db)"""
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+
 @pytest.fixture(scope="function")
 def client(test_db):
     """Create a test client with the test database"""
+    principal_cache.clear()
+    quiz_payload_cache.clear()
+    quiz_answer_key_cache.clear()
+    file_metadata_cache.clear()
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,20 @@
+"""
+Helpers shared by the test modules.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def record_statements(fn):
+    """Run fn and return its result with the SQL of every statement it sent to the database"""
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before)
+    try:
+        result = fn()
+    finally:
+        event.remove(Engine, "before_cursor_execute", before)
+    return result, statements
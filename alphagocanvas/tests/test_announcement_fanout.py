@@ -0,0 +1,84 @@
+"""
+Tests for announcement fan-out to enrolled students.
+"""
+import pytest
+
+from alphagocanvas.api.models.faculty import AnnouncementRequestFacultyRequest
+from alphagocanvas.api.services import announcement_service
+from alphagocanvas.api.services.email_service import email_service
+from alphagocanvas.api.services.faculty_service import add_announcement_to_course
+from alphagocanvas.api.services.notification_service import get_unread_count
+from alphagocanvas.database.models import (
+    AnnouncementTable, CourseFacultyTable, CourseTable, EmailOutboxTable, NotificationTable, StudentEnrollmentTable,
+    StudentTable, UserTable
+)
+from alphagocanvas.tests.helpers import record_statements
+
+
+def _enroll(session, student_id, semester="Fall24", notify=True):
+    session.add_all([
+        UserTable(Userid=student_id, Useremail=f"s{student_id}@test.com", Userrole="Student"),
+        StudentTable(Studentid=student_id, Studentfirstname="Student", Studentlastname=str(student_id),
+                     Studentnotification=notify),
+        StudentEnrollmentTable(Enrollmentid=student_id, Studentid=student_id, Courseid=1, EnrollmentSemester=semester),
+    ])
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    """Course 1 taught by faculty 7 in Fall24, with email configured"""
+    monkeypatch.setattr(email_service, "username", "mailer")
+    monkeypatch.setattr(email_service, "password", "secret")
+    db.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    db.add(CourseFacultyTable(Coursefacultyid=7, Coursecourseid=1, Coursesemester="Fall24"))
+    db.commit()
+    return db
+
+
+def _announce(db):
+    request = AnnouncementRequestFacultyRequest(Courseid=1, Announcementname="Midterm moved",
+                                                Announcementdescription="Now on Friday.", Semester="Fall24")
+    response, statements = record_statements(lambda: add_announcement_to_course(request, 7, db))
+    return response, len(statements)
+
+
+class TestAnnouncementFanOut:
+    """Enrolled students get a notification and, if opted in, an email"""
+
+    def test_notifications_and_emails(self, db):
+        """Test only this semester's students are notified and only opted-in ones are emailed"""
+        _enroll(db, 1)
+        _enroll(db, 2, notify=False)
+        _enroll(db, 3, semester="Spring25")
+        db.commit()
+
+        response, _ = _announce(db)
+        assert response.Notificationscreated == 2 and response.Emailsqueued == 1
+        assert db.get(AnnouncementTable, response.Announcementid).Announcementname == "Midterm moved"
+
+        notifications = db.query(NotificationTable).order_by(NotificationTable.Userid).all()
+        assert [(n.Userid, n.Userrole, n.Notificationtype, n.Isread) for n in notifications] == [
+            (1, "Student", "announcement", False), (2, "Student", "announcement", False)
+        ]
+        assert notifications[0].Linkurl == "/course/1" and notifications[0].Message == "Now on Friday."
+        assert [get_unread_count(db, student_id) for student_id in (1, 2, 3)] == [1, 1, 0]
+        emails = db.query(EmailOutboxTable).all()
+        assert [e.Toemail for e in emails] == ["s1@test.com"]
+        assert "Hi Student 1" in emails[0].Htmlbody and "Algorithms" in emails[0].Htmlbody
+
+    def test_statements_independent_of_course_size(self, db, monkeypatch):
+        """Test fan-out cost grows by email batches, not by a round trip per student"""
+        monkeypatch.setattr(announcement_service, "ANNOUNCEMENT_EMAIL_BATCH_SIZE", 25)
+        for student_id in range(1, 51):
+            _enroll(db, student_id)
+        db.commit()
+        _, small = _announce(db)
+
+        for student_id in range(51, 101):
+            _enroll(db, student_id)
+        db.commit()
+        response, large = _announce(db)
+
+        assert response.Notificationscreated == 100 and response.Emailsqueued == 100
+        assert large - small == 2  # two more outbox batches for fifty more students
+        assert db.query(NotificationTable).count() == 150
@@ -0,0 +1,101 @@
+"""
+Tests for calendar event listing.
+"""
+import pytest
+from sqlalchemy import inspect
+
+from alphagocanvas.api.models.faculty import AssignmentRequestFacultyRequest
+from alphagocanvas.api.services.calendar_service import get_events_for_user, sync_assignments_to_calendar
+from alphagocanvas.api.services.faculty_service import add_assignment_to_course
+from alphagocanvas.database.models import (
+    AssignmentTable,
+    CalendarEventTable,
+    CourseFacultyTable,
+    CourseTable,
+    StudentEnrollmentTable,
+)
+from alphagocanvas.tests.conftest import engine
+from alphagocanvas.tests.helpers import record_statements
+
+
+@pytest.fixture
+def db(db):
+    """Two courses and events for user 1 across them, plus one without a course"""
+    db.add_all([CourseTable(Courseid=1, Coursename="Algorithms"), CourseTable(Courseid=2, Coursename="Compilers")])
+    db.add_all([
+        CalendarEventTable(Eventtitle=f"E{day}", Eventtype="event", Eventstart=f"2025-03-{day:02d}T09:00:00",
+                           Courseid=(day % 2) + 1, Userid=1, Userrole="Student")
+        for day in range(1, 21)
+    ])
+    db.add(CalendarEventTable(Eventtitle="Personal", Eventtype="reminder", Eventstart="2025-03-05T12:00:00",
+                                   Userid=1, Userrole="Student"))
+    db.add(CalendarEventTable(Eventtitle="Other user", Eventtype="event", Eventstart="2025-03-05T12:00:00",
+                                   Courseid=1, Userid=2, Userrole="Student"))
+    db.commit()
+    return db
+
+
+class TestCalendarEvents:
+    """Course names are resolved by the event query itself"""
+
+    def test_single_query_with_course_names(self, db):
+        """Test a month view costs one query and names every event's course"""
+        result, statements = record_statements(lambda: get_events_for_user(db, 1, "2025-03-01", "2025-03-31"))
+        assert len(statements) == 1
+        assert result.Totalevents == 21
+        names = {e.Eventtitle: e.Coursename for e in result.Events}
+        assert names["E1"] == "Compilers" and names["E2"] == "Algorithms" and names["Personal"] is None
+        assert [e.Eventstart for e in result.Events] == sorted(e.Eventstart for e in result.Events)
+
+    def test_course_filter(self, db):
+        """Test the course filter still applies"""
+        result = get_events_for_user(db, 1, "2025-03-01", "2025-03-31", course_id=1)
+        assert {e.Coursename for e in result.Events} == {"Algorithms"}
+
+    def test_user_start_index(self, db):
+        """Test the (Userid, Eventstart) index exists"""
+        indexes = {ix["name"]: ix["column_names"] for ix in inspect(engine).get_indexes("calendar_events")}
+        assert indexes["ix_calendar_events_userid_eventstart"] == ["Userid", "Eventstart"]
+
+
+def _assignment_events(db, user_id=None):
+    query = db.query(CalendarEventTable).filter(CalendarEventTable.Referencetype == "assignment")
+    if user_id is not None:
+        query = query.filter(CalendarEventTable.Userid == user_id)
+    return query.all()
+
+
+class TestCalendarSync:
+    """Assignment due dates are synced with set-based inserts"""
+
+    def test_sync_is_one_statement_and_idempotent(self, db):
+        """Test sync inserts each dated assignment once, skipping ones already on the calendar"""
+        db.add_all([
+            AssignmentTable(Assignmentid=10 + i, Assignmentname=f"A{i}", Courseid=(i % 2) + 1,
+                            Duedate=f"2025-04-{i + 1:02d}T23:59:00" if i != 3 else None)
+            for i in range(6)
+        ])
+        db.commit()
+        assert sync_assignments_to_calendar(db, 5, [1, 2]) == 5
+        assert sync_assignments_to_calendar(db, 5, [1, 2]) == 0
+
+        events = sorted(_assignment_events(db, 5), key=lambda e: e.Referenceid)
+        assert [e.Referenceid for e in events] == [10, 11, 12, 14, 15]
+        assert events[0].Eventtitle == "Due: A0" and events[0].Courseid == 1 and events[0].Eventallday is True
+
+    def test_new_assignment_fans_out_to_enrolled_students(self, db):
+        """Test creating an assignment adds it to every enrolled student's calendar"""
+        db.add(CourseFacultyTable(Coursefacultyid=3, Coursecourseid=1, Coursesemester="Fall24"))
+        db.add_all([
+            StudentEnrollmentTable(Enrollmentid=1, Studentid=20, Courseid=1, EnrollmentSemester="Fall24"),
+            StudentEnrollmentTable(Enrollmentid=2, Studentid=21, Courseid=1, EnrollmentSemester="Fall24"),
+            StudentEnrollmentTable(Enrollmentid=3, Studentid=21, Courseid=1, EnrollmentSemester="Spring25"),
+            StudentEnrollmentTable(Enrollmentid=4, Studentid=22, Courseid=2, EnrollmentSemester="Fall24"),
+        ])
+        db.commit()
+        add_assignment_to_course(AssignmentRequestFacultyRequest(
+            Courseid=1, Semester="Fall24", Assignmentname="Graphs", Assignmentdescription="",
+            Duedate="2025-05-01T23:59:00",
+        ), 3, db)
+        assert sorted(e.Userid for e in _assignment_events(db)) == [20, 21]
+        assert sync_assignments_to_calendar(db, 21, [1]) == 0
@@ -0,0 +1,66 @@
+"""
+Tests for loading discussion reply threads.
+"""
+import pytest
+from fastapi import HTTPException
+
+from alphagocanvas.api.services.discussion_service import get_replies_for_discussion, get_reply_page
+from alphagocanvas.database.models import CourseTable, DiscussionReplyTable, DiscussionTable
+from alphagocanvas.tests.helpers import record_statements
+
+
+def _reply(reply_id, parent=None, minute=0, discussion_id=1):
+    return DiscussionReplyTable(
+        Replyid=reply_id, Replycontent=f"r{reply_id}", Discussionid=discussion_id, Parentreplyid=parent,
+        Authorid=1, Authorrole="Student", Createdat=f"2025-01-01T10:{minute:02d}:00",
+    )
+
+
+@pytest.fixture
+def db(db):
+    """Thread: 1 -> (3 -> 5), 2 -> 4, plus top-level 6 and 7 created at the same minute"""
+    db.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    db.add_all([
+        DiscussionTable(Discussionid=1, Discussiontitle="Intro", Discussioncontent="Say hi", Courseid=1,
+                        Authorid=1, Authorrole="Faculty"),
+        DiscussionTable(Discussionid=2, Discussiontitle="Other", Discussioncontent="...", Courseid=1,
+                        Authorid=1, Authorrole="Faculty"),
+    ])
+    db.add_all([
+        _reply(1, minute=0), _reply(2, minute=1), _reply(3, parent=1, minute=2), _reply(4, parent=2, minute=3),
+        _reply(5, parent=3, minute=4), _reply(7, minute=5), _reply(6, minute=5), _reply(8, discussion_id=2),
+    ])
+    db.commit()
+    return db
+
+
+def _shape(replies):
+    return [(r.Replyid, _shape(r.Replies)) for r in replies]
+
+
+class TestReplyTree:
+    """Whole threads load in one query; pages load in a fixed number"""
+
+    def test_full_tree_single_query(self, db):
+        """Test nesting and creation order, with Replyid breaking ties"""
+        replies, statements = record_statements(lambda: get_replies_for_discussion(db, 1))
+        assert len(statements) == 1
+        assert _shape(replies) == [(1, [(3, [(5, [])])]), (2, [(4, [])]), (6, []), (7, [])]
+
+    def test_cursor_pagination(self, db):
+        """Test pages of top-level replies carry their subtrees and chain via Nextcursor"""
+        first, statements = record_statements(lambda: get_reply_page(db, 1, limit=2))
+        assert len(statements) == 3
+        assert _shape(first.Replies) == [(1, [(3, [(5, [])])]), (2, [(4, [])])]
+        second = get_reply_page(db, 1, limit=2, cursor=first.Nextcursor)
+        assert _shape(second.Replies) == [(6, []), (7, [])]
+        assert second.Nextcursor is None
+
+    def test_bad_cursor_and_missing_discussion(self, db):
+        """Test a malformed cursor is a 400 and an unknown discussion a 404"""
+        with pytest.raises(HTTPException) as bad:
+            get_reply_page(db, 1, cursor="not-a-cursor")
+        assert bad.value.status_code == 400
+        with pytest.raises(HTTPException) as missing:
+            get_reply_page(db, 99)
+        assert missing.value.status_code == 404
@@ -0,0 +1,200 @@
+"""
+Tests for the email outbox and its worker, against a local SMTP sink.
+"""
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from alphagocanvas.api.services.email_outbox import (
+    EMAILS_SENT, SMTP_CONNECTIONS_OPENED, OutboundEmail, OutboxWorker, SMTPConnectionPool, enqueue_emails, retry_delay
+)
+from alphagocanvas.api.services.email_service import GradeNotification, email_service
+from alphagocanvas.database.models import EmailOutboxTable
+from alphagocanvas.tests.conftest import TestingSessionLocal
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP: addresses starting with "bounce" get a 550, "later" a 451"""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 sink ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-sink")
+                self._reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self._reply("235 ok")
+            elif verb == "MAIL":
+                recipients = []
+                self._reply("250 ok")
+            elif verb == "RCPT":
+                address = line.split(":", 1)[1].strip("<> ")
+                if address.startswith("bounce"):
+                    self._reply("550 no such user")
+                elif address.startswith("later"):
+                    self._reply("451 try again later")
+                else:
+                    recipients.append(address)
+                    self._reply("250 ok")
+            elif verb == "DATA":
+                self._reply("354 go ahead")
+                body = []
+                while True:
+                    data = self.rfile.readline().decode()
+                    if data in (".\r\n", ".\n", ""):
+                        break
+                    body.append(data)
+                with server.lock:
+                    server.messages.extend((r, "".join(body)) for r in recipients)
+                self._reply("250 queued")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("250 ok")
+
+
+class _SMTPSink(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+@pytest.fixture
+def smtp_sink():
+    server = _SMTPSink(("127.0.0.1", 0), _SMTPHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def worker(test_db, smtp_sink):
+    pool = SMTPConnectionPool("127.0.0.1", smtp_sink.server_address[1], "mailer", "secret", starttls=False,
+                              max_idle=2, max_messages=10)
+    worker = OutboxWorker(TestingSessionLocal, pool, batch_size=50, max_attempts=2)
+    yield worker
+    worker.stop()
+
+
+def _queue(*addresses):
+    db = TestingSessionLocal()
+    enqueue_emails(db, [OutboundEmail(a, f"Hello {a}", f"<p>Hi {a}</p>", f"Hi {a}") for a in addresses])
+    db.commit()
+    db.close()
+
+
+def _statuses():
+    db = TestingSessionLocal()
+    rows = {row.Toemail: row for row in db.query(EmailOutboxTable)}
+    db.close()
+    return rows
+
+
+class TestOutboxWorker:
+    """Delivery over pooled connections, with retry and give-up"""
+
+    def test_batch_reuses_connections(self, worker, smtp_sink):
+        """Test a batch is split across the pool and connections carry many messages each"""
+        _queue(*[f"s{i}@test.com" for i in range(30)])
+        opened, sent = SMTP_CONNECTIONS_OPENED.value(), EMAILS_SENT.value()
+
+        assert worker.run_once() == 30
+        assert len(smtp_sink.messages) == 30
+        # 2 chunks of 15 over connections capped at 10 messages: 4 logins, not 30
+        assert smtp_sink.connections == 4 and SMTP_CONNECTIONS_OPENED.value() - opened == 4
+        assert EMAILS_SENT.value() - sent == 30
+        assert all(row.Status == "sent" and row.Sentat for row in _statuses().values())
+        assert "Hi s0@test.com" in dict(smtp_sink.messages)["s0@test.com"]
+
+        # Idle connections stay logged in for the next batch
+        _queue("next@test.com")
+        assert worker.run_once() == 1
+        assert smtp_sink.connections == 4
+        assert worker.run_once() == 0
+
+    def test_retry_then_give_up(self, worker, smtp_sink):
+        """Test a 4xx is retried with backoff, a 5xx fails at once and retries stop at max_attempts"""
+        _queue("ok@test.com", "later@test.com", "bounce@test.com")
+        assert worker.run_once() == 3
+
+        rows = _statuses()
+        assert rows["ok@test.com"].Status == "sent"
+        assert rows["bounce@test.com"].Status == "failed" and "550" in rows["bounce@test.com"].Lasterror
+        later = rows["later@test.com"]
+        assert later.Status == "pending" and later.Attempts == 1
+        assert later.Nextattemptat > (datetime.now() + timedelta(seconds=retry_delay(1) - 5)).isoformat()
+        assert worker.run_once() == 0  # not due yet
+
+        db = TestingSessionLocal()
+        db.query(EmailOutboxTable).filter(EmailOutboxTable.Toemail == "later@test.com").update(
+            {"Nextattemptat": datetime.now().isoformat()})
+        db.commit()
+        db.close()
+        assert worker.run_once() == 1
+        assert _statuses()["later@test.com"].Status == "failed"
+        assert retry_delay(1, 30, 3600) == 30 and retry_delay(3, 30, 3600) == 120 and retry_delay(20, 30, 3600) == 3600
+
+    def test_dropped_connection_is_reopened(self, worker, smtp_sink):
+        """Test a pooled connection closed by the server is replaced without failing the send"""
+        _queue("first@test.com")
+        worker.run_once()
+        for connection in worker.pool._idle:
+            connection.smtp.sock.close()
+        _queue("second@test.com")
+        assert worker.run_once() == 1
+        assert _statuses()["second@test.com"].Status == "sent"
+
+    def test_smtp_down_reschedules(self, test_db):
+        """Test an unreachable server leaves the batch pending for a later attempt"""
+        pool = SMTPConnectionPool("127.0.0.1", 1, "", "", starttls=False, timeout=1)
+        worker = OutboxWorker(TestingSessionLocal, pool)
+        _queue("a@test.com")
+        try:
+            assert worker.run_once() == 1
+        finally:
+            worker.stop()
+        row = _statuses()["a@test.com"]
+        assert row.Status == "pending" and row.Attempts == 1 and row.Lasterror
+
+
+class TestEmailServiceQueue:
+    """EmailService renders and queues instead of sending inline"""
+
+    def test_grade_notifications_join_transaction(self, test_db, monkeypatch):
+        """Test queued emails are written only when the caller commits"""
+        monkeypatch.setattr(email_service, "username", "mailer")
+        monkeypatch.setattr(email_service, "password", "secret")
+        db = TestingSessionLocal()
+        notifications = [GradeNotification(f"s{i}@test.com", "Ada", "Algorithms", "Sorting", "95") for i in range(3)]
+        assert email_service.queue_grade_notifications(db, notifications) == 3
+        db.rollback()
+        assert _statuses() == {}
+        email_service.queue_grade_notifications(db, notifications)
+        db.commit()
+        db.close()
+        assert len(_statuses()) == 3
+
+    def test_not_configured_skips(self, test_db, monkeypatch):
+        """Test nothing is queued when SMTP credentials are missing"""
+        monkeypatch.setattr(email_service, "username", "")
+        monkeypatch.setattr(email_service, "session_factory", TestingSessionLocal)
+        assert email_service.send_grade_notification("a@test.com", "Ada", "Algorithms", "Sorting", "95") is False
+        assert _statuses() == {}
@@ -0,0 +1,172 @@
+"""
+Tests for streaming uploads and the deduplicating file store.
+"""
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from alphagocanvas.api.models import TokenData
+from alphagocanvas.api.services import file_store, submission_service
+from alphagocanvas.api.services.admin_service import copy_course_structure
+from alphagocanvas.api.services.storage import LocalStorage
+from alphagocanvas.api.utils.auth import create_token
+from alphagocanvas.api.utils.file_cache import file_metadata_cache
+from alphagocanvas.database.models import CourseTable, FileBlobTable, FileTable, ModuleItemTable, ModuleTable
+from alphagocanvas.database.connection import get_database
+from alphagocanvas.tests.conftest import TestingSessionLocal, app, override_get_db
+
+
+class _CountingFile(io.BytesIO):
+    """BytesIO that records the largest single read"""
+    largest_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.largest_read = max(self.largest_read, len(chunk))
+        return chunk
+
+
+@pytest.fixture
+def db(db, tmp_path, monkeypatch):
+    """Session with uploads written to a temporary directory in small chunks"""
+    monkeypatch.setattr(file_store, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(file_store, "UPLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(file_store, "_storage", LocalStorage(str(tmp_path)))
+    file_metadata_cache.clear()
+    return db
+
+
+def _upload(db, data: bytes, filename="report.pdf", course_id=None):
+    source = _CountingFile(data)
+    upload = UploadFile(file=source, filename=filename)
+    response = asyncio.run(submission_service.upload_file(db, upload, 1, "Student", course_id=course_id))
+    return response, source
+
+
+def _stored_files(tmp_path):
+    return sorted(p.name for p in tmp_path.rglob("*") if p.is_file())
+
+
+class TestStreamingUpload:
+    """Uploads are copied in bounded chunks and hashed on the fly"""
+
+    def test_upload_streams_and_hashes(self, db, tmp_path):
+        """Test the stored file, size and SHA-256 match and reads never exceed one chunk"""
+        data = bytes(range(256)) * 40
+        response, source = _upload(db, data)
+        assert source.largest_read <= 1024
+        assert response.Filesize == len(data)
+        assert response.Filesha256 == hashlib.sha256(data).hexdigest()
+        assert (tmp_path / response.Filename).read_bytes() == data
+        assert response.Fileurl == f"/uploads/{response.Filename}"
+
+    def test_oversized_upload_aborts_early(self, db, tmp_path, monkeypatch):
+        """Test an upload past the limit stops reading, leaves no file and stores no row"""
+        monkeypatch.setattr(submission_service, "MAX_FILE_SIZE", 4096)
+        source = _CountingFile(b"x" * 100_000)
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(submission_service.upload_file(db, UploadFile(file=source, filename="big.zip"), 1, "Student"))
+        assert error.value.status_code == 400
+        assert source.tell() <= 4096 + 1024
+        assert _stored_files(tmp_path) == []
+        assert db.query(FileTable).count() == 0
+
+
+class TestDedupStore:
+    """Identical uploads share one reference-counted blob"""
+
+    def test_reupload_shares_blob_until_last_delete(self, db, tmp_path):
+        """Test two uploads of the same bytes store one blob, unlinked with the last reference"""
+        first, _ = _upload(db, b"same syllabus")
+        second, _ = _upload(db, b"same syllabus", filename="copy.pdf")
+        other, _ = _upload(db, b"different")
+        assert first.Filename == second.Filename != other.Filename
+        assert len(_stored_files(tmp_path)) == 2
+        assert db.get(FileBlobTable, first.Filesha256).Refcount == 2
+
+        submission_service.delete_file(db, first.Fileid, 1, "Student")
+        assert (tmp_path / second.Filename).exists()
+        submission_service.delete_file(db, second.Fileid, 1, "Student")
+        assert not (tmp_path / second.Filename).exists()
+        assert db.get(FileBlobTable, first.Filesha256) is None
+        assert _stored_files(tmp_path) == [other.Filename.rsplit("/", 1)[1]]
+
+    def test_copy_course_shares_files(self, db, tmp_path):
+        """Test copying a course adds file rows and references without copying bytes"""
+        db.add_all([CourseTable(Courseid=1, Coursename="Source"), CourseTable(Courseid=2, Coursename="Target")])
+        db.add(ModuleTable(Moduleid=1, Modulename="Week 1", Courseid=1))
+        db.commit()
+        uploaded, _ = _upload(db, b"lecture notes", course_id=1)
+        db.add(ModuleItemTable(Itemname="Notes", Itemtype="file", Moduleid=1, Referenceid=uploaded.Fileid))
+        db.commit()
+
+        copy_course_structure(db, 1, 2)
+        copied = db.query(FileTable).filter(FileTable.Courseid == 2).one()
+        assert copied.Fileid != uploaded.Fileid and copied.Filename == uploaded.Filename
+        assert db.get(FileBlobTable, uploaded.Filesha256).Refcount == 2
+        assert len(_stored_files(tmp_path)) == 1
+        target_item = db.query(ModuleItemTable).join(ModuleTable).filter(ModuleTable.Courseid == 2).one()
+        assert target_item.Referenceid == copied.Fileid
+
+
+class TestConditionalDownload:
+    """Downloads revalidate by content hash and serve byte ranges"""
+
+    @pytest.fixture
+    def download(self, client, tmp_path, monkeypatch):
+        """Upload a file into a temporary local store; returns (file id, bytes, auth headers)"""
+        monkeypatch.setattr(file_store, "UPLOAD_DIR", str(tmp_path))
+        monkeypatch.setattr(file_store, "_storage", LocalStorage(str(tmp_path)))
+        app.dependency_overrides[get_database] = override_get_db
+        data = bytes(range(256)) * 8
+        session = TestingSessionLocal()
+        uploaded, _ = _upload(session, data, filename="lecture.pdf")
+        session.close()
+        token = create_token(TokenData(useremail="s@test.com", userrole="Student", userid=1))
+        return uploaded, data, {"Authorization": f"Bearer {token}"}
+
+    def test_etag_and_not_modified(self, client, download):
+        """Test the ETag is the content hash and a matching If-None-Match gets an empty 304"""
+        uploaded, data, auth = download
+        response = client.get(f"/files/{uploaded.Fileid}/download", headers=auth)
+        assert response.status_code == 200 and response.content == data
+        assert response.headers["etag"] == f'"{uploaded.Filesha256}"'
+        assert response.headers["accept-ranges"] == "bytes"
+
+        again = client.get(f"/files/{uploaded.Fileid}/download",
+                           headers={**auth, "If-None-Match": f'W/"other", {response.headers["etag"]}'})
+        assert again.status_code == 304 and again.content == b""
+        since = client.get(f"/files/{uploaded.Fileid}/download",
+                           headers={**auth, "If-Modified-Since": response.headers["last-modified"]})
+        assert since.status_code == 304
+        stale = client.get(f"/files/{uploaded.Fileid}/download", headers={**auth, "If-None-Match": '"other"'})
+        assert stale.status_code == 200
+
+    def test_range_and_if_range(self, client, download):
+        """Test a Range gets 206 only while If-Range still matches the ETag"""
+        uploaded, data, auth = download
+        etag = f'"{uploaded.Filesha256}"'
+        part = client.get(f"/files/{uploaded.Fileid}/download", headers={**auth, "Range": "bytes=1000-", "If-Range": etag})
+        assert part.status_code == 206
+        assert part.headers["content-range"] == f"bytes 1000-{len(data) - 1}/{len(data)}"
+        assert part.content == data[1000:]
+
+        changed = client.get(f"/files/{uploaded.Fileid}/download", headers={**auth, "Range": "bytes=0-9", "If-Range": '"old"'})
+        assert changed.status_code == 200 and changed.content == data
+
+        beyond = client.get(f"/files/{uploaded.Fileid}/download", headers={**auth, "Range": f"bytes={len(data)}-"})
+        assert beyond.status_code == 416
+
+    def test_metadata_cached_until_delete(self, client, download):
+        """Test repeat downloads skip the files table and a delete stops them"""
+        uploaded, _, auth = download
+        client.get(f"/files/{uploaded.Fileid}/download", headers=auth)
+        assert len(file_metadata_cache) == 1
+        session = TestingSessionLocal()
+        submission_service.delete_file(session, uploaded.Fileid, 1, "Student")
+        session.close()
+        assert len(file_metadata_cache) == 0
+        assert client.get(f"/files/{uploaded.Fileid}/download", headers=auth).status_code == 404
@@ -0,0 +1,121 @@
+"""
+Tests for the columnar gradebook engine against the row-wise builder.
+"""
+import warnings
+from types import SimpleNamespace
+
+import pytest
+
+from alphagocanvas.api.services.gradebook_engine import _parse_timestamp, _parse_timestamps
+from alphagocanvas.api.services.gradebook_service import _build_gradebook, _build_gradebook_rowwise
+
+
+def _assignment(aid, due, points=100, pct=None, grace=None):
+    return SimpleNamespace(Assignmentid=aid, Assignmentname=f"A{aid}", Points=points, Duedate=due,
+                           Latepolicy_percent_per_day=pct, Latepolicy_grace_minutes=grace)
+
+
+def _submission(sub_id, aid, sid, score, graded, submitted):
+    return SimpleNamespace(Submissionid=sub_id, Assignmentid=aid, Studentid=sid, Submissionscore=score,
+                           Submissiongraded=graded, Submitteddate=submitted)
+
+
+ENROLLMENTS = [SimpleNamespace(Studentid=sid, EnrollmentGrades=grade)
+               for sid, grade in [(3, "A"), (1, None), (2, "B"), (1, None)]]
+STUDENTS = [SimpleNamespace(Studentid=1, Studentfirstname="Ada", Studentlastname="L"),
+            SimpleNamespace(Studentid=2, Studentfirstname=None, Studentlastname=None)]
+ASSIGNMENTS = [
+    _assignment(20, "2025-02-01T23:59:00Z", points=50, pct=10, grace=60),
+    _assignment(10, "2025-02-03T12:00:00", pct=5),
+    _assignment(30, "2025-02-05T12:00:00+02:00", pct=20),
+    _assignment(40, None, pct=10),
+    _assignment(50, "not a date", points=None),
+]
+SUBMISSIONS = [
+    _submission(1, 20, 1, "45", True, "2025-02-03T10:00:00Z"),      # 34 hours late, past grace
+    _submission(2, 20, 2, "40", True, "2025-02-02T00:30:00Z"),      # inside the grace period
+    _submission(3, 10, 1, "A-", True, "2025-02-04T12:00:00Z"),      # late, non-numeric score
+    _submission(4, 10, 2, "88", False, "2025-02-01T12:00:00"),      # early, ungraded
+    _submission(5, 30, 1, "70", True, "2025-02-05T11:30:00+00:00"),  # late once offsets are applied
+    _submission(6, 30, 2, "90", True, "2025-02-06T12:00:00"),       # naive vs aware: treated as on time
+    _submission(7, 40, 3, "60", True, "2025-02-10T00:00:00Z"),      # no due date
+    _submission(8, 50, 3, None, True, "2025-02-10T00:00:00Z"),
+    _submission(9, 10, 99, "100", True, "2025-02-01T00:00:00Z"),    # not enrolled
+]
+
+
+def _normalise(response):
+    data = response.model_dump()
+    for row in data["Rows"]:
+        for cell in row["Cells"]:
+            for key in ("Score_numeric", "Late_deduction_applied"):
+                if cell[key] is not None:
+                    cell[key] = round(cell[key], 6)
+    return data
+
+
+class TestGradebookEngine:
+    """The columnar engine must produce the same gradebook as the row-wise builder"""
+
+    @pytest.mark.parametrize("apply_late_policy,curve_to_score", [
+        (False, None),
+        (True, None),
+        (False, 100.0),
+        (True, 95.0),
+    ])
+    def test_matches_rowwise(self, apply_late_policy, curve_to_score):
+        """Test scores, statuses, deductions and curve agree cell for cell"""
+        args = (7, "Course", ENROLLMENTS, STUDENTS, ASSIGNMENTS, SUBMISSIONS)
+        options = {"apply_late_policy": apply_late_policy, "curve_to_score": curve_to_score}
+        assert _normalise(_build_gradebook(*args, **options)) == _normalise(_build_gradebook_rowwise(*args, **options))
+
+    def test_matches_rowwise_without_offsets(self):
+        """Test the vectorised timestamp path (no explicit UTC offsets) agrees too"""
+        assignments = [a for a in ASSIGNMENTS if "+" not in (a.Duedate or "")]
+        submissions = [s for s in SUBMISSIONS if "+" not in s.Submitteddate]
+        args = (7, "Course", ENROLLMENTS, STUDENTS, assignments, submissions)
+        assert _normalise(_build_gradebook(*args, apply_late_policy=True)) == \
+            _normalise(_build_gradebook_rowwise(*args, apply_late_policy=True))
+
+    @pytest.mark.parametrize("values", [
+        # A negative offset's extra dash balances a basic-format value's missing ones
+        ["2025-02-01T12:00:00-05:00", "2025-02-02T12:00:00-08:00", "20250201"],
+        ["2025-02-01T12:00:00", "2025-02-01T12:00:00-05:00"],
+        ["20250201T120000", "2025-02-01"],
+    ])
+    def test_timestamps_checked_per_value(self, values):
+        """Test a batch only takes the NumPy path when every value is naive extended ISO"""
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            wall, offset, ok = _parse_timestamps(values)
+        expected_wall, expected_offset, expected_ok = zip(*(_parse_timestamp(value) for value in values))
+        assert list(wall) == list(expected_wall) and list(ok) == list(expected_ok)
+        assert list(offset) == pytest.approx(list(expected_offset), nan_ok=True)
+
+    def test_matches_rowwise_with_mixed_formats(self):
+        """Test deductions agree when a negative offset and a basic-format date share a batch"""
+        assignments = [_assignment(60, "2025-02-01T12:00:00-05:00", pct=10),
+                       _assignment(61, "2025-02-01T12:00:00-08:00", pct=10),
+                       _assignment(70, "20250201", pct=10)]
+        submissions = [_submission(1, 60, 1, "90", True, "2025-02-02T17:00:00Z"),
+                       _submission(2, 61, 1, "90", True, "2025-02-02T17:00:00Z"),
+                       _submission(3, 70, 1, "90", True, "2025-02-03T00:00:00")]
+        args = (7, "Course", ENROLLMENTS, STUDENTS, assignments, submissions)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            columnar = _build_gradebook(*args, apply_late_policy=True)
+        assert _normalise(columnar) == _normalise(_build_gradebook_rowwise(*args, apply_late_policy=True))
+        assert {c.Assignmentid: c.Status for c in columnar.Rows[1].Cells} == {60: "late", 61: "late", 70: "late"}
+
+    def test_late_policy_values(self):
+        """Test the deduction for a submission 2041 minutes late with a one-hour grace"""
+        response = _build_gradebook(7, "Course", ENROLLMENTS, STUDENTS, ASSIGNMENTS, SUBMISSIONS,
+                                    apply_late_policy=True)
+        cell = next(c for c in response.Rows[1].Cells if c.Assignmentid == 20)
+        assert cell.Status == "late"
+        assert cell.Late_deduction_applied == pytest.approx(50 * 0.10 * (2041 - 60) / 1440)
+
+    def test_no_submissions(self):
+        """Test every cell is missing when nothing has been submitted"""
+        response = _build_gradebook(7, "Course", ENROLLMENTS, STUDENTS, ASSIGNMENTS, [])
+        assert {c.Status for row in response.Rows for c in row.Cells} == {"missing"}
@@ -0,0 +1,117 @@
+"""
+Tests for the streaming gradebook export.
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from alphagocanvas.api.services import gradebook_export_service as export
+from alphagocanvas.api.services.gradebook_service import get_gradebook
+from alphagocanvas.database.models import (
+    AssignmentTable,
+    Base,
+    CourseTable,
+    DiscussionGradeTable,
+    DiscussionTable,
+    StudentEnrollmentTable,
+    StudentTable,
+    SubmissionTable,
+)
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """Seeded SQLite file shared by a sync session (reference) and an async session factory"""
+    path = tmp_path / "gradebook.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    session = sessionmaker(bind=sync_engine)()
+    session.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    session.add_all([
+        StudentTable(Studentid=10, Studentfirstname="Ada", Studentlastname="Lovelace"),
+        StudentTable(Studentid=11, Studentfirstname="Alan", Studentlastname="Turing"),
+        StudentTable(Studentid=12, Studentfirstname="Grace", Studentlastname="Hopper"),
+        StudentEnrollmentTable(Enrollmentid=1, Studentid=10, Courseid=1, EnrollmentSemester="Fall24"),
+        StudentEnrollmentTable(Enrollmentid=2, Studentid=11, Courseid=1, EnrollmentSemester="Fall24"),
+        StudentEnrollmentTable(Enrollmentid=3, Studentid=12, Courseid=1, EnrollmentSemester="Spring25"),
+        AssignmentTable(Assignmentid=100, Assignmentname="Sorting", Courseid=1, Points=50,
+                        Duedate="2024-10-01T23:59:00", Latepolicy_percent_per_day=10),
+        AssignmentTable(Assignmentid=101, Assignmentname="Graphs", Courseid=1, Points=100),
+        DiscussionTable(Discussionid=5, Discussiontitle="Intro", Discussioncontent="Say hi", Courseid=1,
+                        Authorid=1, Authorrole="Faculty", Points=10),
+        DiscussionGradeTable(Discussionid=5, Studentid=11, Score="9"),
+        SubmissionTable(Submissionid=1000, Assignmentid=100, Studentid=10, Submissionscore="40",
+                        Submissiongraded=True, Submitteddate="2024-10-03T12:00:00"),
+        SubmissionTable(Submissionid=1001, Assignmentid=101, Studentid=12, Submissionscore="80",
+                        Submissiongraded=True, Submitteddate="2024-09-30T12:00:00"),
+    ])
+    session.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    monkeypatch.setattr(export, "AsyncSessionLocal", async_sessions)
+    # One enrollment per chunk so every row crosses a chunk boundary
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", 1)
+    yield session, async_sessions
+    session.close()
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def _export(async_sessions, export_format, **options) -> str:
+    async def run():
+        async with async_sessions() as db:
+            plan = await export.prepare_gradebook_export(db, 1, **options)
+        return "".join([chunk async for chunk in export.stream_gradebook_export(plan, export_format)])
+    return asyncio.run(run())
+
+
+class TestGradebookExport:
+    """Chunked export must match the in-memory gradebook"""
+
+    def test_csv_matches_gradebook(self, databases):
+        """Test CSV has a header plus one row per enrollment with the gradebook's scores"""
+        session, async_sessions = databases
+        rows = list(csv.reader(io.StringIO(_export(async_sessions, "csv", apply_late_policy=True))))
+        assert rows[0] == ["Studentid", "Studentname", "Semester", "Course_grade",
+                           "Sorting (100)", "Graphs (101)", "Intro (5)"]
+
+        expected = get_gradebook(session, 1, apply_late_policy=True)
+        assert [row[0] for row in rows[1:]] == [str(r.Studentid) for r in expected.Rows]
+        for row, reference in zip(rows[1:], expected.Rows):
+            assert row[4:6] == [cell.Score or "" for cell in reference.Cells]
+        assert rows[2][6] == "9"
+
+    def test_csv_escapes_formulas(self, databases):
+        """Test names and titles that a spreadsheet would evaluate are written as text"""
+        session, async_sessions = databases
+        session.get(StudentTable, 10).Studentfirstname = "=HYPERLINK(\"http://x\")"
+        session.get(AssignmentTable, 101).Assignmentname = "@SUM(A1)"
+        session.get(SubmissionTable, 1001).Submissionscore = "-5"
+        session.commit()
+        rows = list(csv.reader(io.StringIO(_export(async_sessions, "csv"))))
+        assert rows[0][5] == "'@SUM(A1) (101)"
+        assert rows[1][1] == "'=HYPERLINK(\"http://x\") Lovelace"
+        assert rows[3][5] == "-5"
+
+    def test_ndjson_curves_against_whole_course(self, databases):
+        """Test the curve uses the course-wide max even though each chunk holds one student"""
+        session, async_sessions = databases
+        lines = _export(async_sessions, "ndjson", curve_to_score=100).splitlines()
+        records = [json.loads(line) for line in lines]
+        expected = get_gradebook(session, 1, curve_to_score=100)
+        assert [[c["Score_numeric"] for c in r["Cells"]] for r in records] == \
+            [[c.Score_numeric for c in r.Cells] for r in expected.Rows]
+        assert records[0]["Cells"][0]["Curved"] is True
+
+    def test_semester_filter(self, databases):
+        """Test semester limits the exported enrollments"""
+        _, async_sessions = databases
+        records = [json.loads(line) for line in _export(async_sessions, "ndjson", semester="Spring25").splitlines()]
+        assert [r["Studentid"] for r in records] == [12]
@@ -0,0 +1,99 @@
+"""
+Tests for the materialized gradebook snapshot.
+"""
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from alphagocanvas.api.models.discussion import DiscussionGradeRequest
+from alphagocanvas.api.services import gradebook_snapshot_service as snapshots
+from alphagocanvas.api.services.discussion_service import set_discussion_grade
+from alphagocanvas.api.services.gradebook_service import get_gradebook
+from alphagocanvas.api.services.submission_service import create_submission, grade_submission
+from alphagocanvas.database.models import (
+    AssignmentTable,
+    CourseTable,
+    DiscussionTable,
+    GradebookSnapshotTable,
+    StudentEnrollmentTable,
+    StudentTable,
+    SubmissionTable,
+)
+from alphagocanvas.tests.helpers import record_statements
+
+
+@pytest.fixture
+def db(db):
+    """Session on the test database with one course, two students and two assignments"""
+    db.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    db.add_all([
+        StudentTable(Studentid=10, Studentfirstname="Ada", Studentlastname="Lovelace"),
+        StudentTable(Studentid=11, Studentfirstname="Alan", Studentlastname="Turing"),
+        StudentEnrollmentTable(Enrollmentid=1, Studentid=10, Courseid=1, EnrollmentSemester="Fall24"),
+        StudentEnrollmentTable(Enrollmentid=2, Studentid=11, Courseid=1, EnrollmentSemester="Fall24"),
+        AssignmentTable(Assignmentid=100, Assignmentname="Sorting", Courseid=1, Points=50,
+                        Duedate="2024-10-01T23:59:00", Latepolicy_percent_per_day=10),
+        AssignmentTable(Assignmentid=101, Assignmentname="Graphs", Courseid=1, Points=100),
+        DiscussionTable(Discussionid=5, Discussiontitle="Intro", Discussioncontent="Say hi", Courseid=1,
+                        Authorid=1, Authorrole="Faculty", Points=10),
+        SubmissionTable(Submissionid=1000, Assignmentid=100, Studentid=10, Submissionscore="40",
+                        Submissiongraded=True, Submitteddate="2024-10-03T12:00:00"),
+    ])
+    db.commit()
+    return db
+
+
+class TestGradebookSnapshot:
+    """The snapshot must track submit and grade events and match a full recompute"""
+
+    def test_first_read_builds_snapshot(self, db):
+        """Test the snapshot is built on first read and serves the same gradebook"""
+        served = snapshots.get_gradebook_from_snapshot(db, 1, apply_late_policy=True)
+        assert db.get(GradebookSnapshotTable, 1) is not None
+        assert served == get_gradebook(db, 1, apply_late_policy=True)
+        assert snapshots.check_snapshot(db, 1) == []
+
+    def test_submit_and_grade_update_snapshot(self, db):
+        """Test create_submission and grade_submission patch the snapshot in place"""
+        snapshots.rebuild_snapshot(db, 1)
+        submission = create_submission(db, assignment_id=101, student_id=11, content="answer")
+        grade_submission(db, submission.Submissionid, "91")
+
+        snapshot = db.get(GradebookSnapshotTable, 1, populate_existing=True)
+        assert snapshot.Version == 2
+        assert snapshots.check_snapshot(db, 1) == []
+        row = snapshots.get_gradebook_from_snapshot(db, 1).Rows[1]
+        assert row.Cells[1].Score == "91" and row.Cells[1].Status == "graded"
+
+    def test_discussion_grade_updates_snapshot(self, db):
+        """Test set_discussion_grade patches the discussion cell"""
+        snapshots.rebuild_snapshot(db, 1)
+        set_discussion_grade(db, 5, DiscussionGradeRequest(Studentid=10, Score="8"), "Faculty")
+        assert snapshots.check_snapshot(db, 1) == []
+        assert snapshots.get_gradebook_from_snapshot(db, 1).Rows[0].Discussion_cells[0].Score_numeric == 8.0
+
+    def test_check_reports_drift(self, db):
+        """Test a write that bypasses the service hooks is reported"""
+        snapshots.rebuild_snapshot(db, 1)
+        db.query(SubmissionTable).filter(SubmissionTable.Submissionid == 1000).update({"Submissionscore": "12"})
+        db.commit()
+        problems = snapshots.check_snapshot(db, 1)
+        assert len(problems) == 1 and "student 10 row differs" in problems[0]
+
+    def test_semester_filter(self, db):
+        """Test the semester filter is applied to snapshot rows"""
+        assert snapshots.get_gradebook_from_snapshot(db, 1, semester="Spring25").Rows == []
+        assert len(snapshots.get_gradebook_from_snapshot(db, 1, semester="Fall24").Rows) == 2
+
+    def test_rebuild_and_patches_take_the_course_lock(self, db):
+        """Test rebuilds lock the course before reading, and grade writes lock it even with no snapshot"""
+        lock = str(snapshots._lock_course(1).compile(dialect=postgresql.dialect()))
+        assert lock.endswith("FOR NO KEY UPDATE")
+
+        _, rebuild = record_statements(lambda: snapshots.rebuild_snapshot(db, 1))
+        snapshots.invalidate_snapshot(db, 1)
+        db.commit()
+        _, statements = record_statements(lambda: grade_submission(db, 1000, "45"))
+        course_lock = [n for n, s in enumerate(rebuild) if s.startswith("SELECT courses.")]
+        submissions_read = [n for n, s in enumerate(rebuild) if "FROM submissions" in s]
+        assert course_lock and course_lock[0] < submissions_read[0]
+        assert any(s.startswith("SELECT courses.") for s in statements)
@@ -0,0 +1,191 @@
+"""
+Tests for the denormalized inbox and paged conversation history.
+"""
+import pytest
+
+from alphagocanvas.api.models.message import ConversationCreateRequest, MessageCreateRequest
+from alphagocanvas.api.services import message_service
+from alphagocanvas.api.services.message_service import (
+    MESSAGE_PREVIEW_LENGTH, backfill_inbox, create_conversation, get_conversation, get_inbox, send_message
+)
+from alphagocanvas.database.models import ConversationParticipantTable, ConversationTable, MessageTable
+from alphagocanvas.tests.helpers import record_statements
+
+
+def _start(db, subject, sender=1, recipients=(2, 3)):
+    return create_conversation(db, ConversationCreateRequest(
+        Conversationsubject=subject, Recipientids=list(recipients), Recipientroles=["Student"] * len(recipients),
+        Initialmessage=f"{subject} opener"
+    ), sender, "Faculty", f"User {sender}")
+
+
+def _send(db, conversation_id, sender, content):
+    return send_message(db, conversation_id, MessageCreateRequest(Messagecontent=content), sender, "Student", f"User {sender}")
+
+
+def _unread(db, conversation_id):
+    rows = db.query(ConversationParticipantTable).filter(ConversationParticipantTable.Conversationid == conversation_id)
+    return {p.Userid: p.Unreadcount for p in rows}
+
+
+class TestSendMessage:
+    """send_message keeps the snapshot and counters in step with the messages"""
+
+    def test_counts_and_snapshot(self, db):
+        """Test each message counts once for every other participant and replaces the snapshot"""
+        conversation = _start(db, "Project")
+        assert _unread(db, conversation.Conversationid) == {1: 0, 2: 1, 3: 1}
+        _send(db, conversation.Conversationid, 2, "first reply")
+        message = _send(db, conversation.Conversationid, 2, "x" * (MESSAGE_PREVIEW_LENGTH + 10))
+
+        assert _unread(db, conversation.Conversationid) == {1: 2, 2: 1, 3: 3}
+        db.expire_all()
+        stored = db.get(ConversationTable, conversation.Conversationid)
+        assert stored.Lastmessageid == message.Messageid and stored.Lastmessagesendername == "User 2"
+        assert stored.Lastmessagepreview == "x" * MESSAGE_PREVIEW_LENGTH
+
+    def test_opening_resets_count(self, db):
+        """Test opening a conversation clears only the reader's count"""
+        conversation = _start(db, "Project")
+        _send(db, conversation.Conversationid, 1, "ping")
+        get_conversation(db, conversation.Conversationid, 2)
+        assert _unread(db, conversation.Conversationid) == {1: 0, 2: 0, 3: 2}
+
+    def test_non_participant_rejected(self, db):
+        """Test a user outside the conversation cannot post or change counters"""
+        conversation = _start(db, "Project")
+        with pytest.raises(Exception):
+            _send(db, conversation.Conversationid, 9, "intruder")
+        assert _unread(db, conversation.Conversationid) == {1: 0, 2: 1, 3: 1}
+
+
+class TestConversationHistory:
+    """Conversations open on their newest page and only write when there is something to mark read"""
+
+    def test_pages_newest_first(self, db):
+        """Test the first page is the newest messages in reading order and the cursor walks back to the start"""
+        conversation = _start(db, "Long")
+        for n in range(6):
+            _send(db, conversation.Conversationid, 2, f"m{n}")
+        first = get_conversation(db, conversation.Conversationid, 3, limit=3)
+        assert [m.Messagecontent for m in first.Messages] == ["m3", "m4", "m5"]
+        seen, cursor = [m.Messagecontent for m in first.Messages], first.Nextcursor
+        while cursor:
+            page = get_conversation(db, conversation.Conversationid, 3, limit=3, cursor=cursor)
+            seen = [m.Messagecontent for m in page.Messages] + seen
+            cursor = page.Nextcursor
+        assert seen == ["Long opener"] + [f"m{n}" for n in range(6)]
+
+    def test_repeated_opens_do_not_write(self, db):
+        """Test only an open with something unread issues an UPDATE"""
+        conversation = _start(db, "Project")
+        _, first = record_statements(lambda: get_conversation(db, conversation.Conversationid, 2))
+        _, again = record_statements(lambda: get_conversation(db, conversation.Conversationid, 2))
+        assert len([s for s in first if s.startswith("UPDATE")]) == 1
+        assert not [s for s in again if s.startswith("UPDATE")]
+        assert len(again) == 4
+
+    def test_read_receipts(self, db):
+        """Test the sender sees a message as read once every other participant has opened it"""
+        conversation = _start(db, "Project")
+        message = _send(db, conversation.Conversationid, 1, "ping")
+        receipt = lambda: {m.Messageid: m.Isread for m in get_conversation(db, conversation.Conversationid, 1).Messages}
+        assert receipt()[message.Messageid] is False
+        get_conversation(db, conversation.Conversationid, 2)
+        assert receipt()[message.Messageid] is False
+        get_conversation(db, conversation.Conversationid, 3)
+        assert receipt()[message.Messageid] is True
+
+    def test_message_arriving_mid_open_stays_unread(self, db, monkeypatch):
+        """Test a read based on a stale unread count clears nothing and pushes no read event"""
+        conversation = _start(db, "Project")
+        stale = db.query(ConversationParticipantTable).filter_by(Conversationid=conversation.Conversationid, Userid=2).one()
+        db.expunge(stale)
+        _send(db, conversation.Conversationid, 1, "new")
+        published = []
+        monkeypatch.setattr(message_service.push, "publish_after_commit", lambda *args: published.append(args))
+        assert message_service._mark_read(db, stale, 1) is False
+        assert _unread(db, conversation.Conversationid)[2] == 2 and published == []
+
+    def test_read_already_advanced(self, db, monkeypatch):
+        """Test a read behind the participant's current read position pushes no read event"""
+        conversation = _start(db, "Project")
+        _send(db, conversation.Conversationid, 1, "new")
+        stale = db.query(ConversationParticipantTable).filter_by(Conversationid=conversation.Conversationid, Userid=2).one()
+        db.expunge(stale)
+        get_conversation(db, conversation.Conversationid, 2)
+        stale.Unreadcount, stale.Isunread = 0, False
+        published = []
+        monkeypatch.setattr(message_service.push, "publish_after_commit", lambda *args: published.append(args))
+        assert message_service._mark_read(db, stale, 1) is False and published == []
+
+    def test_participants_capped(self, db, monkeypatch):
+        """Test large threads list a bounded number of participants with the total alongside"""
+        monkeypatch.setattr(message_service, "MAX_DETAIL_PARTICIPANTS", 2)
+        conversation = get_conversation(db, _start(db, "Course").Conversationid, 1)
+        assert [p.Userid for p in conversation.Participants] == [1, 2] and conversation.Participantcount == 3
+
+
+class TestInbox:
+    """The inbox reads the denormalized columns only"""
+
+    def test_no_message_reads(self, db):
+        """Test an inbox page is three queries, none of them on the messages table"""
+        for subject in ("A", "B"):
+            conversation = _start(db, subject)
+            for n in range(5):
+                _send(db, conversation.Conversationid, 2, f"{subject} {n}")
+        inbox, statements = record_statements(lambda: get_inbox(db, 3))
+        assert len(statements) == 3
+        assert not any("FROM messages" in statement for statement in statements)
+        assert [c.Lastmessage for c in inbox.Conversations] == ["B 4", "A 4"]
+        assert [c.Unreadcount for c in inbox.Conversations] == [6, 6]
+        assert (inbox.Totalconversations, inbox.Unreadconversations, inbox.Unreadmessages) == (2, 2, 12)
+        assert [p.Userid for p in inbox.Conversations[0].Participants] == [1, 2, 3]
+
+    def test_keyset_pages(self, db):
+        """Test paging covers every conversation once, most recently active first"""
+        ids = [_start(db, f"Thread {n}").Conversationid for n in range(5)]
+        _send(db, ids[1], 2, "bump")
+        seen, cursor = [], None
+        while True:
+            page = get_inbox(db, 3, limit=2, cursor=cursor)
+            assert page.Totalconversations == 5
+            seen += [c.Conversationid for c in page.Conversations]
+            cursor = page.Nextcursor
+            if cursor is None:
+                break
+        assert seen[0] == ids[1] and sorted(seen) == sorted(ids) and len(seen) == 5
+
+    def test_empty(self, db):
+        """Test a user with no conversations gets an empty first and last page"""
+        inbox = get_inbox(db, 42)
+        assert inbox.Totalconversations == 0 and inbox.Conversations == [] and inbox.Nextcursor is None
+
+
+class TestBackfill:
+    """Conversations written before the snapshot columns get them filled in"""
+
+    def test_backfill_legacy_rows(self, db):
+        """Test the snapshot comes from the newest message and unread counts from the user's last reply"""
+        db.add(ConversationTable(Conversationid=1, Conversationsubject="Old", Lastmessagedate="2024-01-03"))
+        db.add_all([
+            ConversationParticipantTable(Conversationid=1, Userid=1, Userrole="Faculty", Isunread=True),
+            ConversationParticipantTable(Conversationid=1, Userid=2, Userrole="Student", Isunread=False),
+            MessageTable(Messageid=1, Conversationid=1, Senderid=2, Senderrole="Student", Messagecontent="q",
+                         Createdat="2024-01-01"),
+            MessageTable(Messageid=2, Conversationid=1, Senderid=1, Senderrole="Faculty", Messagecontent="a",
+                         Createdat="2024-01-02"),
+            MessageTable(Messageid=3, Conversationid=1, Senderid=2, Senderrole="Student", Sendername="Sam",
+                         Messagecontent="thanks", Createdat="2024-01-03"),
+        ])
+        db.commit()
+        assert backfill_inbox(db) == (1, 2)
+        assert backfill_inbox(db) == (0, 0)
+
+        inbox = get_inbox(db, 1)
+        assert inbox.Conversations[0].Lastmessage == "thanks"
+        assert inbox.Conversations[0].Lastmessagesendername == "Sam"
+        assert _unread(db, 1) == {1: 1, 2: 0}
+        read = {p.Userid: p.Lastreadmessageid for p in db.query(ConversationParticipantTable)}
+        assert read == {1: 2, 2: 3}
@@ -0,0 +1,89 @@
+"""
+Tests for the metrics registry and pool instrumentation.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+
+from alphagocanvas.api.endpoints import metrics as metrics_endpoint
+from alphagocanvas.database.pool import InstrumentedQueuePool, POOL_CHECKOUTS, POOL_WAIT_SECONDS, instrument_engine
+from alphagocanvas.metrics import Counter, Histogram, render_metrics
+
+
+class TestMetricsRegistry:
+    """Tests for counters, histograms and text rendering"""
+
+    def test_counter_labels(self):
+        """Test counters are tracked per label set"""
+        counter = Counter("test_requests_total", "Test requests", ["route"])
+        counter.inc(route="a")
+        counter.inc(2, route="a")
+        assert counter.value(route="a") == 3
+        assert counter.value(route="b") == 0
+        assert 'test_requests_total{route="a"} 3' in render_metrics()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets count every observation at or below the bound"""
+        histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        output = render_metrics()
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'test_latency_seconds_bucket{le="1"} 2' in output
+        assert 'test_latency_seconds_bucket{le="+Inf"} 2' in output
+        assert histogram.count() == 2
+
+
+class TestPoolInstrumentation:
+    """Tests for the instrumented connection pool"""
+
+    def test_checkout_is_counted(self, tmp_path):
+        """Test checkouts and pool gauges are reported for an instrumented engine"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+        )
+        instrument_engine(engine, "pooltest")
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert POOL_CHECKOUTS.value(engine="pooltest") == 1
+        assert 'db_pool_size{engine="pooltest"} 1' in render_metrics()
+        engine.dispose()
+
+    def test_wait_is_timed_only_when_exhausted(self, tmp_path):
+        """Test a checkout is counted as a wait only when it blocks for a connection to come back"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+        )
+        instrument_engine(engine, "waittest")
+        with engine.connect():
+            pass
+        assert POOL_WAIT_SECONDS.count(engine="waittest") == 0
+
+        held = engine.connect()
+        threading.Timer(0.05, held.close).start()
+        started = time.perf_counter()
+        with engine.connect():
+            waited = time.perf_counter() - started
+        assert POOL_WAIT_SECONDS.count(engine="waittest") == 1 and waited >= 0.04
+        engine.dispose()
+
+
+class TestMetricsEndpoint:
+    """/metrics is never served without a token"""
+
+    def test_requires_token(self, monkeypatch):
+        """Test scrapes are refused when no token is configured and checked when one is"""
+        monkeypatch.setattr(metrics_endpoint, "METRICS_TOKEN", "")
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(metrics_endpoint.get_metrics(authorization=None))
+        assert error.value.status_code == 503
+
+        monkeypatch.setattr(metrics_endpoint, "METRICS_TOKEN", "scrape")
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(metrics_endpoint.get_metrics(authorization="Bearer wrong"))
+        assert error.value.status_code == 401
+        assert asyncio.run(metrics_endpoint.get_metrics(authorization="Bearer scrape")).status_code == 200
@@ -0,0 +1,187 @@
+"""
+Tests for the notification feed, unread counters and bulk notification writes.
+"""
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from alphagocanvas.api.models import TokenData
+from alphagocanvas.api.services import notification_service
+from alphagocanvas.api.services.notification_service import (
+    NewNotification, add_unread_for, create_notifications, get_feed, get_unread_count, mark_all_read, mark_read,
+    purge_notifications, rebuild_unread_counts
+)
+from alphagocanvas.api.utils.auth import create_token
+from alphagocanvas.database.connection import get_async_database, get_database
+from alphagocanvas.database.models import Base, NotificationCounterTable, NotificationTable
+from alphagocanvas.tests.conftest import TestingSessionLocal, app, override_get_db
+from alphagocanvas.tests.helpers import record_statements
+
+
+def _notify(db, user_ids, title="Grade posted", kind="grade"):
+    created = create_notifications(db, [
+        NewNotification(Userid=user_id, Userrole="Student", Title=title, Message=f"{title} for {user_id}",
+                        Notificationtype=kind, Linkurl="/grades")
+        for user_id in user_ids
+    ])
+    db.commit()
+    return created
+
+
+def _ids(db, user_id):
+    return db.execute(
+        select(NotificationTable.Notificationid).where(NotificationTable.Userid == user_id)
+        .order_by(NotificationTable.Notificationid)
+    ).scalars().all()
+
+
+class TestCreateNotifications:
+    """Batched inserts keep every recipient's counter in step"""
+
+    def test_batches_and_counts(self, db, monkeypatch):
+        """Test inserts go out NOTIFICATION_INSERT_BATCH_SIZE rows at a time and counters add up per user"""
+        monkeypatch.setattr(notification_service, "NOTIFICATION_INSERT_BATCH_SIZE", 2)
+        created, statements = record_statements(lambda: _notify(db, [1, 2, 1, 3, 1]))
+        assert created == 5
+        assert len([s for s in statements if s.startswith("INSERT INTO notifications")]) == 3
+        assert len([s for s in statements if s.startswith("INSERT INTO notification_counters")]) == 1
+        _notify(db, [2])
+        assert [get_unread_count(db, user_id) for user_id in (1, 2, 3, 4)] == [3, 2, 1, 0]
+
+    def test_badge_is_one_row(self, db):
+        """Test the unread count is a primary-key read, not a count over notifications"""
+        _notify(db, [1] * 20)
+        count, statements = record_statements(lambda: get_unread_count(db, 1))
+        assert count == 20 and len(statements) == 1
+        assert "notification_counters" in statements[0] and "count(" not in statements[0].lower()
+
+    def test_add_unread_for_returned_ids(self, db):
+        """Test counters follow the user ids an INSERT ... RETURNING reported, in one statement"""
+        _notify(db, [1])
+        _, statements = record_statements(lambda: add_unread_for(db, [2, 1, 2]))
+        db.commit()
+        assert len(statements) == 1
+        assert [get_unread_count(db, user_id) for user_id in (1, 2)] == [2, 2]
+
+
+class TestFeed:
+    """The feed pages newest first"""
+
+    def test_keyset_pages(self, db):
+        """Test paging covers every notification once, newest first, and only the user's own"""
+        _notify(db, [1, 2] * 5)
+        seen, cursor = [], None
+        while True:
+            page = get_feed(db, 1, limit=2, cursor=cursor)
+            assert page.Unreadcount == 5
+            seen += [n.Notificationid for n in page.Notifications]
+            cursor = page.Nextcursor
+            if cursor is None:
+                break
+        assert seen == sorted(_ids(db, 1), reverse=True)
+
+    def test_unread_only(self, db):
+        """Test the unread feed skips what has been read"""
+        _notify(db, [1] * 3)
+        ids = _ids(db, 1)
+        mark_read(db, 1, [ids[1]])
+        page = get_feed(db, 1, unread_only=True)
+        assert [n.Notificationid for n in page.Notifications] == [ids[2], ids[0]] and page.Unreadcount == 2
+
+
+class TestMarkRead:
+    """Counters drop by what actually changed"""
+
+    def test_mark_read(self, db):
+        """Test only the user's unread notifications count, however often they are marked"""
+        _notify(db, [1, 1, 1, 2])
+        mine, theirs = _ids(db, 1), _ids(db, 2)
+        first = mark_read(db, 1, mine[:2] + theirs)
+        assert (first.Updated, first.Unreadcount) == (2, 1)
+        again = mark_read(db, 1, mine[:2])
+        assert (again.Updated, again.Unreadcount) == (0, 1)
+        assert get_unread_count(db, 2) == 1 and not db.get(NotificationTable, theirs[0]).Isread
+
+    def test_mark_all_read_through(self, db):
+        """Test a notification newer than Throughid stays unread"""
+        _notify(db, [1] * 3)
+        ids = _ids(db, 1)
+        response, statements = record_statements(lambda: mark_all_read(db, 1, through_id=ids[1]))
+        assert (response.Updated, response.Unreadcount) == (2, 1)
+        assert len([s for s in statements if s.startswith("UPDATE")]) == 2
+        assert mark_all_read(db, 1).Updated == 1 and get_unread_count(db, 1) == 0
+
+
+class TestMaintenance:
+    """Purging and rebuilding keep the counters honest"""
+
+    def test_purge(self, db):
+        """Test old notifications go in batches and unread ones come off the badge"""
+        _notify(db, [1] * 4 + [2])
+        ids = _ids(db, 1)
+        mark_read(db, 1, [ids[0]])
+        db.query(NotificationTable).filter(NotificationTable.Notificationid.in_(ids[:3])).update(
+            {"Createdat": "2020-01-01T00:00:00"}, synchronize_session=False
+        )
+        db.commit()
+        assert purge_notifications(db, datetime(2021, 1, 1), batch_size=2) == 3
+        assert _ids(db, 1) == ids[3:]
+        assert [get_unread_count(db, user_id) for user_id in (1, 2)] == [1, 1]
+
+    def test_rebuild(self, db):
+        """Test counts are recomputed for notifications written without counters"""
+        db.add_all([
+            NotificationTable(Userid=1, Userrole="Student", Title="t", Message="m", Notificationtype="system"),
+            NotificationTable(Userid=1, Userrole="Student", Title="t", Message="m", Notificationtype="system",
+                              Isread=True),
+            NotificationTable(Userid=2, Userrole="Student", Title="t", Message="m", Notificationtype="system"),
+        ])
+        db.add(NotificationCounterTable(Userid=3, Unreadcount=7))
+        db.commit()
+        assert rebuild_unread_counts(db) == 2
+        assert [get_unread_count(db, user_id) for user_id in (1, 2, 3)] == [1, 1, 0]
+
+
+class TestNotificationEndpoints:
+    """The feed and mark-read endpoints"""
+
+    def test_feed_and_read_all(self, client):
+        """Test a user reads their feed and clears it"""
+        app.dependency_overrides[get_database] = override_get_db
+        db = TestingSessionLocal()
+        _notify(db, [5, 5, 6])
+        db.close()
+        headers = {"Authorization": "Bearer " + create_token(
+            TokenData(useremail="s5@test.com", userrole="Student", userid=5))}
+
+        feed = client.get("/notifications?limit=1", headers=headers).json()
+        assert len(feed["Notifications"]) == 1 and feed["Unreadcount"] == 2 and feed["Nextcursor"]
+        response = client.post("/notifications/read-all", headers=headers,
+                               json={"Throughid": feed["Notifications"][0]["Notificationid"]})
+        assert response.json() == {"Updated": 2, "Unreadcount": 0}
+        assert client.post("/notifications/read", headers=headers, json={"Notificationids": [1]}).json()["Updated"] == 0
+
+    def test_unread_count_on_async_engine(self, client, tmp_path):
+        """Test the badge endpoint reads the counter through the async session"""
+        path = tmp_path / "notifications.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=sync_engine)
+        db = sessionmaker(bind=sync_engine)()
+        _notify(db, [5, 5, 6])
+        db.close()
+        sync_engine.dispose()
+        # NullPool: the TestClient's event loop must not inherit connections from another loop
+        async_sessions = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+
+        async def override_get_async_db():
+            async with async_sessions() as session:
+                yield session
+
+        app.dependency_overrides[get_async_database] = override_get_async_db
+        headers = {"Authorization": "Bearer " + create_token(
+            TokenData(useremail="s5@test.com", userrole="Student", userid=5))}
+        assert client.get("/notifications/unread-count", headers=headers).json() == {"Unreadcount": 2}
+        assert client.get("/notifications/unread-count").status_code == 401
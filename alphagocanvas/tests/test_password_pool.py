@@ -0,0 +1,103 @@
+"""
+Tests for password hashing off the event loop.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from alphagocanvas.api.endpoints import authentication
+from alphagocanvas.api.utils import password_pool
+from alphagocanvas.api.utils.passwords import hash_password
+from alphagocanvas.database.connection import get_database
+from alphagocanvas.database.models import UserTable
+from alphagocanvas.tests.conftest import TestingSessionLocal, app, override_get_db
+
+
+@pytest.fixture
+def pool():
+    """A fresh pool (threads unless a test swaps in processes), shut down afterwards"""
+    password_pool.shutdown()
+    yield password_pool
+    password_pool.shutdown()
+
+
+class TestPasswordPool:
+    """Hashing runs in the pool and the pool pushes back when full"""
+
+    def test_process_pool_round_trip(self, pool, monkeypatch):
+        """Test hashes made and checked in worker processes"""
+        monkeypatch.setattr(pool, "PASSWORD_HASH_WORKERS", 1)
+        pool.start()
+        assert isinstance(pool._executor, password_pool.ProcessPoolExecutor)
+
+        async def scenario():
+            stored = await pool.hash_password_async("correct horse")
+            return stored, await pool.verify_password_async("correct horse", stored), \
+                await pool.verify_password_async("wrong", stored)
+
+        stored, good, bad = asyncio.run(scenario())
+        assert stored.startswith("pbkdf2_sha256$") and good is True and bad is False
+
+    def test_legacy_and_missing_passwords(self, pool):
+        """Test plain-text and empty stored passwords are checked without the pool"""
+        async def scenario():
+            return [await pool.verify_password_async("secret", "secret"),
+                    await pool.verify_password_async("secret", None),
+                    await pool.verify_password_async("secret", hash_password("secret", iterations=1000))]
+
+        assert asyncio.run(scenario()) == [True, False, True]
+
+    def test_back_pressure(self, pool, monkeypatch):
+        """Test jobs past the limit get a 503 with Retry-After while earlier ones finish"""
+        monkeypatch.setattr(pool, "PASSWORD_HASH_MAX_PENDING", 2)
+        release = threading.Event()
+        rejected = pool.PASSWORD_HASH_REJECTED.value(operation="verify")
+
+        async def scenario():
+            running = [asyncio.ensure_future(pool._run("verify", release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(HTTPException) as error:
+                await pool._run("verify", release.wait, 5)
+            release.set()
+            return error.value, await asyncio.gather(*running)
+
+        error, results = asyncio.run(scenario())
+        assert error.status_code == 503 and error.headers["Retry-After"] == "1"
+        assert results == [True, True]
+        assert pool.PASSWORD_HASH_REJECTED.value(operation="verify") == rejected + 1
+        assert pool._pending == 0
+
+
+class TestRejectedRequestsSkipThePool:
+    """Requests that will be refused never take a hash-pool slot"""
+
+    @pytest.fixture
+    def hashed(self, client, monkeypatch):
+        calls = []
+
+        async def record(password):
+            calls.append(password)
+            return hash_password(password, iterations=1000)
+
+        monkeypatch.setattr(authentication, "hash_password_async", record)
+        app.dependency_overrides[get_database] = override_get_db
+        return calls
+
+    def test_invalid_reset_token(self, client, hashed):
+        """Test a bogus reset token is refused without hashing the new password"""
+        response = client.post("/reset-password", json={"token": "bogus", "new_password": "newpassword123"})
+        assert response.status_code == 400 and hashed == []
+
+    def test_duplicate_signup(self, client, hashed):
+        """Test a signup for a taken email is refused without hashing, and a new one hashes once"""
+        db = TestingSessionLocal()
+        db.add(UserTable(Userid=1, Useremail="taken@test.com", Userpassword="x", Userrole="Student", Isactive=True))
+        db.commit()
+        db.close()
+        signup = {"Userfirstname": "A", "Userlastname": "B", "Userpassword": "password123", "Userrole": "Student"}
+        assert client.post("/signup", json={**signup, "Useremail": "Taken@test.com"}).status_code == 400
+        assert hashed == []
+        assert client.post("/signup", json={**signup, "Useremail": "new@test.com"}).status_code == 200
+        assert hashed == ["password123"]
@@ -0,0 +1,186 @@
+"""
+Tests for real-time push: the hub, the brokers and the WebSocket/SSE endpoints.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from alphagocanvas.api.endpoints import push as push_endpoints
+from alphagocanvas.api.models import TokenData
+from alphagocanvas.api.services import push
+from alphagocanvas.api.services.admin_service import delete_user
+from alphagocanvas.api.services.push import LocalBroker, PostgresBroker, PushEvent, PushHub
+from alphagocanvas.api.utils.auth import create_token
+from alphagocanvas.database.connection import get_database
+from alphagocanvas.database.models import ConversationTable, StudentEnrollmentTable, UserTable
+from alphagocanvas.tests.conftest import TestingSessionLocal, app, override_get_db
+
+
+def _token(user_id, role="Student"):
+    return create_token(TokenData(useremail=f"u{user_id}@test.com", userrole=role, userid=user_id))
+
+
+def _add_user(db, user_id, role="Student", active=True):
+    db.add(UserTable(Userid=user_id, Useremail=f"u{user_id}@test.com", Userrole=role, Isactive=active))
+
+
+class TestPushHub:
+    """Topic fan-out within one process"""
+
+    def test_fan_out_shares_one_frame(self):
+        """Test an event reaches every subscriber of its topics once, encoded once"""
+        async def scenario():
+            hub = PushHub(LocalBroker(), max_queue=10)
+            await hub.start()
+            one, two, course = hub.subscribe(["user:1"]), hub.subscribe(["user:2"]), hub.subscribe(["course:1:F", "user:1"])
+            hub.publish([PushEvent(("user:1", "course:1:F"), "grade", {"Submissionid": 5})])
+            assert hub.connections == 3
+            frames = [one.queue.get_nowait(), course.queue.get_nowait()]
+            assert frames[0] is frames[1] and frames[0].json == '{"type":"grade","data":{"Submissionid":5}}'
+            assert two.queue.empty() and course.queue.empty()
+            hub.unsubscribe(course)
+            assert hub.connections == 2 and "course:1:F" not in hub._topics
+            await hub.stop()
+
+        asyncio.run(scenario())
+
+    def test_limits(self):
+        """Test a full queue flags the subscription for resync and max_connections refuses new ones"""
+        async def scenario():
+            hub = PushHub(LocalBroker(), max_queue=2, max_connections=1)
+            await hub.start()
+            subscription = hub.subscribe(["user:1"])
+            assert hub.subscribe(["user:2"]) is None
+            hub.publish([PushEvent(("user:1",), "message", {"n": n}) for n in range(3)])
+            assert subscription.overflowed and subscription.queue.qsize() == 2
+            await hub.stop()
+
+        asyncio.run(scenario())
+
+    def test_published_only_on_commit(self, test_db, monkeypatch):
+        """Test events added in a transaction go out when it commits and are dropped when it rolls back"""
+        async def scenario():
+            hub = PushHub(LocalBroker())
+            monkeypatch.setattr(push, "hub", hub)
+            await hub.start()
+            subscription = hub.subscribe(["user:1"])
+            db = TestingSessionLocal()
+            try:
+                db.add(ConversationTable(Conversationsubject="rolled back"))
+                db.flush()
+                push.publish_after_commit(db, ["user:1"], "message", {"n": 1})
+                db.rollback()
+                push.publish_after_commit(db, ["user:1"], "message", {"n": 2})
+                db.add(ConversationTable(Conversationsubject="s"))
+                db.commit()
+            finally:
+                db.close()
+            assert subscription.queue.qsize() == 1 and subscription.queue.get_nowait().json.endswith('{"n":2}}')
+            await hub.stop()
+
+        asyncio.run(scenario())
+
+    def test_notify_payloads_split_by_topic(self):
+        """Test an event for thousands of users is split into NOTIFY-sized parts covering every topic"""
+        broker = PostgresBroker("postgresql://unused")
+        topics = tuple(f"user:{n}" for n in range(3000))
+        parts = broker._encode(PushEvent(topics, "message", {"Preview": "x" * 400}))
+        assert len(parts) > 1 and all(len(raw) <= push.NOTIFY_PAYLOAD_LIMIT for raw in parts)
+        covered = [topic for raw in parts for topic in PushEvent.from_dict(json.loads(raw)).topics]
+        assert sorted(covered) == sorted(topics)
+
+
+class TestPushEndpoints:
+    """Connections receive the events addressed to their user and courses"""
+
+    def test_websocket_delivers_new_message(self, client):
+        """Test a recipient's WebSocket gets the message pushed when a conversation is started"""
+        app.dependency_overrides[get_database] = override_get_db
+        db = TestingSessionLocal()
+        _add_user(db, 2)
+        db.add(StudentEnrollmentTable(Enrollmentid=1, Studentid=2, Courseid=7, EnrollmentSemester="Fall24"))
+        db.commit()
+        db.close()
+
+        with client.websocket_connect(f"/push/ws?token={_token(2)}") as websocket:
+            hello = websocket.receive_json()
+            assert hello["type"] == "hello" and hello["data"]["Topics"] == ["user:2", "course:7:Fall24"]
+            response = client.post("/messages/conversations", headers={"Authorization": f"Bearer {_token(1, 'Faculty')}"}, json={
+                "Conversationsubject": "Office hours", "Recipientids": [2], "Recipientroles": ["Student"],
+                "Initialmessage": "Moved to 3pm"
+            })
+            assert response.status_code == 200
+            pushed = websocket.receive_json()
+            assert pushed["type"] == "message"
+            assert pushed["data"]["Preview"] == "Moved to 3pm" and pushed["data"]["Senderid"] == 1
+        assert push.hub.connections == 0
+
+    def test_websocket_rejects_bad_token(self, client):
+        """Test an invalid token closes the socket with a policy violation"""
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect("/push/ws?token=nonsense") as websocket:
+                websocket.receive_json()
+        assert closed.value.code == 1008
+
+    def test_event_stream(self, monkeypatch):
+        """Test the SSE stream sends hello, events and heartbeats, and unsubscribes when closed"""
+        async def scenario():
+            hub = PushHub(LocalBroker())
+            monkeypatch.setattr(push_endpoints, "hub", hub)
+            await hub.start()
+            stream = push_endpoints.event_stream(["user:3"], heartbeat=0.01)
+            assert (await stream.__anext__()).startswith("retry: 3000\nevent: hello\n")
+            hub.publish([PushEvent(("user:3",), "grade", {"Submissionid": 9})])
+            assert await stream.__anext__() == 'event: grade\ndata: {"type":"grade","data":{"Submissionid":9}}\n\n'
+            assert await stream.__anext__() == ": ping\n\n"
+            await stream.aclose()
+            assert hub.connections == 0
+            await hub.stop()
+
+        asyncio.run(scenario())
+
+    def test_websocket_rejects_inactive_user(self, client):
+        """Test a valid token for a deactivated user is refused"""
+        app.dependency_overrides[get_database] = override_get_db
+        db = TestingSessionLocal()
+        _add_user(db, 4, active=False)
+        db.commit()
+        db.close()
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(f"/push/ws?token={_token(4)}") as websocket:
+                websocket.receive_json()
+        assert closed.value.code == 1008
+
+    def test_deactivation_closes_websocket(self, client):
+        """Test deactivating a user ends their open connection"""
+        app.dependency_overrides[get_database] = override_get_db
+        db = TestingSessionLocal()
+        _add_user(db, 5)
+        db.commit()
+        with client.websocket_connect(f"/push/ws?token={_token(5)}") as websocket:
+            assert websocket.receive_json()["type"] == "hello"
+            delete_user(db, 5)
+            assert websocket.receive_json()["type"] == push.SESSION_ENDED
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_json()
+            assert closed.value.code == push_endpoints.REAUTHENTICATE_CLOSE_CODE
+        db.close()
+
+    def test_event_stream_ends_when_token_expires(self, monkeypatch):
+        """Test the SSE stream ends at the token's expiry instead of waiting for the next heartbeat"""
+        async def scenario():
+            hub = PushHub(LocalBroker())
+            monkeypatch.setattr(push_endpoints, "hub", hub)
+            await hub.start()
+            stream = push_endpoints.event_stream(["user:3"], heartbeat=60, expires_at=time.time() + 0.05)
+            await stream.__anext__()
+            assert (await asyncio.wait_for(stream.__anext__(), 1)).startswith("event: expired\n")
+            with pytest.raises(StopAsyncIteration):
+                await stream.__anext__()
+            assert hub.connections == 0
+            await hub.stop()
+
+        asyncio.run(scenario())
@@ -0,0 +1,130 @@
+"""
+Tests for quiz loading and the compiled student payload cache.
+"""
+import json
+
+import pytest
+
+from alphagocanvas.api.models.quiz import CreateQuizWithQuestions, QuizAttemptSubmit
+from alphagocanvas.api.services.quiz_service import (
+    create_quiz_with_questions,
+    get_quiz_with_questions,
+    get_student_quiz,
+    submit_quiz_attempt,
+)
+from alphagocanvas.api.utils.quiz_cache import invalidate_quiz, quiz_answer_key_cache, quiz_payload_cache
+from alphagocanvas.database.models import CourseTable, QuizAnswerTable, QuizQuestionOptionTable
+from alphagocanvas.tests.helpers import record_statements
+
+
+@pytest.fixture
+def db(db):
+    """Session with one course"""
+    quiz_payload_cache.clear()
+    quiz_answer_key_cache.clear()
+    db.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    db.commit()
+    yield db
+    quiz_payload_cache.clear()
+    quiz_answer_key_cache.clear()
+
+
+@pytest.fixture
+def quiz_id(db):
+    """A three-question quiz stored out of order"""
+    quiz = create_quiz_with_questions(CreateQuizWithQuestions(
+        Quizname="Week 1",
+        Quizdescription="Basics",
+        Courseid=1,
+        questions=[
+            {"Questiontext": "Essay", "Questiontype": "essay", "Questionorder": 4},
+            {"Questiontext": "Capital of France", "Questiontype": "short_answer", "Questionorder": 3,
+             "Questionpoints": 2, "Correctanswer": " Paris "},
+            {"Questiontext": "2+2?", "Questiontype": "multiple_choice", "Questionorder": 1, "options": [
+                {"Optiontext": "5", "Iscorrect": False, "Optionorder": 2},
+                {"Optiontext": "4", "Iscorrect": True, "Optionorder": 1},
+            ]},
+            {"Questiontext": "Sky is blue", "Questiontype": "true_false", "Questionorder": 2, "options": [
+                {"Optiontext": "True", "Iscorrect": True, "Optionorder": 1},
+                {"Optiontext": "False", "Iscorrect": False, "Optionorder": 2},
+            ]},
+        ],
+    ), db)
+    return quiz.quizid
+
+
+class TestQuizLoading:
+    """Quiz reads must not scale round-trips with question count"""
+
+    def test_loads_in_two_queries_with_order(self, db, quiz_id):
+        """Test questions and options are ordered and fetched with two queries"""
+        quiz, statements = record_statements(lambda: get_quiz_with_questions(quiz_id, db, include_answers=True))
+        assert len(statements) == 2
+        assert [q.Questiontext for q in quiz["questions"]] == ["2+2?", "Sky is blue", "Capital of France", "Essay"]
+        assert [o.Optiontext for o in quiz["questions"][0].options] == ["4", "5"]
+        assert quiz["questions"][0].options[0].Iscorrect is True
+        assert quiz["questions"][3].options == []
+
+    def test_student_payload_strips_answers_and_is_cached(self, db, quiz_id):
+        """Test the compiled payload hides correct answers and is reused until invalidated"""
+        compiled = get_student_quiz(quiz_id, db)
+        payload = json.loads(compiled.body)
+        assert not any(o["Iscorrect"] for q in payload["questions"] for o in q["options"])
+
+        cached, statements = record_statements(lambda: get_student_quiz(quiz_id, db))
+        assert cached is compiled and statements == []
+
+        db.query(QuizQuestionOptionTable).filter(QuizQuestionOptionTable.Optiontext == "5").update({"Optiontext": "3"})
+        db.commit()
+        invalidate_quiz(quiz_id)
+        payload = json.loads(get_student_quiz(quiz_id, db).body)
+        assert [o["Optiontext"] for o in payload["questions"][0]["options"]] == ["4", "3"]
+
+    def test_missing_quiz(self, db):
+        """Test an unknown quiz id returns None and is not cached"""
+        assert get_student_quiz(999, db) is None
+        assert len(quiz_payload_cache) == 0
+
+
+def _submit(db, quiz_id, answers):
+    return submit_quiz_attempt(7, QuizAttemptSubmit(Quizid=quiz_id, answers=answers), db)
+
+
+class TestQuizGrading:
+    """Submissions are graded in memory against the cached answer key"""
+
+    def test_grades_each_question_type(self, db, quiz_id):
+        """Test option, text and essay answers are scored and stored"""
+        quiz = get_quiz_with_questions(quiz_id, db, include_answers=True)
+        mc, tf, text, essay = (q.Questionid for q in quiz["questions"])
+        right = quiz["questions"][0].options[0].Optionid
+        wrong_tf = quiz["questions"][1].options[1].Optionid
+        attempt = _submit(db, quiz_id, [
+            {"Questionid": mc, "Selectedoptionid": right},
+            {"Questionid": tf, "Selectedoptionid": wrong_tf},
+            {"Questionid": text, "Answertext": "paris"},
+            {"Questionid": essay, "Answertext": "..."},
+            {"Questionid": 9999, "Answertext": "not on this quiz"},
+        ])
+        assert (attempt.Attemptscore, attempt.Attemptmaxscore, attempt.Attemptgraded) == (3, 5, False)
+        answers = {a.Questionid: a for a in db.query(QuizAnswerTable).filter(QuizAnswerTable.Attemptid == attempt.Attemptid)}
+        assert set(answers) == {mc, tf, text, essay}
+        assert (answers[mc].Iscorrect, answers[tf].Iscorrect, answers[text].Iscorrect, answers[essay].Iscorrect) == \
+            (True, False, True, None)
+
+    def test_option_from_another_question_is_wrong(self, db, quiz_id):
+        """Test a correct option only scores on its own question; all-MC attempts are auto-graded"""
+        quiz = get_quiz_with_questions(quiz_id, db, include_answers=True)
+        mc, tf = quiz["questions"][0].Questionid, quiz["questions"][1].Questionid
+        tf_true = quiz["questions"][1].options[0].Optionid
+        attempt = _submit(db, quiz_id, [{"Questionid": mc, "Selectedoptionid": tf_true}, {"Questionid": tf}])
+        assert (attempt.Attemptscore, attempt.Attemptmaxscore, attempt.Attemptgraded) == (0, 2, True)
+
+    def test_query_count_independent_of_answers(self, db, quiz_id):
+        """Test a warm submission does not issue per-answer queries"""
+        quiz = get_quiz_with_questions(quiz_id, db, include_answers=True)
+        answers = [{"Questionid": q.Questionid, "Answertext": "x"} for q in quiz["questions"]]
+        _submit(db, quiz_id, answers)
+        _, few = record_statements(lambda: _submit(db, quiz_id, answers[:1]))
+        _, many = record_statements(lambda: _submit(db, quiz_id, answers * 10))
+        assert len(few) == len(many)
@@ -0,0 +1,233 @@
+"""
+Tests for listing, paging and navigating an assignment's submissions.
+"""
+import pytest
+from fastapi import HTTPException
+
+from alphagocanvas.api.models import TokenData
+from alphagocanvas.api.models.submission import BulkGradeItem
+from alphagocanvas.api.services import gradebook_snapshot_service as snapshots
+from alphagocanvas.api.services.email_service import email_service
+from alphagocanvas.api.services.speedgrader_service import (
+    bulk_grade_submissions, get_navigation, get_submission_window
+)
+from alphagocanvas.api.services.notification_service import get_feed, get_unread_count
+from alphagocanvas.api.services.submission_service import (
+    get_submission_page, get_submissions_by_assignment, get_submissions_by_student, grade_submission
+)
+from alphagocanvas.api.utils.auth import create_token
+from alphagocanvas.database.connection import get_database
+from alphagocanvas.database.models import (
+    AssignmentTable, CourseTable, EmailOutboxTable, FileTable, StudentEnrollmentTable, StudentTable,
+    SubmissionCommentTable, SubmissionTable, UserTable
+)
+from alphagocanvas.tests.conftest import app, override_get_db
+from alphagocanvas.tests.helpers import record_statements
+
+
+@pytest.fixture
+def db(db):
+    """Five submissions to assignment 1 (two at the same time, three with files) and one elsewhere"""
+    db.add(CourseTable(Courseid=1, Coursename="Algorithms"))
+    db.add_all([
+        AssignmentTable(Assignmentid=1, Assignmentname="Sorting", Courseid=1),
+        AssignmentTable(Assignmentid=2, Assignmentname="Graphs", Courseid=1),
+    ])
+    for student_id in range(1, 7):
+        db.add(StudentTable(Studentid=student_id, Studentfirstname="Student", Studentlastname=str(student_id)))
+        if student_id <= 3:
+            db.add(FileTable(Fileid=student_id, Filename=f"f{student_id}.pdf", Fileoriginalname=f"hw{student_id}.pdf",
+                                  Filesize=10, Fileurl=f"/uploads/f{student_id}.pdf", Uploaderid=student_id,
+                                  Uploaderrole="Student", Createdat="2025-01-01T00:00:00"))
+    minutes = {1: 5, 2: 3, 3: 3, 4: 1, 5: 0}
+    for student_id, minute in minutes.items():
+        db.add(SubmissionTable(
+            Submissionid=student_id, Assignmentid=1, Studentid=student_id, Submissioncontent=f"essay {student_id}",
+            Submissionfileid=student_id if student_id <= 3 else None, Submissiongraded=student_id % 2 == 0,
+            Submitteddate=f"2025-01-02T10:{minute:02d}:00",
+        ))
+    db.add(SubmissionTable(Submissionid=6, Assignmentid=2, Studentid=6, Submitteddate="2025-01-02T10:00:00"))
+    db.commit()
+    return db
+
+
+class TestSubmissionList:
+    """File info is joined in rather than fetched per submission"""
+
+    def test_full_list_in_two_queries(self, db):
+        """Test the assignment list carries file info and names without a query per row"""
+        result, statements = record_statements(lambda: get_submissions_by_assignment(db, 1))
+        assert len(statements) == 2
+        assert [s.Submissionid for s in result.Submissions][0] == 1
+        assert result.Totalsubmissions == 5 and result.Gradedcount == 2
+        by_id = {s.Submissionid: s for s in result.Submissions}
+        assert by_id[2].Fileinfo.Fileoriginalname == "hw2.pdf"
+        assert by_id[4].Fileinfo is None
+        assert by_id[3].Studentname == "Student 3"
+
+
+    def test_submission_without_student_row(self, db):
+        """Test a submission whose student row is missing is still listed and counted, unnamed"""
+        db.add(SubmissionTable(Submissionid=7, Assignmentid=1, Studentid=70, Submitteddate="2025-01-02T09:00:00"))
+        db.commit()
+        assert [(s.Submissionid, s.Studentname) for s in get_submissions_by_student(db, 70)] == [(7, None)]
+        assert get_submissions_by_assignment(db, 1).Totalsubmissions == 6
+        page = get_submission_page(db, 1, view="list", limit=10)
+        assert page.Totalsubmissions == 6 and page.Submissions[-1].Submissionid == 7
+
+
+class TestSubmissionPage:
+    """Keyset pages cover the list exactly once"""
+
+    def test_pages_match_full_list(self, db):
+        """Test paging two at a time returns every submission once, newest first, ties by id"""
+        cursor, seen = None, []
+        while True:
+            page = get_submission_page(db, 1, view="full", limit=2, cursor=cursor)
+            seen += [s.Submissionid for s in page.Submissions]
+            assert page.Totalsubmissions == 5 and page.Gradedcount == 2
+            cursor = page.Nextcursor
+            if cursor is None:
+                break
+        assert seen == [1, 3, 2, 4, 5]
+        assert page.Submissions[-1].Submissioncontent == "essay 5"
+
+    def test_list_view_is_lightweight(self, db):
+        """Test the list projection omits content but keeps the file name"""
+        page, statements = record_statements(lambda: get_submission_page(db, 1, view="list", limit=10))
+        assert len(statements) == 3
+        first = page.Submissions[0].model_dump()
+        assert "Submissioncontent" not in first and "Submissionfeedback" not in first
+        assert first["Fileoriginalname"] == "hw1.pdf"
+        assert page.Nextcursor is None
+
+    def test_invalid_cursor(self, db):
+        """Test a malformed cursor is a 400"""
+        with pytest.raises(HTTPException) as error:
+            get_submission_page(db, 1, cursor="not-a-cursor")
+        assert error.value.status_code == 400
+
+
+class TestSpeedGraderNavigation:
+    """Flip through submissions one window (one query) at a time"""
+
+    def test_navigation_order(self, db):
+        """Test the id list uses the same order as the submission pages"""
+        navigation = get_navigation(db, 1)
+        assert navigation.Submissionids == [1, 3, 2, 4, 5]
+        assert navigation.Totalsubmissions == 5
+
+    def test_navigation_matches_pages(self, db):
+        """Test navigation covers exactly the submissions the pages list, one without a student row included"""
+        db.add(SubmissionTable(Submissionid=7, Assignmentid=1, Studentid=70, Submitteddate="2025-01-02T09:00:00"))
+        db.commit()
+        navigation = get_navigation(db, 1)
+        page = get_submission_page(db, 1, view="list", limit=10)
+        assert navigation.Submissionids == [s.Submissionid for s in page.Submissions]
+        assert navigation.Totalsubmissions == page.Totalsubmissions == 6
+
+    def test_next_window_in_one_query(self, db):
+        """Test next returns the following submissions with their comments and files in one query"""
+        db.add_all([
+            SubmissionCommentTable(Submissionid=2, Commentcontent="second", Authorid=9, Authorrole="Faculty",
+                                   Createdat="2025-01-03T00:02:00"),
+            SubmissionCommentTable(Submissionid=2, Commentcontent="first", Authorid=9, Authorrole="Faculty",
+                                   Createdat="2025-01-03T00:01:00"),
+        ])
+        db.commit()
+        window, statements = record_statements(lambda: get_submission_window(db, 3, "next", count=2))
+        assert len(statements) == 1
+        assert [s.Submissionid for s in window.Submissions] == [2, 4]
+        assert [c.Commentcontent for c in window.Submissions[0].Comments] == ["first", "second"]
+        assert window.Submissions[0].Fileinfo.Fileoriginalname == "hw2.pdf"
+        assert window.Submissions[1].Comments == [] and window.Hasmore is True
+
+    def test_prev_and_edges(self, db):
+        """Test prev walks back nearest first, include_current starts at the anchor and the ends are empty"""
+        assert [s.Submissionid for s in get_submission_window(db, 4, "prev", count=5).Submissions] == [2, 3, 1]
+        start = get_submission_window(db, 1, "next", count=2, include_current=True)
+        assert [s.Submissionid for s in start.Submissions] == [1, 3]
+        end = get_submission_window(db, 5, "next")
+        assert end.Submissions == [] and end.Hasmore is False and end.Assignmentid == 1
+        with pytest.raises(HTTPException) as error:
+            get_submission_window(db, 999, "next")
+        assert error.value.status_code == 404
+
+
+class TestBulkGrade:
+    """Many grades in one transaction, reported row by row"""
+
+    def test_per_row_results(self, db):
+        """Test valid rows are applied and bad ones reported without failing the batch"""
+        response = bulk_grade_submissions(db, 1, [
+            BulkGradeItem(Submissionid=1, Submissionscore="90", Submissionfeedback="good"),
+            BulkGradeItem(Studentid=3, Submissionscore=" A- "),
+            BulkGradeItem(Submissionid=6, Submissionscore="80"),
+            BulkGradeItem(Studentid=2, Submissionscore="-1"),
+            BulkGradeItem(Submissionid=1, Submissionscore="70"),
+            BulkGradeItem(Submissionscore="50"),
+            BulkGradeItem(Submissionid=4, Studentid=5, Submissionscore="60"),
+        ])
+        assert response.Gradedcount == 2 and response.Errorcount == 5
+        assert [r.Success for r in response.Results] == [True, True, False, False, False, False, False]
+        assert response.Results[1].Submissionid == 3
+        assert response.Results[4].Error == "Submission is graded more than once in this request"
+
+        db.expire_all()
+        first, third = db.get(SubmissionTable, 1), db.get(SubmissionTable, 3)
+        assert (first.Submissionscore, first.Submissionfeedback, first.Submissiongraded) == ("90", "good", True)
+        assert third.Submissionscore == "A-" and third.Gradeddate is not None
+        assert db.get(SubmissionTable, 6).Submissionscore is None
+
+    def test_one_update_statement(self, db):
+        """Test the grades are written with a single executemany UPDATE"""
+        grades = [BulkGradeItem(Submissionid=i, Submissionscore=str(80 + i)) for i in range(1, 6)]
+        _, statements = record_statements(lambda: bulk_grade_submissions(db, 1, grades))
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE SUBMISSIONS")]) == 1
+
+    def test_in_app_notifications(self, db):
+        """Test graded students get one grade notification each, counted unread, only with notify"""
+        bulk_grade_submissions(db, 1, [BulkGradeItem(Submissionid=i, Submissionscore="88") for i in (1, 2)])
+        bulk_grade_submissions(db, 1, [BulkGradeItem(Submissionid=3, Submissionscore="70")], notify=False)
+        feed = get_feed(db, 1)
+        assert [(n.Notificationtype, n.Message, n.Linkurl) for n in feed.Notifications] == [
+            ("grade", "Sorting was graded: 88", "/student/assignment/1")
+        ]
+        assert [get_unread_count(db, student_id) for student_id in (1, 2, 3)] == [1, 1, 0]
+
+        grade_submission(db, 3, "72")
+        assert get_feed(db, 3).Notifications[0].Message == "Sorting was graded: 72"
+        assert get_unread_count(db, 3) == 1
+
+    def test_snapshot_patched(self, db):
+        """Test an existing gradebook snapshot is patched to match the new grades"""
+        db.add_all([StudentEnrollmentTable(Enrollmentid=i, Studentid=i, Courseid=1, EnrollmentSemester="Fall24")
+                    for i in range(1, 6)])
+        db.commit()
+        snapshots.rebuild_snapshot(db, 1)
+        bulk_grade_submissions(db, 1, [BulkGradeItem(Studentid=i, Submissionscore="75") for i in range(1, 6)])
+        assert snapshots.check_snapshot(db, 1) == []
+
+    def test_endpoint_queues_emails_with_grades(self, db, client, monkeypatch):
+        """Test the endpoint queues emails for opted-in students only, in the grading transaction"""
+        db.add_all([
+            UserTable(Userid=1, Useremail="s1@test.com", Userrole="Student"),
+            UserTable(Userid=2, Useremail="s2@test.com", Userrole="Student"),
+            UserTable(Userid=99, Useremail="f@test.com", Userrole="Faculty", Isactive=True),
+        ])
+        db.get(StudentTable, 1).Studentnotification = True
+        db.get(StudentTable, 2).Studentnotification = False
+        db.commit()
+        monkeypatch.setattr(email_service, "username", "mailer")
+        monkeypatch.setattr(email_service, "password", "secret")
+        app.dependency_overrides[get_database] = override_get_db
+        token = create_token(TokenData(useremail="f@test.com", userrole="Faculty", userid=99))
+
+        response = client.put("/speedgrader/assignment/1/grades", headers={"Authorization": f"Bearer {token}"}, json={
+            "Grades": [{"Submissionid": i, "Submissionscore": "88"} for i in (1, 2, 3)]
+        })
+        assert response.status_code == 200
+        assert response.json()["Gradedcount"] == 3 and response.json()["Notificationsqueued"] == 1
+        queued = db.query(EmailOutboxTable).all()
+        assert [(e.Toemail, e.Status) for e in queued] == [("s1@test.com", "pending")]
+        assert "Grade: 88" in queued[0].Htmlbody
@@ -0,0 +1,63 @@
+"""
+Tests for the TTL + LRU cache behind the principal, quiz and file metadata caches.
+"""
+from alphagocanvas.api.utils import ttl_cache as ttl_cache_module
+from alphagocanvas.api.utils.principal_cache import CachedPrincipal, invalidate_user, principal_cache
+from alphagocanvas.api.utils.ttl_cache import CACHE_HITS, CACHE_INVALIDATIONS, TTLCache
+
+
+def _principal(userid: int, role: str = "Student") -> CachedPrincipal:
+    return CachedPrincipal(Userid=userid, Useremail=f"user{userid}@test.com", Userrole=role,
+                           Createdat=None, Isactive=True)
+
+
+class TestTTLCache:
+    """Tests for TTL, LRU eviction and invalidation"""
+
+    def test_hit_after_put(self):
+        """Test a cached value is returned for the same key only"""
+        cache = TTLCache("test", ttl_seconds=60, max_entries=10)
+        hits = CACHE_HITS.value(cache="test")
+        cache.put((1, 1000), _principal(1))
+        assert cache.get((1, 1000)).Userrole == "Student"
+        assert cache.get((1, 2000)) is None
+        assert CACHE_HITS.value(cache="test") == hits + 1
+
+    def test_expired_entry_is_a_miss(self, monkeypatch):
+        """Test entries are not served after the TTL"""
+        cache = TTLCache("test", ttl_seconds=30, max_entries=10)
+        monkeypatch.setattr(ttl_cache_module.time, "monotonic", lambda: 100.0)
+        cache.put(1, "value")
+        monkeypatch.setattr(ttl_cache_module.time, "monotonic", lambda: 131.0)
+        assert cache.get(1) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = TTLCache("test", ttl_seconds=60, max_entries=2)
+        cache.put(1, "one")
+        cache.put(2, "two")
+        cache.get(1)
+        cache.put(3, "three")
+        assert cache.get(2) is None
+        assert cache.get(1) == "one"
+
+    def test_disabled(self):
+        """Test a zero TTL stores nothing"""
+        cache = TTLCache("test", ttl_seconds=0, max_entries=10)
+        cache.put(1, "one")
+        assert cache.get(1) is None and len(cache) == 0
+
+    def test_invalidate_user_drops_all_tokens(self):
+        """Test invalidation removes every token entry for that user only"""
+        principal_cache.clear()
+        invalidations = CACHE_INVALIDATIONS.value(cache="auth_principal")
+        principal_cache.put((1, 1000), _principal(1))
+        principal_cache.put((1, 2000), _principal(1))
+        principal_cache.put((2, 1000), _principal(2))
+        invalidate_user(1)
+        assert principal_cache.get((1, 1000)) is None
+        assert principal_cache.get((1, 2000)) is None
+        assert principal_cache.get((2, 1000)) is not None
+        assert CACHE_INVALIDATIONS.value(cache="auth_principal") == invalidations + 2
+        principal_cache.clear()
@@ -16,19 +16,27 @@ from alphagocanvas.api.endpoints.modules import router as modules_router
 from alphagocanvas.api.endpoints.discussions import router as discussions_router
 from alphagocanvas.api.endpoints.calendar import router as calendar_router
 from alphagocanvas.api.endpoints.messages import router as messages_router
+from alphagocanvas.api.endpoints.notifications import router as notifications_router
 from alphagocanvas.api.endpoints.speedgrader import router as speedgrader_router
 from alphagocanvas.api.endpoints.quiz import router as quiz_router
 from alphagocanvas.api.endpoints.gradebook import router as gradebook_router
 from alphagocanvas.api.endpoints.pages import router as pages_router
+from alphagocanvas.api.endpoints.metrics import router as metrics_router
+from alphagocanvas.api.endpoints.push import router as push_router
+from alphagocanvas.api.services import email_outbox, push
+from alphagocanvas.api.utils import password_pool
 from alphagocanvas.config import (
     ALLOWED_HOSTS,
+    EMAIL_OUTBOX_WORKER,
     ENABLE_HTTPS_REDIRECT,
     FRONTEND_URL,
     IS_PRODUCTION,
     IS_TESTING,
+    METRICS_ENABLED,
     SECURE_HEADERS,
+    STORAGE_BACKEND,
 )
-from alphagocanvas.database.connection import ENGINE
+from alphagocanvas.database.connection import ASYNC_ENGINE, ENGINE, SessionLocal
 from alphagocanvas.database.models import Base
 
 # Load environment variables
@@ -54,19 +62,26 @@ app.include_router(modules_router)
 app.include_router(discussions_router)
 app.include_router(calendar_router)
 app.include_router(messages_router)
+app.include_router(notifications_router)
 app.include_router(speedgrader_router)
 app.include_router(quiz_router)
 app.include_router(gradebook_router)
 app.include_router(pages_router)
+app.include_router(push_router)
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+# Files on the local storage backend are also served statically; with an object store,
+# Fileurl points at the bucket instead
+if STORAGE_BACKEND == "local":
+    # Create uploads directory if it doesn't exist
+    UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
+    if not os.path.exists(UPLOAD_DIR):
+        os.makedirs(UPLOAD_DIR)
 
-# Mount static files for serving uploads
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+    # Mount static files for serving uploads
+    app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Get allowed origins from environment variable or fallback to configured frontend URL
 cors_origins_str = os.getenv("CORS_ORIGINS", FRONTEND_URL)
@@ -120,6 +135,42 @@ if AUTO_INIT_DB:
             logger.exception("AUTO_INIT_DB failed: could not create tables.")
 
 
+if not IS_TESTING:
+    @app.on_event("startup")
+    def _start_password_pool() -> None:
+        password_pool.start()
+
+
+@app.on_event("shutdown")
+def _stop_password_pool() -> None:
+    password_pool.shutdown()
+
+
+if EMAIL_OUTBOX_WORKER and not IS_TESTING:
+    @app.on_event("startup")
+    def _start_email_outbox_worker() -> None:
+        email_outbox.start_worker(SessionLocal)
+
+    @app.on_event("shutdown")
+    def _stop_email_outbox_worker() -> None:
+        email_outbox.stop_worker()
+
+
+@app.on_event("startup")
+async def _start_push_hub() -> None:
+    await push.hub.start()
+
+
+@app.on_event("shutdown")
+async def _stop_push_hub() -> None:
+    await push.hub.stop()
+
+
+@app.on_event("shutdown")
+async def _dispose_async_engine() -> None:
+    await ASYNC_ENGINE.dispose()
+
+
 @app.get("/")
 async def root():
     return {"message": "Go Canvas API is running", "status": "ok"}
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Fill the denormalized inbox columns for conversations created before they existed.
+
+Run once after scripts/init_database.py has added the columns; re-running only touches
+rows that are still empty.
+
+Usage:
+    PYTHONPATH=. python scripts/backfill_inbox.py
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from alphagocanvas.api.services.message_service import backfill_inbox  # noqa: E402
+from alphagocanvas.database.connection import SessionLocal  # noqa: E402
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    db = SessionLocal()
+    try:
+        conversations, participants = backfill_inbox(db)
+    finally:
+        db.close()
+    print(f"Backfilled {conversations} conversations and {participants} participants")
+
+
+if __name__ == "__main__":
+    main()
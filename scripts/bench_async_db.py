@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare concurrent throughput of the sync and async database paths.
+
+Each simulated request runs one of the hot read services (gradebook, inbox, modules,
+calendar) from inside a coroutine, exactly as the endpoints do. The sync path uses
+SessionLocal and blocks the event loop for the duration of the query; the async path
+uses AsyncSessionLocal and yields while waiting on PostgreSQL.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/bench_async_db.py --target gradebook --id 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from alphagocanvas.api.services.calendar_service import get_events_for_user, get_events_for_user_async  # noqa: E402
+from alphagocanvas.api.services.gradebook_service import get_gradebook, get_gradebook_async  # noqa: E402
+from alphagocanvas.api.services.message_service import get_inbox, get_inbox_async  # noqa: E402
+from alphagocanvas.api.services.module_service import get_modules_by_course, get_modules_by_course_async  # noqa: E402
+from alphagocanvas.database.connection import ASYNC_ENGINE, ENGINE, AsyncSessionLocal, SessionLocal  # noqa: E402
+
+TARGETS = {
+    "gradebook": (get_gradebook, get_gradebook_async),
+    "inbox": (get_inbox, get_inbox_async),
+    "modules": (get_modules_by_course, get_modules_by_course_async),
+    "calendar": (
+        lambda db, uid: get_events_for_user(db, uid, "0000", "9999"),
+        lambda db, uid: get_events_for_user_async(db, uid, "0000", "9999"),
+    ),
+}
+
+
+async def _sync_request(func, target_id: int) -> None:
+    db = SessionLocal()
+    try:
+        func(db, target_id)
+    finally:
+        db.close()
+
+
+async def _async_request(func, target_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await func(db, target_id)
+
+
+async def _run(request, func, target_id: int, total: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await request(func, target_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), default="gradebook")
+    parser.add_argument("--id", type=int, required=True, help="course id (gradebook/modules) or user id (inbox/calendar)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    sync_func, async_func = TARGETS[args.target]
+    # warm both pools so connection setup is not measured
+    await _run(_sync_request, sync_func, args.id, 10, 5)
+    await _run(_async_request, async_func, args.id, 10, 5)
+
+    for label, request, func in (("sync", _sync_request, sync_func), ("async", _async_request, async_func)):
+        result = await _run(request, func, args.id, args.requests, args.concurrency)
+        print(f"{label:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms")
+
+    await ASYNC_ENGINE.dispose()
+    ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
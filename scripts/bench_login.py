@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark a term-start login storm against one API worker: PBKDF2 inline vs the hash pool.
+
+Creates users in a temporary SQLite file and drives POST /token through the ASGI app in a
+single event loop, the way one uvicorn worker serves it, with --concurrency logins in
+flight at once. "inline" reproduces the previous endpoint, which called verify_password on
+the event loop; "pool" is the current one, which awaits it in the password hash pool.
+A heartbeat task ticks every 10 ms alongside, and its lateness shows how long the event
+loop was blocked, i.e. what every other request on the worker waited.
+
+Reports logins per second, login latency and heartbeat lag for each mode.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_login.py --users 200 --concurrency 32 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from alphagocanvas.api.endpoints import authentication
+from alphagocanvas.api.utils import password_pool
+from alphagocanvas.api.utils.passwords import hash_password, verify_password
+from alphagocanvas.database.connection import get_database
+from alphagocanvas.database.models import Base, UserTable
+from main import app
+
+
+async def verify_inline(plain_password, stored_password):
+    """What the login endpoint did before the pool"""
+    return verify_password(plain_password, stored_password)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def storm(n_users: int, concurrency: int):
+    latencies, lags = [], []
+    statuses = {}
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(max(time.perf_counter() - expected, 0))
+
+    async def login(client, user_id, gate):
+        async with gate:
+            started = time.perf_counter()
+            response = await client.post("/token", data={"username": f"user{user_id}@bench.edu", "password": "hunter22"})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ticker = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(client, user_id, gate) for user_id in range(1, n_users + 1)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker
+    return elapsed, latencies, lags, statuses
+
+
+def report(label: str, n_users: int, result) -> None:
+    elapsed, latencies, lags, statuses = result
+    ok = statuses.get(200, 0)
+    print(f"{label:<8}{ok / elapsed:>10.1f}{statistics.median(latencies) * 1000:>12.0f}"
+          f"{percentile(latencies, 0.99) * 1000:>12.0f}{percentile(lags, 0.99) * 1000:>14.1f}"
+          f"{max(lags, default=0) * 1000:>12.1f}   {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="hash pool processes (0 = threads)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False},
+                               pool_size=args.concurrency + 5)
+        Base.metadata.create_all(bind=engine)
+        sessions = sessionmaker(bind=engine, autoflush=False)
+        stored = hash_password("hunter22")  # one real 310k-iteration hash, shared to keep setup quick
+        with sessions() as db:
+            db.add_all([
+                UserTable(Userid=user_id, Useremail=f"user{user_id}@bench.edu", Userpassword=stored,
+                          Userrole="Student", Isactive=True)
+                for user_id in range(1, args.users + 1)
+            ])
+            db.commit()
+
+        def override_get_database():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_database] = override_get_database
+        password_pool.PASSWORD_HASH_WORKERS = args.workers
+        password_pool.PASSWORD_HASH_MAX_PENDING = max(password_pool.PASSWORD_HASH_MAX_PENDING, args.concurrency)
+        password_pool.start()
+
+        print(f"{args.users} logins, {args.concurrency} in flight, {args.workers} hash workers, "
+              f"{os.cpu_count()} CPUs")
+        print(f"{'mode':<8}{'logins/s':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'loop lag p99':>14}{'max lag':>12}")
+        pooled_verify = authentication.verify_password_async
+        authentication.verify_password_async = verify_inline
+        try:
+            report("inline", args.users, asyncio.run(storm(args.users, args.concurrency)))
+        finally:
+            authentication.verify_password_async = pooled_verify
+        report("pool", args.users, asyncio.run(storm(args.users, args.concurrency)))
+
+        password_pool.shutdown()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
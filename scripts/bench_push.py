@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark idle push connections per API worker and the cost of one broadcast to all of them.
+
+Starts one uvicorn worker of the app in a child process, with a temporary SQLite database
+in which every benchmark user is enrolled in the same course offering. The parent opens
+--connections server-sent-event streams (/push/events), one per user, and holds them idle.
+It then publishes --rounds course announcements and times how long each takes to reach
+every connection.
+
+Reports the worker's resident memory per idle connection and the broadcast latency to
+the first, median, 99th percentile and last connection. Client and server each need a file
+descriptor per connection (ulimit -n).
+
+Usage:
+    PYTHONPATH=. python scripts/bench_push.py --connections 10000 --rounds 5
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+COURSE_ID, SEMESTER = 1, "Bench"
+
+
+def _rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def serve(port: int, users: int, db_path: str) -> None:
+    """The API worker under test, on a SQLite copy of just the users and enrollments"""
+    import uvicorn
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from alphagocanvas.api.services import push
+    from alphagocanvas.database.connection import get_database
+    from alphagocanvas.database.models import Base, StudentEnrollmentTable, UserTable
+    from main import app
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False},
+                           pool_size=20, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(UserTable), [
+            {"Userid": user_id, "Useremail": f"user{user_id}@bench.edu", "Userrole": "Student", "Isactive": True}
+            for user_id in range(1, users + 1)
+        ])
+        connection.execute(insert(StudentEnrollmentTable), [
+            {"Studentid": user_id, "Courseid": COURSE_ID, "EnrollmentSemester": SEMESTER}
+            for user_id in range(1, users + 1)
+        ])
+    sessions = sessionmaker(bind=engine, autoflush=False)
+
+    def override_get_database():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_database] = override_get_database
+
+    @app.post("/bench/publish")
+    async def bench_publish():
+        push.publish([push.course_topic(COURSE_ID, SEMESTER)], "announcement", {"Announcementname": "bench"})
+        return {"ok": True}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+async def _request(port: int, request: bytes) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await reader.readuntil(b"\r\n\r\n")
+    writer.close()
+
+
+async def _open_stream(port: int, token: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /push/events?token={token} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await reader.readuntil(b"event: hello")
+    return reader, writer
+
+
+async def run(args) -> None:
+    from alphagocanvas.api.models import TokenData
+    from alphagocanvas.api.utils.auth import create_token
+
+    tokens = [create_token(TokenData(useremail=f"user{n}@bench.edu", userrole="Student", userid=n))
+              for n in range(1, args.connections + 1)]
+
+    started = time.perf_counter()
+    streams = []
+    for offset in range(0, len(tokens), args.connect_batch):
+        streams += await asyncio.gather(*(_open_stream(args.port, token)
+                                          for token in tokens[offset:offset + args.connect_batch]))
+    connected = time.perf_counter() - started
+    await asyncio.sleep(1)
+    return streams, connected
+
+
+async def broadcast(port: int, streams) -> list:
+    """Seconds from publishing one announcement until each connection has it"""
+    async def receive(reader):
+        await reader.readuntil(b"event: announcement")
+        return time.perf_counter()
+
+    waiting = [asyncio.ensure_future(receive(reader)) for reader, _ in streams]
+    await asyncio.sleep(0)
+    sent = time.perf_counter()
+    await _request(port, b"POST /bench/publish HTTP/1.1\r\nHost: bench\r\nContent-Length: 0\r\n\r\n")
+    return sorted(arrived - sent for arrived in await asyncio.gather(*waiting))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect-batch", type=int, default=500, help="connections opened at a time")
+    args = parser.parse_args()
+
+    # The worker only serves push: no heartbeats during the run, no background workers
+    os.environ.update({
+        "PUSH_HEARTBEAT_SECONDS": "3600",
+        "PUSH_MAX_CONNECTIONS": str(args.connections),
+        "PUSH_BROKER": "local",
+        "EMAIL_OUTBOX_WORKER": "false",
+        "PASSWORD_HASH_WORKERS": "0",
+        "METRICS_ENABLED": "false",
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve, args=(args.port, args.connections, os.path.join(tmp, "bench.db")), daemon=True
+        )
+        server.start()
+        loop = asyncio.new_event_loop()
+        try:
+            for _ in range(600):
+                try:
+                    loop.run_until_complete(_request(args.port, b"GET / HTTP/1.1\r\nHost: bench\r\n\r\n"))
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            idle_rss = _rss_kb(server.pid)
+
+            streams, connected = loop.run_until_complete(run(args))
+            held_rss = _rss_kb(server.pid)
+            print(f"{len(streams)} connections opened in {connected:.1f}s; worker RSS {idle_rss / 1024:.0f} MiB -> "
+                  f"{held_rss / 1024:.0f} MiB ({(held_rss - idle_rss) / max(len(streams), 1):.1f} KiB per connection)")
+
+            print(f"{'round':<8}{'first (ms)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'last (ms)':>12}")
+            for n in range(1, args.rounds + 1):
+                latencies = loop.run_until_complete(broadcast(args.port, streams))
+                print(f"{n:<8}{latencies[0] * 1000:>12.1f}{statistics.median(latencies) * 1000:>12.1f}"
+                      f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>12.1f}{latencies[-1] * 1000:>12.1f}")
+
+            for _, writer in streams:
+                writer.close()
+        finally:
+            loop.close()
+            # uvicorn's graceful shutdown would wait out every open stream
+            server.kill()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
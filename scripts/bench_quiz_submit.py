@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark quiz submissions at the deadline: set-based autograder vs the per-answer grader.
+
+Creates a quiz (default 50 questions: multiple choice, true/false and short answer) in a
+temporary SQLite file and has a class of students submit back to back, as they would in the
+last minute before a quiz closes. The per-answer grader is the previous submit_quiz_attempt
+loop, reproduced here for comparison: a question and an option query per answer, one INSERT
+per answer and a second pass over every question to decide whether the attempt is fully
+auto-graded. Reports submits per second and SQL statements per submit.
+
+SQLite in-process has no network round-trip, so against PostgreSQL the gap is larger.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_quiz_submit.py --questions 50 --students 300
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from alphagocanvas.api.models.quiz import CreateQuizWithQuestions, QuizAttemptSubmit
+from alphagocanvas.api.services.quiz_grader import normalize_answer
+from alphagocanvas.api.services.quiz_service import create_quiz_with_questions, submit_quiz_attempt
+from alphagocanvas.api.utils.quiz_cache import quiz_answer_key_cache
+from alphagocanvas.database.models import (
+    Base,
+    CourseTable,
+    QuizAnswerTable,
+    QuizAttemptTable,
+    QuizQuestionOptionTable,
+    QuizQuestionTable,
+)
+
+
+def make_quiz(n_questions: int, seed: int) -> CreateQuizWithQuestions:
+    rng = random.Random(seed)
+    questions = []
+    for order in range(n_questions):
+        kind = rng.choice(["multiple_choice", "true_false", "short_answer"])
+        question = {"Questiontext": f"Q{order}", "Questiontype": kind, "Questionorder": order}
+        if kind == "multiple_choice":
+            correct = rng.randrange(4)
+            question["options"] = [{"Optiontext": f"O{i}", "Iscorrect": i == correct, "Optionorder": i} for i in range(4)]
+        elif kind == "true_false":
+            question["options"] = [{"Optiontext": "True", "Iscorrect": True, "Optionorder": 0},
+                                   {"Optiontext": "False", "Iscorrect": False, "Optionorder": 1}]
+        else:
+            question["Correctanswer"] = f"answer {order}"
+        questions.append(question)
+    return CreateQuizWithQuestions(Quizname="Deadline", Quizdescription="Benchmark", Courseid=1, questions=questions)
+
+
+def make_submissions(db, quiz_id: int, n_students: int, seed: int):
+    rng = random.Random(seed)
+    questions = db.query(QuizQuestionTable).filter(QuizQuestionTable.Quizid == quiz_id).all()
+    options = {}
+    for opt in db.query(QuizQuestionOptionTable).join(QuizQuestionTable).filter(QuizQuestionTable.Quizid == quiz_id):
+        options.setdefault(opt.Questionid, []).append(opt.Optionid)
+    submissions = []
+    for student_id in range(1, n_students + 1):
+        answers = []
+        for q in questions:
+            if q.Questionid in options:
+                answers.append({"Questionid": q.Questionid, "Selectedoptionid": rng.choice(options[q.Questionid])})
+            else:
+                answers.append({"Questionid": q.Questionid, "Answertext": rng.choice([q.Correctanswer, "wrong"])})
+        submissions.append((student_id, QuizAttemptSubmit(Quizid=quiz_id, answers=answers)))
+    return submissions
+
+
+def submit_per_answer(student_id: int, attempt_data: QuizAttemptSubmit, db):
+    """The grading loop submit_quiz_attempt used before the set-based grader"""
+    new_attempt = QuizAttemptTable(
+        Quizid=attempt_data.Quizid,
+        Studentid=student_id,
+        Attemptstarted=datetime.now().isoformat(),
+        Attemptsubmitted=datetime.now().isoformat(),
+        Attemptgraded=False,
+    )
+    db.add(new_attempt)
+    db.flush()
+    total_score = 0
+    max_score = 0
+    for answer_data in attempt_data.answers:
+        question = db.query(QuizQuestionTable).filter(QuizQuestionTable.Questionid == answer_data.Questionid).first()
+        if not question:
+            continue
+        max_score += question.Questionpoints
+        is_correct = None
+        points_earned = 0
+        if question.Questiontype in ["multiple_choice", "true_false"] and answer_data.Selectedoptionid:
+            selected = db.query(QuizQuestionOptionTable).filter(
+                QuizQuestionOptionTable.Optionid == answer_data.Selectedoptionid
+            ).first()
+            is_correct = bool(selected and selected.Iscorrect)
+            points_earned = question.Questionpoints if is_correct else 0
+        elif question.Questiontype in ["short_answer", "fill_in_blank"] and question.Correctanswer:
+            given = normalize_answer(answer_data.Answertext)
+            is_correct = bool(given) and given == normalize_answer(question.Correctanswer)
+            points_earned = question.Questionpoints if is_correct else 0
+        total_score += points_earned
+        db.add(QuizAnswerTable(
+            Attemptid=new_attempt.Attemptid,
+            Questionid=answer_data.Questionid,
+            Selectedoptionid=answer_data.Selectedoptionid,
+            Answertext=answer_data.Answertext,
+            Iscorrect=is_correct,
+            Pointsearned=points_earned,
+        ))
+    new_attempt.Attemptscore = total_score
+    new_attempt.Attemptmaxscore = max_score
+    new_attempt.Attemptgraded = all(
+        db.query(QuizQuestionTable).filter(
+            QuizQuestionTable.Questionid == ans.Questionid,
+            QuizQuestionTable.Questiontype.in_(["multiple_choice", "true_false"]),
+        ).first() is not None
+        for ans in attempt_data.answers
+    )
+    db.commit()
+    return new_attempt
+
+
+def run(label: str, submit, sessions, engine, submissions) -> None:
+    statements = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = sessions()
+    started = time.perf_counter()
+    try:
+        for student_id, attempt in submissions:
+            submit(student_id, attempt, db)
+    finally:
+        elapsed = time.perf_counter() - started
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+    n = len(submissions)
+    print(f"{label:<14}{n / elapsed:>14.1f}{statements[0] / n:>18.1f}{elapsed:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        sessions = sessionmaker(bind=engine, autoflush=False)
+        with sessions() as db:
+            db.add(CourseTable(Courseid=1, Coursename="Benchmark"))
+            db.commit()
+            quiz_id = create_quiz_with_questions(make_quiz(args.questions, args.seed), db).quizid
+            submissions = make_submissions(db, quiz_id, args.students, args.seed)
+
+        print(f"{args.students} students x {args.questions} questions")
+        print(f"{'grader':<14}{'submits/s':>14}{'statements/submit':>18}{'total (s)':>12}")
+        run("per-answer", submit_per_answer, sessions, engine, submissions)
+        quiz_answer_key_cache.clear()
+        run("set-based", submit_quiz_attempt, sessions, engine, submissions)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
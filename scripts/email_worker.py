@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Deliver queued emails from the email outbox in a dedicated process.
+
+API processes run an outbox worker of their own unless EMAIL_OUTBOX_WORKER=false; use this
+to move delivery off the API hosts, or with --once to drain the outbox from a cron job.
+
+Usage:
+    PYTHONPATH=. python scripts/email_worker.py           # run until interrupted
+    PYTHONPATH=. python scripts/email_worker.py --once    # send everything due, then exit
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from alphagocanvas.api.services.email_outbox import OutboxWorker  # noqa: E402
+from alphagocanvas.database.connection import SessionLocal  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="drain due emails and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    worker = OutboxWorker(SessionLocal)
+    if args.once:
+        total = 0
+        while True:
+            processed = worker.run_once()
+            total += processed
+            if processed < worker.batch_size:
+                break
+        worker.stop()
+        print(f"Processed {total} emails.")
+        return 0
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    worker.start()
+    stopped.wait()
+    worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
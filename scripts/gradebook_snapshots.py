@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Rebuild or verify materialized gradebook snapshots.
+
+    rebuild  recompute snapshots from submissions, assignments and enrollments
+    check    compare stored snapshots with a full recompute; exits 1 on any difference
+
+Usage:
+    PYTHONPATH=. python scripts/gradebook_snapshots.py rebuild            # every course
+    PYTHONPATH=. python scripts/gradebook_snapshots.py check --course 12 --course 14
+    PYTHONPATH=. python scripts/gradebook_snapshots.py check --repair     # rebuild inconsistent ones
+"""
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from alphagocanvas.api.services.gradebook_snapshot_service import check_snapshot, rebuild_snapshot  # noqa: E402
+from alphagocanvas.database.connection import SessionLocal  # noqa: E402
+from alphagocanvas.database.models import CourseTable, GradebookSnapshotTable  # noqa: E402
+
+
+def _course_ids(db, requested, snapshots_only: bool):
+    if requested:
+        return requested
+    table = GradebookSnapshotTable if snapshots_only else CourseTable
+    return [course_id for (course_id,) in db.query(table.Courseid).order_by(table.Courseid).all()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--course", type=int, action="append", help="course id (repeatable); default all")
+    parser.add_argument("--repair", action="store_true", help="with check: rebuild snapshots that differ")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            for course_id in _course_ids(db, args.course, snapshots_only=False):
+                snapshot = rebuild_snapshot(db, course_id)
+                print(f"course {course_id}: rebuilt at {snapshot.Builtat}")
+            return 0
+
+        # Without --course only existing snapshots are checked; missing ones are built on first read
+        inconsistent = 0
+        for course_id in _course_ids(db, args.course, snapshots_only=True):
+            problems = check_snapshot(db, course_id)
+            db.rollback()
+            if not problems:
+                print(f"course {course_id}: ok")
+                continue
+            inconsistent += 1
+            for problem in problems:
+                print(problem)
+            if args.repair:
+                rebuild_snapshot(db, course_id)
+                print(f"course {course_id}: rebuilt")
+        print(f"{inconsistent} inconsistent snapshot(s)")
+        return 1 if inconsistent and not args.repair else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,63 @@
 #!/usr/bin/env python3
 from dotenv import load_dotenv
+from sqlalchemy import and_, delete, exists, inspect, select, text
 
 from alphagocanvas.database.connection import ENGINE
 from alphagocanvas.database.models import Base
 
 
+def add_missing_columns() -> None:
+    """ALTER existing tables to add nullable columns declared on the models since they were created"""
+    inspector = inspect(ENGINE)
+    preparer = ENGINE.dialect.identifier_preparer
+    with ENGINE.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=ENGINE.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.quote(column.name)} {column_type}"
+                ))
+                print(f"Added {table.name}.{column.name}")
+
+
+def remove_duplicates(index) -> None:
+    """
+    Delete rows that would violate a unique index about to be added to an existing table,
+    keeping the lowest primary key of each duplicate group. Rows with a NULL in the key never
+    conflict, so they stay.
+    """
+    table = index.table
+    (primary_key,) = table.primary_key.columns
+    keeper = table.alias("keeper")
+    duplicate = exists(select(keeper.c[primary_key.name]).where(
+        and_(*[keeper.c[column.name] == column for column in index.columns]),
+        keeper.c[primary_key.name] < primary_key,
+    ))
+    with ENGINE.begin() as connection:
+        removed = connection.execute(delete(table).where(duplicate)).rowcount
+    if removed:
+        print(f"Removed {removed} duplicate {table.name} rows before creating {index.name}")
+
+
 def main() -> None:
     load_dotenv()
     Base.metadata.create_all(bind=ENGINE)
+    # create_all skips tables that already exist, so add columns and indexes declared on them since
+    add_missing_columns()
+    inspector = inspect(ENGINE)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                remove_duplicates(index)
+            index.create(bind=ENGINE)
     print("Database initialized.")
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Maintain in-app notifications.
+
+    purge           delete notifications older than the retention period, in batches,
+                    taking unread ones off their users' badges
+    rebuild-counts  recount every user's unread notifications into notification_counters;
+                    run once after upgrading, and while notifications are quiet
+
+Usage:
+    PYTHONPATH=. python scripts/notifications.py purge                 # NOTIFICATION_RETENTION_DAYS
+    PYTHONPATH=. python scripts/notifications.py purge --days 30 --batch-size 5000
+    PYTHONPATH=. python scripts/notifications.py rebuild-counts
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from alphagocanvas.api.services.notification_service import (  # noqa: E402
+    purge_notifications, rebuild_unread_counts
+)
+from alphagocanvas.config import NOTIFICATION_INSERT_BATCH_SIZE, NOTIFICATION_RETENTION_DAYS  # noqa: E402
+from alphagocanvas.database.connection import SessionLocal  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["purge", "rebuild-counts"])
+    parser.add_argument("--days", type=int, default=NOTIFICATION_RETENTION_DAYS, help="with purge: retention in days")
+    parser.add_argument("--batch-size", type=int, default=NOTIFICATION_INSERT_BATCH_SIZE,
+                        help="with purge: notifications deleted per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "purge":
+            cutoff = datetime.now() - timedelta(days=args.days)
+            purged = purge_notifications(db, cutoff, batch_size=args.batch_size)
+            print(f"Purged {purged} notifications created before {cutoff.isoformat()}")
+        else:
+            users = rebuild_unread_counts(db)
+            print(f"Rebuilt unread counts for {users} users")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()